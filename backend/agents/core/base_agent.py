@@ -12,11 +12,14 @@ import os
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Dict, List, Optional
 
 import openai
 import redis
 
+from backend.core.capacity_index import CapacityIndex, RedisCapacityIndex
+from backend.core.task_queue import QueuedTask, RedisStreamTaskQueue, TaskQueue
+
 from .orchestrator import AgentCapability, AgentStatus, Task, TaskStatus
 
 logger = logging.getLogger(__name__)
@@ -32,6 +35,7 @@ class AgentConfig:
     openai_api_key: str = None
     performance_target: float = 0.90
     max_concurrent_tasks: int = 5
+    claim_block_seconds: float = 5.0
 
 
 @dataclass
@@ -47,7 +51,12 @@ class TaskResult:
 class BaseAgent(ABC):
     """Base class for all Sophia AI agents"""
 
-    def __init__(self, config: AgentConfig):
+    def __init__(
+        self,
+        config: AgentConfig,
+        task_queue: Optional[TaskQueue] = None,
+        capacity_index: Optional[CapacityIndex] = None,
+    ):
         self.config = config
         self.agent_id = config.agent_id
         self.agent_type = config.agent_type
@@ -66,6 +75,20 @@ class BaseAgent(ABC):
             host=config.redis_host, port=config.redis_port, decode_responses=True
         )
 
+        # Durable queue the agent pulls its work from
+        self.task_queue = task_queue or RedisStreamTaskQueue(
+            f"redis://{config.redis_host}:{config.redis_port}"
+        )
+        self._deliveries: Dict[str, QueuedTask] = {}
+        # Running _execute_task coroutines, cancelled before tasks are handed back
+        self._executions: Dict[str, asyncio.Task] = {}
+        self._slot_freed = asyncio.Event()
+
+        # Free slots this agent advertises to dispatchers
+        self.capacity_index = capacity_index or RedisCapacityIndex(
+            f"redis://{config.redis_host}:{config.redis_port}"
+        )
+
         # OpenAI client if needed
         if config.openai_api_key:
             openai.api_key = config.openai_api_key
@@ -91,8 +114,10 @@ class BaseAgent(ABC):
             # Register with orchestrator
             await self._register_with_orchestrator()
 
-            # Start task processing loop
+            # Start task processing loops: queued tasks are pulled, tasks
+            # dispatched through the capacity index are pushed
             asyncio.create_task(self._task_processing_loop())
+            asyncio.create_task(self._pushed_task_loop())
 
             # Start health reporting
             asyncio.create_task(self._health_reporting_loop())
@@ -109,9 +134,25 @@ class BaseAgent(ABC):
         self.is_running = False
         self.status = AgentStatus.INACTIVE
 
-        # Complete any remaining tasks
-        for task_id, task in self.current_tasks.items():
-            await self._complete_task(task_id, {"error": "Agent shutting down"}, False)
+        # Stop work in progress first, so a task handed back is never still
+        # running here and never publishes a second result
+        executions = list(self._executions.values())
+        for execution in executions:
+            execution.cancel()
+        await asyncio.gather(*executions, return_exceptions=True)
+
+        # Hand unfinished queued tasks back for other agents; fail the rest
+        for task_id in list(self.current_tasks):
+            delivery = self._deliveries.pop(task_id, None)
+            if delivery is not None:
+                await self.task_queue.release(delivery)
+                del self.current_tasks[task_id]
+            else:
+                await self._complete_task(
+                    task_id, {"error": "Agent shutting down"}, False
+                )
+        self._slot_freed.set()
+        await self._update_capacity(self.capacity_index.remove(self.agent_id))
 
         logger.info(f"Agent {self.agent_id} stopped")
 
@@ -145,6 +186,7 @@ class BaseAgent(ABC):
             await self.redis_client.publish(
                 "sophia:agents:registration", json.dumps(registration_data)
             )
+            await self._register_capacity(capabilities)
 
             logger.info(f"Registered agent {self.agent_id} with orchestrator")
 
@@ -153,7 +195,42 @@ class BaseAgent(ABC):
             raise
 
     async def _task_processing_loop(self):
-        """Main task processing loop"""
+        """Main task processing loop
+
+        Pulls tasks for this agent's capabilities, never more than it has free
+        slots for. When nothing new is queued, takes over tasks other agents
+        claimed but never acknowledged.
+        """
+        capabilities = [cap.name for cap in await self.get_capabilities()]
+
+        while self.is_running:
+            try:
+                free_slots = self.config.max_concurrent_tasks - len(self.current_tasks)
+                if free_slots <= 0:
+                    self._slot_freed.clear()
+                    await self._slot_freed.wait()
+                    continue
+
+                deliveries = await self.task_queue.claim(
+                    capabilities,
+                    self.agent_id,
+                    count=free_slots,
+                    block_seconds=self.config.claim_block_seconds,
+                )
+                if not deliveries:
+                    deliveries = await self.task_queue.reclaim(
+                        capabilities, self.agent_id, count=free_slots
+                    )
+
+                for delivery in deliveries:
+                    await self._handle_task_assignment(delivery.payload, delivery)
+
+            except Exception as e:
+                logger.error(f"Task processing loop error: {str(e)}")
+                await asyncio.sleep(self.config.claim_block_seconds)
+
+    async def _pushed_task_loop(self):
+        """Accept tasks pushed to this agent by a dispatcher without a queue"""
         pubsub = self.redis_client.pubsub()
         channel = f"sophia:agent:{self.agent_id}:tasks"
         await pubsub.subscribe(channel)
@@ -172,15 +249,24 @@ class BaseAgent(ABC):
                         logger.error(f"Error processing task message: {str(e)}")
 
         except Exception as e:
-            logger.error(f"Task processing loop error: {str(e)}")
+            logger.error(f"Pushed task loop error: {str(e)}")
         finally:
             await pubsub.unsubscribe(channel)
 
-    async def _handle_task_assignment(self, task_data: Dict[str, Any]):
+    async def _handle_task_assignment(
+        self, task_data: Dict[str, Any], delivery: Optional[QueuedTask] = None
+    ):
         """Handle new task assignment"""
         try:
             # Check if we can accept more tasks
             if len(self.current_tasks) >= self.config.max_concurrent_tasks:
+                if delivery is not None:
+                    await self.task_queue.release(delivery)
+                else:
+                    # Hand back the slot the dispatcher reserved for it
+                    await self._update_capacity(
+                        self.capacity_index.release(self.agent_id)
+                    )
                 logger.warning(f"Agent {self.agent_id} at capacity, rejecting task")
                 return
 
@@ -188,7 +274,7 @@ class BaseAgent(ABC):
             task = Task(
                 task_id=task_data["task_id"],
                 task_type=task_data["task_type"],
-                agent_id=task_data["agent_id"],
+                agent_id=self.agent_id,
                 task_data=task_data["task_data"],
                 status=TaskStatus(task_data["status"]),
                 created_at=datetime.fromisoformat(task_data["created_at"]),
@@ -209,13 +295,21 @@ class BaseAgent(ABC):
 
             # Add to current tasks
             self.current_tasks[task.task_id] = task
+            if delivery is not None:
+                self._deliveries[task.task_id] = delivery
+                # Pushed tasks had their slot reserved by the dispatcher
+                await self._update_capacity(self.capacity_index.acquire(self.agent_id))
 
             # Update status to busy if needed
             if len(self.current_tasks) > 0:
                 self.status = AgentStatus.BUSY
 
             # Process task asynchronously
-            asyncio.create_task(self._execute_task(task))
+            execution = asyncio.create_task(self._execute_task(task))
+            self._executions[task.task_id] = execution
+            execution.add_done_callback(
+                lambda _, task_id=task.task_id: self._executions.pop(task_id, None)
+            )
 
             logger.info(f"Agent {self.agent_id} accepted task {task.task_id}")
 
@@ -286,8 +380,15 @@ class BaseAgent(ABC):
                 "sophia:agents:results", json.dumps(result_message)
             )
 
+            # The result is out; only now is the task done with
+            delivery = self._deliveries.pop(task_id, None)
+            if delivery is not None:
+                await self.task_queue.ack(delivery)
+
             # Remove from current tasks
             del self.current_tasks[task_id]
+            self._slot_freed.set()
+            await self._update_capacity(self.capacity_index.release(self.agent_id))
 
             # Update status if no more tasks
             if len(self.current_tasks) == 0:
@@ -298,6 +399,29 @@ class BaseAgent(ABC):
         except Exception as e:
             logger.error(f"Failed to complete task {task_id}: {str(e)}")
 
+    async def _register_capacity(self, capabilities: List[AgentCapability]):
+        """Advertise this agent's free slots in the capacity index"""
+        await self._update_capacity(
+            self.capacity_index.register(
+                self.agent_id,
+                [cap.name for cap in capabilities],
+                self.config.max_concurrent_tasks,
+                self.performance_metrics["success_rate"],
+                free_slots=self.config.max_concurrent_tasks - len(self.current_tasks),
+            )
+        )
+
+    async def _update_capacity(self, update: Awaitable[Any]) -> Any:
+        """Apply a capacity index update; task processing never fails on it
+
+        Returns the update's result, or None if it failed.
+        """
+        try:
+            return await update
+        except Exception as e:
+            logger.warning(f"Agent {self.agent_id} capacity update failed: {e}")
+            return None
+
     def _update_performance_metrics(self, duration: float, success: bool):
         """Update agent performance metrics"""
         if success:
@@ -337,6 +461,24 @@ class BaseAgent(ABC):
                     "sophia:agents:health", json.dumps(health_data)
                 )
 
+                alive = await self._update_capacity(
+                    self.capacity_index.heartbeat(
+                        self.agent_id, self.performance_metrics["success_rate"]
+                    )
+                )
+                if alive is False:
+                    # Purged after missed heartbeats (e.g. a long GC pause or
+                    # network partition); come back with the current load
+                    logger.warning(
+                        f"Agent {self.agent_id} dropped out of the capacity index, "
+                        f"re-registering"
+                    )
+                    await self._register_capacity(await self.get_capabilities())
+
+                # Keep long-running tasks from being reclaimed by other agents
+                if self._deliveries:
+                    await self.task_queue.extend(list(self._deliveries.values()))
+
                 await asyncio.sleep(30)  # Report every 30 seconds
 
             except Exception as e:
@@ -20,6 +20,9 @@ import psycopg2
 import redis
 from psycopg2.extras import RealDictCursor
 
+from backend.core.capacity_index import CapacityIndex, RedisCapacityIndex
+from backend.core.task_queue import RedisStreamTaskQueue, TaskQueue
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -59,6 +62,7 @@ class AgentInfo:
     last_seen: datetime
     current_load: float
     specialization: str
+    max_concurrent_tasks: int = 5
 
 
 @dataclass
@@ -76,6 +80,16 @@ class Task:
     priority: int = 1  # 1=low, 5=high
 
 
+def serialize_task(task: Task) -> Dict[str, Any]:
+    """JSON-safe form of a task, as agents receive it"""
+    data = asdict(task)
+    data["status"] = task.status.value
+    for key in ("created_at", "started_at", "completed_at"):
+        value = data[key]
+        data[key] = value.isoformat() if value else None
+    return data
+
+
 class AgentMessageBus:
     """Redis-based message bus for agent communication"""
 
@@ -105,7 +119,7 @@ class AgentMessageBus:
             channel = f"sophia:agent:{agent_id}:tasks"
             message = {
                 "type": "task_assignment",
-                "task": asdict(task),
+                "task": serialize_task(task),
                 "timestamp": datetime.now().isoformat(),
             }
             await self.redis_client.publish(channel, json.dumps(message))
@@ -155,10 +169,14 @@ class AgentMessageBus:
 class AgentRegistry:
     """Central registry for agent discovery and management"""
 
-    def __init__(self, redis_client: redis.Redis):
+    def __init__(
+        self, redis_client: redis.Redis, capacity_index: Optional[CapacityIndex] = None
+    ):
         self.redis_client = redis_client
         self.agents: Dict[str, AgentInfo] = {}
         self.capabilities_index: Dict[str, List[str]] = {}
+        # Free slots shared with agents and other orchestrator replicas
+        self.capacity_index = capacity_index
 
     async def register_agent(self, agent_info: AgentInfo):
         """Register new agent with capabilities"""
@@ -174,11 +192,22 @@ class AgentRegistry:
 
             # Store in Redis for persistence
             agent_data = asdict(agent_info)
+            agent_data["status"] = agent_info.status.value
             agent_data["last_seen"] = agent_info.last_seen.isoformat()
             await self.redis_client.hset(
                 "sophia:agents:registry", agent_info.agent_id, json.dumps(agent_data)
             )
 
+            if self.capacity_index is not None:
+                slots = agent_info.max_concurrent_tasks
+                await self.capacity_index.register(
+                    agent_info.agent_id,
+                    [capability.name for capability in agent_info.capabilities],
+                    slots,
+                    agent_info.performance_score,
+                    free_slots=round(slots * (1 - agent_info.current_load)),
+                )
+
             logger.info(
                 f"Registered agent {agent_info.agent_id} with {len(agent_info.capabilities)} capabilities"
             )
@@ -189,7 +218,22 @@ class AgentRegistry:
     async def find_agent_for_task(
         self, task_type: str, context: Dict[str, Any] = None
     ) -> Optional[str]:
-        """Find best agent for specific task"""
+        """Find best agent for specific task
+
+        With a capacity index, one of its free slots is reserved for the task;
+        the agent gives it back when the task completes.
+        """
+        if self.capacity_index is not None:
+            try:
+                agent_id = await self.capacity_index.select(task_type)
+                if agent_id:
+                    logger.info(f"Selected agent {agent_id} for task {task_type}")
+                else:
+                    logger.warning(f"No available agents for task type: {task_type}")
+                return agent_id
+            except Exception as e:
+                logger.warning(f"Capacity index unavailable, using local state: {e}")
+
         try:
             # Get agents with required capability
             candidates = self.capabilities_index.get(task_type, [])
@@ -237,11 +281,17 @@ class AgentRegistry:
                 if load is not None:
                     self.agents[agent_id].current_load = load
 
-                # Update in Redis
-                agent_data = asdict(self.agents[agent_id])
-                agent_data["last_seen"] = self.agents[agent_id].last_seen.isoformat()
+                # Only the fields that change; the registration stays as is
                 await self.redis_client.hset(
-                    "sophia:agents:registry", agent_id, json.dumps(agent_data)
+                    "sophia:agents:status",
+                    agent_id,
+                    json.dumps(
+                        {
+                            "status": status.value,
+                            "current_load": self.agents[agent_id].current_load,
+                            "last_seen": self.agents[agent_id].last_seen.isoformat(),
+                        }
+                    ),
                 )
 
                 logger.info(f"Updated agent {agent_id} status to {status.value}")
@@ -257,6 +307,12 @@ class AgentRegistry:
         """Get agents that have specific capability"""
         return self.capabilities_index.get(capability, [])
 
+    def get_selection_stats(self) -> Dict[str, Any]:
+        """Agent selection counters and latency"""
+        if self.capacity_index is None:
+            return {}
+        return self.capacity_index.get_stats()
+
 
 class ContextManager:
     """Manages shared context and memory across agents"""
@@ -412,10 +468,13 @@ class TaskRouter:
         agent_registry: AgentRegistry,
         message_bus: AgentMessageBus,
         context_manager: ContextManager,
+        task_queue: Optional[TaskQueue] = None,
     ):
         self.agent_registry = agent_registry
         self.message_bus = message_bus
         self.context_manager = context_manager
+        # With a durable queue agents pull tasks; otherwise they are pushed
+        self.task_queue = task_queue
         self.active_tasks: Dict[str, Task] = {}
 
     async def submit_task(
@@ -442,6 +501,15 @@ class TaskRouter:
                 priority=priority,
             )
 
+            if self.task_queue is not None:
+                # Queued per capability and priority until an agent pulls it
+                await self.task_queue.enqueue(
+                    task_type, serialize_task(task), priority=priority
+                )
+                self.active_tasks[task_id] = task
+                logger.info(f"Queued task {task_id} for {task_type}")
+                return task_id
+
             # Find appropriate agent
             agent_id = await self.agent_registry.find_agent_for_task(task_type, context)
             if not agent_id:
@@ -458,7 +526,12 @@ class TaskRouter:
             self.active_tasks[task_id] = task
 
             # Send task to agent
-            await self.message_bus.publish_task(agent_id, task)
+            try:
+                await self.message_bus.publish_task(agent_id, task)
+            except Exception:
+                if self.agent_registry.capacity_index is not None:
+                    await self.agent_registry.capacity_index.release(agent_id)
+                raise
 
             # Update agent status
             await self.agent_registry.update_agent_status(agent_id, AgentStatus.BUSY)
@@ -471,7 +544,11 @@ class TaskRouter:
             raise
 
     async def complete_task(
-        self, task_id: str, result: Dict[str, Any], success: bool = True
+        self,
+        task_id: str,
+        result: Dict[str, Any],
+        success: bool = True,
+        agent_id: Optional[str] = None,
     ):
         """Mark task as completed with result"""
         try:
@@ -480,6 +557,7 @@ class TaskRouter:
                 return
 
             task = self.active_tasks[task_id]
+            task.agent_id = task.agent_id or agent_id
             task.status = TaskStatus.COMPLETED if success else TaskStatus.FAILED
             task.completed_at = datetime.now()
             task.result = result
@@ -514,7 +592,12 @@ class TaskRouter:
 class SophiaOrchestrator:
     """Main orchestrator class that coordinates all agents and systems"""
 
-    def __init__(self, redis_host: str = None, postgres_connection: str = None):
+    def __init__(
+        self,
+        redis_host: str = None,
+        postgres_connection: str = None,
+        use_task_queue: bool = True,
+    ):
         redis_host = redis_host or os.getenv("REDIS_HOST", "localhost")
         postgres_connection = postgres_connection or os.getenv(
             "POSTGRES_URL", "postgresql://localhost:5432/sophia_payready"
@@ -524,10 +607,22 @@ class SophiaOrchestrator:
             host=redis_host, port=6379, decode_responses=True
         )
         self.message_bus = AgentMessageBus(redis_host)
-        self.agent_registry = AgentRegistry(self.redis_client)
+        self.capacity_index = RedisCapacityIndex(f"redis://{redis_host}:6379")
+        self.agent_registry = AgentRegistry(self.redis_client, self.capacity_index)
         self.context_manager = ContextManager(self.redis_client, postgres_connection)
+        # Agents pull queued tasks by default, claiming only as many as they
+        # have free slots. Without the queue, tasks are pushed to an agent
+        # whose free slot is reserved through the capacity index.
+        self.task_queue = (
+            RedisStreamTaskQueue(f"redis://{redis_host}:6379")
+            if use_task_queue
+            else None
+        )
         self.task_router = TaskRouter(
-            self.agent_registry, self.message_bus, self.context_manager
+            self.agent_registry,
+            self.message_bus,
+            self.context_manager,
+            task_queue=self.task_queue,
         )
         self.is_running = False
 
@@ -552,6 +647,9 @@ class SophiaOrchestrator:
     async def stop(self):
         """Stop the orchestrator gracefully"""
         self.is_running = False
+        if self.task_queue is not None:
+            await self.task_queue.close()
+        await self.capacity_index.close()
         logger.info("Sophia AI Orchestrator stopped")
 
     async def submit_task(
@@ -595,9 +693,12 @@ class SophiaOrchestrator:
         async def result_callback(message):
             try:
                 if message["type"] == "task_result":
-                    task_id = message["task_id"]
-                    result = message["result"]
-                    await self.task_router.complete_task(task_id, result, True)
+                    await self.task_router.complete_task(
+                        message["task_id"],
+                        message["result"],
+                        message.get("success", True),
+                        agent_id=message.get("agent_id"),
+                    )
             except Exception as e:
                 logger.error(f"Error processing result: {str(e)}")
 
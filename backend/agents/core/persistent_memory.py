@@ -7,6 +7,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from backend.core.memory_log import MemoryLog, StreamKey, sanitize_stream_id
 from backend.core.secret_manager import secret_manager
 from backend.vector.vector_integration import vector_integration
 
@@ -14,49 +15,91 @@ logger = logging.getLogger(__name__)
 
 
 class PersistentMemory:
-    """A simple file-based persistent memory store for agents.
-    Each agent's memory is stored in a separate JSON file.
+    """A file-based persistent memory store for agents.
+    Each agent's memories are kept in an append-only log per role partition
+    (see ``MemoryLog``): writes and deletes append a line, recent memories
+    are read from the tail, and garbage is reclaimed by compaction.
     """
 
     def __init__(self, storage_path: str = "./agent_memory"):
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(exist_ok=True)
-        self.lock = asyncio.Lock()
+        self.log = MemoryLog(self.storage_path)
+        self._migrations: Dict[StreamKey, asyncio.Task] = {}
+
+    def _stream_key(self, agent_id: str, role_partition: str) -> StreamKey:
+        return (sanitize_stream_id(role_partition), sanitize_stream_id(agent_id))
 
     def _get_agent_memory_file(
         self, agent_id: str, role_partition: str = "default"
     ) -> Path:
-        """Gets the memory file path for a given agent, partitioned by role."""
-        partition_path = self.storage_path / role_partition
-        partition_path.mkdir(exist_ok=True)
-        return partition_path / f"{agent_id}_memory.json"
+        """Gets the legacy single-file memory path for an agent."""
+        return self.storage_path / role_partition / f"{agent_id}_memory.json"
+
+    async def _open_stream(self, agent_id: str, role_partition: str) -> StreamKey:
+        """Stream key for an agent, importing its legacy JSON file once."""
+        key = self._stream_key(agent_id, role_partition)
+        migration = self._migrations.get(key)
+        if migration is None:
+            migration = self._migrations[key] = asyncio.ensure_future(
+                self._migrate_legacy_file(agent_id, role_partition, key)
+            )
+            migration.add_done_callback(
+                lambda done: self._forget_failed_migration(key, done)
+            )
+        # Shielded so a cancelled caller does not cancel the shared migration
+        await asyncio.shield(migration)
+        return key
+
+    def _forget_failed_migration(self, key: StreamKey, migration: asyncio.Task):
+        """Let the next caller retry a migration that failed or was cancelled"""
+        if migration.cancelled() or migration.exception() is not None:
+            if self._migrations.get(key) is migration:
+                del self._migrations[key]
+
+    async def _migrate_legacy_file(
+        self, agent_id: str, role_partition: str, key: StreamKey
+    ):
+        legacy_file = self._get_agent_memory_file(agent_id, role_partition)
+        legacy = await asyncio.to_thread(self._read_legacy_file, legacy_file)
+        if legacy:
+            records = [
+                self._record(memory_type, item.get("content"), item.get("metadata"))
+                for memory_type, items in legacy.items()
+                for item in items
+            ]
+            await self.log.append(key, records)
+            await asyncio.to_thread(
+                legacy_file.rename, legacy_file.with_suffix(".json.migrated")
+            )
+            logger.info(
+                f"Migrated {len(records)} memories for {agent_id} to the memory log"
+            )
 
-    async def _read_memory(
-        self, agent_id: str, role_partition: str = "default"
-    ) -> Dict[str, Any]:
-        """Reads the entire memory for an agent."""
-        memory_file = self._get_agent_memory_file(agent_id, role_partition)
+    @staticmethod
+    def _read_legacy_file(memory_file: Path) -> Dict[str, List[Dict[str, Any]]]:
         if not memory_file.exists():
             return {}
-
-        async with self.lock:
-            with open(memory_file, "r") as f:
-                try:
-                    return json.load(f)
-                except json.JSONDecodeError:
-                    return {}
-
-    async def _write_memory(
-        self,
-        agent_id: str,
-        memory_data: Dict[str, Any],
-        role_partition: str = "default",
-    ):
-        """Writes the entire memory for an agent."""
-        memory_file = self._get_agent_memory_file(agent_id, role_partition)
-        async with self.lock:
-            with open(memory_file, "w") as f:
-                json.dump(memory_data, f, indent=2)
+        with open(memory_file, "r") as f:
+            try:
+                return json.load(f)
+            except json.JSONDecodeError:
+                return {}
+
+    @staticmethod
+    def _record(
+        memory_type: str,
+        content: Any,
+        metadata: Optional[Dict[str, Any]],
+        memory_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        return {
+            "id": memory_id or str(uuid.uuid4()),
+            "memory_type": memory_type,
+            "content": content,
+            "metadata": metadata or {},
+            "created_at": datetime.now().isoformat(),
+        }
 
     async def store_memory(
         self,
@@ -65,16 +108,17 @@ class PersistentMemory:
         content: Any,
         metadata: Optional[Dict[str, Any]] = None,
         role_partition: str = "default",
-    ):
-        """Stores a specific piece of memory for an agent."""
-        memory_data = await self._read_memory(agent_id, role_partition)
-        if memory_type not in memory_data:
-            memory_data[memory_type] = []
+        memory_id: Optional[str] = None,
+    ) -> str:
+        """Stores a specific piece of memory for an agent.
 
-        memory_data[memory_type].append(
-            {"content": content, "metadata": metadata or {}}
-        )
-        await self._write_memory(agent_id, memory_data, role_partition)
+        Storing under an existing ``memory_id`` replaces that memory.
+        Returns the memory id.
+        """
+        key = await self._open_stream(agent_id, role_partition)
+        record = self._record(memory_type, content, metadata, memory_id)
+        await self.log.append(key, [record])
+        return record["id"]
 
     async def retrieve_memories(
         self,
@@ -86,13 +130,20 @@ class PersistentMemory:
         """Retrieves memories. This is a simple implementation that returns the latest memories.
         A real implementation would have more sophisticated querying.
         """
-        memory_data = await self._read_memory(agent_id, role_partition)
-        all_memories = []
-        for mem_type in memory_data:
-            all_memories.extend(memory_data[mem_type])
-
+        key = await self._open_stream(agent_id, role_partition)
         # Return the most recent memories, regardless of query for this simple version
-        return all_memories[-limit:]
+        return await self.log.tail(key, limit)
+
+    async def delete_memory(
+        self, agent_id: str, memory_id: str, role_partition: str = "default"
+    ) -> bool:
+        """Deletes a memory; returns False if it does not exist."""
+        key = await self._open_stream(agent_id, role_partition)
+        return await self.log.delete(key, memory_id)
+
+    async def compact(self) -> Dict[str, int]:
+        """Reclaims space from deleted and replaced memories of all agents."""
+        return await self.log.compact_all()
 
 
 class Mem0PersistentMemory(PersistentMemory):
@@ -6,8 +6,11 @@ This agent processes Gong.io call data to provide actionable insights for the sa
 
 import asyncio
 import logging
+import os
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from backend.core.insight_cache import InsightCache, call_fingerprint
 
 from ..core.base_agent import (
     AgentCapability,
@@ -26,11 +29,27 @@ logger = logging.getLogger(__name__)
 class CallAnalysisAgent(BaseAgent):
     """Specialized agent for analyzing sales calls and extracting insights"""
 
-    def __init__(self, config: AgentConfig):
+    def __init__(
+        self,
+        config: AgentConfig,
+        analysis_concurrency: int = 8,
+        call_timeout_seconds: float = 60.0,
+        max_calls_per_report: int = 1000,
+        insight_cache: Optional[InsightCache] = None,
+    ):
         super().__init__(config)
         self.gong_integration = None
         self.hubspot_integration = None
 
+        # Calls are analysed concurrently over one Gong session, and every
+        # result is kept so an unchanged call is never analysed twice
+        self.analysis_concurrency = analysis_concurrency
+        self.call_timeout_seconds = call_timeout_seconds
+        self.max_calls_per_report = max_calls_per_report
+        self.insight_cache = insight_cache or InsightCache(
+            os.getenv("CALL_INSIGHT_CACHE_PATH", "./cache/call_insights.db")
+        )
+
     async def start(self):
         """Start the agent and initialize integrations"""
         await super().start()
@@ -112,12 +131,12 @@ class CallAnalysisAgent(BaseAgent):
                 raise ValueError("Missing required field: call_id")
 
             call_id = task.task_data["call_id"]
+            call = {**(task.task_data.get("call_data") or {}), "id": call_id}
 
             # Get call insights from Gong
             async with self.gong_integration:
-                call_insights = await self.gong_integration.extract_call_insights(
-                    call_id
-                )
+                analyses = await self._extract_insights([call])
+            call_insights = analyses["insights"].get(call_id)
 
             if not call_insights:
                 raise ValueError(f"Could not retrieve insights for call {call_id}")
@@ -161,28 +180,26 @@ class CallAnalysisAgent(BaseAgent):
             from_date = datetime.fromisoformat(date_range["from"])
             to_date = datetime.fromisoformat(date_range["to"])
 
-            # Get calls from Gong
+            # Get calls from Gong and analyse them all over the same session
             async with self.gong_integration:
                 calls = await self.gong_integration.get_calls(
-                    from_date, to_date, limit=100
+                    from_date,
+                    to_date,
+                    limit=task.task_data.get("max_calls", self.max_calls_per_report),
                 )
 
-            if not calls:
-                return await create_agent_response(
-                    True, {"message": "No calls found in date range"}
-                )
+                if not calls:
+                    return await create_agent_response(
+                        True, {"message": "No calls found in date range"}
+                    )
 
-            # Analyze each call
-            call_analyses = []
-            for call in calls[:20]:  # Limit to 20 calls for performance
-                call_id = call.get("id")
-                if call_id:
-                    async with self.gong_integration:
-                        insights = await self.gong_integration.extract_call_insights(
-                            call_id
-                        )
-                    if insights:
-                        call_analyses.append(insights)
+                analyses = await self._extract_insights(calls)
+
+            call_analyses = [
+                analyses["insights"][call["id"]]
+                for call in calls
+                if call.get("id") in analyses["insights"]
+            ]
 
             # Generate trend analysis
             trend_analysis = await self._analyze_call_trends(call_analyses)
@@ -201,6 +218,9 @@ class CallAnalysisAgent(BaseAgent):
                     "to": to_date.isoformat(),
                 },
                 "total_calls_analyzed": len(call_analyses),
+                "calls_in_range": len(calls),
+                "insights_from_cache": analyses["cached"],
+                "failed_calls": analyses["failed"],
                 "trend_analysis": trend_analysis,
                 "team_insights": team_insights,
                 "coaching_opportunities": coaching_opportunities,
@@ -212,6 +232,70 @@ class CallAnalysisAgent(BaseAgent):
         except Exception as e:
             return await create_agent_response(False, error=str(e))
 
+    async def _extract_insights(self, calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Insights for each call, from the cache or from Gong
+
+        Must run inside the Gong integration context; uncached calls are
+        analysed concurrently, at most ``analysis_concurrency`` at a time and
+        each within ``call_timeout_seconds``. A call is re-analysed only when
+        its transcript (or, without one, its call record) changes; calls
+        known only by id are always analysed and never cached.
+        """
+        call_ids = list(dict.fromkeys(call["id"] for call in calls if call.get("id")))
+        fingerprints = {}
+        for call in calls:
+            fingerprint = call_fingerprint(call) if call.get("id") else None
+            if fingerprint:
+                fingerprints[call["id"]] = fingerprint
+        try:
+            insights = (
+                await self.insight_cache.get_many(fingerprints) if fingerprints else {}
+            )
+        except Exception as e:
+            logger.warning(f"Call insight cache unavailable: {e}")
+            insights = {}
+        cached = len(insights)
+
+        semaphore = asyncio.Semaphore(self.analysis_concurrency)
+
+        async def analyze(call_id: str):
+            async with semaphore:
+                try:
+                    return call_id, await asyncio.wait_for(
+                        self.gong_integration.extract_call_insights(call_id),
+                        self.call_timeout_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"Call {call_id} analysis timed out")
+                except Exception as e:
+                    logger.error(f"Call {call_id} analysis failed: {str(e)}")
+                return call_id, None
+
+        results = await asyncio.gather(
+            *(analyze(call_id) for call_id in call_ids if call_id not in insights)
+        )
+        fresh = {call_id: result for call_id, result in results if result}
+        insights.update(fresh)
+
+        try:
+            await self.insight_cache.set_many(
+                {
+                    call_id: result
+                    for call_id, result in fresh.items()
+                    if call_id in fingerprints
+                },
+                fingerprints,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cache call insights: {e}")
+
+        return {
+            "insights": insights,
+            "cached": cached,
+            "analyzed": len(fresh),
+            "failed": len(results) - len(fresh),
+        }
+
     async def _sync_call_to_crm(self, task: Task) -> Dict[str, Any]:
         """Sync call insights to CRM system"""
         try:
@@ -234,14 +318,18 @@ class CallAnalysisAgent(BaseAgent):
                     # Create new contact
                     contact_data = {
                         "email": contact_email,
-                        "firstname": call_insights.get("contact_name", "").split(" ")[0]
-                        if call_insights.get("contact_name")
-                        else "",
-                        "lastname": " ".join(
-                            call_insights.get("contact_name", "").split(" ")[1:]
-                        )
-                        if call_insights.get("contact_name")
-                        else "",
+                        "firstname": (
+                            call_insights.get("contact_name", "").split(" ")[0]
+                            if call_insights.get("contact_name")
+                            else ""
+                        ),
+                        "lastname": (
+                            " ".join(
+                                call_insights.get("contact_name", "").split(" ")[1:]
+                            )
+                            if call_insights.get("contact_name")
+                            else ""
+                        ),
                         "company": call_insights.get("company_name", ""),
                         "lifecyclestage": "lead",
                     }
@@ -273,6 +273,13 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Sophia AI - Pay Ready Company Assistant")
+    # Write out local vector index changes not yet persisted
+    try:
+        from backend.vector.vector_integration import vector_integration
+
+        await vector_integration.close()
+    except Exception as e:
+        logger.error(f"Failed to flush vector integration: {e}")
 
 
 # Run the application
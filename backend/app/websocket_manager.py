@@ -6,26 +6,29 @@ Implements WebSocket connections for live data streaming to dashboards.
 import asyncio
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Set
+from typing import Any, Dict, Hashable, List, Optional, Set
 from uuid import uuid4
 
 from fastapi import WebSocket, WebSocketDisconnect
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from backend.core.auto_esc_config import config
 from backend.core.hierarchical_cache import hierarchical_cache
+from backend.core.send_queue import ClientSendQueue, OverflowPolicy
 from backend.monitoring.observability import logger
 
 
-class WebSocketClient(BaseModel, Any):
+class WebSocketClient(BaseModel):
     """WebSocket client connection"""
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     id: str = Field(default_factory=lambda: str(uuid4()))
     websocket: WebSocket
     subscriptions: Set[str] = Field(default_factory=set)
     connected_at: datetime = Field(default_factory=datetime.utcnow)
     last_ping: datetime = Field(default_factory=datetime.utcnow)
-    metadata: Dict[str, any] = {}
+    metadata: Dict[str, Any] = {}
 
 
 class DashboardUpdate(BaseModel):
@@ -34,7 +37,7 @@ class DashboardUpdate(BaseModel):
     type: str  # metric, alert, notification, data
     dashboard_id: Optional[str] = None
     widget_id: Optional[str] = None
-    data: Dict[str, any]
+    data: Dict[str, Any]
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     priority: str = "normal"  # low, normal, high, critical
 
@@ -42,13 +45,30 @@ class DashboardUpdate(BaseModel):
 class WebSocketManager:
     """Manages WebSocket connections for real-time updates"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        send_queue_size: int = 256,
+        overflow_policy: OverflowPolicy = OverflowPolicy.COALESCE,
+    ):
         self.active_connections: Dict[str, WebSocketClient] = {}
         self.subscription_map: Dict[str, Set[str]] = {}  # subscription -> client_ids
         self._initialized = False
         self._redis_client = None
         self._update_queue: asyncio.Queue = asyncio.Queue()
 
+        # Each client has its own bounded queue drained by its own writer, so
+        # broadcasting never waits on a socket
+        self.send_queue_size = send_queue_size
+        self.overflow_policy = OverflowPolicy(overflow_policy)
+        self._send_queues: Dict[str, ClientSendQueue] = {}
+        self._writers: Dict[str, asyncio.Task] = {}
+        self._closers: Set[asyncio.Task] = set()
+        self.broadcast_stats = {
+            "updates": 0,
+            "deliveries": 0,
+            "overflow_disconnects": 0,
+        }
+
     async def initialize(self):
         """Initialize WebSocket manager."""
         if self._initialized:
@@ -70,7 +90,10 @@ class WebSocketManager:
         logger.info("WebSocket manager initialized")
 
     async def connect(
-        self, websocket: WebSocket, metadata: Optional[Dict] = None
+        self,
+        websocket: WebSocket,
+        metadata: Optional[Dict] = None,
+        overflow_policy: Optional[OverflowPolicy] = None,
     ) -> str:
         """Accept WebSocket connection"""
         await self.initialize()
@@ -80,6 +103,14 @@ class WebSocketManager:
         client = WebSocketClient(websocket=websocket, metadata=metadata or {})
 
         self.active_connections[client.id] = client
+        send_queue = ClientSendQueue(
+            max_size=self.send_queue_size,
+            policy=overflow_policy or self.overflow_policy,
+        )
+        self._send_queues[client.id] = send_queue
+        self._writers[client.id] = asyncio.create_task(
+            self._client_writer(client, send_queue)
+        )
 
         # Send welcome message
         await self._send_to_client(
@@ -95,17 +126,34 @@ class WebSocketManager:
         logger.info(f"WebSocket client connected: {client.id}")
         return client.id
 
-    async def disconnect(self, client_id: str):
-        """Handle WebSocket disconnection"""
+    async def disconnect(self, client_id: str, close_code: Optional[int] = None):
+        """Handle WebSocket disconnection
+
+        With a ``close_code`` the server also closes the socket; that runs in
+        the background so a slow client cannot hold up the caller.
+        """
         if client_id in self.active_connections:
             client = self.active_connections[client_id]
 
+            # Stop the writer first; nothing more is sent to this client
+            send_queue = self._send_queues.pop(client_id, None)
+            if send_queue is not None:
+                send_queue.close()
+            writer = self._writers.pop(client_id, None)
+            if writer is not None and writer is not asyncio.current_task():
+                writer.cancel()
+
             # Remove from all subscriptions
             for subscription in list(client.subscriptions):
                 await self.unsubscribe(client_id, subscription)
 
             # Remove client
-            del self.active_connections[client_id]
+            self.active_connections.pop(client_id, None)
+
+            if close_code is not None:
+                closer = asyncio.create_task(self._close_socket(client, close_code))
+                self._closers.add(closer)
+                closer.add_done_callback(self._closers.discard)
 
             logger.info(f"WebSocket client disconnected: {client_id}")
 
@@ -274,27 +322,82 @@ class WebSocketManager:
         if client_id not in self.active_connections:
             return
 
-        client = self.active_connections[client_id]
+        await self._enqueue(client_id, json.dumps(message, default=str))
+
+    async def _enqueue(
+        self, client_id: str, payload: str, key: Optional[Hashable] = None
+    ) -> bool:
+        """Put a serialized payload on a client's send queue without waiting"""
+        send_queue = self._send_queues.get(client_id)
+        if send_queue is None:
+            return False
+        if send_queue.put(payload, key):
+            return True
+
+        if not send_queue.overflowed:
+            await self.disconnect(client_id)
+            return False
+
+        self.broadcast_stats["overflow_disconnects"] += 1
+        logger.warning(
+            f"WebSocket client {client_id} fell {send_queue.max_size} "
+            f"messages behind, disconnecting"
+        )
+        # 1013 (try again later) tells the client to reconnect and resync
+        await self.disconnect(client_id, close_code=1013)
+        return False
+
+    async def _close_socket(self, client: WebSocketClient, code: int):
+        """Close a client's socket, ignoring clients that are already gone"""
         try:
-            await client.websocket.send_json(message)
+            await client.websocket.close(code=code)
         except Exception as e:
-            logger.error(f"Error sending to client {client_id}: {e}")
-            await self.disconnect(client_id)
+            logger.debug(f"Error closing WebSocket for {client.id}: {e}")
+
+    async def _client_writer(
+        self, client: WebSocketClient, send_queue: ClientSendQueue
+    ):
+        """Drain one client's send queue onto its socket"""
+        while True:
+            message = await send_queue.get()
+            if message is None:
+                return
+            try:
+                if isinstance(message.payload, bytes):
+                    await client.websocket.send_bytes(message.payload)
+                else:
+                    await client.websocket.send_text(message.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error sending to client {client.id}: {e}")
+                await self.disconnect(client.id)
+                return
+            send_queue.mark_sent(message)
 
     async def _broadcast_to_subscription(self, subscription: str, message: Dict):
         """Broadcast message to all clients with subscription"""
         if subscription not in self.subscription_map:
             return
 
-        # Get all client IDs with this subscription
-        client_ids = list(self.subscription_map[subscription])
+        await self._fan_out(
+            set(self.subscription_map[subscription]), json.dumps(message, default=str)
+        )
 
-        # Send to each client
-        tasks = []
+    async def _fan_out(
+        self, client_ids: Set[str], payload: str, key: Optional[Hashable] = None
+    ):
+        """Hand one serialized payload to every recipient's send queue"""
         for client_id in client_ids:
-            tasks.append(self._send_to_client(client_id, message))
+            if await self._enqueue(client_id, payload, key):
+                self.broadcast_stats["deliveries"] += 1
 
-        await asyncio.gather(*tasks, return_exceptions=True)
+    @staticmethod
+    def _coalesce_key(update: DashboardUpdate) -> Optional[Hashable]:
+        """Updates to the same widget supersede each other while queued"""
+        if not update.widget_id:
+            return None
+        return (update.type, update.dashboard_id, update.widget_id)
 
     async def _process_updates(self):
         """Process update queue."""
@@ -320,13 +423,19 @@ class WebSocketManager:
                 if update.priority in ["high", "critical"]:
                     subscriptions.add("updates:priority")
 
-                # Broadcast to all relevant subscriptions
-                message = update.dict()
-                tasks = []
+                # Serialize once and deliver once per client, however many of
+                # the subscriptions it holds
+                recipients: Set[str] = set()
                 for subscription in subscriptions:
-                    tasks.append(self._broadcast_to_subscription(subscription, message))
-
-                await asyncio.gather(*tasks)
+                    recipients.update(self.subscription_map.get(subscription, ()))
+
+                self.broadcast_stats["updates"] += 1
+                if recipients:
+                    await self._fan_out(
+                        recipients,
+                        update.model_dump_json(),
+                        self._coalesce_key(update),
+                    )
 
             except Exception as e:
                 logger.error(f"Error processing update: {e}")
@@ -338,6 +447,7 @@ class WebSocketManager:
 
             now = datetime.utcnow()
             disconnected = []
+            alive = set()
 
             for client_id, client in self.active_connections.items():
                 # Check if client is still alive
@@ -345,20 +455,20 @@ class WebSocketManager:
 
                 if time_since_ping > 60:  # No ping for 60 seconds
                     disconnected.append(client_id)
-                    continue
-
-                # Send heartbeat
-                try:
-                    await client.websocket.send_json(
-                        {"type": "heartbeat", "timestamp": now.isoformat()}
-                    )
-                except Exception:
-                    disconnected.append(client_id)
+                else:
+                    alive.add(client_id)
 
             # Disconnect dead clients
             for client_id in disconnected:
                 await self.disconnect(client_id)
 
+            # Send heartbeat
+            await self._fan_out(
+                alive,
+                json.dumps({"type": "heartbeat", "timestamp": now.isoformat()}),
+                key="heartbeat",
+            )
+
             # Log stats
             logger.info(
                 f"WebSocket connections: {len(self.active_connections)} active, {len(disconnected)} disconnected"
@@ -417,15 +527,16 @@ class WebSocketManager:
 
     async def _get_current_metrics(self, metric_names: List[str]) -> Dict:
         """Get current metric values"""
-        metrics = {}
-
-        for metric in metric_names:
-            # Try to get from cache first
-            value = await hierarchical_cache.get(f"metric:{metric}")
-            if value is not None:
-                metrics[metric] = value
+        # One batched cache lookup instead of one round trip per metric
+        cached = await hierarchical_cache.get_many(
+            [f"metric:{metric}" for metric in metric_names]
+        )
 
-        return metrics
+        return {
+            metric: cached[f"metric:{metric}"]
+            for metric in metric_names
+            if f"metric:{metric}" in cached
+        }
 
     async def _get_historical_data(
         self, metric: str, start_time: Optional[str], end_time: Optional[str]
@@ -441,19 +552,37 @@ class WebSocketManager:
             len(client.subscriptions) for client in self.active_connections.values()
         )
 
-        return {
-            "active_connections": len(self.active_connections),
-            "total_subscriptions": total_subscriptions,
-            "subscription_topics": list(self.subscription_map.keys()),
-            "clients": [
+        clients = []
+        for client_id, client in self.active_connections.items():
+            send_queue = self._send_queues.get(client_id)
+            clients.append(
                 {
                     "id": client_id,
                     "connected_at": client.connected_at.isoformat(),
                     "subscriptions": list(client.subscriptions),
                     "metadata": client.metadata,
+                    "send_queue": send_queue.get_stats() if send_queue else None,
                 }
-                for client_id, client in self.active_connections.items()
-            ],
+            )
+
+        return {
+            "active_connections": len(self.active_connections),
+            "total_subscriptions": total_subscriptions,
+            "subscription_topics": list(self.subscription_map.keys()),
+            "broadcast": {
+                **self.broadcast_stats,
+                "overflow_policy": self.overflow_policy.value,
+                "send_queue_size": self.send_queue_size,
+                "max_client_lag_ms": max(
+                    (
+                        c["send_queue"]["oldest_pending_ms"]
+                        for c in clients
+                        if c["send_queue"]
+                    ),
+                    default=0.0,
+                ),
+            },
+            "clients": clients,
         }
 
 
@@ -6,10 +6,36 @@ such as API routes, MCP tool definitions, and database schemas.
 import ast
 import logging
 import re
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Line breaks as ast counts them (not str.splitlines, which also splits on \f etc.)
+_LINE_RE = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+")
+
+
+def _source_segment(lines: List[str], node: ast.AST) -> Optional[str]:
+    """Like ast.get_source_segment, but over lines split once per file
+
+    ast.get_source_segment re-splits the whole file on every call, which made
+    parsing quadratic in the number of definitions per file.
+    """
+    if getattr(node, "end_lineno", None) is None:
+        return None
+    lineno, end_lineno = node.lineno - 1, node.end_lineno - 1
+    # Column offsets are in UTF-8 bytes
+    first = lines[lineno].encode("utf-8")
+    if lineno == end_lineno:
+        return first[node.col_offset : node.end_col_offset].decode("utf-8")
+    last = lines[end_lineno].encode("utf-8")[: node.end_col_offset]
+    return "".join(
+        [
+            first[node.col_offset :].decode("utf-8"),
+            *lines[lineno + 1 : end_lineno],
+            last.decode("utf-8"),
+        ]
+    )
+
 
 class ArchitectureParser:
     """A class containing static methods to parse different architectural
@@ -147,6 +173,7 @@ class ArchitectureParser:
         items = []
         try:
             tree = ast.parse(file_content)
+            lines = _LINE_RE.findall(file_content)
             for node in ast.walk(tree):
                 if isinstance(node, ast.FunctionDef):
                     items.append(
@@ -154,7 +181,7 @@ class ArchitectureParser:
                             "type": "python_function",
                             "name": node.name,
                             "docstring": ast.get_docstring(node) or "",
-                            "code": ast.get_source_segment(file_content, node),
+                            "code": _source_segment(lines, node),
                             "file_path": file_path,
                         }
                     )
@@ -164,7 +191,7 @@ class ArchitectureParser:
                             "type": "python_class",
                             "name": node.name,
                             "docstring": ast.get_docstring(node) or "",
-                            "code": ast.get_source_segment(file_content, node),
+                            "code": _source_segment(lines, node),
                             "file_path": file_path,
                         }
                     )
@@ -3,12 +3,23 @@ Scans the codebase, applies the appropriate architectural parsers,
 and prepares the structured data for vectorization and storage.
 """
 
+import asyncio
 import logging
-import uuid
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence
 
 from backend.codebase_awareness.architecture_parsers import ArchitectureParser
+from backend.codebase_awareness.ingestion_manifest import (
+    IGNORED_DIRS,
+    FileRecord,
+    IngestionManifest,
+    ParsedFile,
+    iter_source_files,
+    parse_file,
+)
 from backend.knowledge_base.chunking import Chunk  # Re-using the Chunk dataclass
 from backend.knowledge_base.metadata_store import (
     MetadataStore,  # Can be adapted for code
@@ -17,6 +28,9 @@ from backend.knowledge_base.vector_store import VectorStore
 
 logger = logging.getLogger(__name__)
 
+# Below this many files, parsing inline beats starting a process pool
+PARALLEL_PARSE_MIN_FILES = 32
+
 
 class CodebaseIngestionPipeline:
     """Orchestrates the process of scanning and ingesting the entire codebase
@@ -28,6 +42,8 @@ class CodebaseIngestionPipeline:
         vector_store: VectorStore,
         metadata_store: MetadataStore,
         project_root: Path,
+        manifest_path: Optional[Path] = None,
+        max_workers: Optional[int] = None,
     ):
         self.vector_store = vector_store
         self.metadata_store = (
@@ -35,6 +51,34 @@ class CodebaseIngestionPipeline:
         )
         self.project_root = project_root
         self.parser = ArchitectureParser()
+        self.manifest_path = Path(
+            manifest_path
+            or os.getenv("CODEBASE_MANIFEST_PATH", "./cache/codebase_manifest.json")
+        )
+        self.max_workers = max_workers
+
+        # Directories with specific components
+        self.mcp_dir = self.project_root / "backend" / "mcp"
+        self.routes_dir = self.project_root / "backend" / "app" / "routes"
+        self.db_dir = self.project_root / "database" / "init"
+
+    def _parse_files(self, paths: Sequence[Path]) -> List[ParsedFile]:
+        """Parse files across a process pool; small batches are parsed inline"""
+        args = [
+            (
+                str(path),
+                path.relative_to(self.project_root).as_posix(),
+                self.mcp_dir in path.parents,
+                self.routes_dir in path.parents,
+                self.db_dir in path.parents,
+            )
+            for path in paths
+        ]
+        if len(args) < PARALLEL_PARSE_MIN_FILES or self.max_workers == 1:
+            return [parse_file(*arg) for arg in args]
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(parse_file, *zip(*args), chunksize=16))
 
     def scan_and_parse_project(self) -> List[Dict[str, Any]]:
         """Scans the entire project directory and uses the specialized parsers
@@ -46,75 +90,115 @@ class CodebaseIngestionPipeline:
         """
         all_items = []
 
-        # Define directories to scan for specific components
-        mcp_dir = self.project_root / "backend" / "mcp"
-        routes_dir = self.project_root / "backend" / "app" / "routes"
-        db_dir = self.project_root / "database" / "init"
-
         logger.info(f"Starting codebase scan from root: {self.project_root}")
 
-        for p in self.project_root.rglob("*"):
-            if p.is_file():
-                if self._should_ignore(p):
-                    continue
-
-                try:
-                    content = p.read_text(encoding="utf-8")
-
-                    if p.suffix == ".py":
-                        all_items.extend(self.parser.parse_python_code(content, str(p)))
-                        # Check for specific Python file types
-                        if mcp_dir in p.parents:
-                            all_items.extend(
-                                self.parser.parse_mcp_tools(content, str(p))
-                            )
-                        if routes_dir in p.parents:
-                            all_items.extend(
-                                self.parser.parse_fastapi_routes(content, str(p))
-                            )
-
-                    elif p.suffix == ".sql":
-                        if db_dir in p.parents:
-                            all_items.extend(
-                                self.parser.parse_db_schema(content, str(p))
-                            )
-
-                except Exception as e:
-                    logger.warning(f"Could not read or parse file {p}: {e}")
+        paths = [path for path, _ in iter_source_files(self.project_root, self.db_dir)]
+        for parsed in self._parse_files(paths):
+            if parsed.error:
+                logger.warning(
+                    f"Could not read or parse file {parsed.rel_path}: {parsed.error}"
+                )
+            all_items.extend(parsed.items)
 
         logger.info(
             f"Codebase scan complete. Found {len(all_items)} architectural items."
         )
         return all_items
 
-    async def ingest_codebase(self):
-        """Performs a full scan and ingestion of the project codebase."""
-        logger.info("Starting full codebase ingestion...")
-
-        architectural_items = self.scan_and_parse_project()
-
-        if not architectural_items:
-            logger.warning("No architectural items found to ingest.")
-            return
-
-        # Convert these items into the Chunk format for the stores
-        chunks_to_ingest = []
-        for item in architectural_items:
-            # Create a descriptive content string for embedding
-            content_for_embedding = self._create_embedding_content(item)
+    async def ingest_codebase(self, incremental: bool = True) -> Dict[str, int]:
+        """Scans the project and brings the codebase index up to date.
 
-            # Use a unique ID for each architectural item
-            item_id = str(uuid.uuid4())
-            item["item_id"] = item_id
+        Incremental runs only parse files whose size or mtime changed since the
+        manifest was written and only upsert items whose content-addressed id
+        is new. A full run re-parses and re-upserts everything. Both delete
+        the vectors of items that no longer exist, so re-runs never duplicate.
 
-            chunks_to_ingest.append(Chunk(content=content_for_embedding, metadata=item))
+        Returns:
+            Counts of scanned, parsed and deleted files and upserted and
+            deleted items.
+        """
+        mode = "incremental" if incremental else "full"
+        logger.info(f"Starting {mode} codebase ingestion...")
+        start = time.perf_counter()
 
-        # Upsert into the vector and metadata stores
-        await self.vector_store.upsert(chunks_to_ingest)
-        # The metadata store might need adaptation, but for now we'll assume it can handle this
-        # self.metadata_store.add_chunks(chunks_to_ingest)
+        manifest = IngestionManifest.load(
+            self.manifest_path, getattr(self.vector_store, "INDEX_NAME", "")
+        )
+        current = {
+            path.relative_to(self.project_root).as_posix(): (path, stat)
+            for path, stat in iter_source_files(self.project_root, self.db_dir)
+        }
+        to_parse = [
+            path
+            for rel_path, (path, stat) in current.items()
+            if not (incremental and manifest.is_unchanged(rel_path, stat))
+        ]
+        parsed_files = await asyncio.to_thread(self._parse_files, to_parse)
+
+        items_to_upsert: List[Dict[str, Any]] = []
+        stale_ids = set()
+        for parsed in parsed_files:
+            if parsed.error:
+                logger.warning(
+                    f"Could not read or parse file {parsed.rel_path}: {parsed.error}"
+                )
+                continue
+
+            old = manifest.files.get(parsed.rel_path)
+            old_ids = set(old.item_ids) if old else set()
+            new_ids = [item["item_id"] for item in parsed.items]
+            items_to_upsert.extend(
+                item
+                for item in parsed.items
+                if not incremental or item["item_id"] not in old_ids
+            )
+            stale_ids.update(old_ids.difference(new_ids))
+            manifest.files[parsed.rel_path] = FileRecord(
+                parsed.content_hash, parsed.size, parsed.mtime_ns, new_ids
+            )
 
-        logger.info(f"Successfully ingested {len(chunks_to_ingest)} codebase items.")
+        deleted_files = [
+            rel_path for rel_path in manifest.files if rel_path not in current
+        ]
+        for rel_path in deleted_files:
+            stale_ids.update(manifest.files.pop(rel_path).item_ids)
+
+        if items_to_upsert:
+            # Convert these items into the Chunk format for the stores
+            chunks_to_ingest = [
+                Chunk(content=self._create_embedding_content(item), metadata=item)
+                for item in items_to_upsert
+            ]
+            await self.vector_store.upsert(chunks_to_ingest)
+        if stale_ids:
+            await self._delete_items(sorted(stale_ids))
+
+        # Only record the new state once the index reflects it
+        manifest.save()
+
+        stats = {
+            "files_scanned": len(current),
+            "files_parsed": len(parsed_files),
+            "files_deleted": len(deleted_files),
+            "items_upserted": len(items_to_upsert),
+            "items_deleted": len(stale_ids),
+        }
+        logger.info(
+            f"Codebase ingestion ({mode}) finished in "
+            f"{time.perf_counter() - start:.2f}s: {stats}"
+        )
+        return stats
+
+    async def _delete_items(self, item_ids: List[str]):
+        """Removes the vectors of items that no longer exist."""
+        delete = getattr(self.vector_store, "delete", None)
+        if delete is None:
+            logger.warning(
+                f"Vector store does not support deletes; {len(item_ids)} stale "
+                f"codebase items remain indexed"
+            )
+            return
+        await delete(item_ids)
 
     def _create_embedding_content(self, item: Dict[str, Any]) -> str:
         """Creates a single string from a structured item to be used for embedding.
@@ -138,8 +222,7 @@ class CodebaseIngestionPipeline:
 
     def _should_ignore(self, path: Path) -> bool:
         """Determines if a file or directory should be ignored during scanning."""
-        ignored_dirs = ["__pycache__", ".git", "node_modules", "venv", "sophia_venv"]
-        ignored_parts = set(path.parts).intersection(ignored_dirs)
+        ignored_parts = set(path.parts).intersection(IGNORED_DIRS)
         return bool(ignored_parts)
 
 
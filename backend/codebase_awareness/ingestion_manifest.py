@@ -0,0 +1,185 @@
+"""Incremental ingestion support for the Codebase Awareness System
+Tracks which file produced which architectural items, so a re-index only
+parses files whose content changed and only touches the vectors of items
+that appeared or disappeared. Item ids are derived from the item content,
+so an unchanged function in an edited file keeps its id and its vector.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from backend.codebase_awareness.architecture_parsers import ArchitectureParser
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+IGNORED_DIRS = {"__pycache__", ".git", "node_modules", "venv", "sophia_venv"}
+
+
+@dataclass
+class FileRecord:
+    """What the manifest knows about one source file"""
+
+    content_hash: str
+    size: int
+    mtime_ns: int
+    item_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ParsedFile:
+    """Result of parsing one file in a worker process"""
+
+    rel_path: str
+    content_hash: str
+    size: int
+    mtime_ns: int
+    items: List[Dict[str, Any]]
+    error: Optional[str] = None
+
+
+def item_id(rel_path: str, item: Dict[str, Any], occurrence: int = 0) -> str:
+    """Content-addressed id: same file, same item content, same id"""
+    content = {k: v for k, v in item.items() if k not in ("file_path", "item_id")}
+    digest = hashlib.sha256(
+        json.dumps([rel_path, occurrence, content], sort_keys=True, default=str).encode(
+            "utf-8"
+        )
+    )
+    return digest.hexdigest()[:32]
+
+
+def parse_file(
+    path: str, rel_path: str, is_mcp: bool, is_route: bool, is_schema: bool
+) -> ParsedFile:
+    """Read, hash and parse one file; runs in a worker process"""
+    try:
+        stat = os.stat(path)
+        with open(path, "rb") as f:
+            raw = f.read()
+    except OSError as e:
+        # Deleted or unreadable since the scan; the caller keeps the old record
+        return ParsedFile(rel_path, "", 0, 0, [], error=str(e))
+    content_hash = hashlib.sha256(raw).hexdigest()
+    parsed = ParsedFile(rel_path, content_hash, stat.st_size, stat.st_mtime_ns, [])
+
+    try:
+        content = raw.decode("utf-8")
+        items: List[Dict[str, Any]] = []
+        if path.endswith(".py"):
+            items.extend(ArchitectureParser.parse_python_code(content, path))
+            if is_mcp:
+                items.extend(ArchitectureParser.parse_mcp_tools(content, path))
+            if is_route:
+                items.extend(ArchitectureParser.parse_fastapi_routes(content, path))
+        elif is_schema:
+            items.extend(ArchitectureParser.parse_db_schema(content, path))
+    except Exception as e:
+        parsed.error = str(e)
+        return parsed
+
+    seen: Dict[str, int] = {}
+    for item in items:
+        base = item_id(rel_path, item)
+        # Identical items in one file (rare) still get distinct ids
+        occurrence = seen.get(base, 0)
+        seen[base] = occurrence + 1
+        item["item_id"] = (
+            base if not occurrence else item_id(rel_path, item, occurrence)
+        )
+    parsed.items = items
+    return parsed
+
+
+def iter_source_files(
+    root: Path, schema_dir: Path
+) -> Iterator[Tuple[Path, os.stat_result]]:
+    """Python files, and SQL files under ``schema_dir``, with their stat
+
+    Ignored directories are pruned instead of walked, and no other file
+    types are visited since no parser would use them.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+        directory = Path(dirpath)
+        in_schema_dir = directory == schema_dir or schema_dir in directory.parents
+        for filename in filenames:
+            if filename.endswith(".py") or (
+                in_schema_dir and filename.endswith(".sql")
+            ):
+                path = directory / filename
+                try:
+                    yield path, path.stat()
+                except OSError:
+                    continue
+
+
+class IngestionManifest:
+    """File path -> content hash -> item ids, persisted as JSON"""
+
+    def __init__(self, path: Path, index_name: str = ""):
+        self.path = Path(path)
+        self.index_name = index_name
+        self.files: Dict[str, FileRecord] = {}
+
+    @classmethod
+    def load(cls, path: Path, index_name: str = "") -> "IngestionManifest":
+        manifest = cls(path, index_name)
+        try:
+            with open(manifest.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return manifest
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+            return manifest
+
+        # A manifest written for another index says nothing about this one
+        if (
+            data.get("version") != MANIFEST_VERSION
+            or data.get("index_name", "") != index_name
+        ):
+            return manifest
+        manifest.files = {
+            rel_path: FileRecord(**record)
+            for rel_path, record in data.get("files", {}).items()
+        }
+        return manifest
+
+    def save(self):
+        """Write atomically, so a crash never leaves a torn manifest"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "index_name": self.index_name,
+                    "files": {
+                        rel_path: asdict(record)
+                        for rel_path, record in sorted(self.files.items())
+                    },
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def is_unchanged(self, rel_path: str, stat: os.stat_result) -> bool:
+        """Same size and mtime as when last indexed; skips reading the file"""
+        record = self.files.get(rel_path)
+        return (
+            record is not None
+            and record.size == stat.st_size
+            and record.mtime_ns == stat.st_mtime_ns
+        )
+
+    def all_item_ids(self) -> Set[str]:
+        return {
+            item_id for record in self.files.values() for item_id in record.item_ids
+        }
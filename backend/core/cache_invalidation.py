@@ -0,0 +1,129 @@
+"""Cross-node invalidation bus for HierarchicalCache
+Every worker keeps its own L1 copy of hot values. Writes and invalidations
+are broadcast on a shared channel so the other workers drop their stale
+copies immediately instead of serving them until the L1 TTL runs out.
+"""
+
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, List, Optional
+
+try:
+    import aioredis
+
+    AIOREDIS_AVAILABLE = True
+except ImportError:
+    AIOREDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL = "cache:invalidations"
+
+
+@dataclass
+class InvalidationMessage:
+    """Drop L1 copies of ``keys`` and of entries tagged with ``tags``
+
+    Only copies written before ``version`` (a ``time.time_ns()`` stamp) are
+    dropped, so an invalidation that arrives after a newer write leaves the
+    newer value alone. ``sequence`` increases per ``node_id``; receivers
+    discard anything not newer than the last sequence seen from that node.
+    """
+
+    node_id: str
+    sequence: int
+    version: int
+    keys: List[str] = field(default_factory=list)
+    tags: List[str] = field(default_factory=list)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "InvalidationMessage":
+        return cls(**json.loads(raw))
+
+
+Handler = Callable[[InvalidationMessage], Awaitable[None]]
+
+
+class InvalidationBus(ABC):
+    """Broadcast channel that delivers every message to every subscriber"""
+
+    @abstractmethod
+    async def start(self, handler: Handler):
+        """Deliver every published message to ``handler``"""
+        pass
+
+    @abstractmethod
+    async def publish(self, message: InvalidationMessage):
+        """Send ``message`` to every subscriber"""
+        pass
+
+    async def close(self):
+        pass
+
+
+class LocalInvalidationBus(InvalidationBus):
+    """In-process bus; share one instance between caches to simulate nodes"""
+
+    def __init__(self):
+        self._handlers: List[Handler] = []
+
+    async def start(self, handler: Handler):
+        self._handlers.append(handler)
+
+    async def publish(self, message: InvalidationMessage):
+        for handler in list(self._handlers):
+            try:
+                await handler(message)
+            except Exception as e:
+                logger.error(f"Invalidation handler failed: {e}")
+
+    async def close(self):
+        self._handlers.clear()
+
+
+class RedisInvalidationBus(InvalidationBus):
+    """Redis pub/sub bus; subscribes on a dedicated connection"""
+
+    def __init__(self, redis_url: str, channel: str = DEFAULT_CHANNEL):
+        self.redis_url = redis_url
+        self.channel = channel
+        self._publisher = None
+        self._subscriber = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self, handler: Handler):
+        if not AIOREDIS_AVAILABLE:
+            raise RuntimeError("aioredis is required for RedisInvalidationBus")
+
+        self._publisher = await aioredis.create_redis(self.redis_url, encoding="utf-8")
+        self._subscriber = await aioredis.create_redis(self.redis_url, encoding="utf-8")
+        (channel,) = await self._subscriber.subscribe(self.channel)
+        self._reader = asyncio.create_task(self._read(channel, handler))
+        logger.info(f"Subscribed to cache invalidations on {self.channel}")
+
+    async def _read(self, channel, handler: Handler):
+        while await channel.wait_message():
+            raw = await channel.get(encoding="utf-8")
+            try:
+                await handler(InvalidationMessage.from_json(raw))
+            except Exception as e:
+                logger.error(f"Failed to apply cache invalidation: {e}")
+
+    async def publish(self, message: InvalidationMessage):
+        if self._publisher is None:
+            return
+        await self._publisher.publish(self.channel, message.to_json())
+
+    async def close(self):
+        if self._reader:
+            self._reader.cancel()
+        for connection in (self._subscriber, self._publisher):
+            if connection is not None:
+                connection.close()
+                await connection.wait_closed()
@@ -0,0 +1,166 @@
+"""Persistent L3 store for HierarchicalCache
+Keeps encoded cache envelopes in a local SQLite database with an expiry
+column and a tag -> key index, so expensive results survive Redis evictions
+and restarts and whole groups of keys can be invalidated in one call.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    evict_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_evict_at
+    ON cache_entries (evict_at);
+CREATE TABLE IF NOT EXISTS cache_tags (
+    tag TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (tag, key)
+);
+CREATE INDEX IF NOT EXISTS idx_cache_tags_key ON cache_tags (key);
+"""
+
+# Stay well below SQLite's bound-parameter limit
+MAX_PARAMS = 500
+
+
+def _chunks(items: Sequence, size: int = MAX_PARAMS) -> Iterable[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class SQLiteCacheStore:
+    """SQLite table of encoded envelopes with expiry and a tag index
+
+    Methods are blocking and thread-safe; the cache calls them through
+    ``asyncio.to_thread``. WAL mode lets several worker processes share one
+    database file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def get_many(self, keys: Sequence[str], now: float) -> Dict[str, str]:
+        """Encoded values for the unexpired ``keys``"""
+        found = {}
+        with self._lock:
+            for chunk in _chunks(list(keys)):
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM cache_entries "
+                    f"WHERE key IN ({placeholders}) AND evict_at > ?",
+                    (*chunk, now),
+                )
+                found.update(rows)
+        return found
+
+    def set_many(
+        self,
+        rows: Sequence[Tuple[str, str, float]],
+        tags: Optional[Sequence[str]] = None,
+    ):
+        """Upsert ``(key, value, evict_at)`` rows, replacing their tags"""
+        if not rows:
+            return
+
+        keys = [row[0] for row in rows]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO cache_entries (key, value, evict_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "value = excluded.value, evict_at = excluded.evict_at",
+                rows,
+            )
+            self._delete_tags(keys)
+            if tags:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)",
+                    [(tag, key) for key in keys for tag in tags],
+                )
+
+    def delete_many(self, keys: Sequence[str]) -> int:
+        """Delete entries and their tags; returns the number of entries removed"""
+        removed = 0
+        with self._lock, self._conn:
+            for chunk in _chunks(list(keys)):
+                placeholders = ", ".join("?" * len(chunk))
+                cursor = self._conn.execute(
+                    f"DELETE FROM cache_entries WHERE key IN ({placeholders})", chunk
+                )
+                removed += cursor.rowcount
+            self._delete_tags(keys)
+        return removed
+
+    def keys_for_tag(self, tag: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM cache_tags WHERE tag = ?", (tag,)
+            )
+            return [key for (key,) in rows]
+
+    def delete_tag(self, tag: str) -> List[str]:
+        """Delete every entry carrying ``tag``; returns the affected keys"""
+        with self._lock, self._conn:
+            keys = [
+                key
+                for (key,) in self._conn.execute(
+                    "SELECT key FROM cache_tags WHERE tag = ?", (tag,)
+                )
+            ]
+            for chunk in _chunks(keys):
+                placeholders = ", ".join("?" * len(chunk))
+                self._conn.execute(
+                    f"DELETE FROM cache_entries WHERE key IN ({placeholders})", chunk
+                )
+            self._delete_tags(keys)
+        return keys
+
+    def sweep(self, now: float, batch_size: int = 10_000) -> int:
+        """Delete expired entries in batches; returns the number removed"""
+        removed = 0
+        while True:
+            with self._lock, self._conn:
+                keys = [
+                    key
+                    for (key,) in self._conn.execute(
+                        "SELECT key FROM cache_entries WHERE evict_at <= ? LIMIT ?",
+                        (now, batch_size),
+                    )
+                ]
+                if not keys:
+                    return removed
+                for chunk in _chunks(keys):
+                    placeholders = ", ".join("?" * len(chunk))
+                    self._conn.execute(
+                        f"DELETE FROM cache_entries WHERE key IN ({placeholders})",
+                        chunk,
+                    )
+                self._delete_tags(keys)
+            removed += len(keys)
+
+    def _delete_tags(self, keys: Sequence[str]):
+        # Caller holds the lock and the transaction
+        for chunk in _chunks(list(keys)):
+            placeholders = ", ".join("?" * len(chunk))
+            self._conn.execute(
+                f"DELETE FROM cache_tags WHERE key IN ({placeholders})", chunk
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,434 @@
+"""Shared agent capacity index for Sophia AI task dispatch
+Each capability keeps a sorted set of agents scored by free task slots.
+Agents adjust their own scores atomically as they start and finish tasks and
+refresh a heartbeat; agents whose heartbeat lapses drop out of the index.
+Selection samples two agents with free slots and takes the less loaded one
+(power of two choices), so every orchestrator replica sees the same
+capacity and concurrent selections spread out instead of piling onto the
+single "best" agent.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import statistics
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# (agent_id, free_slots, performance_score)
+Candidate = Tuple[str, float, float]
+
+
+class CapacityIndex(ABC):
+    """Free task slots per agent and capability, shared across processes"""
+
+    def __init__(
+        self,
+        heartbeat_ttl_seconds: float = 90.0,
+        purge_interval_seconds: float = 5.0,
+        max_attempts: int = 3,
+        seed: Optional[int] = None,
+    ):
+        self.heartbeat_ttl_seconds = heartbeat_ttl_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+        self.max_attempts = max_attempts
+        self._rng = random.Random(seed)
+        self._last_purge = 0.0
+        self._latencies_ms: Deque[float] = deque(maxlen=1000)
+        self.metrics = {
+            "selections": 0,
+            "no_capacity": 0,
+            "conflicts": 0,
+            "expired_agents": 0,
+        }
+
+    @abstractmethod
+    async def register(
+        self,
+        agent_id: str,
+        capabilities: Sequence[str],
+        slots: int,
+        performance_score: float = 1.0,
+        free_slots: Optional[int] = None,
+    ):
+        """Add or reset an agent; it starts with ``free_slots`` (default all)"""
+        pass
+
+    @abstractmethod
+    async def heartbeat(
+        self, agent_id: str, performance_score: Optional[float] = None
+    ) -> bool:
+        """Extend an agent's registration; False if it is no longer indexed
+
+        A heartbeat never resurrects a purged agent, so on False the agent
+        must register again.
+        """
+        pass
+
+    @abstractmethod
+    async def remove(self, agent_id: str):
+        """Drop an agent from every capability set"""
+        pass
+
+    async def acquire(self, agent_id: str, capability: Optional[str] = None) -> bool:
+        """Take one slot; with ``capability``, only if that set shows one free"""
+        return await self._adjust(agent_id, -1, capability)
+
+    async def release(self, agent_id: str):
+        """Give one slot back"""
+        await self._adjust(agent_id, 1, None)
+
+    async def select(self, capability: str, reserve: bool = True) -> Optional[str]:
+        """Less loaded of two random agents with a free slot for ``capability``
+
+        With ``reserve`` the chosen agent's slot is taken atomically; if
+        another replica got there first, selection is retried.
+        """
+        start = time.perf_counter()
+        try:
+            now = time.time()
+            if now - self._last_purge >= self.purge_interval_seconds:
+                self._last_purge = now
+                await self.purge_expired(now)
+
+            for _ in range(self.max_attempts):
+                available = await self._count_free(capability)
+                if not available:
+                    break
+                ranks = self._rng.sample(range(available), min(2, available))
+                candidates = await self._candidates(capability, ranks, now)
+                if not candidates:
+                    continue
+                agent_id = max(candidates, key=lambda c: (c[1], c[2]))[0]
+                if not reserve or await self.acquire(agent_id, capability):
+                    self.metrics["selections"] += 1
+                    return agent_id
+                self.metrics["conflicts"] += 1
+
+            self.metrics["no_capacity"] += 1
+            return None
+        finally:
+            self._latencies_ms.append((time.perf_counter() - start) * 1000)
+
+    async def purge_expired(self, now: Optional[float] = None) -> int:
+        """Drop agents whose heartbeat has lapsed"""
+        expired = await self._expired(time.time() if now is None else now)
+        for agent_id in expired:
+            await self.remove(agent_id)
+        if expired:
+            self.metrics["expired_agents"] += len(expired)
+            logger.warning(f"Removed {len(expired)} agents with stale heartbeats")
+        return len(expired)
+
+    @abstractmethod
+    async def free_slots(self, capability: str) -> Dict[str, float]:
+        """Free slots per agent for ``capability``"""
+        pass
+
+    @abstractmethod
+    async def _count_free(self, capability: str) -> int:
+        """Agents with at least one free slot for ``capability``"""
+        pass
+
+    @abstractmethod
+    async def _candidates(
+        self, capability: str, ranks: Sequence[int], now: float
+    ) -> List[Candidate]:
+        """Live agents at ``ranks`` of the capability set, most free first"""
+        pass
+
+    @abstractmethod
+    async def _adjust(self, agent_id: str, delta: int, guard: Optional[str]) -> bool:
+        """Add ``delta`` free slots to every capability set of an agent"""
+        pass
+
+    @abstractmethod
+    async def _expired(self, now: float) -> List[str]:
+        """Agents whose heartbeat expired before ``now``"""
+        pass
+
+    async def close(self):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = list(self._latencies_ms)
+        stats = {**self.metrics, "heartbeat_ttl_seconds": self.heartbeat_ttl_seconds}
+        if len(latencies) >= 2:
+            percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+            stats["selection_latency_ms"] = {
+                "p50": percentiles[49],
+                "p99": percentiles[98],
+                "max": max(latencies),
+            }
+        return stats
+
+
+class InMemoryCapacityIndex(CapacityIndex):
+    """Single-process stand-in with the same semantics, for tests"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._free: Dict[str, Dict[str, float]] = {}
+        self._agents: Dict[str, Dict[str, Any]] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def register(
+        self,
+        agent_id: str,
+        capabilities: Sequence[str],
+        slots: int,
+        performance_score: float = 1.0,
+        free_slots: Optional[int] = None,
+    ):
+        await self.remove(agent_id)
+        free = slots if free_slots is None else max(0, min(slots, free_slots))
+        self._agents[agent_id] = {
+            "capabilities": list(capabilities),
+            "slots": slots,
+            "performance": performance_score,
+        }
+        for capability in capabilities:
+            self._free.setdefault(capability, {})[agent_id] = free
+        self._expires[agent_id] = time.time() + self.heartbeat_ttl_seconds
+
+    async def heartbeat(
+        self, agent_id: str, performance_score: Optional[float] = None
+    ) -> bool:
+        if agent_id not in self._agents:
+            return False
+        self._expires[agent_id] = time.time() + self.heartbeat_ttl_seconds
+        if performance_score is not None:
+            self._agents[agent_id]["performance"] = performance_score
+        return True
+
+    async def remove(self, agent_id: str):
+        agent = self._agents.pop(agent_id, None)
+        self._expires.pop(agent_id, None)
+        for capability in agent["capabilities"] if agent else ():
+            self._free.get(capability, {}).pop(agent_id, None)
+
+    async def free_slots(self, capability: str) -> Dict[str, float]:
+        return dict(self._free.get(capability, {}))
+
+    async def _count_free(self, capability: str) -> int:
+        return sum(1 for free in self._free.get(capability, {}).values() if free >= 1)
+
+    async def _candidates(
+        self, capability: str, ranks: Sequence[int], now: float
+    ) -> List[Candidate]:
+        ordered = sorted(
+            self._free.get(capability, {}).items(), key=lambda item: -item[1]
+        )
+        return [
+            (
+                ordered[rank][0],
+                ordered[rank][1],
+                self._agents[ordered[rank][0]]["performance"],
+            )
+            for rank in ranks
+            if rank < len(ordered) and self._expires[ordered[rank][0]] > now
+        ]
+
+    async def _adjust(self, agent_id: str, delta: int, guard: Optional[str]) -> bool:
+        async with self._lock:
+            agent = self._agents.get(agent_id)
+            if agent is None:
+                return False
+            if guard is not None:
+                free = self._free.get(guard, {}).get(agent_id)
+                if free is None or free + delta < 0:
+                    return False
+            for capability in agent["capabilities"]:
+                free = self._free[capability][agent_id]
+                self._free[capability][agent_id] = max(
+                    0, min(agent["slots"], free + delta)
+                )
+            return True
+
+    async def _expired(self, now: float) -> List[str]:
+        return [
+            agent_id for agent_id, expires in self._expires.items() if expires <= now
+        ]
+
+
+# Take or return one slot in every capability set of an agent, clamped to
+# [0, slots]; with a guard capability, refuse if it shows no room
+_ADJUST_SCRIPT = """
+local raw = redis.call('HGET', KEYS[1], 'capabilities')
+if not raw then return 0 end
+local prefix, agent, delta, guard = ARGV[1], ARGV[2], tonumber(ARGV[3]), ARGV[4]
+if guard ~= '' then
+    local free = redis.call('ZSCORE', prefix .. ':cap:' .. guard, agent)
+    if not free or tonumber(free) + delta < 0 then return 0 end
+end
+local slots = tonumber(redis.call('HGET', KEYS[1], 'slots'))
+for _, capability in ipairs(cjson.decode(raw)) do
+    local key = prefix .. ':cap:' .. capability
+    local free = redis.call('ZSCORE', key, agent)
+    if free then
+        free = math.max(0, math.min(slots, tonumber(free) + delta))
+        redis.call('ZADD', key, free, agent)
+    end
+end
+return 1
+"""
+
+
+class RedisCapacityIndex(CapacityIndex):
+    """Redis sorted sets shared by all agents and orchestrator replicas
+
+    ``{prefix}:cap:{capability}`` scores agents by free slots,
+    ``{prefix}:agent:{id}`` holds an agent's capabilities, slot count and
+    performance score, and ``{prefix}:heartbeats`` scores agents by the time
+    their heartbeat expires.
+    """
+
+    def __init__(self, redis_url: str, prefix: str = "sophia:capacity", **kwargs):
+        super().__init__(**kwargs)
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self._redis = None
+        self._adjust_script = None
+
+    async def _client(self):
+        if self._redis is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis is required for RedisCapacityIndex")
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+            self._adjust_script = self._redis.register_script(_ADJUST_SCRIPT)
+        return self._redis
+
+    def _capability_key(self, capability: str) -> str:
+        return f"{self.prefix}:cap:{capability}"
+
+    def _agent_key(self, agent_id: str) -> str:
+        return f"{self.prefix}:agent:{agent_id}"
+
+    @property
+    def _heartbeat_key(self) -> str:
+        return f"{self.prefix}:heartbeats"
+
+    async def register(
+        self,
+        agent_id: str,
+        capabilities: Sequence[str],
+        slots: int,
+        performance_score: float = 1.0,
+        free_slots: Optional[int] = None,
+    ):
+        await self.remove(agent_id)
+        client = await self._client()
+        free = slots if free_slots is None else max(0, min(slots, free_slots))
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                self._agent_key(agent_id),
+                mapping={
+                    "capabilities": json.dumps(list(capabilities)),
+                    "slots": slots,
+                    "performance": performance_score,
+                },
+            )
+            for capability in capabilities:
+                pipe.zadd(self._capability_key(capability), {agent_id: free})
+            pipe.zadd(
+                self._heartbeat_key,
+                {agent_id: time.time() + self.heartbeat_ttl_seconds},
+            )
+            await pipe.execute()
+
+    async def heartbeat(
+        self, agent_id: str, performance_score: Optional[float] = None
+    ) -> bool:
+        client = await self._client()
+        # XX: a heartbeat never resurrects an agent that has been purged;
+        # CH makes the reply say whether the agent was still there
+        alive = await client.zadd(
+            self._heartbeat_key,
+            {agent_id: time.time() + self.heartbeat_ttl_seconds},
+            xx=True,
+            ch=True,
+        )
+        if not alive:
+            return False
+        if performance_score is not None:
+            await client.hset(
+                self._agent_key(agent_id), "performance", performance_score
+            )
+        return True
+
+    async def remove(self, agent_id: str):
+        client = await self._client()
+        raw = await client.hget(self._agent_key(agent_id), "capabilities")
+        async with client.pipeline(transaction=True) as pipe:
+            for capability in json.loads(raw) if raw else ():
+                pipe.zrem(self._capability_key(capability), agent_id)
+            pipe.zrem(self._heartbeat_key, agent_id)
+            pipe.delete(self._agent_key(agent_id))
+            await pipe.execute()
+
+    async def free_slots(self, capability: str) -> Dict[str, float]:
+        client = await self._client()
+        return dict(
+            await client.zrange(
+                self._capability_key(capability), 0, -1, withscores=True
+            )
+        )
+
+    async def _count_free(self, capability: str) -> int:
+        client = await self._client()
+        return await client.zcount(self._capability_key(capability), 1, "+inf")
+
+    async def _candidates(
+        self, capability: str, ranks: Sequence[int], now: float
+    ) -> List[Candidate]:
+        client = await self._client()
+        key = self._capability_key(capability)
+        async with client.pipeline(transaction=False) as pipe:
+            for rank in ranks:
+                pipe.zrevrange(key, rank, rank, withscores=True)
+            ranked = [entry for entries in await pipe.execute() for entry in entries]
+        if not ranked:
+            return []
+
+        agent_ids = [agent_id for agent_id, _ in ranked]
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.zmscore(self._heartbeat_key, agent_ids)
+            for agent_id in agent_ids:
+                pipe.hget(self._agent_key(agent_id), "performance")
+            expires, *performance = await pipe.execute()
+
+        return [
+            (agent_id, free, float(score or 0.0))
+            for (agent_id, free), expires_at, score in zip(ranked, expires, performance)
+            if expires_at is not None and expires_at > now
+        ]
+
+    async def _adjust(self, agent_id: str, delta: int, guard: Optional[str]) -> bool:
+        await self._client()
+        result = await self._adjust_script(
+            keys=[self._agent_key(agent_id)],
+            args=[self.prefix, agent_id, delta, guard or ""],
+        )
+        return bool(result)
+
+    async def _expired(self, now: float) -> List[str]:
+        client = await self._client()
+        return await client.zrangebyscore(self._heartbeat_key, "-inf", now)
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
@@ -7,7 +7,7 @@ import logging
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from backend.agents.core.persistent_memory import PersistentMemory
 from backend.core.enhanced_embedding_manager import enhanced_embedding_manager
@@ -58,7 +58,9 @@ class ComprehensiveMemoryManager:
 
         # Core components
         self.embedding_manager = enhanced_embedding_manager
-        self.vector_integration = VectorIntegration()
+        self.vector_integration = VectorIntegration(
+            embedding_manager=self.embedding_manager
+        )
         self.persistent_memory = PersistentMemory()
 
         self.initialized = False
@@ -108,6 +110,16 @@ class ComprehensiveMemoryManager:
                 error_message=str(e),
             )
 
+    async def store_vectors(
+        self,
+        items: List[Tuple[str, List[float], Dict[str, Any]]],
+        namespace: Optional[str] = None,
+    ) -> bool:
+        """Store precomputed ``(id, embedding, metadata)`` vectors in one batch"""
+        if not self.initialized:
+            await self.initialize()
+        return await self.vector_integration.index_vectors(items, namespace=namespace)
+
     async def _handle_store_request(self, request: MemoryRequest) -> Dict[str, Any]:
         """Handle memory storage request."""
         if not request.content:
@@ -132,6 +144,7 @@ class ComprehensiveMemoryManager:
             text=request.content,
             metadata=metadata,
             namespace=request.user_role,
+            embedding=embedding,
         )
 
         await self.persistent_memory.store_memory(
@@ -140,6 +153,7 @@ class ComprehensiveMemoryManager:
             content={"vector_id": memory_id, "text_preview": request.content[:100]},
             metadata=metadata,
             role_partition=request.user_role,
+            memory_id=memory_id,
         )
 
         return {"memory_id": memory_id, "status": "stored"}
@@ -174,8 +188,11 @@ class ComprehensiveMemoryManager:
         await self.vector_integration.delete_content(
             content_id=request.memory_id, namespace=request.user_role
         )
-        # Note: Deleting from the simple file-based persistent store is more complex
-        # and is omitted in this simplified version.
+        await self.persistent_memory.delete_memory(
+            agent_id=request.agent_id,
+            memory_id=request.memory_id,
+            role_partition=request.user_role,
+        )
 
         return {"memory_id": request.memory_id, "status": "deleted"}
 
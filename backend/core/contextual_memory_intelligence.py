@@ -18,7 +18,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from backend.core.auto_esc_config import config
-from backend.core.enhanced_embedding_manager import EnhancedEmbeddingManager
+from backend.core.enhanced_embedding_manager import enhanced_embedding_manager
 from backend.vector.vector_integration import VectorIntegration
 
 Base = declarative_base()
@@ -91,8 +91,10 @@ class ContextualMemoryIntelligence:
         self.redis_client = None
         self.db_engine = None
         self.async_session = None
-        self.embedding_manager = EnhancedEmbeddingManager()
-        self.vector_integration = VectorIntegration()
+        self.embedding_manager = enhanced_embedding_manager
+        self.vector_integration = VectorIntegration(
+            embedding_manager=self.embedding_manager
+        )
         self._initialized = False
 
     async def initialize(self):
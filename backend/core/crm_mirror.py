@@ -0,0 +1,766 @@
+"""Local columnar mirror of HubSpot CRM objects
+Deals, contacts and companies are held as one numpy array per analytic column
+(amount, dates, dictionary-encoded pipeline and stage) next to each record's
+raw properties. Delta syncs and webhook events upsert records, and totals per
+pipeline and stage are adjusted on every change, so pipeline analytics never
+rescan the deals. On disk, each object type is an ``.npz`` snapshot and
+changes since the last snapshot are appended to a JSONL journal. Disk writes
+run in a worker thread when the mirror is flushed, never on the event loop.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CLOSED_WON = "closedwon"
+CLOSED_LOST = "closedlost"
+
+JOURNAL_FILE = "journal.jsonl"
+STATE_FILE = "state.json"
+
+
+@dataclass(frozen=True)
+class ObjectSchema:
+    """Which properties of an object type are mirrored, and how"""
+
+    modified_property: str
+    properties: Tuple[str, ...]
+    numeric: Tuple[str, ...] = ()
+    timestamps: Tuple[str, ...] = ()
+    categorical: Tuple[str, ...] = ()
+
+
+OBJECT_SCHEMAS: Dict[str, ObjectSchema] = {
+    "deals": ObjectSchema(
+        modified_property="hs_lastmodifieddate",
+        properties=(
+            "dealname",
+            "amount",
+            "dealstage",
+            "pipeline",
+            "closedate",
+            "createdate",
+            "hs_lastmodifieddate",
+        ),
+        numeric=("amount",),
+        timestamps=("closedate", "createdate"),
+        categorical=("pipeline", "dealstage"),
+    ),
+    "contacts": ObjectSchema(
+        modified_property="lastmodifieddate",
+        properties=(
+            "email",
+            "firstname",
+            "lastname",
+            "company",
+            "phone",
+            "lifecyclestage",
+            "createdate",
+            "lastmodifieddate",
+        ),
+        timestamps=("createdate",),
+        categorical=("lifecyclestage",),
+    ),
+    "companies": ObjectSchema(
+        modified_property="hs_lastmodifieddate",
+        properties=(
+            "name",
+            "domain",
+            "industry",
+            "numberofemployees",
+            "annualrevenue",
+            "createdate",
+            "hs_lastmodifieddate",
+        ),
+        numeric=("numberofemployees", "annualrevenue"),
+        timestamps=("createdate",),
+        categorical=("industry",),
+    ),
+}
+
+# Webhook subscription prefix -> mirrored object type
+WEBHOOK_OBJECT_TYPES = {"deal": "deals", "contact": "contacts", "company": "companies"}
+
+
+def parse_timestamp(value: Any) -> float:
+    """Epoch milliseconds from HubSpot's ISO or millisecond values; NaN if absent"""
+    if value is None or value == "":
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value)
+    if text.isdigit():
+        return float(text)
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return math.nan
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp() * 1000
+
+
+def parse_number(value: Any) -> float:
+    if value is None or value == "":
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _text(value: Any) -> str:
+    return "" if value is None else str(value).lower()
+
+
+def _in_values(value: Any, search_filter: Dict[str, Any]) -> bool:
+    return _text(value) in {_text(v) for v in search_filter.get("values", [])}
+
+
+def _difference(value: Any, target: Any) -> float:
+    # Numbers compare as numbers, dates as timestamps; NaN fails every check
+    difference = parse_number(value) - parse_number(target)
+    if math.isnan(difference):
+        difference = parse_timestamp(value) - parse_timestamp(target)
+    return difference
+
+
+_FILTER_OPERATORS: Dict[str, Callable[[Any, Dict[str, Any]], bool]] = {
+    "EQ": lambda value, f: _text(value) == _text(f.get("value")),
+    "NEQ": lambda value, f: _text(value) != _text(f.get("value")),
+    "HAS_PROPERTY": lambda value, f: value not in (None, ""),
+    "NOT_HAS_PROPERTY": lambda value, f: value in (None, ""),
+    "IN": lambda value, f: _in_values(value, f),
+    "NOT_IN": lambda value, f: not _in_values(value, f),
+    "GT": lambda value, f: _difference(value, f.get("value")) > 0,
+    "GTE": lambda value, f: _difference(value, f.get("value")) >= 0,
+    "LT": lambda value, f: _difference(value, f.get("value")) < 0,
+    "LTE": lambda value, f: _difference(value, f.get("value")) <= 0,
+}
+
+
+def compile_filters(
+    filters: Optional[Sequence[Dict[str, Any]]], available: Sequence[str]
+) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """Predicate over record properties equivalent to one HubSpot filter group
+
+    Returns None if a filter uses an operator or property the mirror cannot
+    evaluate, in which case the caller should ask the API instead.
+    """
+    checks = []
+    for search_filter in filters or []:
+        operator = _FILTER_OPERATORS.get(search_filter.get("operator"))
+        name = search_filter.get("propertyName")
+        if operator is None or name not in available:
+            return None
+        checks.append((name, operator, search_filter))
+    return lambda properties: all(
+        operator(properties.get(name), search_filter)
+        for name, operator, search_filter in checks
+    )
+
+
+class CRMTable:
+    """Columnar store of one object type
+
+    Rows are appended and updated in place; a deleted row stays a hole until
+    the next snapshot compacts it away. ``observers`` are called with
+    ``(table, row, -1)`` before a row changes and ``(table, row, 1)`` after.
+    """
+
+    def __init__(self, object_type: str, schema: ObjectSchema, capacity: int = 1024):
+        self.object_type = object_type
+        self.schema = schema
+        self.observers: List[Callable[["CRMTable", int, int], None]] = []
+        self._reset(capacity)
+
+    def _reset(self, capacity: int):
+        self.ids: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.properties: List[Optional[bytes]] = []  # JSON per row
+        self.categories: Dict[str, List[str]] = {
+            name: [] for name in self.schema.categorical
+        }
+        self._category_codes: Dict[str, Dict[str, int]] = {
+            name: {} for name in self.schema.categorical
+        }
+        self.live = np.zeros(capacity, dtype=bool)
+        self.modified = np.full(capacity, np.nan)
+        self.numeric = {
+            name: np.full(capacity, np.nan)
+            for name in self.schema.numeric + self.schema.timestamps
+        }
+        self.codes = {
+            name: np.full(capacity, -1, dtype=np.int32)
+            for name in self.schema.categorical
+        }
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _grow(self):
+        capacity = max(1024, 2 * len(self.live))
+
+        def grown(array: np.ndarray, fill) -> np.ndarray:
+            resized = np.full(capacity, fill, dtype=array.dtype)
+            resized[: len(array)] = array
+            return resized
+
+        self.live = grown(self.live, False)
+        self.modified = grown(self.modified, np.nan)
+        self.numeric = {name: grown(a, np.nan) for name, a in self.numeric.items()}
+        self.codes = {name: grown(a, -1) for name, a in self.codes.items()}
+
+    def _code(self, name: str, value: Any) -> int:
+        if value is None or value == "":
+            return -1
+        value = str(value)
+        codes = self._category_codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.categories[name])
+            self.categories[name].append(value)
+        return code
+
+    def category(self, name: str, row: int) -> Optional[str]:
+        code = self.codes[name][row]
+        return self.categories[name][code] if code >= 0 else None
+
+    def _notify(self, row: int, sign: int):
+        for observer in self.observers:
+            observer(self, row, sign)
+
+    @staticmethod
+    def _encode(properties: Dict[str, Any]) -> bytes:
+        return json.dumps(properties, separators=(",", ":")).encode("utf-8")
+
+    def _write_row(
+        self,
+        row: int,
+        properties: Dict[str, Any],
+        modified: float,
+        encoded: Optional[bytes] = None,
+    ):
+        self.live[row] = True
+        self.modified[row] = modified
+        for name in self.schema.numeric:
+            self.numeric[name][row] = parse_number(properties.get(name))
+        for name in self.schema.timestamps:
+            self.numeric[name][row] = parse_timestamp(properties.get(name))
+        for name in self.schema.categorical:
+            self.codes[name][row] = self._code(name, properties.get(name))
+        self.properties[row] = encoded or self._encode(properties)
+
+    def upsert(
+        self, object_id: str, properties: Dict[str, Any], modified: float
+    ) -> bool:
+        """Insert or replace a record; False if it is older than ours or the same"""
+        encoded = self._encode(properties)
+        row = self.rows.get(object_id)
+        if row is not None:
+            if modified < self.modified[row] or (
+                modified == self.modified[row] and encoded == self.properties[row]
+            ):
+                return False
+            self._notify(row, -1)
+        else:
+            row = len(self.ids)
+            if row == len(self.live):
+                self._grow()
+            self.ids.append(object_id)
+            self.properties.append(None)
+            self.rows[object_id] = row
+        self._write_row(row, properties, modified, encoded)
+        self._notify(row, 1)
+        return True
+
+    def patch(
+        self, object_id: str, name: str, value: Any, occurred_at: float
+    ) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Change one property of a known record; returns its new state"""
+        row = self.rows.get(object_id)
+        if (
+            row is None
+            or name not in self.schema.properties
+            or occurred_at < self.modified[row]
+        ):
+            return None
+        properties = json.loads(self.properties[row])
+        properties[name] = value
+        modified = float(np.fmax(self.modified[row], occurred_at))
+        self._notify(row, -1)
+        self._write_row(row, properties, modified)
+        self._notify(row, 1)
+        return properties, modified
+
+    def delete(self, object_id: str, occurred_at: float = math.nan) -> bool:
+        row = self.rows.get(object_id)
+        if row is None or occurred_at < self.modified[row]:
+            return False
+        self._notify(row, -1)
+        del self.rows[object_id]
+        self.ids[row] = None
+        self.properties[row] = None
+        self.live[row] = False
+        return True
+
+    def get(self, object_id: str) -> Optional[Dict[str, Any]]:
+        row = self.rows.get(object_id)
+        if row is None:
+            return None
+        return {"id": object_id, "properties": json.loads(self.properties[row])}
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        for object_id, row in self.rows.items():
+            yield {"id": object_id, "properties": json.loads(self.properties[row])}
+
+    def column(self, name: str) -> np.ndarray:
+        """Values of a numeric or timestamp column for live rows"""
+        count = len(self.ids)
+        return self.numeric[name][:count][self.live[:count]]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Live rows only, as arrays for ``np.savez``"""
+        live = np.flatnonzero(self.live[: len(self.ids)])
+        properties = [self.properties[row] for row in live]
+        offsets = np.zeros(len(properties) + 1, dtype=np.int64)
+        np.cumsum(
+            np.fromiter((len(p) for p in properties), np.int64, len(properties)),
+            out=offsets[1:],
+        )
+        arrays = {
+            "ids": np.array([self.ids[row] for row in live], dtype=str),
+            "modified": self.modified[live],
+            "properties": np.frombuffer(b"".join(properties), dtype=np.uint8),
+            "offsets": offsets,
+        }
+        for name, values in self.numeric.items():
+            arrays[f"num.{name}"] = values[live]
+        for name, codes in self.codes.items():
+            arrays[f"code.{name}"] = codes[live]
+            arrays[f"cat.{name}"] = np.array(self.categories[name], dtype=str)
+        return arrays
+
+    def load_arrays(self, arrays: Dict[str, np.ndarray]):
+        """Replace the contents with a ``to_arrays`` snapshot"""
+        ids = [str(object_id) for object_id in arrays["ids"]]
+        count = len(ids)
+        self._reset(max(1024, 2 * count))
+        self.ids = ids
+        self.rows = {object_id: row for row, object_id in enumerate(ids)}
+        blob = arrays["properties"].tobytes()
+        offsets = arrays["offsets"]
+        self.properties = [blob[offsets[i] : offsets[i + 1]] for i in range(count)]
+        self.live[:count] = True
+        self.modified[:count] = arrays["modified"]
+
+        columns = [f"num.{name}" for name in self.numeric]
+        columns += [f"code.{name}" for name in self.codes]
+        columns += [f"cat.{name}" for name in self.codes]
+        if all(column in arrays for column in columns):
+            for name in self.numeric:
+                self.numeric[name][:count] = arrays[f"num.{name}"]
+            for name in self.codes:
+                self.codes[name][:count] = arrays[f"code.{name}"]
+                self.categories[name] = [str(c) for c in arrays[f"cat.{name}"]]
+                self._category_codes[name] = {
+                    value: code for code, value in enumerate(self.categories[name])
+                }
+        else:
+            # Snapshot from an older schema: derive the columns again
+            for row in range(count):
+                self._write_row(
+                    row, json.loads(self.properties[row]), self.modified[row]
+                )
+
+    def compact(self):
+        """Drop the holes left by deleted rows"""
+        if len(self.rows) < len(self.ids):
+            self.load_arrays(self.to_arrays())
+
+
+class PipelineAggregates:
+    """Deal count and amount per (pipeline, stage), kept current on change"""
+
+    def __init__(self):
+        self.totals: Dict[Tuple[str, str], List[float]] = {}
+
+    @staticmethod
+    def _amount(table: CRMTable, row: int) -> float:
+        amount = table.numeric["amount"][row]
+        return 0.0 if math.isnan(amount) else float(amount)
+
+    def apply(self, table: CRMTable, row: int, sign: int):
+        key = (
+            table.category("pipeline", row) or "",
+            table.category("dealstage", row) or "",
+        )
+        bucket = self.totals.setdefault(key, [0, 0.0])
+        bucket[0] += sign
+        bucket[1] += sign * self._amount(table, row)
+        if bucket[0] <= 0:
+            # Also resets any float drift in the running amount
+            del self.totals[key]
+
+    def rebuild(self, table: CRMTable):
+        """Recompute every bucket from the deals table"""
+        self.totals.clear()
+        count = len(table.ids)
+        live = table.live[:count]
+        if not live.any():
+            return
+        pairs = np.stack(
+            [
+                table.codes["pipeline"][:count][live],
+                table.codes["dealstage"][:count][live],
+            ],
+            axis=1,
+        )
+        amounts = np.nan_to_num(table.numeric["amount"][:count][live])
+        keys, inverse = np.unique(pairs, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        counts = np.bincount(inverse)
+        values = np.bincount(inverse, weights=amounts)
+        for (pipeline, stage), deals, value in zip(keys, counts, values):
+            key = (
+                table.categories["pipeline"][pipeline] if pipeline >= 0 else "",
+                table.categories["dealstage"][stage] if stage >= 0 else "",
+            )
+            bucket = self.totals.setdefault(key, [0, 0.0])
+            bucket[0] += int(deals)
+            bucket[1] += float(value)
+
+    def analytics(self, pipeline_id: str = None) -> Dict[str, Any]:
+        """Pipeline totals, win rate and a per-stage breakdown"""
+        total_count = won_count = lost_count = open_count = 0
+        total_value = won_value = open_value = 0.0
+        stages: Dict[str, Dict[str, float]] = {}
+        for (pipeline, stage), (count, value) in self.totals.items():
+            if pipeline_id and pipeline != pipeline_id:
+                continue
+            stage_totals = stages.setdefault(stage, {"count": 0, "value": 0.0})
+            stage_totals["count"] += count
+            stage_totals["value"] += value
+            total_count += count
+            total_value += value
+            if stage == CLOSED_WON:
+                won_count += count
+                won_value += value
+            elif stage == CLOSED_LOST:
+                lost_count += count
+            else:
+                open_count += count
+                open_value += value
+
+        return {
+            "pipeline_id": pipeline_id,
+            "total_deals": total_count,
+            "total_value": total_value,
+            "closed_won_count": won_count,
+            "closed_won_value": won_value,
+            "closed_lost_count": lost_count,
+            "open_deals_count": open_count,
+            "open_deals_value": open_value,
+            "win_rate": (
+                won_count / (won_count + lost_count) if (won_count or lost_count) else 0
+            ),
+            "average_deal_size": total_value / total_count if total_count else 0,
+            "stages": stages,
+        }
+
+
+class CRMMirror:
+    """Deals, contacts and companies mirrored under ``directory``
+
+    Every applied change is queued for the journal and written by ``flush``;
+    once the journal holds ``journal_max_records`` entries, the tables are
+    written out as snapshots and the journal starts over. ``directory=None``
+    keeps the mirror in memory only. Not thread-safe: use it from the event
+    loop.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        journal_max_records: int = 50_000,
+        fsync: bool = False,
+    ):
+        self.directory = Path(directory) if directory else None
+        self.journal_max_records = journal_max_records
+        self.fsync = fsync
+        self.tables = {
+            object_type: CRMTable(object_type, schema)
+            for object_type, schema in OBJECT_SCHEMAS.items()
+        }
+        self.pipelines = PipelineAggregates()
+        self.tables["deals"].observers.append(self.pipelines.apply)
+        # Highest modification time synced (ms) and when the sync ran, per type
+        self.watermarks: Dict[str, float] = {}
+        self.synced_at: Dict[str, float] = {}
+        self._journal_records = 0
+        # Encoded journal lines not yet written, and one writer at a time
+        self._pending: List[bytes] = []
+        self._write_lock = asyncio.Lock()
+
+        if self.directory is not None:
+            self._load()
+
+    # Changes
+
+    def upsert(self, object_type: str, records: Sequence[Dict[str, Any]]) -> int:
+        """Apply API records (``id`` and ``properties``); returns how many changed"""
+        table = self.tables[object_type]
+        schema = table.schema
+        entries = []
+        for record in records:
+            properties = record.get("properties") or {}
+            kept = {
+                name: properties[name]
+                for name in schema.properties
+                if name in properties
+            }
+            modified = parse_timestamp(
+                properties.get(schema.modified_property) or record.get("updatedAt")
+            )
+            object_id = str(record["id"])
+            if table.upsert(object_id, kept, modified):
+                entries.append(
+                    {
+                        "op": "upsert",
+                        "type": object_type,
+                        "id": object_id,
+                        "properties": kept,
+                        "modified": modified,
+                    }
+                )
+        self._journal(entries)
+        return len(entries)
+
+    def patch(
+        self,
+        object_type: str,
+        object_id: str,
+        property_name: str,
+        value: Any,
+        occurred_at: float,
+    ) -> bool:
+        changed = self.tables[object_type].patch(
+            object_id, property_name, value, occurred_at
+        )
+        if changed is None:
+            return False
+        properties, modified = changed
+        self._journal(
+            [
+                {
+                    "op": "upsert",
+                    "type": object_type,
+                    "id": object_id,
+                    "properties": properties,
+                    "modified": modified,
+                }
+            ]
+        )
+        return True
+
+    def delete(
+        self, object_type: str, object_id: str, occurred_at: float = math.nan
+    ) -> bool:
+        if not self.tables[object_type].delete(object_id, occurred_at):
+            return False
+        self._journal(
+            [{"op": "delete", "type": object_type, "id": object_id, "at": occurred_at}]
+        )
+        return True
+
+    def apply_webhook_event(self, event: Dict[str, Any]) -> bool:
+        """Apply a HubSpot webhook event; False if it changed nothing"""
+        object_name, _, action = event.get("subscriptionType", "").partition(".")
+        object_type = WEBHOOK_OBJECT_TYPES.get(object_name)
+        if object_type is None or event.get("objectId") is None:
+            return False
+        object_id = str(event["objectId"])
+        occurred_at = parse_timestamp(event.get("occurredAt"))
+        if action == "deletion":
+            return self.delete(object_type, object_id, occurred_at)
+        if action == "propertyChange":
+            return self.patch(
+                object_type,
+                object_id,
+                event.get("propertyName"),
+                event.get("propertyValue"),
+                occurred_at,
+            )
+        # Creations, merges and restores carry no properties; the next delta
+        # sync picks those records up by modification time
+        return False
+
+    def complete_sync(self, object_type: str, watermark: float, started_at: float):
+        """Record that everything modified up to ``watermark`` is mirrored"""
+        self.watermarks[object_type] = watermark
+        self.synced_at[object_type] = started_at
+        self._journal(
+            [
+                {
+                    "op": "sync",
+                    "type": object_type,
+                    "watermark": watermark,
+                    "synced_at": started_at,
+                }
+            ]
+        )
+
+    # Queries
+
+    def staleness(self, object_type: str) -> float:
+        """Seconds since the last completed sync; infinite if never synced"""
+        synced_at = self.synced_at.get(object_type)
+        return math.inf if synced_at is None else time.time() - synced_at
+
+    def pipeline_analytics(self, pipeline_id: str = None) -> Dict[str, Any]:
+        return self.pipelines.analytics(pipeline_id)
+
+    def records(
+        self,
+        object_type: str,
+        predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        for record in self.tables[object_type].records():
+            if predicate is None or predicate(record["properties"]):
+                yield record
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "directory": str(self.directory) if self.directory else None,
+            "objects": {name: len(table) for name, table in self.tables.items()},
+            "watermarks": dict(self.watermarks),
+            "staleness_seconds": {name: self.staleness(name) for name in self.tables},
+            "journal_records": self._journal_records,
+            "pending_journal_records": len(self._pending),
+            "pipeline_stages": len(self.pipelines.totals),
+        }
+
+    # Persistence
+
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+
+    def _apply_entry(self, entry: Dict[str, Any]):
+        table = self.tables.get(entry.get("type"))
+        if table is None:
+            return
+        op = entry.get("op")
+        if op == "upsert":
+            table.upsert(entry["id"], entry["properties"], entry["modified"])
+        elif op == "delete":
+            table.delete(entry["id"], entry.get("at", math.nan))
+        elif op == "sync":
+            self.watermarks[entry["type"]] = entry["watermark"]
+            self.synced_at[entry["type"]] = entry["synced_at"]
+
+    def _load(self):
+        for object_type, table in self.tables.items():
+            path = self._path(f"{object_type}.npz")
+            if path.exists():
+                with np.load(path, allow_pickle=False) as arrays:
+                    table.load_arrays(dict(arrays))
+
+        state_path = self._path(STATE_FILE)
+        if state_path.exists():
+            with open(state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            self.watermarks = state.get("watermarks", {})
+            self.synced_at = state.get("synced_at", {})
+
+        journal_path = self._path(JOURNAL_FILE)
+        if journal_path.exists():
+            with open(journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn final write
+                    self._apply_entry(entry)
+                    self._journal_records += 1
+
+        self.pipelines.rebuild(self.tables["deals"])
+        counts = {name: len(table) for name, table in self.tables.items()}
+        logger.info(f"Loaded CRM mirror from {self.directory}: {counts}")
+
+    def _journal(self, entries: List[Dict[str, Any]]):
+        if self.directory is None:
+            return
+        self._pending.extend((json.dumps(e) + "\n").encode("utf-8") for e in entries)
+
+    async def flush(self):
+        """Write queued journal entries, then snapshot if the journal is full"""
+        if self.directory is None:
+            return
+        async with self._write_lock:
+            lines, self._pending = self._pending, []
+            if lines:
+                await asyncio.to_thread(self._append_journal, lines)
+                self._journal_records += len(lines)
+            if self._journal_records >= self.journal_max_records:
+                await self._snapshot()
+
+    async def snapshot(self):
+        """Write every table and the sync state, then start a new journal
+
+        Each file is replaced atomically. A crash part way through leaves the
+        old journal in place, and replaying it over newer snapshots is
+        harmless because older changes never overwrite newer ones.
+        """
+        if self.directory is None:
+            return
+        async with self._write_lock:
+            await self._snapshot()
+
+    async def _snapshot(self):
+        # Copy the tables on the loop; changes made while the files are written
+        # stay queued and go into the new journal
+        arrays = {}
+        for object_type, table in self.tables.items():
+            table.compact()
+            arrays[object_type] = table.to_arrays()
+        state = {"watermarks": dict(self.watermarks), "synced_at": dict(self.synced_at)}
+        await asyncio.to_thread(self._write_snapshot, arrays, state)
+        self._journal_records = 0
+
+    def _append_journal(self, lines: List[bytes]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._path(JOURNAL_FILE), "ab") as f:
+            f.write(b"".join(lines))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def _write_snapshot(
+        self, arrays: Dict[str, Dict[str, np.ndarray]], state: Dict[str, Any]
+    ):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for object_type, table_arrays in arrays.items():
+            path = self._path(f"{object_type}.npz")
+            tmp_path = path.with_suffix(".npz.tmp")
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **table_arrays)
+            os.replace(tmp_path, path)
+
+        state_path = self._path(STATE_FILE)
+        tmp_path = state_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+
+        open(self._path(JOURNAL_FILE), "wb").close()
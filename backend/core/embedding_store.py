@@ -0,0 +1,261 @@
+"""Memory-mapped on-disk embedding store for Sophia AI
+Stores embeddings as fixed-width float32 records keyed by content hash, one
+append-only file per model, so every worker process can share a single warm
+cache that survives restarts and deploys.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def record_dtype(dimension: int) -> np.dtype:
+    """Fixed-width record layout: key digest, write time, vector"""
+    return np.dtype(
+        [("key", "S32"), ("created_at", "<f8"), ("vector", "<f4", (dimension,))]
+    )
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """``os.write`` until every byte is written; it may write fewer"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+class MmapEmbeddingStore:
+    """Append-only, memory-mapped embedding file for a single model
+
+    Writers append whole records under an exclusive ``flock`` so concurrent
+    workers never interleave. Readers map the file read-only and pick up
+    records appended by other processes when a lookup misses. Once the file
+    exceeds ``max_records`` it is compacted to the most recent half and
+    atomically replaced; other processes notice the new inode and remap.
+    """
+
+    def __init__(self, directory: str, model: str, dimension: int, max_records: int):
+        self.directory = directory
+        self.model = model
+        self.dimension = dimension
+        self.max_records = max_records
+        self.dtype = record_dtype(dimension)
+        self.path = os.path.join(directory, "vectors.bin")
+        self.lock_path = os.path.join(directory, "vectors.lock")
+
+        self._records: Optional[np.memmap] = None
+        self._index: Dict[bytes, int] = {}
+        self._inode: Optional[int] = None
+        self._count = 0
+
+    @staticmethod
+    def digest(content_hash: str) -> bytes:
+        return hashlib.sha256(content_hash.encode()).digest()
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def refresh(self) -> None:
+        """Map records written since the last refresh, remapping if compacted"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._records, self._index, self._inode, self._count = None, {}, None, 0
+            return
+
+        # Ignore a torn trailing record left by a crashed writer
+        count = stat.st_size // self.dtype.itemsize
+        if stat.st_ino == self._inode and count == self._count:
+            return
+
+        if stat.st_ino != self._inode:
+            self._index = {}
+            self._count = 0
+            self._inode = stat.st_ino
+
+        if count == 0:
+            self._records = None
+            return
+
+        self._records = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(count,))
+        for row, key in enumerate(self._records["key"][self._count :], self._count):
+            # numpy drops trailing NUL bytes from "S" fields; restore the digest
+            self._index[bytes(key).ljust(32, b"\0")] = row
+        self._count = count
+
+    def get(self, content_hash: str) -> Optional[np.ndarray]:
+        """Return the stored vector for ``content_hash`` or None"""
+        key = self.digest(content_hash)
+        row = self._index.get(key)
+        if row is None:
+            self.refresh()
+            row = self._index.get(key)
+            if row is None:
+                return None
+        return np.array(self._records["vector"][row])
+
+    def __contains__(self, content_hash: str) -> bool:
+        return self.digest(content_hash) in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def put(self, content_hash: str, vector, created_at: float) -> bool:
+        """Append a record; returns False if it was already stored"""
+        return self.put_many([(content_hash, vector, created_at)]) == 1
+
+    def put_many(self, records: Sequence[Tuple[str, object, float]]) -> int:
+        """Append records not stored yet in one write; returns how many"""
+        pending: Dict[bytes, Tuple[object, float]] = {}
+        for content_hash, vector, created_at in records:
+            key = self.digest(content_hash)
+            if key not in self._index:
+                pending[key] = (vector, created_at)
+        if not pending:
+            return 0
+
+        with self._locked(exclusive=True):
+            self.refresh()
+            keys = [key for key in pending if key not in self._index]
+            if not keys:
+                return 0
+
+            batch = np.zeros(len(keys), dtype=self.dtype)
+            batch["key"] = keys
+            batch["created_at"] = [pending[key][1] for key in keys]
+            batch["vector"] = np.asarray(
+                [pending[key][0] for key in keys], dtype=np.float32
+            )
+
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                self._truncate_torn_tail(fd)
+                _write_all(fd, batch.tobytes())
+            finally:
+                os.close(fd)
+
+            if self._count + len(keys) > self.max_records:
+                self._compact()
+            self.refresh()
+        return len(keys)
+
+    def _truncate_torn_tail(self, fd: int) -> None:
+        # Caller holds the exclusive lock; a partial record left by a crashed
+        # writer would otherwise shift every record appended after it
+        size = os.fstat(fd).st_size
+        torn = size % self.dtype.itemsize
+        if torn:
+            logger.warning(
+                f"Dropping {torn} trailing bytes of a torn record in {self.path}"
+            )
+            os.ftruncate(fd, size - torn)
+
+    def _compact(self) -> None:
+        # Caller holds the exclusive lock
+        self.refresh()
+        if self._records is None:
+            return
+
+        keep = max(self.max_records // 2, 1)
+        rows = sorted(self._index.values())[-keep:]
+        tmp_path = f"{self.path}.tmp"
+        self._records[rows].tofile(tmp_path)
+        os.replace(tmp_path, self.path)
+        logger.info(
+            f"Compacted embedding store for {self.model} to {len(rows)} records"
+        )
+
+
+class EmbeddingDiskCache:
+    """Directory of per-model ``MmapEmbeddingStore`` files
+
+    Every method does blocking file I/O (and writes may compact a large
+    file), so async callers run them via ``asyncio.to_thread``. A lock keeps
+    threads in one process from racing on a store's index.
+    """
+
+    def __init__(self, root: str, max_records_per_model: int = 1_000_000):
+        self.root = root
+        self.max_records_per_model = max_records_per_model
+        self._stores: Dict[str, MmapEmbeddingStore] = {}
+        self._lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+
+    def _model_directory(self, model: str) -> str:
+        slug = re.sub(r"[^A-Za-z0-9_.-]", "_", model)
+        return os.path.join(self.root, slug)
+
+    def store(
+        self, model: str, dimension: Optional[int] = None
+    ) -> Optional[MmapEmbeddingStore]:
+        """Open the store for ``model``, creating it when ``dimension`` is given"""
+        with self._lock:
+            return self._open(model, dimension)
+
+    def _open(
+        self, model: str, dimension: Optional[int]
+    ) -> Optional[MmapEmbeddingStore]:
+        store = self._stores.get(model)
+        if store is not None:
+            return store
+
+        directory = self._model_directory(model)
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                dimension = json.load(f)["dimension"]
+        elif dimension is None:
+            return None
+        else:
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"model": model, "dimension": dimension}, f)
+            os.replace(tmp_path, meta_path)
+
+        store = MmapEmbeddingStore(
+            directory, model, dimension, self.max_records_per_model
+        )
+        store.refresh()
+        self._stores[model] = store
+        return store
+
+    def get_many(
+        self, model: str, content_hashes: Sequence[str]
+    ) -> Dict[str, np.ndarray]:
+        """Stored vectors for the given hashes of ``model``'s embeddings"""
+        with self._lock:
+            store = self._open(model, None)
+            if store is None:
+                return {}
+            found = {}
+            for content_hash in content_hashes:
+                vector = store.get(content_hash)
+                if vector is not None:
+                    found[content_hash] = vector
+            return found
+
+    def put_many(
+        self, model: str, records: Sequence[Tuple[str, np.ndarray, float]]
+    ) -> int:
+        """Persist ``(content_hash, vector, created_at)`` records for ``model``"""
+        if not records:
+            return 0
+        with self._lock:
+            store = self._open(model, len(records[0][1]))
+            return store.put_many(records)
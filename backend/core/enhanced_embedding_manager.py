@@ -5,9 +5,11 @@ Manages text embeddings with caching and multiple model support.
 import asyncio
 import hashlib
 import logging
+import os
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 
@@ -29,6 +31,7 @@ except ImportError:
     openai = None
 
 from backend.core.auto_esc_config import config
+from backend.core.embedding_store import EmbeddingDiskCache
 
 logger = logging.getLogger(__name__)
 
@@ -53,30 +56,165 @@ class EmbeddingResult:
 
 
 class EmbeddingCache:
-    """Simple in-memory cache for embeddings"""
-
-    def __init__(self, ttl_seconds: int = 3600):
-        self.cache: Dict[str, Tuple[List[float], EmbeddingMetadata, datetime]] = {}
-        self.ttl = timedelta(seconds=ttl_seconds)
-
-    def get(self, key: str) -> Optional[EmbeddingResult]:
-        """Get embedding from cache if not expired"""
-        if key in self.cache:
-            embedding, metadata, cached_at = self.cache[key]
-            if datetime.now() - cached_at < self.ttl:
-                return EmbeddingResult(embedding=embedding, metadata=metadata)
-            else:
-                # Remove expired entry
-                del self.cache[key]
+    """Tiered embedding cache: byte-bounded in-process LRU over a shared disk store
+
+    The memory tier holds float32 vectors in an ``OrderedDict`` and evicts the
+    least recently used entries once ``max_memory_bytes`` is exceeded. Misses
+    fall through to a memory-mapped ``EmbeddingDiskCache`` shared by every
+    worker process, so identical content is embedded once per model rather
+    than once per process lifetime.
+    """
+
+    # Rough per-entry overhead of the key, metadata and dict slot
+    ENTRY_OVERHEAD_BYTES = 256
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[int] = None,
+        max_memory_bytes: int = 256 * 1024 * 1024,
+        disk_path: Optional[str] = None,
+    ):
+        # key -> (vector, metadata, cached_at), least recently used first
+        self.cache: OrderedDict = OrderedDict()
+        self.ttl = timedelta(seconds=ttl_seconds) if ttl_seconds else None
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        self.disk: Optional[EmbeddingDiskCache] = None
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+        if disk_path:
+            try:
+                self.disk = EmbeddingDiskCache(disk_path)
+            except OSError as e:
+                logger.warning(f"Embedding disk cache disabled ({disk_path}): {e}")
+
+    @staticmethod
+    def _split_key(key: str) -> Tuple[str, str]:
+        model, _, content_hash = key.rpartition(":")
+        return model, content_hash
+
+    def _entry_bytes(self, vector: np.ndarray) -> int:
+        return vector.nbytes + self.ENTRY_OVERHEAD_BYTES
+
+    def _remember(self, key: str, vector: np.ndarray, metadata: EmbeddingMetadata):
+        previous = self.cache.pop(key, None)
+        if previous is not None:
+            self.memory_bytes -= self._entry_bytes(previous[0])
+
+        self.cache[key] = (vector, metadata, datetime.now())
+        self.memory_bytes += self._entry_bytes(vector)
+
+        while self.memory_bytes > self.max_memory_bytes and len(self.cache) > 1:
+            _, (evicted, _, _) = self.cache.popitem(last=False)
+            self.memory_bytes -= self._entry_bytes(evicted)
+            self.stats["evictions"] += 1
+
+    def _memory_get(self, key: str) -> Optional[EmbeddingResult]:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        vector, metadata, cached_at = entry
+        if self.ttl is None or datetime.now() - cached_at < self.ttl:
+            self.cache.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return EmbeddingResult(embedding=vector.tolist(), metadata=metadata)
+
+        # Remove expired entry
+        del self.cache[key]
+        self.memory_bytes -= self._entry_bytes(vector)
         return None
 
-    def set(self, key: str, result: EmbeddingResult):
-        """Store embedding in cache"""
-        self.cache[key] = (result.embedding, result.metadata, datetime.now())
+    async def get(self, key: str) -> Optional[EmbeddingResult]:
+        """Get embedding from memory, then disk; None on a miss"""
+        return (await self.get_many([key])).get(key)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, EmbeddingResult]:
+        """Look up keys in memory, then the misses on disk in one pass per model"""
+        found: Dict[str, EmbeddingResult] = {}
+        disk_lookups: Dict[str, Dict[str, str]] = {}
+        for key in keys:
+            result = self._memory_get(key)
+            if result is not None:
+                found[key] = result
+            elif self.disk is not None:
+                model, content_hash = self._split_key(key)
+                disk_lookups.setdefault(model, {})[content_hash] = key
+
+        for model, hash_keys in disk_lookups.items():
+            try:
+                vectors = await asyncio.to_thread(
+                    self.disk.get_many, model, list(hash_keys)
+                )
+            except (OSError, ValueError) as e:
+                logger.warning(f"Embedding disk cache read failed: {e}")
+                continue
+
+            for content_hash, vector in vectors.items():
+                key = hash_keys[content_hash]
+                metadata = EmbeddingMetadata(
+                    model=model,
+                    dimension=len(vector),
+                    content_hash=content_hash,
+                    created_at=datetime.now(),
+                )
+                self._remember(key, vector, metadata)
+                self.stats["disk_hits"] += 1
+                found[key] = EmbeddingResult(
+                    embedding=vector.tolist(), metadata=metadata
+                )
+
+        self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    async def set(self, key: str, result: EmbeddingResult):
+        """Store embedding in memory and persist it to the disk tier"""
+        await self.set_many([(key, result)])
+
+    async def set_many(self, items: List[Tuple[str, EmbeddingResult]]):
+        """Store embeddings in memory and persist them in one write per model"""
+        disk_records: Dict[str, List[Tuple[str, np.ndarray, float]]] = {}
+        for key, result in items:
+            vector = np.asarray(result.embedding, dtype=np.float32)
+            self._remember(key, vector, result.metadata)
+            self.stats["writes"] += 1
+
+            # Disk records are filed under the model that actually produced the
+            # vector, so fallback embeddings never answer for the real model
+            if self.disk is not None:
+                _, content_hash = self._split_key(key)
+                disk_records.setdefault(result.metadata.model, []).append(
+                    (content_hash, vector, result.metadata.created_at.timestamp())
+                )
+
+        for model, records in disk_records.items():
+            try:
+                await asyncio.to_thread(self.disk.put_many, model, records)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Embedding disk cache write failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit-rate and size statistics for both tiers"""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.cache),
+            "memory_bytes": self.memory_bytes,
+            "max_memory_bytes": self.max_memory_bytes,
+            "disk_enabled": self.disk is not None,
+        }
 
     def clear(self):
-        """Clear all cached embeddings"""
+        """Clear the in-process tier (the shared disk tier is left intact)"""
         self.cache.clear()
+        self.memory_bytes = 0
 
 
 class EnhancedEmbeddingManager:
@@ -85,8 +223,15 @@ class EnhancedEmbeddingManager:
     def __init__(self):
         self.sentence_transformer = None
         self.openai_client = None
-        self.cache = EmbeddingCache()
+        self.cache = EmbeddingCache(
+            max_memory_bytes=int(
+                os.getenv("EMBEDDING_CACHE_MEMORY_BYTES", str(256 * 1024 * 1024))
+            ),
+            disk_path=os.getenv("EMBEDDING_CACHE_DIR", "./cache/embeddings"),
+        )
         self.default_model = "all-MiniLM-L6-v2"
+        self.batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+        self.openai_batch_size = int(os.getenv("OPENAI_EMBEDDING_BATCH_SIZE", "512"))
         self.initialized = False
 
     async def initialize(self):
@@ -138,7 +283,7 @@ class EnhancedEmbeddingManager:
 
         # Check cache
         if use_cache:
-            cached_result = self.cache.get(cache_key)
+            cached_result = await self.cache.get(cache_key)
             if cached_result:
                 logger.debug(f"Using cached embedding for hash {content_hash[:8]}")
                 return cached_result.embedding, cached_result.metadata
@@ -157,7 +302,7 @@ class EnhancedEmbeddingManager:
         # Cache the result
         if use_cache:
             result = EmbeddingResult(embedding=embedding, metadata=metadata)
-            self.cache.set(cache_key, result)
+            await self.cache.set(cache_key, result)
 
         return embedding, metadata
 
@@ -240,17 +385,158 @@ class EnhancedEmbeddingManager:
         return embedding, metadata
 
     async def generate_batch_embeddings(
-        self, texts: List[str], model: Optional[str] = None, use_cache: bool = True
+        self,
+        texts: List[str],
+        model: Optional[str] = None,
+        use_cache: bool = True,
+        batch_size: Optional[int] = None,
     ) -> List[Tuple[List[float], EmbeddingMetadata]]:
-        """Generate embeddings for multiple texts"""
+        """Generate embeddings for multiple texts
+
+        Identical texts are embedded once, cache hits are served directly and
+        the remaining misses are sent to the model in batches. Results are
+        returned in input order.
+        """
+        if not self.initialized:
+            await self.initialize()
+
+        model = model or self.default_model
+        results: List[Optional[Tuple[List[float], EmbeddingMetadata]]] = [None] * len(
+            texts
+        )
+
+        positions: Dict[str, List[int]] = {}
+        for position, text in enumerate(texts):
+            positions.setdefault(text, []).append(position)
+
+        cache_keys = {
+            text: f"{model}:{self._compute_content_hash(text)}" for text in positions
+        }
+        cached = (
+            await self.cache.get_many(list(cache_keys.values())) if use_cache else {}
+        )
+
+        misses: List[str] = []
+        for text, text_positions in positions.items():
+            cached_result = cached.get(cache_keys[text])
+            if cached_result:
+                for position in text_positions:
+                    results[position] = (
+                        cached_result.embedding,
+                        cached_result.metadata,
+                    )
+            else:
+                misses.append(text)
+
+        if misses:
+            generated = await self._generate_embeddings(misses, model, batch_size)
+            for text, (embedding, metadata) in zip(misses, generated):
+                for position in positions[text]:
+                    results[position] = (embedding, metadata)
+            if use_cache:
+                await self.cache.set_many(
+                    [
+                        (
+                            f"{model}:{metadata.content_hash}",
+                            EmbeddingResult(embedding=embedding, metadata=metadata),
+                        )
+                        for embedding, metadata in generated
+                    ]
+                )
+
+        logger.debug(
+            f"Batch embeddings: {len(texts)} texts, {len(positions)} unique, "
+            f"{len(misses)} generated"
+        )
+        return results
+
+    async def _generate_embeddings(
+        self, texts: List[str], model: str, batch_size: Optional[int] = None
+    ) -> List[Tuple[List[float], EmbeddingMetadata]]:
+        """Generate embeddings for cache misses in model-sized batches"""
+        results: List[Tuple[List[float], EmbeddingMetadata]] = []
+
+        if model == "text-embedding-ada-002" and self.openai_client:
+            batch_size = batch_size or self.openai_batch_size
+            for start in range(0, len(texts), batch_size):
+                results.extend(
+                    await self._generate_openai_embeddings(
+                        texts[start : start + batch_size], model
+                    )
+                )
+        elif self.sentence_transformer:
+            batch_size = batch_size or self.batch_size
+            # Hand the model several batches per call to amortize thread hops
+            chunk_size = batch_size * 8
+            for start in range(0, len(texts), chunk_size):
+                results.extend(
+                    await self._generate_sentence_transformer_embeddings(
+                        texts[start : start + chunk_size], model, batch_size
+                    )
+                )
+        else:
+            for text in texts:
+                results.append(await self._generate_random_embedding(text, model))
+
+        return results
+
+    async def _generate_sentence_transformer_embeddings(
+        self, texts: List[str], model: str, batch_size: int
+    ) -> List[Tuple[List[float], EmbeddingMetadata]]:
+        """Encode a batch with sentence transformers off the event loop"""
+        try:
+            embeddings = await asyncio.to_thread(
+                self.sentence_transformer.encode,
+                texts,
+                batch_size=batch_size,
+                convert_to_numpy=True,
+            )
+        except Exception as e:
+            logger.error(f"Failed to generate sentence transformer embeddings: {e}")
+            raise
+
+        created_at = datetime.now()
         results = []
+        for text, embedding in zip(texts, embeddings):
+            embedding_list = embedding.tolist()
+            metadata = EmbeddingMetadata(
+                model=model,
+                dimension=len(embedding_list),
+                content_hash=self._compute_content_hash(text),
+                created_at=created_at,
+                token_count=len(text.split()),  # Approximate
+            )
+            results.append((embedding_list, metadata))
+        return results
 
-        for text in texts:
-            embedding, metadata = await self.generate_text_embedding(
-                text=text, model=model, use_cache=use_cache
+    async def _generate_openai_embeddings(
+        self, texts: List[str], model: str
+    ) -> List[Tuple[List[float], EmbeddingMetadata]]:
+        """Embed a batch with a single multi-input OpenAI request"""
+        try:
+            response = await asyncio.to_thread(
+                self.openai_client.Embedding.create, input=texts, model=model
             )
-            results.append((embedding, metadata))
+        except Exception as e:
+            logger.error(f"Failed to generate OpenAI embeddings: {e}")
+            raise
 
+        # The API reports each vector's input position; do not rely on order
+        data = sorted(response["data"], key=lambda item: item["index"])
+        total_tokens = response.get("usage", {}).get("total_tokens")
+        created_at = datetime.now()
+
+        results = []
+        for text, item in zip(texts, data):
+            embedding = item["embedding"]
+            metadata = EmbeddingMetadata(
+                model=model,
+                dimension=len(embedding),
+                content_hash=self._compute_content_hash(text),
+                created_at=created_at,
+                token_count=total_tokens // len(texts) if total_tokens else None,
+            )
+            results.append((embedding, metadata))
         return results
 
     def clear_cache(self):
@@ -258,6 +544,10 @@ class EnhancedEmbeddingManager:
         self.cache.clear()
         logger.info("Cleared embedding cache")
 
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get embedding cache hit-rate statistics"""
+        return self.cache.get_stats()
+
     async def get_available_models(self) -> List[str]:
         """Get list of available embedding models"""
         models = []
@@ -5,16 +5,27 @@ Implements L1 (Memory), L2 (Redis), and L3 (Database) caching for optimal perfor
 
 import asyncio
 import json
+import os
+import sys
 import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 import aioredis
-from cachetools import TTLCache
 from pydantic import BaseModel, Field
 
 from backend.core.auto_esc_config import config
+from backend.core.cache_invalidation import (
+    InvalidationBus,
+    InvalidationMessage,
+    RedisInvalidationBus,
+)
+from backend.core.cache_store import SQLiteCacheStore
+from backend.core.hot_keys import HotKeyTracker
+from backend.core.single_flight import SingleFlight, should_refresh_early
 from backend.monitoring.observability import logger
 
 
@@ -70,27 +81,122 @@ class CacheEntry(BaseModel):
         return datetime.utcnow() > expiry
 
 
+class MemoryTier:
+    """Byte-bounded LRU of live cache envelopes
+
+    Values are kept as the Python objects that were cached, so an L1 hit is a
+    dict lookup rather than a JSON parse; callers must treat returned values
+    as read-only. Entries are evicted least recently used first once either
+    ``max_entries`` or ``max_bytes`` is exceeded. Sizes are the length of the
+    envelope's JSON encoding, which the L2 write produces anyway. Tagged
+    envelopes are indexed so a tag can be invalidated without a scan.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        # key -> (envelope, size_bytes, evict_at), least recently used first
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = (
+            OrderedDict()
+        )
+        self._tags: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        envelope, _, evict_at = entry
+        if time.time() >= evict_at:
+            self.pop(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return envelope
+
+    def set(self, key: str, envelope: Dict[str, Any], size: int, evict_at: float):
+        self.pop(key)
+        self._entries[key] = (envelope, size, evict_at)
+        self.bytes += size
+        for tag in envelope.get("tags") or ():
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self.bytes > self.max_bytes
+        ):
+            self.pop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def pop(self, key: str, older_than: Optional[int] = None) -> bool:
+        """Remove ``key``; with ``older_than``, only a copy written before it"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+
+        envelope = entry[0]
+        if older_than is not None and envelope.get("version", 0) >= older_than:
+            return False
+
+        del self._entries[key]
+        self.bytes -= entry[1]
+        for tag in envelope.get("tags") or ():
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    def keys_for_tag(self, tag: str) -> List[str]:
+        return list(self._tags.get(tag, ()))
+
+
 class HierarchicalCache:
     """3-tier hierarchical caching system"""
 
     def __init__(
         self,
         l1_max_size: int = 1000,
+        l1_max_bytes: int = 64 * 1024 * 1024,
         l1_ttl_seconds: int = 300,  # 5 minutes
         l2_ttl_seconds: int = 3600,  # 1 hour
         l3_ttl_seconds: int = 86400,  # 24 hours
         strategy: CacheStrategy = CacheStrategy.WRITE_THROUGH,
+        stale_ttl_seconds: int = 60,
+        early_expiry_beta: float = 1.0,
+        l3_path: Optional[str] = None,
+        l3_sweep_interval_seconds: int = 300,
+        invalidation_bus: Optional[InvalidationBus] = None,
+        hot_key_count: int = 100,
     ):
-        # L1: In-memory cache
-        self.l1_cache = TTLCache(maxsize=l1_max_size, ttl=l1_ttl_seconds)
+        # Expired values stay servable for ``stale_ttl_seconds`` while a single
+        # background fetch revalidates them
+        self.stale_ttl = stale_ttl_seconds
+        # XFetch: refresh before expiry with a probability that grows as the
+        # deadline nears and with how long the value took to compute
+        self.early_expiry_beta = early_expiry_beta
+
+        # L1: In-memory cache of live objects
+        self.l1_cache = MemoryTier(max_entries=l1_max_size, max_bytes=l1_max_bytes)
         self.l1_ttl = l1_ttl_seconds
 
         # L2: Redis cache
         self.l2_client: Optional[aioredis.Redis] = None
         self.l2_ttl = l2_ttl_seconds
 
-        # L3: Database cache (reference only, actual implementation in database layer)
+        # L3: Persistent SQLite cache with a tag index
+        self.l3_store: Optional[SQLiteCacheStore] = None
+        self.l3_path = l3_path or os.getenv("CACHE_L3_PATH", "./cache/l3_cache.db")
         self.l3_ttl = l3_ttl_seconds
+        self.l3_sweep_interval = l3_sweep_interval_seconds
 
         # Configuration
         self.strategy = strategy
@@ -98,9 +204,32 @@ class HierarchicalCache:
             tier: CacheMetrics() for tier in CacheTier
         }
 
+        # Cross-node L1 invalidation; defaults to Redis pub/sub on initialize
+        self.node_id = uuid.uuid4().hex
+        self.invalidation_bus = invalidation_bus
+        self._invalidation_sequence = 0
+        self._last_sequence: Dict[str, int] = {}
+        self.invalidation_metrics = {
+            "published": 0,
+            "received": 0,
+            "entries_dropped": 0,
+            "out_of_order": 0,
+        }
+
+        # Single-flight: one fetch per key, shared by every concurrent miss
+        self._inflight = SingleFlight(on_error=self._fetch_failed)
+        self.fetch_metrics = {
+            "fetches": 0,
+            "coalesced_waits": 0,
+            "stale_served": 0,
+            "background_refreshes": 0,
+            "early_refreshes": 0,
+            "fetch_errors": 0,
+        }
+
         # Warm-up tracking
         self._warm_keys: Set[str] = set()
-        self._access_patterns: Dict[str, List[float]] = {}
+        self.hot_keys = HotKeyTracker(k=hot_key_count)
 
         self._initialized = False
 
@@ -114,9 +243,28 @@ class HierarchicalCache:
             config.redis_url or "redis://localhost:6379", encoding="utf-8"
         )
 
+        # Initialize L3 store; the cache keeps working without it
+        try:
+            self.l3_store = await asyncio.to_thread(SQLiteCacheStore, self.l3_path)
+        except Exception as e:
+            logger.warning(f"L3 cache disabled ({self.l3_path}): {e}")
+
+        # Subscribe this node's L1 to invalidations from the other workers
+        if self.invalidation_bus is None:
+            self.invalidation_bus = RedisInvalidationBus(
+                config.redis_url or "redis://localhost:6379"
+            )
+        try:
+            await self.invalidation_bus.start(self._apply_invalidation)
+        except Exception as e:
+            logger.warning(f"Cache invalidation bus disabled: {e}")
+            self.invalidation_bus = None
+
         # Start background tasks
         asyncio.create_task(self._monitor_performance())
         asyncio.create_task(self._adaptive_optimization())
+        if self.l3_store:
+            asyncio.create_task(self._sweep_l3())
 
         self._initialized = True
         logger.info("Hierarchical cache initialized")
@@ -126,8 +274,15 @@ class HierarchicalCache:
         key: str,
         fetch_fn: Optional[Callable] = None,
         ttl_override: Optional[Dict[CacheTier, int]] = None,
+        tags: Optional[List[str]] = None,
     ) -> Optional[Any]:
-        """Get value from cache with hierarchical lookup"""
+        """Get value from cache with hierarchical lookup
+
+        With a ``fetch_fn``, concurrent misses for the same key share a single
+        fetch, expired values inside the stale window are served while one
+        background fetch refreshes them, and fresh values are refreshed early
+        with a probability that rises towards expiry.
+        """
         await self.initialize()
 
         start_time = time.time()
@@ -135,39 +290,129 @@ class HierarchicalCache:
         # Track access pattern
         self._track_access(key)
 
+        envelope, tier = await self._lookup(key, ttl_override)
+        if envelope is not None:
+            now = time.time()
+            if now < envelope["expires_at"]:
+                self._record_hit(tier, now - start_time)
+                if fetch_fn and self._should_refresh_early(envelope, now):
+                    self.fetch_metrics["early_refreshes"] += 1
+                    self._start_fetch(key, fetch_fn, ttl_override, tags)
+                return envelope["value"]
+
+            if fetch_fn:
+                self._record_hit(tier, now - start_time)
+                self.fetch_metrics["stale_served"] += 1
+                if key not in self._inflight:
+                    self.fetch_metrics["background_refreshes"] += 1
+                self._start_fetch(key, fetch_fn, ttl_override, tags)
+                return envelope["value"]
+
+        # Record miss
+        self._record_miss(time.time() - start_time)
+
+        # Cache miss - fetch if function provided
+        if fetch_fn:
+            if key in self._inflight:
+                self.fetch_metrics["coalesced_waits"] += 1
+            # Shield so a cancelled caller does not cancel the shared fetch
+            return await asyncio.shield(
+                self._start_fetch(key, fetch_fn, ttl_override, tags)
+            )
+
+        return None
+
+    async def _lookup(
+        self, key: str, ttl_override: Optional[Dict[CacheTier, int]] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[CacheTier]]:
+        """Find the freshest copy of ``key``, promoting it to faster tiers
+
+        Returns the first fresh envelope, otherwise the first stale one still
+        inside its stale window, otherwise ``(None, None)``.
+        """
+        ttls = ttl_override or {}
+        stale: Tuple[Optional[Dict[str, Any]], Optional[CacheTier]] = (None, None)
+
         # L1 lookup
-        value = await self._get_l1(key)
-        if value is not None:
-            self._record_hit(CacheTier.L1_MEMORY, time.time() - start_time)
-            return value
+        envelope = await self._get_l1(key)
+        if envelope is not None:
+            if time.time() < envelope["expires_at"]:
+                return envelope, CacheTier.L1_MEMORY
+            stale = (envelope, CacheTier.L1_MEMORY)
 
         # L2 lookup
-        value = await self._get_l2(key)
-        if value is not None:
-            self._record_hit(CacheTier.L2_REDIS, time.time() - start_time)
+        found = await self._get_l2_many([key])
+        if key in found:
+            envelope, size = found[key]
             # Promote to L1
-            await self._set_l1(key, value, ttl_override)
-            return value
+            await self._set_l1(key, envelope, ttls.get(CacheTier.L1_MEMORY), size)
+            if time.time() < envelope["expires_at"]:
+                return envelope, CacheTier.L2_REDIS
+            stale = stale if stale[0] is not None else (envelope, CacheTier.L2_REDIS)
 
         # L3 lookup
-        value = await self._get_l3(key)
-        if value is not None:
-            self._record_hit(CacheTier.L3_DATABASE, time.time() - start_time)
+        envelope = await self._get_l3(key)
+        if envelope is not None:
             # Promote to L1 and L2
-            await self._set_l1(key, value, ttl_override)
-            await self._set_l2(key, value, ttl_override)
-            return value
+            await self._write_tiers(
+                {key: envelope}, ttls, tiers=(CacheTier.L1_MEMORY, CacheTier.L2_REDIS)
+            )
+            if time.time() < envelope["expires_at"]:
+                return envelope, CacheTier.L3_DATABASE
+            stale = stale if stale[0] is not None else (envelope, CacheTier.L3_DATABASE)
+
+        if stale[0] is not None and time.time() >= (
+            stale[0]["expires_at"] + self.stale_ttl
+        ):
+            return None, None
+        return stale
+
+    def _should_refresh_early(self, envelope: Dict[str, Any], now: float) -> bool:
+        """XFetch test against the value's compute time and expiry"""
+        return should_refresh_early(
+            envelope["expires_at"],
+            envelope.get("delta") or 0.0,
+            now,
+            self.early_expiry_beta,
+        )
 
-        # Cache miss - fetch if function provided
-        if fetch_fn:
-            value = await fetch_fn()
-            if value is not None:
-                await self.set(key, value, ttl_override)
-            return value
+    def _start_fetch(
+        self,
+        key: str,
+        fetch_fn: Callable,
+        ttl_override: Optional[Dict[CacheTier, int]] = None,
+        tags: Optional[List[str]] = None,
+    ) -> asyncio.Task:
+        """Return the in-flight fetch for ``key``, starting one if needed"""
+        return self._inflight.start(
+            key, lambda: self._fetch_and_store(key, fetch_fn, ttl_override, tags)
+        )
 
-        # Record miss
-        self._record_miss(time.time() - start_time)
-        return None
+    def _fetch_failed(self, key: str, error: BaseException):
+        """Surface errors from fetches, including unawaited background ones"""
+        self.fetch_metrics["fetch_errors"] += 1
+        logger.error(f"Cache fetch for {key} failed: {error}")
+
+    async def _fetch_and_store(
+        self,
+        key: str,
+        fetch_fn: Callable,
+        ttl_override: Optional[Dict[CacheTier, int]] = None,
+        tags: Optional[List[str]] = None,
+    ) -> Optional[Any]:
+        """Run ``fetch_fn`` once and write the result to every tier"""
+        self.fetch_metrics["fetches"] += 1
+        started = time.time()
+        value = await fetch_fn()
+        if value is not None:
+            await self.set(
+                key,
+                value,
+                ttl_override,
+                tags,
+                compute_seconds=time.time() - started,
+            )
+        return value
 
     async def set(
         self,
@@ -175,59 +420,318 @@ class HierarchicalCache:
         value: Any,
         ttl_override: Optional[Dict[CacheTier, int]] = None,
         tags: Optional[List[str]] = None,
+        compute_seconds: float = 0.0,
     ):
-        """Set value in cache based on strategy"""
+        """Set value in cache based on strategy
+
+        ``compute_seconds`` is how long the value took to produce; slower
+        values are refreshed earlier ahead of expiry.
+        """
         await self.initialize()
 
         ttls = ttl_override or {}
+        await self._write(
+            {key: self._envelope(value, ttls, compute_seconds, tags)}, ttls, tags
+        )
+
+    async def get_many(
+        self,
+        keys: List[str],
+        ttl_override: Optional[Dict[CacheTier, int]] = None,
+    ) -> Dict[str, Any]:
+        """Get several keys at once
+
+        L1 is resolved locally and every remaining key is read from L2 in a
+        single MGET. Only fresh values are returned; missing or expired keys
+        are absent from the result.
+        """
+        await self.initialize()
+
+        start_time = time.time()
+        ttls = ttl_override or {}
+        results: Dict[str, Any] = {}
+        hits: Dict[CacheTier, int] = {tier: 0 for tier in CacheTier}
+
+        remaining = []
+        for key in dict.fromkeys(keys):
+            self._track_access(key)
+            envelope = await self._get_l1(key)
+            if envelope is not None and time.time() < envelope["expires_at"]:
+                results[key] = envelope["value"]
+                hits[CacheTier.L1_MEMORY] += 1
+            else:
+                remaining.append(key)
+
+        if remaining:
+            found = await self._get_l2_many(remaining)
+            for key, (envelope, size) in found.items():
+                await self._set_l1(key, envelope, ttls.get(CacheTier.L1_MEMORY), size)
+                if time.time() < envelope["expires_at"]:
+                    results[key] = envelope["value"]
+                    hits[CacheTier.L2_REDIS] += 1
+            remaining = [key for key in remaining if key not in results]
+
+        if remaining:
+            found = await self._get_l3_many(remaining)
+            promoted = {}
+            for key, envelope in found.items():
+                if time.time() < envelope["expires_at"]:
+                    results[key] = envelope["value"]
+                    promoted[key] = envelope
+                    hits[CacheTier.L3_DATABASE] += 1
+            await self._write_tiers(
+                promoted, ttls, tiers=(CacheTier.L1_MEMORY, CacheTier.L2_REDIS)
+            )
+            remaining = [key for key in remaining if key not in results]
+
+        elapsed = time.time() - start_time
+        for tier, count in hits.items():
+            for _ in range(count):
+                self._record_hit(tier, elapsed)
+        for _ in remaining:
+            self._record_miss(elapsed)
+
+        return results
+
+    async def set_many(
+        self,
+        items: Dict[str, Any],
+        ttl_override: Optional[Dict[CacheTier, int]] = None,
+        tags: Optional[List[str]] = None,
+    ):
+        """Set several values at once; L2 writes go out in one pipeline"""
+        await self.initialize()
+
+        ttls = ttl_override or {}
+        envelopes = {
+            key: self._envelope(value, ttls, 0.0, tags) for key, value in items.items()
+        }
+        await self._write(envelopes, ttls, tags)
+
+    async def _write(
+        self,
+        envelopes: Dict[str, Dict[str, Any]],
+        ttls: Dict[CacheTier, int],
+        tags: Optional[List[str]] = None,
+    ):
+        """Write envelopes to the tiers selected by the strategy
+
+        Other workers are told to drop their older L1 copies of the keys.
+        """
+        if not envelopes:
+            return
+
+        await self._publish_invalidation(
+            keys=list(envelopes),
+            version=min(envelope["version"] for envelope in envelopes.values()),
+        )
 
         if self.strategy == CacheStrategy.WRITE_THROUGH:
             # Write to all tiers
-            await asyncio.gather(
-                self._set_l1(key, value, ttls.get(CacheTier.L1_MEMORY)),
-                self._set_l2(key, value, ttls.get(CacheTier.L2_REDIS)),
-                self._set_l3(key, value, ttls.get(CacheTier.L3_DATABASE), tags),
-            )
+            await self._write_tiers(envelopes, ttls, tags)
         elif self.strategy == CacheStrategy.WRITE_BACK:
             # Write to L1 only, background sync to other tiers
-            await self._set_l1(key, value, ttls.get(CacheTier.L1_MEMORY))
-            asyncio.create_task(self._write_back(key, value, ttls, tags))
+            await self._write_tiers(envelopes, ttls, tiers=(CacheTier.L1_MEMORY,))
+            asyncio.create_task(self._write_back(envelopes, ttls, tags))
         elif self.strategy == CacheStrategy.WRITE_AROUND:
             # Write to L3 only
-            await self._set_l3(key, value, ttls.get(CacheTier.L3_DATABASE), tags)
+            await self._write_tiers(envelopes, ttls, tags, (CacheTier.L3_DATABASE,))
+
+    async def _write_tiers(
+        self,
+        envelopes: Dict[str, Dict[str, Any]],
+        ttls: Dict[CacheTier, int],
+        tags: Optional[List[str]] = None,
+        tiers: Tuple[CacheTier, ...] = tuple(CacheTier),
+    ):
+        """Encode each envelope once and write it to ``tiers``"""
+        if not envelopes:
+            return
+
+        encoded = {key: self._encode(envelope) for key, envelope in envelopes.items()}
+
+        if CacheTier.L1_MEMORY in tiers:
+            for key, envelope in envelopes.items():
+                size = (
+                    len(encoded[key])
+                    if encoded[key] is not None
+                    else sys.getsizeof(envelope["value"])
+                )
+                await self._set_l1(key, envelope, ttls.get(CacheTier.L1_MEMORY), size)
+
+        # Values that cannot be encoded stay L1-only
+        serialized = {
+            key: (envelopes[key], data)
+            for key, data in encoded.items()
+            if data is not None
+        }
+        writes = []
+        if CacheTier.L2_REDIS in tiers:
+            writes.append(self._set_l2_many(serialized, ttls.get(CacheTier.L2_REDIS)))
+        if CacheTier.L3_DATABASE in tiers:
+            writes.append(
+                self._set_l3_many(serialized, ttls.get(CacheTier.L3_DATABASE), tags)
+            )
+        await asyncio.gather(*writes)
+
+    @staticmethod
+    def _encode(envelope: Dict[str, Any]) -> Optional[str]:
+        """JSON-encode an envelope for L2/L3; None if the value is not JSON"""
+        try:
+            return json.dumps(envelope)
+        except (TypeError, ValueError) as e:
+            logger.error(f"Cache value is not JSON serializable: {e}")
+            return None
+
+    def _envelope(
+        self,
+        value: Any,
+        ttls: Dict[CacheTier, int],
+        compute_seconds: float,
+        tags: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Wrap a value with its logical expiry, recompute cost and version
+
+        TTLs the caller overrides bound freshness, and the shortest of them
+        wins. Otherwise the longest default among the L1 and L2 tiers written
+        applies; L3 is a backing store and sets freshness only when it is the
+        sole tier. Each tier then retains the value for its own TTL, capped at
+        that expiry, plus the stale window. The version orders the write
+        against invalidations.
+        """
+        if self.strategy == CacheStrategy.WRITE_AROUND:
+            tiers = [CacheTier.L3_DATABASE]
+        else:
+            tiers = [CacheTier.L1_MEMORY]
+            if self.l2_client:
+                tiers.append(CacheTier.L2_REDIS)
+            if self.l3_store:
+                tiers.append(CacheTier.L3_DATABASE)
+        overridden = [ttls[tier] for tier in tiers if ttls.get(tier)]
+        if overridden:
+            fresh_ttl = min(overridden)
+        else:
+            fresh_ttl = max(
+                [self._default_ttl(t) for t in tiers if t != CacheTier.L3_DATABASE]
+                or [self.l3_ttl]
+            )
+        envelope = {
+            "value": value,
+            "expires_at": time.time() + fresh_ttl,
+            "delta": compute_seconds,
+            "version": time.time_ns(),
+        }
+        if tags:
+            envelope["tags"] = list(tags)
+        return envelope
+
+    def _default_ttl(self, tier: CacheTier) -> int:
+        return {
+            CacheTier.L1_MEMORY: self.l1_ttl,
+            CacheTier.L2_REDIS: self.l2_ttl,
+            CacheTier.L3_DATABASE: self.l3_ttl,
+        }[tier]
+
+    @staticmethod
+    def _unwrap(raw: Any) -> Optional[Dict[str, Any]]:
+        """Validate a stored envelope; entries in the old raw format miss"""
+        if isinstance(raw, dict) and "expires_at" in raw and "value" in raw:
+            return raw
+        return None
 
     async def invalidate(self, key: str):
-        """Invalidate entry across all tiers"""
+        """Invalidate entry across all tiers and every worker's L1"""
         await self.initialize()
 
+        version = time.time_ns()
         await asyncio.gather(
             self._invalidate_l1(key), self._invalidate_l2(key), self._invalidate_l3(key)
         )
+        await self._publish_invalidation(keys=[key], version=version)
+
+    async def invalidate_by_tag(self, tag: str) -> int:
+        """Invalidate all entries with a specific tag
 
-    async def invalidate_by_tag(self, tag: str):
-        """Invalidate all entries with a specific tag"""
+        The tag index lives in L3; matching keys are deleted there in one
+        transaction, dropped from L1 and, with a single DEL, from L2, and the
+        tag is broadcast so other workers drop their tagged L1 copies.
+        Returns the number of keys invalidated.
+        """
         await self.initialize()
 
-        # Get all keys with tag from L3
-        keys = await self._get_keys_by_tag(tag)
+        version = time.time_ns()
+        keys = set(self.l1_cache.keys_for_tag(tag))
+        if self.l3_store:
+            l3_keys = await asyncio.to_thread(self.l3_store.delete_tag, tag)
+            self.metrics[CacheTier.L3_DATABASE].evictions += len(l3_keys)
+            keys.update(l3_keys)
+        else:
+            logger.warning(f"L3 cache is disabled; {tag} is only invalidated in L1")
 
-        # Invalidate all keys
-        tasks = []
         for key in keys:
-            tasks.append(self.invalidate(key))
+            await self._invalidate_l1(key)
+        await self._invalidate_l2_many(list(keys))
+        await self._publish_invalidation(tags=[tag], version=version)
 
-        await asyncio.gather(*tasks)
+        logger.info(f"Invalidated {len(keys)} keys tagged {tag}")
+        return len(keys)
+
+    async def _publish_invalidation(
+        self,
+        version: int,
+        keys: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+    ):
+        """Tell other workers to drop L1 copies written before ``version``"""
+        if self.invalidation_bus is None:
+            return
+
+        self._invalidation_sequence += 1
+        message = InvalidationMessage(
+            node_id=self.node_id,
+            sequence=self._invalidation_sequence,
+            version=version,
+            keys=keys or [],
+            tags=tags or [],
+        )
+        try:
+            await self.invalidation_bus.publish(message)
+            self.invalidation_metrics["published"] += 1
+        except Exception as e:
+            logger.error(f"Failed to publish cache invalidation: {e}")
+
+    async def _apply_invalidation(self, message: InvalidationMessage):
+        """Drop this worker's L1 copies named by another worker's message"""
+        if message.node_id == self.node_id:
+            return
+
+        self.invalidation_metrics["received"] += 1
+        if message.sequence <= self._last_sequence.get(message.node_id, 0):
+            self.invalidation_metrics["out_of_order"] += 1
+            return
+        self._last_sequence[message.node_id] = message.sequence
+
+        keys = set(message.keys)
+        for tag in message.tags:
+            keys.update(self.l1_cache.keys_for_tag(tag))
+
+        dropped = sum(
+            1 for key in keys if self.l1_cache.pop(key, older_than=message.version)
+        )
+        self.invalidation_metrics["entries_dropped"] += dropped
+        self.metrics[CacheTier.L1_MEMORY].evictions += dropped
 
     async def warm_cache(self, keys: List[str], fetch_fn: Callable):
         """Pre-warm cache with specific keys"""
         await self.initialize()
 
-        tasks = []
-        for key in keys:
-            self._warm_keys.add(key)
-            tasks.append(self.get(key, fetch_fn))
+        self._warm_keys.update(keys)
 
-        await asyncio.gather(*tasks)
+        # One batched lookup, then a (coalesced) fetch for whatever is missing
+        cached = await self.get_many(keys)
+        await asyncio.gather(
+            *[self.get(key, fetch_fn) for key in keys if key not in cached]
+        )
         logger.info(f"Warmed cache with {len(keys)} keys")
 
     async def get_metrics(self) -> Dict[str, Any]:
@@ -247,7 +751,31 @@ class HierarchicalCache:
 
         # Add L1 specific metrics
         metrics["l1_memory"]["size"] = len(self.l1_cache)
-        metrics["l1_memory"]["max_size"] = self.l1_cache.maxsize
+        metrics["l1_memory"]["max_size"] = self.l1_cache.max_entries
+        metrics["l1_memory"]["bytes"] = self.l1_cache.bytes
+        metrics["l1_memory"]["max_bytes"] = self.l1_cache.max_bytes
+        metrics["l1_memory"]["capacity_evictions"] = self.l1_cache.evictions
+
+        # Add cross-node invalidation metrics
+        metrics["invalidation"] = {
+            **self.invalidation_metrics,
+            "node_id": self.node_id,
+            "bus": (
+                type(self.invalidation_bus).__name__ if self.invalidation_bus else None
+            ),
+        }
+
+        # Add request coalescing metrics
+        metrics["single_flight"] = {
+            **self.fetch_metrics,
+            "in_flight": len(self._inflight),
+        }
+
+        # Add hot key metrics (estimated accesses per hour, decayed)
+        metrics["hot_keys"] = [
+            {"key": key, "rate_per_hour": round(rate, 2)}
+            for key, rate in self.hot_keys.top(10)
+        ]
 
         # Add warm key metrics
         metrics["warm_keys"] = {
@@ -258,112 +786,205 @@ class HierarchicalCache:
         return metrics
 
     # L1 Operations
-    async def _get_l1(self, key: str) -> Optional[Any]:
+    async def _get_l1(self, key: str) -> Optional[Dict[str, Any]]:
         """Get from L1 memory cache"""
-        try:
-            value = self.l1_cache.get(key)
-            if value is not None:
-                return json.loads(value) if isinstance(value, str) else value
-        except KeyError:
-            pass
-        return None
+        return self.l1_cache.get(key)
 
-    async def _set_l1(self, key: str, value: Any, ttl: Optional[int] = None):
+    async def _set_l1(
+        self,
+        key: str,
+        envelope: Dict[str, Any],
+        ttl: Optional[int] = None,
+        size: Optional[int] = None,
+    ):
         """Set in L1 memory cache"""
-        try:
-            serialized = json.dumps(value) if not isinstance(value, str) else value
-            self.l1_cache[key] = serialized
-            self.metrics[CacheTier.L1_MEMORY].writes += 1
-        except Exception as e:
-            logger.error(f"L1 set error: {e}")
+        if size is None:
+            encoded = self._encode(envelope)
+            size = len(encoded) if encoded else sys.getsizeof(envelope["value"])
+
+        evict_at = time.time() + self._retention(envelope, ttl or self.l1_ttl)
+        self.l1_cache.set(key, envelope, size, evict_at)
+        self.metrics[CacheTier.L1_MEMORY].writes += 1
 
     async def _invalidate_l1(self, key: str):
         """Invalidate L1 entry"""
-        try:
-            del self.l1_cache[key]
+        if self.l1_cache.pop(key):
             self.metrics[CacheTier.L1_MEMORY].evictions += 1
-        except KeyError:
-            pass
 
     # L2 Operations
-    async def _get_l2(self, key: str) -> Optional[Any]:
+    async def _get_l2(self, key: str) -> Optional[Dict[str, Any]]:
         """Get from L2 Redis cache"""
-        if not self.l2_client:
-            return None
+        found = await self._get_l2_many([key])
+        return found[key][0] if key in found else None
+
+    async def _get_l2_many(
+        self, keys: List[str]
+    ) -> Dict[str, Tuple[Dict[str, Any], int]]:
+        """MGET ``keys`` from L2 in one round trip, with each encoded size"""
+        if not self.l2_client or not keys:
+            return {}
 
         try:
-            value = await self.l2_client.get(f"cache:{key}")
-            if value:
-                return json.loads(value)
+            values = await self.l2_client.mget(*[f"cache:{key}" for key in keys])
         except Exception as e:
             logger.error(f"L2 get error: {e}")
-        return None
-
-    async def _set_l2(self, key: str, value: Any, ttl: Optional[int] = None):
+            return {}
+
+        found = {}
+        for key, value in zip(keys, values):
+            if not value:
+                continue
+            try:
+                envelope = self._unwrap(json.loads(value))
+            except ValueError as e:
+                logger.error(f"L2 decode error for {key}: {e}")
+                continue
+            if envelope is not None:
+                found[key] = (envelope, len(value))
+        return found
+
+    async def _set_l2(
+        self, key: str, envelope: Dict[str, Any], ttl: Optional[int] = None
+    ):
         """Set in L2 Redis cache"""
-        if not self.l2_client:
+        serialized = self._encode(envelope)
+        if serialized is not None:
+            await self._set_l2_many({key: (envelope, serialized)}, ttl)
+
+    async def _set_l2_many(
+        self, items: Dict[str, Tuple[Dict[str, Any], str]], ttl: Optional[int] = None
+    ):
+        """SETEX pre-encoded envelopes in a single pipelined round trip"""
+        if not self.l2_client or not items:
             return
 
         try:
-            serialized = json.dumps(value)
-            ttl = ttl or self.l2_ttl
-            await self.l2_client.setex(f"cache:{key}", ttl, serialized)
-            self.metrics[CacheTier.L2_REDIS].writes += 1
+            pipe = self.l2_client.pipeline()
+            for key, (envelope, serialized) in items.items():
+                pipe.setex(
+                    f"cache:{key}",
+                    self._retention(envelope, ttl or self.l2_ttl),
+                    serialized,
+                )
+            await pipe.execute()
+            self.metrics[CacheTier.L2_REDIS].writes += len(items)
         except Exception as e:
             logger.error(f"L2 set error: {e}")
 
+    def _retention(self, envelope: Dict[str, Any], ttl: int) -> int:
+        """Tier TTL capped at the value's expiry, plus the stale window"""
+        remaining = envelope["expires_at"] - time.time()
+        return max(1, int(min(ttl, remaining) + self.stale_ttl))
+
     async def _invalidate_l2(self, key: str):
         """Invalidate L2 entry"""
-        if not self.l2_client:
+        await self._invalidate_l2_many([key])
+
+    async def _invalidate_l2_many(self, keys: List[str]):
+        """Delete several L2 entries with a single DEL"""
+        if not self.l2_client or not keys:
             return
 
         try:
-            await self.l2_client.delete(f"cache:{key}")
-            self.metrics[CacheTier.L2_REDIS].evictions += 1
+            await self.l2_client.delete(*[f"cache:{key}" for key in keys])
+            self.metrics[CacheTier.L2_REDIS].evictions += len(keys)
         except Exception as e:
             logger.error(f"L2 invalidate error: {e}")
 
-    # L3 Operations (placeholder - actual implementation in database layer)
-    async def _get_l3(self, key: str) -> Optional[Any]:
+    # L3 Operations
+    async def _get_l3(self, key: str) -> Optional[Dict[str, Any]]:
         """Get from L3 database cache"""
-        # This would be implemented by the database layer
-        # For now, return None
-        return None
+        found = await self._get_l3_many([key])
+        return found.get(key)
+
+    async def _get_l3_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get several keys from L3 database cache in one query"""
+        if not self.l3_store or not keys:
+            return {}
+
+        try:
+            rows = await asyncio.to_thread(self.l3_store.get_many, keys, time.time())
+        except Exception as e:
+            logger.error(f"L3 get error: {e}")
+            return {}
+
+        found = {}
+        for key, value in rows.items():
+            try:
+                envelope = self._unwrap(json.loads(value))
+            except ValueError as e:
+                logger.error(f"L3 decode error for {key}: {e}")
+                continue
+            if envelope is not None:
+                found[key] = envelope
+        return found
 
     async def _set_l3(
         self,
         key: str,
-        value: Any,
+        envelope: Dict[str, Any],
         ttl: Optional[int] = None,
         tags: Optional[List[str]] = None,
     ):
         """Set in L3 database cache"""
-        # This would be implemented by the database layer
-        self.metrics[CacheTier.L3_DATABASE].writes += 1
+        serialized = self._encode(envelope)
+        if serialized is not None:
+            await self._set_l3_many({key: (envelope, serialized)}, ttl, tags)
+
+    async def _set_l3_many(
+        self,
+        items: Dict[str, Tuple[Dict[str, Any], str]],
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None,
+    ):
+        """Upsert pre-encoded envelopes and their tags in one transaction"""
+        if not self.l3_store or not items:
+            return
+
+        now = time.time()
+        rows = [
+            (key, serialized, now + self._retention(envelope, ttl or self.l3_ttl))
+            for key, (envelope, serialized) in items.items()
+        ]
+        try:
+            await asyncio.to_thread(self.l3_store.set_many, rows, tags)
+            self.metrics[CacheTier.L3_DATABASE].writes += len(rows)
+        except Exception as e:
+            logger.error(f"L3 set error: {e}")
 
     async def _invalidate_l3(self, key: str):
         """Invalidate L3 entry"""
-        # This would be implemented by the database layer
-        self.metrics[CacheTier.L3_DATABASE].evictions += 1
+        if not self.l3_store:
+            return
+
+        try:
+            removed = await asyncio.to_thread(self.l3_store.delete_many, [key])
+            self.metrics[CacheTier.L3_DATABASE].evictions += removed
+        except Exception as e:
+            logger.error(f"L3 invalidate error: {e}")
 
     async def _get_keys_by_tag(self, tag: str) -> List[str]:
         """Get all keys with a specific tag from L3"""
-        # This would be implemented by the database layer
-        return []
+        if not self.l3_store:
+            return []
+        return await asyncio.to_thread(self.l3_store.keys_for_tag, tag)
+
+    async def _sweep_l3(self):
+        """Periodically delete expired L3 rows in bulk"""
+        while True:
+            await asyncio.sleep(self.l3_sweep_interval)
+            try:
+                removed = await asyncio.to_thread(self.l3_store.sweep, time.time())
+                if removed:
+                    self.metrics[CacheTier.L3_DATABASE].evictions += removed
+                    logger.info(f"Swept {removed} expired L3 cache entries")
+            except Exception as e:
+                logger.error(f"L3 sweep error: {e}")
 
     # Helper methods
     def _track_access(self, key: str):
         """Track access patterns for optimization"""
-        now = time.time()
-        if key not in self._access_patterns:
-            self._access_patterns[key] = []
-        self._access_patterns[key].append(now)
-
-        # Keep only recent accesses (last hour)
-        cutoff = now - 3600
-        self._access_patterns[key] = [
-            t for t in self._access_patterns[key] if t > cutoff
-        ]
+        self.hot_keys.record(key)
 
     def _record_hit(self, tier: CacheTier, latency: float):
         """Record cache hit metrics"""
@@ -380,16 +1001,14 @@ class HierarchicalCache:
 
     async def _write_back(
         self,
-        key: str,
-        value: Any,
+        envelopes: Dict[str, Dict[str, Any]],
         ttls: Dict[CacheTier, int],
         tags: Optional[List[str]],
     ):
         """Background write to L2 and L3"""
         await asyncio.sleep(0.1)  # Small delay to batch writes
-        await asyncio.gather(
-            self._set_l2(key, value, ttls.get(CacheTier.L2_REDIS)),
-            self._set_l3(key, value, ttls.get(CacheTier.L3_DATABASE), tags),
+        await self._write_tiers(
+            envelopes, ttls, tags, (CacheTier.L2_REDIS, CacheTier.L3_DATABASE)
         )
 
     async def _monitor_performance(self):
@@ -398,10 +1017,8 @@ class HierarchicalCache:
             await asyncio.sleep(60)  # Check every minute
 
             # Update memory usage
-            import sys
-
             self.metrics[CacheTier.L1_MEMORY].memory_usage_mb = (
-                sys.getsizeof(self.l1_cache) / 1024 / 1024
+                self.l1_cache.bytes / 1024 / 1024
             )
 
             # Log metrics
@@ -413,23 +1030,21 @@ class HierarchicalCache:
         while True:
             await asyncio.sleep(300)  # Run every 5 minutes
 
-            # Identify hot keys
-            hot_keys = []
-            for key, accesses in self._access_patterns.items():
-                if len(accesses) > 10:  # More than 10 accesses in last hour
-                    hot_keys.append((key, len(accesses)))
-
-            # Sort by access count
-            hot_keys.sort(key=lambda x: x[1], reverse=True)
-
-            # Pre-warm top keys if not already warm
-            for key, _ in hot_keys[:20]:
-                if key not in self._warm_keys:
-                    self._warm_keys.add(key)
-                    # Ensure hot keys are in L1
-                    value = await self._get_l2(key) or await self._get_l3(key)
-                    if value:
-                        await self._set_l1(key, value)
+            # Identify hot keys: more than 10 accesses an hour, hottest first
+            hot_keys = [
+                key for key, rate_per_hour in self.hot_keys.top() if rate_per_hour > 10
+            ]
+
+            # Pre-warm top keys if not already warm, with one batched L2 read
+            candidates = [key for key in hot_keys[:20] if key not in self._warm_keys]
+            self._warm_keys.update(candidates)
+            found = await self._get_l2_many(candidates)
+            for key, (envelope, size) in found.items():
+                # Ensure hot keys are in L1
+                await self._set_l1(key, envelope, size=size)
+            missing = [key for key in candidates if key not in found]
+            for key, envelope in (await self._get_l3_many(missing)).items():
+                await self._set_l1(key, envelope)
 
             logger.info(f"Identified {len(hot_keys)} hot keys for optimization")
 
@@ -451,19 +1066,10 @@ def cached(
             # Generate cache key
             cache_key = f"{key_prefix}:{func.__name__}:{str(args)}:{str(kwargs)}"
 
-            # Try to get from cache
-            result = await hierarchical_cache.get(cache_key)
-            if result is not None:
-                return result
-
-            # Execute function
-            result = await func(*args, **kwargs)
-
-            # Store in cache
-            if result is not None:
-                await hierarchical_cache.set(cache_key, result, ttl, tags)
-
-            return result
+            # Concurrent callers with the same key share one execution
+            return await hierarchical_cache.get(
+                cache_key, lambda: func(*args, **kwargs), ttl, tags
+            )
 
         return wrapper
 
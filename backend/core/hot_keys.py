@@ -0,0 +1,149 @@
+"""Fixed-memory hot-key detection for Sophia AI caches
+A Count-Min sketch estimates exponentially decayed access counts for any
+number of keys, and a small heap keeps the current top-K, so tracking an
+access is O(depth) regardless of key cardinality or access history.
+"""
+
+import heapq
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class CountMinSketch:
+    """Count-Min sketch with forward exponential decay
+
+    Instead of decaying every counter, each increment is scaled up by
+    ``exp(decay_rate * (t - t0))`` and estimates are scaled back down, so
+    updates stay O(depth). Counters are renormalized before the scale factor
+    gets large enough to lose float precision.
+    """
+
+    # Renormalize once increments are scaled by more than this
+    MAX_SCALE = 1e12
+
+    def __init__(
+        self, width: int = 2048, depth: int = 4, half_life_seconds: float = 900.0
+    ):
+        self.width = width
+        self.depth = depth
+        self.decay_rate = math.log(2) / half_life_seconds
+        self._counters = np.zeros((depth, width), dtype=np.float64)
+        self._rows = np.arange(depth)
+        # Decay reference point, fixed by the first update
+        self._epoch: Optional[float] = None
+
+    def _columns(self, key: str) -> np.ndarray:
+        # Double hashing: column_i = h1 + i * h2
+        h1 = hash(key)
+        h2 = hash((key, 0x9E3779B9)) | 1
+        return (h1 + self._rows * h2) % self.width
+
+    def _scale(self, now: float) -> float:
+        if self._epoch is None:
+            self._epoch = now
+        scale = math.exp(self.decay_rate * (now - self._epoch))
+        if scale > self.MAX_SCALE:
+            self._counters /= scale
+            self._epoch = now
+            scale = 1.0
+        return scale
+
+    def add(self, key: str, count: float = 1.0, now: Optional[float] = None) -> float:
+        """Record ``count`` accesses and return the key's decayed estimate"""
+        now = time.time() if now is None else now
+        scale = self._scale(now)
+        columns = self._columns(key)
+        self._counters[self._rows, columns] += count * scale
+        return float(self._counters[self._rows, columns].min()) / scale
+
+    def estimate(self, key: str, now: Optional[float] = None) -> float:
+        """Decayed access count for ``key`` (never an underestimate)"""
+        now = time.time() if now is None else now
+        scale = self._scale(now)
+        return float(self._counters[self._rows, self._columns(key)].min()) / scale
+
+
+class HotKeyTracker:
+    """Decaying top-K of the most frequently accessed keys
+
+    Memory is bounded by the sketch size plus ``k`` heap entries. Because
+    every count decays by the same factor, the heap order stays valid as
+    time passes; entries are compared on their scaled (undecayed) values.
+    """
+
+    def __init__(
+        self,
+        k: int = 100,
+        width: int = 2048,
+        depth: int = 4,
+        half_life_seconds: float = 900.0,
+    ):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth, half_life_seconds)
+        # key -> scaled count for the current top-K, plus a lazy min-heap
+        self._top: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._epoch: Optional[float] = None
+
+    def _scaled(self, estimate: float, now: float) -> float:
+        if self._epoch is None:
+            self._epoch = now
+        return estimate * math.exp(self.sketch.decay_rate * (now - self._epoch))
+
+    def record(self, key: str, now: Optional[float] = None) -> float:
+        """Record one access; returns the key's decayed access estimate"""
+        now = time.time() if now is None else now
+        estimate = self.sketch.add(key, now=now)
+        scaled = self._scaled(estimate, now)
+
+        if key in self._top or len(self._top) < self.k:
+            self._top[key] = scaled
+            heapq.heappush(self._heap, (scaled, key))
+        else:
+            floor_score, floor_key = self._floor()
+            if scaled > floor_score:
+                del self._top[floor_key]
+                self._top[key] = scaled
+                heapq.heappush(self._heap, (scaled, key))
+
+        if len(self._heap) > 4 * max(self.k, 1):
+            self._heap = [(score, key) for key, score in self._top.items()]
+            heapq.heapify(self._heap)
+        if scaled > CountMinSketch.MAX_SCALE:
+            self._rebase(now)
+        return estimate
+
+    def _floor(self) -> Tuple[float, str]:
+        # Drop heap entries superseded by a later push for the same key
+        while self._heap:
+            score, key = self._heap[0]
+            if self._top.get(key) == score:
+                return score, key
+            heapq.heappop(self._heap)
+        return 0.0, ""
+
+    def _rebase(self, now: float):
+        factor = math.exp(self.sketch.decay_rate * (now - self._epoch))
+        self._top = {key: score / factor for key, score in self._top.items()}
+        self._heap = [(score, key) for key, score in self._top.items()]
+        heapq.heapify(self._heap)
+        self._epoch = now
+
+    def top(
+        self, n: Optional[int] = None, now: Optional[float] = None
+    ) -> List[Tuple[str, float]]:
+        """Hottest keys with their estimated access rate per hour"""
+        if self._epoch is None:
+            return []
+        now = time.time() if now is None else now
+        decay = math.exp(-self.sketch.decay_rate * (now - self._epoch))
+        # A decayed count of C with decay rate L corresponds to C * L hits/s
+        per_hour = self.sketch.decay_rate * 3600
+        ranked = sorted(self._top.items(), key=lambda item: item[1], reverse=True)
+        return [(key, score * decay * per_hour) for key, score in ranked[:n]]
+
+    def __len__(self) -> int:
+        return len(self._top)
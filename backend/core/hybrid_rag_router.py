@@ -3,14 +3,22 @@ Routes queries optimally between vector search, MCP federation, and Agno orchest
 """
 
 import asyncio
+import json
 import logging
-import re
 import statistics
 import time
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, replace
 from enum import Enum
-from typing import Any, AsyncGenerator, Dict, List, Optional, Union
-
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, Set, Union
+
+from backend.core.enhanced_embedding_manager import enhanced_embedding_manager
+from backend.core.query_classification import (
+    CompiledRuleSet,
+    DecisionCache,
+    normalize_query,
+)
+from backend.core.semantic_cache import semantic_answer_cache
 from backend.integrations.enhanced_agno_integration import enhanced_agno_integration
 from backend.integrations.llamaindex_integration import llamaindex_integration
 from backend.knowledge.hybrid_rag_manager import hybrid_rag_manager
@@ -55,43 +63,111 @@ class ProcessingResult:
     error: Optional[str] = None
 
 
+# Context flags that change the routing decision for a given query
+ROUTING_CONTEXT_KEYS = (
+    "user_preferences",
+    "historical_performance",
+    "document_context",
+    "business_context",
+    "automation_context",
+    "data_context",
+    "requires_analysis",
+    "document_processing",
+    "knowledge_required",
+    "structured_data",
+)
+
+# Data sources behind each engine's answers, for answer cache TTLs and
+# invalidation; MCP answers name the servers that responded. Agno agents
+# read HubSpot, so their answers go stale when the CRM changes.
+ENGINE_SOURCES = {
+    "vector_search": ["knowledge"],
+    "llamaindex": ["knowledge"],
+    "agno_orchestration": ["agno", "hubspot"],
+}
+MCP_SERVER_SOURCES = {
+    "agno": ["agno", "hubspot"],
+}
+
+# Request options that do not change the answer itself
+ANSWER_CACHE_IGNORED_CONTEXT = {
+    "latency_budget_ms",
+    "confidence_threshold",
+    "early_return_confidence",
+    "use_answer_cache",
+    "request_id",
+    "session_id",
+    "user_id",
+    "timestamp",
+}
+
+
 class MLQueryClassifier:
     """Machine learning-based query classifier."""
 
     def __init__(self):
         """Initialize ML query classifier."""
+        # Each rule is a sequence of term groups that must appear in order
         self.patterns = {
             QueryType.SEMANTIC_SEARCH: [
-                r"\b(find|search|look for|locate|discover)\b.*\b(document|file|content|information)\b",
-                r"\b(what|where|when|who|how)\b.*\b(about|regarding|concerning)\b",
-                r"\b(similar|related|like|comparable)\b.*\b(to|as)\b",
-                r"\b(meaning|definition|explanation|description)\b",
+                (
+                    ("find", "search", "look for", "locate", "discover"),
+                    ("document", "file", "content", "information"),
+                ),
+                (
+                    ("what", "where", "when", "who", "how"),
+                    ("about", "regarding", "concerning"),
+                ),
+                (("similar", "related", "like", "comparable"), ("to", "as")),
+                (("meaning", "definition", "explanation", "description"),),
             ],
             QueryType.STRUCTURED_QUERY: [
-                r"\b(get|retrieve|fetch|pull)\b.*\b(data|records|entries|items)\b",
-                r"\b(list|show|display)\b.*\b(all|recent|latest|current)\b",
-                r"\b(count|number|total|sum)\b.*\b(of|in)\b",
-                r"\b(filter|where|having|with)\b.*\b(condition|criteria)\b",
+                (
+                    ("get", "retrieve", "fetch", "pull"),
+                    ("data", "records", "entries", "items"),
+                ),
+                (("list", "show", "display"), ("all", "recent", "latest", "current")),
+                (("count", "number", "total", "sum"), ("of", "in")),
+                (("filter", "where", "having", "with"), ("condition", "criteria")),
             ],
             QueryType.HYBRID_WORKFLOW: [
-                r"\b(analyze|process|generate|create)\b.*\b(report|summary|analysis|insights)\b",
-                r"\b(combine|merge|integrate)\b.*\b(data|information|sources)\b",
-                r"\b(workflow|process|pipeline|automation)\b",
-                r"\b(business intelligence|bi|analytics|metrics)\b",
+                (
+                    ("analyze", "process", "generate", "create"),
+                    ("report", "summary", "analysis", "insights"),
+                ),
+                (("combine", "merge", "integrate"), ("data", "information", "sources")),
+                (("workflow", "process", "pipeline", "automation"),),
+                (("business intelligence", "bi", "analytics", "metrics"),),
             ],
             QueryType.AGENT_ORCHESTRATION: [
-                r"\b(automate|orchestrate|coordinate|manage)\b.*\b(task|process|workflow)\b",
-                r"\b(agent|assistant|ai)\b.*\b(help|assist|perform|execute)\b",
-                r"\b(multi-step|complex|advanced)\b.*\b(operation|task|process)\b",
-                r"\b(collaboration|teamwork|coordination)\b",
+                (
+                    ("automate", "orchestrate", "coordinate", "manage"),
+                    ("task", "process", "workflow"),
+                ),
+                (
+                    ("agent", "assistant", "ai"),
+                    ("help", "assist", "perform", "execute"),
+                ),
+                (
+                    ("multi-step", "complex", "advanced"),
+                    ("operation", "task", "process"),
+                ),
+                (("collaboration", "teamwork", "coordination"),),
             ],
             QueryType.DOCUMENT_ANALYSIS: [
-                r"\b(analyze|examine|review|study)\b.*\b(document|file|text|content)\b",
-                r"\b(extract|parse|process)\b.*\b(information|data|insights)\b",
-                r"\b(summarize|abstract|overview)\b.*\b(of|from)\b",
-                r"\b(key points|main ideas|important|highlights)\b",
+                (
+                    ("analyze", "examine", "review", "study"),
+                    ("document", "file", "text", "content"),
+                ),
+                (("extract", "parse", "process"), ("information", "data", "insights")),
+                (("summarize", "abstract", "overview"), ("of", "from")),
+                (("key points", "main ideas", "important", "highlights"),),
             ],
         }
+        self.rule_set = CompiledRuleSet(self.patterns)
+        self.decision_cache: DecisionCache[RoutingDecision] = DecisionCache(
+            max_size=4096
+        )
 
         self.engine_capabilities = {
             "vector_search": {
@@ -136,6 +212,9 @@ class MLQueryClassifier:
             },
         }
 
+        # Observed p90 latency per engine, fed back by the router
+        self.latency_estimates_ms: Dict[str, float] = {}
+
     def classify_query(
         self, query: str, context: Dict[str, Any] = None
     ) -> RoutingDecision:
@@ -148,33 +227,44 @@ class MLQueryClassifier:
         Returns:
             RoutingDecision with optimal routing strategy
         """
-        query_lower = query.lower()
+        query_lower = normalize_query(query)
         context = context or {}
 
-        # Score each query type
-        type_scores = {}
-        for query_type, patterns in self.patterns.items():
-            score = 0
-            for pattern in patterns:
-                if re.search(pattern, query_lower):
-                    score += 1
-            type_scores[query_type] = score
+        cache_key = (
+            query_lower,
+            tuple(bool(context.get(key)) for key in ROUTING_CONTEXT_KEYS),
+        )
+        cached = self.decision_cache.get(cache_key)
+        if cached is not None:
+            # Time estimates follow observed latencies, so refresh them
+            return replace(
+                cached,
+                secondary_engines=list(cached.secondary_engines),
+                estimated_time_ms=self._estimate_execution_time(
+                    cached.primary_engine,
+                    cached.secondary_engines,
+                    cached.parallel_execution,
+                ),
+            )
+
+        # Score each query type in a single pass over the query
+        type_scores = self.rule_set.score(query_lower)
 
         # Determine primary query type
         if not any(type_scores.values()):
             # Default classification based on context
-            primary_type = self._classify_by_context(query, context)
+            primary_type = self._classify_by_context(query_lower, context)
         else:
             primary_type = max(type_scores, key=type_scores.get)
 
         # Determine optimal engines
         primary_engine, secondary_engines = self._select_engines(
-            primary_type, query, context
+            primary_type, query_lower, context
         )
 
         # Calculate confidence
         max_score = max(type_scores.values()) if type_scores.values() else 0
-        total_patterns = sum(len(patterns) for patterns in self.patterns.values())
+        total_patterns = len(self.rule_set)
         confidence = max_score / total_patterns if total_patterns > 0 else 0.5
 
         # Adjust confidence based on context
@@ -196,7 +286,7 @@ class MLQueryClassifier:
             primary_type, primary_engine, secondary_engines, confidence
         )
 
-        return RoutingDecision(
+        decision = RoutingDecision(
             query_type=primary_type,
             primary_engine=primary_engine,
             secondary_engines=secondary_engines,
@@ -205,6 +295,10 @@ class MLQueryClassifier:
             estimated_time_ms=estimated_time,
             parallel_execution=parallel_execution,
         )
+        self.decision_cache.set(
+            cache_key, replace(decision, secondary_engines=list(secondary_engines))
+        )
+        return decision
 
     def _classify_by_context(self, query: str, context: Dict[str, Any]) -> QueryType:
         """Classify query based on context when patterns don't match."""
@@ -290,10 +384,12 @@ class MLQueryClassifier:
             "llamaindex": 300,
         }
 
+        base_times.update(self.latency_estimates_ms)
+
         primary_time = base_times.get(primary_engine, 500)
 
         if not secondary_engines:
-            return primary_time
+            return int(primary_time)
 
         secondary_time = max(
             base_times.get(engine, 500) for engine in secondary_engines
@@ -301,10 +397,10 @@ class MLQueryClassifier:
 
         if parallel:
             # Parallel execution - max of primary and secondary
-            return max(primary_time, secondary_time) + 100  # Add coordination overhead
+            return int(max(primary_time, secondary_time) + 100)  # Coordination
         else:
             # Sequential execution
-            return primary_time + secondary_time
+            return int(primary_time + secondary_time)
 
     def _generate_reasoning(
         self,
@@ -346,12 +442,24 @@ class HybridRAGRouter:
             "engine_performance": {},
             "avg_routing_time_ms": 0.0,
             "success_rate": 0.0,
+            "answer_cache_hits": 0,
         }
 
         # Adaptive learning
         self.performance_history = {}
         self.learning_enabled = True
 
+        # Speculative execution: run every selected engine at once under a
+        # latency budget and stop once the answers gathered are good enough
+        self.speculative_execution = True
+        self.latency_budget_ms = 5000
+        self.confidence_threshold = 0.8
+        self.engine_latencies: Dict[str, Deque[float]] = {}
+
+        # Serve near-identical questions from the semantic answer cache
+        self.answer_cache = semantic_answer_cache
+        self.answer_cache_enabled = True
+
     async def initialize(self):
         """Initialize the hybrid RAG router."""
         if self.initialized:
@@ -363,6 +471,7 @@ class HybridRAGRouter:
             await mcp_federation.initialize()
             await hybrid_rag_manager.initialize()
             await llamaindex_integration.initialize()
+            await self.answer_cache.start()
 
             self.initialized = True
             logger.info("Hybrid RAG Router initialized successfully")
@@ -389,14 +498,46 @@ class HybridRAGRouter:
             await self.initialize()
 
         start_time = time.perf_counter()
+        # Answers are versioned from when they started, so an invalidation
+        # that lands while the engines run keeps the answer out of the cache
+        answer_version = time.time_ns()
         context = context or {}
 
         try:
             # Make routing decision
             routing_start = time.perf_counter()
             decision = self.classifier.classify_query(query, context)
+
+            speculate = not stream and self._can_speculate(query, context, decision)
+            if speculate:
+                budget_ms = context.get("latency_budget_ms", self.latency_budget_ms)
+                decision = replace(
+                    decision,
+                    parallel_execution=True,
+                    estimated_time_ms=min(
+                        budget_ms,
+                        self.classifier._estimate_execution_time(
+                            decision.primary_engine, decision.secondary_engines, True
+                        ),
+                    ),
+                )
             routing_time = (time.perf_counter() - routing_start) * 1000
 
+            # Writes must reach their engine every time, so only read-only
+            # queries are answered from or stored in the answer cache
+            embedding = None
+            use_answer_cache = (
+                self.answer_cache_enabled
+                and not stream
+                and context.get("use_answer_cache", True)
+                and self._is_read_only(query, context, decision)
+            )
+            if use_answer_cache:
+                embedding = await self._embed_query(query)
+                cached = self._cached_answer(query, embedding, context)
+                if cached is not None:
+                    return cached
+
             logger.info(
                 f"Routing decision: {decision.reasoning} (took {routing_time:.2f}ms)"
             )
@@ -407,8 +548,20 @@ class HybridRAGRouter:
             # Execute query based on routing decision
             if stream:
                 return self._stream_hybrid_results(query, context, decision)
-            else:
-                return await self._execute_hybrid_query(query, context, decision)
+
+            result = await self._execute_hybrid_query(
+                query, context, decision, speculate
+            )
+            if embedding is not None and result.get("success"):
+                self.answer_cache.store(
+                    query,
+                    embedding,
+                    result,
+                    sources=self._answer_sources(result, context),
+                    scope=self._answer_cache_scope(context),
+                    version=answer_version,
+                )
+            return result
 
         except Exception as e:
             logger.error(f"Query routing failed: {e}")
@@ -418,32 +571,127 @@ class HybridRAGRouter:
                 "routing_time_ms": (time.perf_counter() - start_time) * 1000,
             }
 
-    async def _execute_hybrid_query(
+    async def _embed_query(self, query: str) -> Optional[List[float]]:
+        """Embedding of the query for the answer cache, or None on failure"""
+        try:
+            embedding, _ = await enhanced_embedding_manager.generate_text_embedding(
+                query
+            )
+            return embedding
+        except Exception as e:
+            logger.warning(f"Answer cache disabled for query, embedding failed: {e}")
+            return None
+
+    def _cached_answer(
+        self,
+        query: str,
+        embedding: Optional[List[float]],
+        context: Dict[str, Any],
+    ) -> Optional[Dict[str, Any]]:
+        """Previous answer to a semantically equivalent question, if any"""
+        if embedding is None:
+            return None
+
+        match = self.answer_cache.lookup(
+            query, embedding, scope=self._answer_cache_scope(context)
+        )
+        if match is None:
+            return None
+
+        entry, similarity = match
+        self.metrics["answer_cache_hits"] += 1
+        logger.info(
+            f"Answered from cache: '{entry.query}' (similarity {similarity:.3f})"
+        )
+        return {
+            **entry.answer,
+            "answer_cache": entry.provenance(similarity, time.time()),
+        }
+
+    @staticmethod
+    def _answer_cache_scope(context: Dict[str, Any]) -> str:
+        """Answers are only shared between requests with the same context"""
+        relevant = {
+            key: value
+            for key, value in context.items()
+            if key not in ANSWER_CACHE_IGNORED_CONTEXT
+        }
+        return json.dumps(relevant, sort_keys=True, default=str)
+
+    @staticmethod
+    def _answer_sources(result: Dict[str, Any], context: Dict[str, Any]) -> Set[str]:
+        """Data sources an answer was built from"""
+        if result.get("fallback_used"):
+            engine_data = {result.get("primary_engine"): result.get("data")}
+        else:
+            data = result.get("data") or {}
+            engine_data = {data.get("primary_engine"): data.get("primary_result")}
+            for engine, secondary in data.get("secondary_results", {}).items():
+                engine_data[engine] = secondary.get("data")
+
+        sources = set(context.get("data_sources", []))
+        for engine, data in engine_data.items():
+            if engine == "mcp_federation" and isinstance(data, dict):
+                for ranked in data.get("ranked_results", []):
+                    server = ranked["server"]
+                    sources.update(MCP_SERVER_SOURCES.get(server, [server]))
+            elif engine:
+                sources.update(ENGINE_SOURCES.get(engine, [engine]))
+        return sources
+
+    def _can_speculate(
+        self, query: str, context: Dict[str, Any], decision: RoutingDecision
+    ) -> bool:
+        """Whether every selected engine is safe to launch and then cancel
+
+        The MCP federation also carries writes (sending messages, creating
+        issues), so those queries run staged instead of speculatively.
+        """
+        if not self.speculative_execution:
+            return False
+        engines = {decision.primary_engine, *decision.secondary_engines}
+        if "mcp_federation" not in engines:
+            return True
+        return self._mcp_read_only(query, context)
+
+    def _is_read_only(
         self, query: str, context: Dict[str, Any], decision: RoutingDecision
+    ) -> bool:
+        """Whether no selected engine can act on the query, so it may be cached
+
+        Agno agents take actions (updating deals, sending follow-ups) and MCP
+        servers carry writes, so answers involving either are only reused
+        for queries the federation classifies as reads.
+        """
+        engines = {decision.primary_engine, *decision.secondary_engines}
+        if "agno_orchestration" in engines:
+            return False
+        return "mcp_federation" not in engines or self._mcp_read_only(query, context)
+
+    @staticmethod
+    def _mcp_read_only(query: str, context: Dict[str, Any]) -> bool:
+        classification = mcp_federation.query_classifier.classify_query(query, context)
+        return classification["query_type"] in mcp_federation.hedged_query_types
+
+    async def _execute_hybrid_query(
+        self,
+        query: str,
+        context: Dict[str, Any],
+        decision: RoutingDecision,
+        speculate: bool = False,
     ) -> Dict[str, Any]:
         """Execute hybrid query based on routing decision."""
         start_time = time.perf_counter()
+        speculation: Dict[str, Any] = {}
 
-        # Execute primary engine
-        primary_result = await self._execute_engine_query(
-            decision.primary_engine, query, context
-        )
-
-        # Execute secondary engines if needed
-        secondary_results = []
-        if decision.secondary_engines:
-            if decision.parallel_execution:
-                # Parallel execution
-                tasks = [
-                    self._execute_engine_query(engine, query, context)
-                    for engine in decision.secondary_engines
-                ]
-                secondary_results = await asyncio.gather(*tasks, return_exceptions=True)
-            else:
-                # Sequential execution
-                for engine in decision.secondary_engines:
-                    result = await self._execute_engine_query(engine, query, context)
-                    secondary_results.append(result)
+        if speculate:
+            primary_result, secondary_results, speculation = (
+                await self._execute_speculative(query, context, decision)
+            )
+        else:
+            primary_result, secondary_results = await self._execute_staged(
+                query, context, decision
+            )
 
         # Combine results
         combined_result = self._combine_hybrid_results(
@@ -464,17 +712,144 @@ class HybridRAGRouter:
             "performance": {
                 "total_execution_time_ms": total_time,
                 "estimated_time_ms": decision.estimated_time_ms,
-                "performance_ratio": decision.estimated_time_ms / total_time
-                if total_time > 0
-                else 0,
+                "performance_ratio": (
+                    decision.estimated_time_ms / total_time if total_time > 0 else 0
+                ),
             },
         }
+        if speculation:
+            combined_result["routing_metadata"]["speculation"] = speculation
 
         # Update performance metrics
-        self._update_performance_metrics(decision, combined_result, total_time)
+        self._update_performance_metrics(
+            decision,
+            combined_result,
+            total_time,
+            [primary_result] + list(secondary_results),
+        )
 
         return combined_result
 
+    async def _execute_speculative(
+        self, query: str, context: Dict[str, Any], decision: RoutingDecision
+    ) -> tuple[ProcessingResult, List[ProcessingResult], Dict[str, Any]]:
+        """Run primary and secondary engines concurrently under a deadline
+
+        Once the primary engine has finished, engines still running are
+        cancelled if the successful results reach ``confidence_threshold``
+        (combined as the chance that at least one of them is right). The
+        primary is only ever cut off by the request's latency budget, so a
+        fast secondary cannot pre-empt it and it always records its latency.
+        """
+        budget_s = context.get("latency_budget_ms", self.latency_budget_ms) / 1000
+        threshold = context.get("confidence_threshold", self.confidence_threshold)
+        engines = [decision.primary_engine] + [
+            engine
+            for engine in decision.secondary_engines
+            if engine != decision.primary_engine
+        ]
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget_s
+        tasks = {
+            asyncio.create_task(self._execute_engine_query(engine, query, context)): (
+                engine
+            )
+            for engine in engines
+        }
+        results: Dict[str, ProcessingResult] = {}
+        pending = set(tasks)
+        stop_reason = "all_completed"
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    stop_reason = "deadline"
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    results[tasks[task]] = task.result()
+
+                if (
+                    pending
+                    and decision.primary_engine in results
+                    and self._combined_confidence(results) >= threshold
+                ):
+                    stop_reason = "confidence_reached"
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+
+        unfinished = [tasks[task] for task in pending]
+        for engine in unfinished:
+            error = (
+                "Deadline exceeded"
+                if stop_reason == "deadline"
+                else "Cancelled: confidence threshold reached"
+            )
+            results[engine] = ProcessingResult(
+                success=False,
+                data=None,
+                engine=engine,
+                # Timeouts count at the full budget in the latency history
+                execution_time_ms=budget_s * 1000 if stop_reason == "deadline" else 0,
+                confidence=0.0,
+                metadata={"query": query, "context": context, "cancelled": True},
+                error=error,
+            )
+
+        speculation = {
+            "stop_reason": stop_reason,
+            "latency_budget_ms": budget_s * 1000,
+            "confidence_threshold": threshold,
+            "combined_confidence": self._combined_confidence(results),
+            "cancelled_engines": unfinished if stop_reason != "deadline" else [],
+            "timed_out_engines": unfinished if stop_reason == "deadline" else [],
+        }
+        primary_result = results[decision.primary_engine]
+        secondary_results = [results[engine] for engine in engines[1:]]
+        return primary_result, secondary_results, speculation
+
+    @staticmethod
+    def _combined_confidence(results: Dict[str, ProcessingResult]) -> float:
+        """Probability that at least one successful result is right"""
+        miss = 1.0
+        for result in results.values():
+            if result.success:
+                miss *= 1.0 - min(max(result.confidence, 0.0), 1.0)
+        return 1.0 - miss
+
+    async def _execute_staged(
+        self, query: str, context: Dict[str, Any], decision: RoutingDecision
+    ) -> tuple[ProcessingResult, List[ProcessingResult]]:
+        """Run the primary engine, then the secondary engines"""
+        # Execute primary engine
+        primary_result = await self._execute_engine_query(
+            decision.primary_engine, query, context
+        )
+
+        # Execute secondary engines if needed
+        secondary_results = []
+        if decision.secondary_engines:
+            if decision.parallel_execution:
+                # Parallel execution
+                tasks = [
+                    self._execute_engine_query(engine, query, context)
+                    for engine in decision.secondary_engines
+                ]
+                secondary_results = await asyncio.gather(*tasks, return_exceptions=True)
+            else:
+                # Sequential execution
+                for engine in decision.secondary_engines:
+                    result = await self._execute_engine_query(engine, query, context)
+                    secondary_results.append(result)
+
+        return primary_result, secondary_results
+
     async def _execute_engine_query(
         self, engine: str, query: str, context: Dict[str, Any]
     ) -> ProcessingResult:
@@ -675,9 +1050,9 @@ class HybridRAGRouter:
             "type": "hybrid_complete",
             "combined_result": combined_result,
             "total_execution_time_ms": total_time,
-            "performance_ratio": decision.estimated_time_ms / total_time
-            if total_time > 0
-            else 0,
+            "performance_ratio": (
+                decision.estimated_time_ms / total_time if total_time > 0 else 0
+            ),
         }
 
     def _update_routing_metrics(
@@ -704,8 +1079,28 @@ class HybridRAGRouter:
         decision: RoutingDecision,
         result: Dict[str, Any],
         execution_time_ms: float,
+        engine_results: Optional[List[ProcessingResult]] = None,
     ):
         """Update performance metrics for adaptive learning."""
+        # Feed per-engine latency back into the classifier's time estimates;
+        # engines cancelled before finishing carry no latency information
+        for engine_result in engine_results or []:
+            if not isinstance(engine_result, ProcessingResult):
+                continue
+            if engine_result.metadata.get("cancelled") and not (
+                engine_result.execution_time_ms
+            ):
+                continue
+            samples = self.engine_latencies.setdefault(
+                engine_result.engine, deque(maxlen=200)
+            )
+            samples.append(engine_result.execution_time_ms)
+            self.classifier.latency_estimates_ms[engine_result.engine] = (
+                statistics.quantiles(samples, n=10)[-1]
+                if len(samples) >= 5
+                else max(samples)
+            )
+
         # Update success rate
         success = result.get("success", False)
         total_queries = self.metrics["total_queries"]
@@ -765,15 +1160,20 @@ class HybridRAGRouter:
                 for signature, history in self.performance_history.items()
             },
             "engine_success_rates": {
-                engine: metrics["successful_queries"] / metrics["total_queries"]
-                if metrics["total_queries"] > 0
-                else 0.0
+                engine: (
+                    metrics["successful_queries"] / metrics["total_queries"]
+                    if metrics["total_queries"] > 0
+                    else 0.0
+                )
                 for engine, metrics in self.metrics["engine_performance"].items()
             },
             "adaptive_learning": {
                 "enabled": self.learning_enabled,
                 "total_patterns": len(self.performance_history),
             },
+            "engine_latency_p90_ms": dict(self.classifier.latency_estimates_ms),
+            "classification_cache": self.classifier.decision_cache.get_stats(),
+            "answer_cache": self.answer_cache.get_stats(),
         }
 
     async def optimize_routing(self):
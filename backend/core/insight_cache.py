@@ -0,0 +1,108 @@
+"""Persistent cache of per-call analysis results
+Insights extracted from a call are stored under the call id and a hash of
+the call's content, so a call is analysed once and re-analysed only when its
+transcript changes. Entries live in a SQLite store like the L3 cache tier's
+and survive restarts.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Dict, Mapping, Optional
+
+from backend.core.cache_store import SQLiteCacheStore
+
+KEY_PREFIX = "call_insights"
+
+
+def content_fingerprint(content: Any) -> str:
+    """Stable hash of a transcript or call record"""
+    if not isinstance(content, (str, bytes)):
+        content = json.dumps(content, sort_keys=True, default=str)
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()[:32]
+
+
+def call_fingerprint(call: Mapping[str, Any]) -> Optional[str]:
+    """Fingerprint of a call's transcript, else of its record without the id
+
+    None when the call carries nothing but its id; such calls cannot be
+    checked for changes and must not be served from the cache.
+    """
+    content = call.get("transcript") or {
+        key: value for key, value in call.items() if key != "id"
+    }
+    return content_fingerprint(content) if content else None
+
+
+class InsightCache:
+    """Call insights keyed by (call id, content fingerprint)"""
+
+    def __init__(self, path: str, ttl_seconds: float = 90 * 86400):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._store: Optional[SQLiteCacheStore] = None
+        self.metrics = {"hits": 0, "misses": 0, "stores": 0}
+
+    def _get_store(self) -> SQLiteCacheStore:
+        if self._store is None:
+            self._store = SQLiteCacheStore(self.path)
+        return self._store
+
+    @staticmethod
+    def _key(call_id: str, fingerprint: str) -> str:
+        return f"{KEY_PREFIX}:{call_id}:{fingerprint}"
+
+    async def get_many(self, fingerprints: Mapping[str, str]) -> Dict[str, Any]:
+        """Cached insights for each call id whose content is unchanged"""
+        keys = {
+            self._key(call_id, fingerprint): call_id
+            for call_id, fingerprint in fingerprints.items()
+        }
+        rows = await asyncio.to_thread(
+            self._get_store().get_many, list(keys), time.time()
+        )
+        found = {keys[key]: json.loads(value) for key, value in rows.items()}
+        self.metrics["hits"] += len(found)
+        self.metrics["misses"] += len(keys) - len(found)
+        return found
+
+    async def set_many(
+        self, insights: Mapping[str, Any], fingerprints: Mapping[str, str]
+    ):
+        """Store insights per call id, replacing older versions of each call"""
+        if not insights:
+            return
+        store = self._get_store()
+        evict_at = time.time() + self.ttl_seconds
+
+        def write():
+            for call_id, value in insights.items():
+                store.delete_tag(f"call:{call_id}")
+                store.set_many(
+                    [
+                        (
+                            self._key(call_id, fingerprints[call_id]),
+                            json.dumps(value, default=str),
+                            evict_at,
+                        )
+                    ],
+                    tags=[f"call:{call_id}"],
+                )
+
+        await asyncio.to_thread(write)
+        self.metrics["stores"] += len(insights)
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hit_rate": self.metrics["hits"] / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,321 @@
+"""Append-only, log-structured storage for agent memories
+Each stream (one agent in one role partition) is a directory of JSONL
+segments. A write appends one line, a delete appends a tombstone, and an
+in-memory index of record offsets lets the newest records be read without
+scanning the log. Compaction rewrites the live records once enough of the
+log is garbage.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+StreamKey = Tuple[str, str]  # (partition, stream id)
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+@dataclass
+class RecordRef:
+    """Where a live record's line sits in the log"""
+
+    segment: int
+    offset: int
+    length: int
+
+
+class _Stream:
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = asyncio.Lock()
+        self.loaded = False
+        # Live records in write order: id -> location
+        self.index: "OrderedDict[str, RecordRef]" = OrderedDict()
+        self.segment = 1
+        self.segment_size = 0
+        self.total_bytes = 0
+        self.live_bytes = 0
+
+    def segment_path(self, number: int) -> Path:
+        return self.path / f"{SEGMENT_PREFIX}{number:08d}{SEGMENT_SUFFIX}"
+
+    def segment_numbers(self) -> List[int]:
+        if not self.path.exists():
+            return []
+        return sorted(
+            int(name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self.path)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+
+
+class MemoryLog:
+    """Log-structured record store with tombstone deletes and compaction
+
+    Records are dicts with an ``id``; writing an existing id supersedes the
+    old record. Every stream has its own lock, so agents never wait on each
+    other, and all file I/O runs in worker threads.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        segment_max_bytes: int = 4 * 1024 * 1024,
+        compaction_ratio: float = 0.5,
+        compaction_min_bytes: int = 64 * 1024,
+        fsync: bool = False,
+    ):
+        self.root = Path(root)
+        self.segment_max_bytes = segment_max_bytes
+        self.compaction_ratio = compaction_ratio
+        self.compaction_min_bytes = compaction_min_bytes
+        self.fsync = fsync
+        self._streams: Dict[StreamKey, _Stream] = {}
+
+    def _stream(self, key: StreamKey) -> _Stream:
+        stream = self._streams.get(key)
+        if stream is None:
+            partition, stream_id = key
+            stream = self._streams[key] = _Stream(self.root / partition / stream_id)
+        return stream
+
+    async def _ready(self, key: StreamKey) -> _Stream:
+        # Caller holds the stream lock
+        stream = self._stream(key)
+        if not stream.loaded:
+            await asyncio.to_thread(self._load, stream)
+        return stream
+
+    async def append(self, key: StreamKey, records: Sequence[Dict[str, Any]]):
+        """Append records; each must carry a unique ``id``"""
+        if not records:
+            return
+        lines = [self._encode({"op": "put", **record}) for record in records]
+        stream = self._stream(key)
+        async with stream.lock:
+            await self._ready(key)
+            refs = await asyncio.to_thread(self._write, stream, lines)
+            for record, ref in zip(records, refs):
+                previous = stream.index.pop(record["id"], None)
+                if previous is not None:
+                    stream.live_bytes -= previous.length
+                stream.index[record["id"]] = ref
+                stream.live_bytes += ref.length
+            await self._maybe_compact(stream)
+
+    async def delete(self, key: StreamKey, record_id: str) -> bool:
+        """Tombstone a record; returns False if it does not exist"""
+        stream = self._stream(key)
+        async with stream.lock:
+            await self._ready(key)
+            ref = stream.index.pop(record_id, None)
+            if ref is None:
+                return False
+            stream.live_bytes -= ref.length
+            tombstone = self._encode(
+                {"op": "delete", "id": record_id, "ts": time.time()}
+            )
+            await asyncio.to_thread(self._write, stream, [tombstone])
+            await self._maybe_compact(stream)
+            return True
+
+    async def tail(self, key: StreamKey, limit: int) -> List[Dict[str, Any]]:
+        """The newest ``limit`` live records, oldest first"""
+        stream = self._stream(key)
+        async with stream.lock:
+            await self._ready(key)
+            if limit <= 0 or not stream.index:
+                return []
+            refs = []
+            for ref in reversed(stream.index.values()):
+                refs.append(ref)
+                if len(refs) == limit:
+                    break
+            refs.reverse()
+            return await asyncio.to_thread(self._read, stream, refs)
+
+    async def count(self, key: StreamKey) -> int:
+        stream = self._stream(key)
+        async with stream.lock:
+            await self._ready(key)
+            return len(stream.index)
+
+    async def compact(self, key: StreamKey) -> Dict[str, int]:
+        """Rewrite the stream's live records into fresh segments"""
+        stream = self._stream(key)
+        async with stream.lock:
+            await self._ready(key)
+            return await self._compact(stream)
+
+    async def compact_all(self) -> Dict[str, int]:
+        """Compact every stream with garbage; meant for periodic maintenance"""
+        totals = {"streams": 0, "reclaimed_bytes": 0}
+        for key in await asyncio.to_thread(self._discover):
+            stream = self._stream(key)
+            async with stream.lock:
+                await self._ready(key)
+                if stream.total_bytes > stream.live_bytes:
+                    stats = await self._compact(stream)
+                    totals["streams"] += 1
+                    totals["reclaimed_bytes"] += stats["reclaimed_bytes"]
+        return totals
+
+    async def _maybe_compact(self, stream: _Stream):
+        garbage = stream.total_bytes - stream.live_bytes
+        if (
+            stream.total_bytes >= self.compaction_min_bytes
+            and garbage > self.compaction_ratio * stream.total_bytes
+        ):
+            await self._compact(stream)
+
+    async def _compact(self, stream: _Stream) -> Dict[str, int]:
+        before = stream.total_bytes
+        await asyncio.to_thread(self._rewrite, stream)
+        reclaimed = before - stream.total_bytes
+        logger.info(f"Compacted memory log {stream.path}: reclaimed {reclaimed} bytes")
+        return {"records": len(stream.index), "reclaimed_bytes": reclaimed}
+
+    @staticmethod
+    def _encode(record: Dict[str, Any]) -> bytes:
+        return (json.dumps(record, default=str) + "\n").encode("utf-8")
+
+    # Blocking helpers below run in worker threads under the stream lock
+
+    def _discover(self) -> List[StreamKey]:
+        keys = []
+        if not self.root.exists():
+            return keys
+        for partition in sorted(os.listdir(self.root)):
+            partition_path = self.root / partition
+            if not partition_path.is_dir():
+                continue
+            for stream_id in sorted(os.listdir(partition_path)):
+                if (partition_path / stream_id).is_dir():
+                    keys.append((partition, stream_id))
+        return keys
+
+    def _load(self, stream: _Stream):
+        stream.index.clear()
+        stream.total_bytes = 0
+        numbers = stream.segment_numbers()
+        for number in numbers:
+            with open(stream.segment_path(number), "rb") as f:
+                data = f.read()
+            if number == numbers[-1] and data and not data.endswith(b"\n"):
+                # Drop a torn final write so the next append starts a new line
+                data = data[: data.rfind(b"\n") + 1]
+                with open(stream.segment_path(number), "rb+") as f:
+                    f.truncate(len(data))
+            offset = 0
+            for line in data.splitlines(keepends=True):
+                length = len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if isinstance(record, dict) and "id" in record:
+                    stream.index.pop(record["id"], None)
+                    if record.get("op") != "delete":
+                        stream.index[record["id"]] = RecordRef(number, offset, length)
+                offset += length
+                stream.total_bytes += length
+
+        stream.live_bytes = sum(ref.length for ref in stream.index.values())
+        stream.segment = numbers[-1] if numbers else 1
+        stream.segment_size = (
+            stream.segment_path(stream.segment).stat().st_size if numbers else 0
+        )
+        stream.loaded = True
+
+    def _write(self, stream: _Stream, lines: List[bytes]) -> List[RecordRef]:
+        stream.path.mkdir(parents=True, exist_ok=True)
+        refs = []
+        handle = None
+        try:
+            for line in lines:
+                if (
+                    stream.segment_size
+                    and stream.segment_size + len(line) > self.segment_max_bytes
+                ):
+                    self._close(handle)
+                    handle = None
+                    stream.segment += 1
+                    stream.segment_size = 0
+                if handle is None:
+                    handle = open(stream.segment_path(stream.segment), "ab")
+                handle.write(line)
+                refs.append(RecordRef(stream.segment, stream.segment_size, len(line)))
+                stream.segment_size += len(line)
+                stream.total_bytes += len(line)
+        finally:
+            self._close(handle)
+        return refs
+
+    def _close(self, handle):
+        if handle is None:
+            return
+        handle.flush()
+        if self.fsync:
+            os.fsync(handle.fileno())
+        handle.close()
+
+    def _read(self, stream: _Stream, refs: List[RecordRef]) -> List[Dict[str, Any]]:
+        records = []
+        handles = {}
+        try:
+            for ref in refs:
+                handle = handles.get(ref.segment)
+                if handle is None:
+                    handle = handles[ref.segment] = open(
+                        stream.segment_path(ref.segment), "rb"
+                    )
+                handle.seek(ref.offset)
+                record = json.loads(handle.read(ref.length))
+                record.pop("op", None)
+                records.append(record)
+        finally:
+            for handle in handles.values():
+                handle.close()
+        return records
+
+    def _rewrite(self, stream: _Stream):
+        # New segments are numbered after the old ones and fully written
+        # before the old ones are removed. If the process dies in between,
+        # reloading replays old then new segments, and the new copies win.
+        old_numbers = stream.segment_numbers()
+        live = list(stream.index.items())
+        records = self._read(stream, [ref for _, ref in live])
+
+        stream.segment = (old_numbers[-1] if old_numbers else 0) + 1
+        stream.segment_size = 0
+        stream.total_bytes = 0
+        refs = self._write(stream, [self._encode({"op": "put", **r}) for r in records])
+        if not self.fsync:
+            # Compaction deletes data, so make the rewrite durable regardless
+            for number in {ref.segment for ref in refs}:
+                with open(stream.segment_path(number), "rb+") as f:
+                    os.fsync(f.fileno())
+
+        stream.index = OrderedDict(
+            (record_id, ref) for (record_id, _), ref in zip(live, refs)
+        )
+        stream.live_bytes = stream.total_bytes
+        for number in old_numbers:
+            os.remove(stream.segment_path(number))
+
+
+def sanitize_stream_id(value: str) -> str:
+    """Make an agent id or partition safe to use as a directory name"""
+    cleaned = "".join(
+        char if char.isalnum() or char in "-_." else "_" for char in value
+    )
+    return cleaned.strip(".") or "_"
@@ -0,0 +1,233 @@
+"""Shared compiled query classification for Sophia AI routers
+Every vocabulary term of a rule set is compiled into one alternation, so a
+query is scanned once no matter how many rules it is scored against, and
+finished decisions are memoized per normalized query in a bounded LRU.
+"""
+
+import re
+from collections import OrderedDict
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+# A rule is a sequence of term groups that must occur in order, e.g.
+# (("find", "search"), ("document", "file")) behaves like the regex
+# r"\b(find|search)\b.*\b(document|file)\b"
+Rule = Sequence[Sequence[str]]
+
+Label = TypeVar("Label", bound=Hashable)
+Value = TypeVar("Value")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _trie_pattern(terms: Sequence[str]) -> str:
+    """Alternation of ``terms`` factored by common prefix
+
+    ``find|fetch|filter`` becomes ``f(?:ind|etch|ilter)``, so the regex engine
+    rejects a position after one character instead of trying every term.
+    Longer continuations come first, making the match at a position the
+    longest term that starts there.
+    """
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, Any]) -> str:
+        branches = [
+            re.escape(char) + emit(child) for char, child in node.items() if char
+        ]
+        branches.sort(key=len, reverse=True)
+        optional = "" in node
+        if not branches:
+            return ""
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+
+    return emit(trie)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace; the text rules are matched against"""
+    return _WHITESPACE.sub(" ", query).strip().lower()
+
+
+class CompiledRuleSet(Generic[Label]):
+    """Scores text against labelled rules with a single regex scan
+
+    The scan finds every term occurrence (including terms that are prefixes
+    of longer ones at the same position); rules are then checked against the
+    occurrence spans without touching the text again. With ``whole_words``
+    terms need word boundaries on both sides, otherwise they match as plain
+    substrings.
+    """
+
+    def __init__(self, rules: Dict[Label, List[Rule]], whole_words: bool = True):
+        self.rules = rules
+        self.whole_words = whole_words
+
+        terms = sorted(
+            {
+                term
+                for label_rules in rules.values()
+                for rule in label_rules
+                for group in rule
+                for term in group
+            },
+            key=lambda term: (-len(term), term),
+        )
+        self.terms = terms
+        # Zero-width lookahead so overlapping occurrences are all reported
+        alternation = _trie_pattern(terms)
+        if whole_words:
+            self._scanner = re.compile(rf"\b(?=({alternation})\b)")
+        else:
+            self._scanner = re.compile(rf"(?=({alternation}))")
+        self._boundary = re.compile(r"\b")
+
+        # Shorter terms that can match at the same position as a longer one
+        self._prefixes = {
+            term: [other for other in terms if other != term and term.startswith(other)]
+            for term in terms
+        }
+        # Single-group rules are indexed by term so scoring only touches the
+        # terms that occurred; ordered chains are checked against the spans
+        self._rules_by_term: Dict[str, List[int]] = {}
+        self._chains: List[Tuple[int, List[frozenset]]] = []
+        self._rule_labels: List[Label] = []
+        for label, label_rules in rules.items():
+            for rule in label_rules:
+                rule_id = len(self._rule_labels)
+                self._rule_labels.append(label)
+                if len(rule) == 1:
+                    for term in rule[0]:
+                        self._rules_by_term.setdefault(term, []).append(rule_id)
+                else:
+                    self._chains.append((rule_id, [frozenset(group) for group in rule]))
+
+    def __len__(self) -> int:
+        return sum(len(label_rules) for label_rules in self.rules.values())
+
+    def scan(self, text: str) -> Dict[str, List[Tuple[int, int]]]:
+        """Spans of every term occurrence in ``text`` (already normalized)"""
+        occurrences: Dict[str, List[Tuple[int, int]]] = {}
+        prefixes = self._prefixes
+        boundary = self._boundary.match if self.whole_words else None
+        for match in self._scanner.finditer(text):
+            start = match.start()
+            longest = match.group(1)
+            spans = occurrences.get(longest)
+            if spans is None:
+                spans = occurrences[longest] = []
+            spans.append((start, start + len(longest)))
+            for prefix in prefixes[longest]:
+                end = start + len(prefix)
+                if boundary is None or boundary(text, end):
+                    occurrences.setdefault(prefix, []).append((start, end))
+        return occurrences
+
+    def score(self, text: str) -> Dict[Label, int]:
+        """Number of matching rules per label"""
+        occurrences = self.scan(text)
+        matched = set()
+        for term in occurrences:
+            matched.update(self._rules_by_term.get(term, ()))
+        for rule_id, rule in self._chains:
+            if self._matches(rule, occurrences):
+                matched.add(rule_id)
+
+        scores = dict.fromkeys(self.rules, 0)
+        for rule_id in matched:
+            scores[self._rule_labels[rule_id]] += 1
+        return scores
+
+    @staticmethod
+    def _matches(
+        rule: List[frozenset], occurrences: Dict[str, List[Tuple[int, int]]]
+    ) -> bool:
+        # Greedy: take the earliest-ending occurrence of each group after the
+        # previous one, which finds an ordered chain whenever one exists
+        found = occurrences.keys()
+        for group in rule:
+            if group.isdisjoint(found):
+                return False
+
+        position = 0
+        for group in rule:
+            best_end = None
+            for term in group:
+                for start, end in occurrences.get(term, ()):
+                    if start >= position and (best_end is None or end < best_end):
+                        best_end = end
+            if best_end is None:
+                return False
+            position = best_end
+        return True
+
+    def as_regexes(self) -> Dict[Label, List[str]]:
+        """Equivalent per-rule regular expressions, for testing and benchmarks"""
+        boundary = r"\b" if self.whole_words else ""
+        return {
+            label: [
+                ".*".join(
+                    boundary
+                    + "("
+                    + "|".join(re.escape(term) for term in group)
+                    + ")"
+                    + boundary
+                    for group in rule
+                )
+                for rule in label_rules
+            ]
+            for label, label_rules in self.rules.items()
+        }
+
+
+class DecisionCache(Generic[Value]):
+    """Bounded LRU of classification results"""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Value]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Value]:
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,48 @@
+"""Async token-bucket rate limiting for Sophia AI
+Used to keep bulk calls to metered APIs (embeddings, LLMs) under their
+per-minute request and token quotas.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class AsyncTokenBucket:
+    """Token bucket that refills continuously at ``rate_per_minute``
+
+    ``acquire`` waits until enough tokens are available. Requests larger than
+    the bucket capacity are clamped so they can still proceed once the bucket
+    is full.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second
+        )
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Take ``amount`` tokens, sleeping as needed; returns seconds waited"""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+
+        # Holding the lock while sleeping keeps callers first-come first-served
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+
+                delay = (amount - self.tokens) / self.rate_per_second
+                await asyncio.sleep(delay)
+                waited += delay
@@ -0,0 +1,375 @@
+"""Semantic answer cache for the hybrid RAG router
+Answers are stored under the embedding of the question that produced them.
+A later question whose embedding is close enough, and that names the same
+entities and periods, is answered from the cache along with the original
+question, the sources behind the answer and its age. Entries expire on the
+shortest TTL of their sources and are dropped when a source reports changes.
+"""
+
+import logging
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from backend.core.cache_invalidation import (
+    InvalidationBus,
+    InvalidationMessage,
+    RedisInvalidationBus,
+)
+from backend.vector.matrix_index import MatrixIndex
+
+logger = logging.getLogger(__name__)
+
+# How long an answer stays valid, per underlying data source
+DEFAULT_SOURCE_TTLS = {
+    "gong": 3600,
+    "hubspot": 900,
+    "slack": 600,
+    "linear": 900,
+    "vercel": 300,
+    "lambda_labs": 300,
+    "knowledge": 3600,
+    "agno": 300,
+}
+
+SOURCE_TAG_PREFIX = "source:"
+
+# Capitalized words that start questions rather than name things
+_LEADING_WORDS = {
+    "a",
+    "an",
+    "are",
+    "can",
+    "compare",
+    "did",
+    "do",
+    "does",
+    "find",
+    "get",
+    "give",
+    "how",
+    "i",
+    "is",
+    "list",
+    "show",
+    "summarize",
+    "tell",
+    "the",
+    "what",
+    "what's",
+    "when",
+    "where",
+    "which",
+    "who",
+    "why",
+}
+_TOKEN = re.compile(r"[\w'][\w'&.-]*")
+
+
+def anchor_terms(query: str) -> FrozenSet[str]:
+    """Terms that must match exactly for two questions to share an answer
+
+    Numbers and periods ("Q3", "2024") and capitalized names ("Acme") are
+    anchors; "Q3 pipeline for Acme" and "Acme Q3 pipeline" agree, while the
+    same question about another account or quarter does not.
+    """
+    anchors = set()
+    for token in _TOKEN.findall(query):
+        token = token.rstrip(".'")
+        lowered = token.lower()
+        if any(char.isdigit() for char in token):
+            anchors.add(lowered)
+        elif token[:1].isupper() and lowered not in _LEADING_WORDS:
+            anchors.add(lowered.removesuffix("'s"))
+    return frozenset(anchors)
+
+
+@dataclass
+class CachedAnswer:
+    """A stored answer with its provenance"""
+
+    entry_id: str
+    query: str
+    answer: Dict[str, Any]
+    sources: List[str]
+    scope: str
+    anchors: FrozenSet[str]
+    created_at: float
+    expires_at: float
+    version: int = field(default_factory=time.time_ns)
+    hits: int = 0
+
+    def provenance(self, similarity: float, now: float) -> Dict[str, Any]:
+        return {
+            "hit": True,
+            "matched_query": self.query,
+            "similarity": similarity,
+            "sources": list(self.sources),
+            "age_seconds": now - self.created_at,
+            "expires_in_seconds": self.expires_at - now,
+        }
+
+
+class SemanticAnswerCache:
+    """Embedding-keyed answer cache with per-source TTLs and invalidation
+
+    Each scope (e.g. a set of routing context flags) gets its own exact
+    cosine index, so answers never leak between scopes. Callers embed the
+    question themselves and pass the vector in. Source invalidations are
+    broadcast on ``invalidation_bus`` so every worker drops its copies.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.92,
+        max_entries: int = 5000,
+        source_ttls: Optional[Dict[str, float]] = None,
+        default_ttl_seconds: float = 600,
+        invalidation_bus: Optional[InvalidationBus] = None,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.source_ttls = dict(DEFAULT_SOURCE_TTLS)
+        self.source_ttls.update(source_ttls or {})
+        self.default_ttl_seconds = default_ttl_seconds
+        self.invalidation_bus = invalidation_bus
+        self.node_id = uuid.uuid4().hex
+        self._sequence = 0
+        self._started = False
+
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._indexes: Dict[str, MatrixIndex] = {}
+        self._by_source: Dict[str, Set[str]] = {}
+        # Version of the latest invalidation seen per source
+        self._source_versions: Dict[str, int] = {}
+
+        self.metrics = {
+            "lookups": 0,
+            "hits": 0,
+            "near_misses": 0,
+            "stores": 0,
+            "expired": 0,
+            "evicted": 0,
+            "invalidated": 0,
+            "stale_stores": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def start(self):
+        """Subscribe to source invalidations from other workers"""
+        if self._started:
+            return
+        self._started = True
+        if self.invalidation_bus is None:
+            return
+        try:
+            await self.invalidation_bus.start(self._apply_invalidation)
+        except Exception as e:
+            logger.warning(f"Answer cache invalidation bus unavailable: {e}")
+            self.invalidation_bus = None
+
+    def ttl_for(self, sources: Iterable[str]) -> float:
+        """Shortest TTL among ``sources``"""
+        ttls = [
+            self.source_ttls.get(source, self.default_ttl_seconds) for source in sources
+        ]
+        return min(ttls) if ttls else self.default_ttl_seconds
+
+    def lookup(
+        self,
+        query: str,
+        embedding: Sequence[float],
+        scope: str = "",
+        now: Optional[float] = None,
+    ) -> Optional[Tuple[CachedAnswer, float]]:
+        """Closest live answer above the similarity threshold, with its score"""
+        now = time.time() if now is None else now
+        self.metrics["lookups"] += 1
+        index = self._indexes.get(scope)
+        if index is None or not len(index) or len(embedding) != index.dimension:
+            return None
+
+        anchors = anchor_terms(query)
+        for entry_id, similarity in index.search(embedding, top_k=5)[0]:
+            if similarity < self.similarity_threshold:
+                break
+            entry = self._entries[entry_id]
+            if entry.expires_at <= now:
+                self._remove(entry_id)
+                self.metrics["expired"] += 1
+                continue
+            if entry.anchors != anchors:
+                self.metrics["near_misses"] += 1
+                continue
+
+            entry.hits += 1
+            self._entries.move_to_end(entry_id)
+            self.metrics["hits"] += 1
+            return entry, similarity
+        return None
+
+    def store(
+        self,
+        query: str,
+        embedding: Sequence[float],
+        answer: Dict[str, Any],
+        sources: Sequence[str],
+        scope: str = "",
+        now: Optional[float] = None,
+        version: Optional[int] = None,
+    ) -> Optional[CachedAnswer]:
+        """Remember ``answer``; it expires on the shortest TTL of its sources
+
+        ``version`` is a ``time.time_ns()`` stamp taken when the answer was
+        started; answers whose sources were invalidated since are not stored.
+        """
+        now = time.time() if now is None else now
+        version = time.time_ns() if version is None else version
+        if any(self._source_versions.get(source, 0) > version for source in sources):
+            self.metrics["stale_stores"] += 1
+            return None
+
+        index = self._indexes.get(scope)
+        if index is None or index.dimension != len(embedding):
+            # A new embedding model invalidates everything indexed before it
+            if index is not None:
+                for entry_id in index.export()[0]:
+                    self._remove(entry_id)
+            index = self._indexes[scope] = MatrixIndex(len(embedding))
+
+        entry = CachedAnswer(
+            entry_id=uuid.uuid4().hex,
+            query=query,
+            answer=answer,
+            sources=sorted(set(sources)),
+            scope=scope,
+            anchors=anchor_terms(query),
+            created_at=now,
+            expires_at=now + self.ttl_for(sources),
+            version=version,
+        )
+        index.upsert(entry.entry_id, embedding)
+        self._entries[entry.entry_id] = entry
+        for source in entry.sources:
+            self._by_source.setdefault(source, set()).add(entry.entry_id)
+        self.metrics["stores"] += 1
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.metrics["evicted"] += 1
+        return entry
+
+    async def invalidate_sources(self, sources: Sequence[str]) -> int:
+        """Drop answers built on any of ``sources`` here and on other workers"""
+        version = time.time_ns()
+        dropped = self._drop_sources(sources, version)
+        await self.start()
+        if self.invalidation_bus is not None:
+            self._sequence += 1
+            message = InvalidationMessage(
+                node_id=self.node_id,
+                sequence=self._sequence,
+                version=version,
+                tags=[SOURCE_TAG_PREFIX + source for source in sources],
+            )
+            try:
+                await self.invalidation_bus.publish(message)
+            except Exception as e:
+                logger.warning(f"Failed to publish answer cache invalidation: {e}")
+        if dropped:
+            logger.info(f"Dropped {dropped} cached answers built on {list(sources)}")
+        return dropped
+
+    async def invalidate_source(self, source: str) -> int:
+        return await self.invalidate_sources([source])
+
+    async def _apply_invalidation(self, message: InvalidationMessage):
+        if message.node_id == self.node_id:
+            return
+        sources = [
+            tag[len(SOURCE_TAG_PREFIX) :]
+            for tag in message.tags
+            if tag.startswith(SOURCE_TAG_PREFIX)
+        ]
+        self._drop_sources(sources, message.version)
+
+    def _drop_sources(self, sources: Sequence[str], version: int) -> int:
+        entry_ids = set()
+        for source in sources:
+            entry_ids.update(self._by_source.get(source, ()))
+            self._source_versions[source] = max(
+                self._source_versions.get(source, 0), version
+            )
+
+        dropped = 0
+        for entry_id in entry_ids:
+            entry = self._entries.get(entry_id)
+            # Answers stored after the change already reflect it
+            if entry is not None and entry.version < version:
+                self._remove(entry_id)
+                dropped += 1
+        self.metrics["invalidated"] += dropped
+        return dropped
+
+    def _remove(self, entry_id: str):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        index = self._indexes.get(entry.scope)
+        if index is not None:
+            index.delete(entry_id)
+        for source in entry.sources:
+            ids = self._by_source.get(source)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._by_source[source]
+
+    def clear(self):
+        self._entries.clear()
+        self._indexes.clear()
+        self._by_source.clear()
+
+    async def close(self):
+        if self.invalidation_bus is not None:
+            await self.invalidation_bus.close()
+        self._started = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.metrics["lookups"]
+        return {
+            **self.metrics,
+            "entries": len(self._entries),
+            "scopes": len(self._indexes),
+            "hit_rate": self.metrics["hits"] / lookups if lookups else 0.0,
+            "similarity_threshold": self.similarity_threshold,
+            "entries_by_source": {
+                source: len(ids) for source, ids in self._by_source.items()
+            },
+        }
+
+
+# Global instance
+semantic_answer_cache = SemanticAnswerCache(
+    invalidation_bus=RedisInvalidationBus(
+        os.getenv("REDIS_URL", "redis://localhost:6379"),
+        channel="rag:answer_invalidations",
+    )
+)
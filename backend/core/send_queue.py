@@ -0,0 +1,139 @@
+"""Bounded per-client send queues for Sophia AI push channels
+A broadcaster serializes each message once and puts the same payload on every
+recipient's queue without awaiting the network; a writer task per client
+drains its own queue, so a slow consumer only ever delays itself. What
+happens when a queue is full is decided by its overflow policy.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Hashable, Optional, Union
+
+Payload = Union[str, bytes]
+
+
+class OverflowPolicy(str, Enum):
+    """What a full send queue does with a new message"""
+
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"  # newest message per key wins, then drop oldest
+    DISCONNECT = "disconnect"
+
+
+@dataclass
+class PendingMessage:
+    """A payload waiting in a send queue"""
+
+    payload: Payload
+    enqueued_at: float
+    key: Optional[Hashable] = None
+
+
+class ClientSendQueue:
+    """FIFO of serialized payloads for one client
+
+    ``put`` never blocks. Messages with a ``key`` (e.g. a dashboard widget)
+    replace the pending message with the same key under the ``COALESCE``
+    policy, keeping its place in line, so a lagging client skips straight to
+    the latest state instead of replaying every intermediate value.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        policy: OverflowPolicy = OverflowPolicy.COALESCE,
+    ):
+        self.max_size = max_size
+        self.policy = OverflowPolicy(policy)
+        self._pending: "OrderedDict[Any, PendingMessage]" = OrderedDict()
+        self._sequence = 0
+        self._ready = asyncio.Event()
+        self._closed = False
+
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.overflowed = False
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, payload: Payload, key: Optional[Hashable] = None) -> bool:
+        """Queue ``payload``; False if the client should be disconnected"""
+        if self._closed:
+            return False
+        self.enqueued += 1
+
+        if key is not None and self.policy is OverflowPolicy.COALESCE:
+            slot = ("key", key)
+            pending = self._pending.get(slot)
+            if pending is not None:
+                # Keep the original enqueue time so lag reflects the wait
+                pending.payload = payload
+                self.coalesced += 1
+                return True
+        else:
+            self._sequence += 1
+            slot = ("seq", self._sequence)
+
+        if len(self._pending) >= self.max_size:
+            if self.policy is OverflowPolicy.DISCONNECT:
+                self.overflowed = True
+                self.dropped += 1
+                return False
+            self._pending.popitem(last=False)
+            self.dropped += 1
+
+        self._pending[slot] = PendingMessage(payload, time.monotonic(), key)
+        self._ready.set()
+        return True
+
+    async def get(self) -> Optional[PendingMessage]:
+        """Next message in order, or None once the queue is closed"""
+        while not self._pending:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        if self._closed:
+            return None
+        return self._pending.popitem(last=False)[1]
+
+    def mark_sent(self, message: PendingMessage):
+        """Record delivery of ``message`` for lag metrics"""
+        self.sent += 1
+        self.last_lag_ms = (time.monotonic() - message.enqueued_at) * 1000
+        self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+
+    def close(self):
+        """Discard pending messages and release the writer"""
+        self._closed = True
+        self._pending.clear()
+        self._ready.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        oldest = next(iter(self._pending.values()), None)
+        return {
+            "policy": self.policy.value,
+            "depth": len(self._pending),
+            "max_size": self.max_size,
+            "oldest_pending_ms": (
+                (time.monotonic() - oldest.enqueued_at) * 1000 if oldest else 0.0
+            ),
+            "last_lag_ms": self.last_lag_ms,
+            "max_lag_ms": self.max_lag_ms,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
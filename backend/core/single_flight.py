@@ -0,0 +1,67 @@
+"""Fetch coordination primitives for the hierarchical cache
+
+``SingleFlight`` runs at most one fetch per key and hands the same task to
+every concurrent caller. ``should_refresh_early`` is the XFetch test, which
+refreshes a value shortly before it expires with a probability that grows
+towards expiry and with how long the value took to compute.
+"""
+
+import asyncio
+import math
+import random
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class SingleFlight:
+    """At most one running fetch per key, shared by every caller
+
+    ``on_error`` is called with the key and exception of every failed fetch,
+    so errors from fetches nobody awaits (background refreshes) still surface.
+    """
+
+    def __init__(self, on_error: Optional[Callable[[str, BaseException], None]] = None):
+        self.on_error = on_error
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def start(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Return the in-flight task for ``key``, starting ``fetch()`` if none"""
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+
+        task = asyncio.create_task(fetch())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is None:
+            return
+        if self.on_error is not None:
+            self.on_error(key, task.exception())
+
+
+def should_refresh_early(
+    expires_at: float,
+    delta: float,
+    now: float,
+    beta: float = 1.0,
+    rand: Callable[[], float] = random.random,
+) -> bool:
+    """XFetch: refresh when ``now - delta * beta * ln(U)`` passes expiry
+
+    ``delta`` is how long the value took to compute; values without one (or
+    with ``beta <= 0``) are never refreshed early.
+    """
+    if not delta or delta <= 0 or beta <= 0:
+        return False
+    gap = -delta * beta * math.log(1.0 - rand())
+    return now + gap >= expires_at
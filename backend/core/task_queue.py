@@ -0,0 +1,493 @@
+"""Durable priority task queue for Sophia AI agents
+Tasks are appended to one lane per (capability, priority) and stay queued
+until an agent pulls them; a pulled task stays pending until the agent
+acknowledges it. Tasks left pending longer than the visibility timeout (the
+agent crashed or hung) are claimed by idle agents, and tasks delivered too
+many times are moved to a dead-letter lane instead of looping forever.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Any, Deque, Dict, List, Sequence, Tuple
+
+try:
+    import redis.asyncio as aioredis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MIN_PRIORITY = 1
+MAX_PRIORITY = 5
+
+
+def clamp_priority(priority: int) -> int:
+    return max(MIN_PRIORITY, min(MAX_PRIORITY, int(priority)))
+
+
+@dataclass
+class QueuedTask:
+    """A task delivered to a consumer, to be acked or released"""
+
+    delivery_id: str
+    capability: str
+    priority: int
+    payload: Dict[str, Any]
+    consumer: str = ""
+    deliveries: int = 1
+    claimed_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def task_id(self) -> str:
+        return self.payload.get("task_id", self.delivery_id)
+
+
+class TaskQueue(ABC):
+    """Pull-based work queue with acknowledgements"""
+
+    def __init__(
+        self, visibility_timeout_seconds: float = 300.0, max_deliveries: int = 5
+    ):
+        self.visibility_timeout_seconds = visibility_timeout_seconds
+        self.max_deliveries = max_deliveries
+        self.metrics = {
+            "enqueued": 0,
+            "delivered": 0,
+            "acked": 0,
+            "released": 0,
+            "reclaimed": 0,
+            "dead_lettered": 0,
+        }
+
+    @abstractmethod
+    async def enqueue(
+        self, capability: str, payload: Dict[str, Any], priority: int = 1
+    ) -> str:
+        """Append a task to its (capability, priority) lane"""
+        pass
+
+    @abstractmethod
+    async def claim(
+        self,
+        capabilities: Sequence[str],
+        consumer: str,
+        count: int = 1,
+        block_seconds: float = 0.0,
+    ) -> List[QueuedTask]:
+        """Up to ``count`` new tasks, highest priority first"""
+        pass
+
+    @abstractmethod
+    async def reclaim(
+        self, capabilities: Sequence[str], consumer: str, count: int = 1
+    ) -> List[QueuedTask]:
+        """Take over tasks pending past the visibility timeout"""
+        pass
+
+    @abstractmethod
+    async def ack(self, task: QueuedTask):
+        """Mark a task done and remove it"""
+        pass
+
+    @abstractmethod
+    async def release(self, task: QueuedTask):
+        """Hand an unfinished task back to its lane for another consumer"""
+        pass
+
+    @abstractmethod
+    async def extend(self, tasks: Sequence[QueuedTask]):
+        """Reset the visibility timeout of tasks the consumer still owns"""
+        pass
+
+    @abstractmethod
+    async def depth(self, capability: str) -> Dict[int, int]:
+        """Queued (not yet delivered) tasks per priority"""
+        pass
+
+    async def close(self):
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.metrics,
+            "visibility_timeout_seconds": self.visibility_timeout_seconds,
+            "max_deliveries": self.max_deliveries,
+        }
+
+
+class InMemoryTaskQueue(TaskQueue):
+    """Single-process stand-in with the same delivery semantics, for tests"""
+
+    def __init__(
+        self, visibility_timeout_seconds: float = 300.0, max_deliveries: int = 5
+    ):
+        super().__init__(visibility_timeout_seconds, max_deliveries)
+        self._lanes: Dict[Tuple[str, int], Deque[Tuple[str, Dict[str, Any], int]]] = {}
+        self._pending: Dict[str, QueuedTask] = {}
+        self.dead_letters: List[QueuedTask] = []
+        self._ids = itertools.count(1)
+        self._ready = asyncio.Event()
+
+    async def enqueue(
+        self, capability: str, payload: Dict[str, Any], priority: int = 1
+    ) -> str:
+        delivery_id = str(next(self._ids))
+        lane = self._lanes.setdefault((capability, clamp_priority(priority)), deque())
+        lane.append((delivery_id, payload, 0))
+        self.metrics["enqueued"] += 1
+        self._ready.set()
+        return delivery_id
+
+    def _take(
+        self, capabilities: Sequence[str], consumer: str, count: int
+    ) -> List[QueuedTask]:
+        tasks = []
+        for priority in range(MAX_PRIORITY, MIN_PRIORITY - 1, -1):
+            for capability in capabilities:
+                lane = self._lanes.get((capability, priority))
+                while lane and len(tasks) < count:
+                    delivery_id, payload, deliveries = lane.popleft()
+                    task = QueuedTask(
+                        delivery_id,
+                        capability,
+                        priority,
+                        payload,
+                        consumer,
+                        deliveries + 1,
+                    )
+                    self._pending[delivery_id] = task
+                    tasks.append(task)
+        self.metrics["delivered"] += len(tasks)
+        return tasks
+
+    async def claim(
+        self,
+        capabilities: Sequence[str],
+        consumer: str,
+        count: int = 1,
+        block_seconds: float = 0.0,
+    ) -> List[QueuedTask]:
+        deadline = time.monotonic() + block_seconds
+        while True:
+            tasks = self._take(capabilities, consumer, count)
+            remaining = deadline - time.monotonic()
+            if tasks or remaining <= 0:
+                return tasks
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def reclaim(
+        self, capabilities: Sequence[str], consumer: str, count: int = 1
+    ) -> List[QueuedTask]:
+        cutoff = time.monotonic() - self.visibility_timeout_seconds
+        stuck = [
+            task
+            for task in self._pending.values()
+            if task.capability in capabilities and task.claimed_at <= cutoff
+        ]
+        reclaimed = []
+        for task in stuck:
+            if len(reclaimed) >= count:
+                break
+            if task.deliveries >= self.max_deliveries:
+                del self._pending[task.delivery_id]
+                self.dead_letters.append(task)
+                self.metrics["dead_lettered"] += 1
+                continue
+            task = replace(
+                task,
+                consumer=consumer,
+                deliveries=task.deliveries + 1,
+                claimed_at=time.monotonic(),
+            )
+            self._pending[task.delivery_id] = task
+            reclaimed.append(task)
+        self.metrics["reclaimed"] += len(reclaimed)
+        return reclaimed
+
+    async def ack(self, task: QueuedTask):
+        if self._pending.pop(task.delivery_id, None) is not None:
+            self.metrics["acked"] += 1
+
+    async def release(self, task: QueuedTask):
+        if self._pending.pop(task.delivery_id, None) is None:
+            return
+        lane = self._lanes.setdefault((task.capability, task.priority), deque())
+        lane.appendleft((task.delivery_id, task.payload, task.deliveries))
+        self.metrics["released"] += 1
+        self._ready.set()
+
+    async def extend(self, tasks: Sequence[QueuedTask]):
+        now = time.monotonic()
+        for task in tasks:
+            pending = self._pending.get(task.delivery_id)
+            if pending is not None and pending.consumer == task.consumer:
+                pending.claimed_at = now
+
+    async def depth(self, capability: str) -> Dict[int, int]:
+        return {
+            priority: len(lane)
+            for (lane_capability, priority), lane in self._lanes.items()
+            if lane_capability == capability and lane
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **super().get_stats(),
+            "queued": sum(len(lane) for lane in self._lanes.values()),
+            "pending": len(self._pending),
+            "dead_letters": len(self.dead_letters),
+        }
+
+
+class RedisStreamTaskQueue(TaskQueue):
+    """Redis Streams backend: one stream per lane, one consumer group
+
+    Delivered-but-unacked tasks live in the group's pending entries list,
+    so they survive agent crashes and are taken over with XAUTOCLAIM.
+    """
+
+    def __init__(
+        self,
+        redis_url: str,
+        prefix: str = "sophia:tasks",
+        group: str = "agents",
+        visibility_timeout_seconds: float = 300.0,
+        max_deliveries: int = 5,
+    ):
+        super().__init__(visibility_timeout_seconds, max_deliveries)
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.group = group
+        self._redis = None
+        self._groups: set = set()
+
+    def _lane(self, capability: str, priority: int) -> str:
+        return f"{self.prefix}:{capability}:p{priority}"
+
+    def _lanes(self, capabilities: Sequence[str]) -> List[Tuple[str, str, int]]:
+        # Highest priority first, capabilities interleaved within a priority
+        return [
+            (self._lane(capability, priority), capability, priority)
+            for priority in range(MAX_PRIORITY, MIN_PRIORITY - 1, -1)
+            for capability in capabilities
+        ]
+
+    async def _client(self):
+        if self._redis is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis is required for RedisStreamTaskQueue")
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    async def _ensure_group(self, stream: str):
+        if stream in self._groups:
+            return
+        client = await self._client()
+        try:
+            await client.xgroup_create(stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._groups.add(stream)
+
+    async def enqueue(
+        self, capability: str, payload: Dict[str, Any], priority: int = 1
+    ) -> str:
+        stream = self._lane(capability, clamp_priority(priority))
+        await self._ensure_group(stream)
+        client = await self._client()
+        delivery_id = await client.xadd(stream, self._fields(payload))
+        self.metrics["enqueued"] += 1
+        return delivery_id
+
+    @staticmethod
+    def _fields(payload: Dict[str, Any], deliveries: int = 0) -> Dict[str, Any]:
+        return {"task": json.dumps(payload), "deliveries": deliveries}
+
+    def _decode(
+        self, lane: Tuple[str, str, int], consumer: str, entries
+    ) -> List[QueuedTask]:
+        _, capability, priority = lane
+        return [
+            QueuedTask(
+                delivery_id=entry_id,
+                capability=capability,
+                priority=priority,
+                payload=json.loads(fields["task"]),
+                consumer=consumer,
+                # Deliveries before the task was released back to its lane
+                deliveries=int(fields.get("deliveries", 0)) + 1,
+            )
+            for entry_id, fields in entries
+            if fields
+        ]
+
+    async def claim(
+        self,
+        capabilities: Sequence[str],
+        consumer: str,
+        count: int = 1,
+        block_seconds: float = 0.0,
+    ) -> List[QueuedTask]:
+        client = await self._client()
+        lanes = self._lanes(capabilities)
+        for stream, _, _ in lanes:
+            await self._ensure_group(stream)
+
+        # Drain lanes in priority order without blocking
+        tasks: List[QueuedTask] = []
+        for lane in lanes:
+            if len(tasks) >= count:
+                break
+            response = await client.xreadgroup(
+                self.group, consumer, {lane[0]: ">"}, count=count - len(tasks)
+            )
+            for _, entries in response or ():
+                tasks.extend(self._decode(lane, consumer, entries))
+
+        # Nothing queued: wait on every lane at once
+        if not tasks and block_seconds > 0:
+            by_stream = {lane[0]: lane for lane in lanes}
+            response = await client.xreadgroup(
+                self.group,
+                consumer,
+                {stream: ">" for stream in by_stream},
+                count=count,
+                block=int(block_seconds * 1000),
+            )
+            for stream, entries in response or ():
+                tasks.extend(self._decode(by_stream[stream], consumer, entries))
+            # COUNT applies per stream, so keep the best ``count`` and hand
+            # the rest back; they are already pending for this consumer
+            tasks.sort(key=lambda task: task.priority, reverse=True)
+            for extra in tasks[count:]:
+                await self._requeue(extra, extra.deliveries - 1)
+            tasks = tasks[:count]
+
+        self.metrics["delivered"] += len(tasks)
+        return tasks
+
+    async def reclaim(
+        self, capabilities: Sequence[str], consumer: str, count: int = 1
+    ) -> List[QueuedTask]:
+        client = await self._client()
+        min_idle_ms = int(self.visibility_timeout_seconds * 1000)
+        reclaimed: List[QueuedTask] = []
+        for lane in self._lanes(capabilities):
+            if len(reclaimed) >= count:
+                break
+            stream = lane[0]
+            await self._ensure_group(stream)
+            _, entries, *_ = await client.xautoclaim(
+                stream,
+                self.group,
+                consumer,
+                min_idle_ms,
+                start_id="0-0",
+                count=count - len(reclaimed),
+            )
+            for task in self._decode(lane, consumer, entries):
+                pending = await client.xpending_range(
+                    stream, self.group, task.delivery_id, task.delivery_id, 1
+                )
+                if pending:
+                    task.deliveries += pending[0]["times_delivered"] - 1
+                if task.deliveries > self.max_deliveries:
+                    await self._dead_letter(task)
+                    continue
+                reclaimed.append(task)
+        self.metrics["reclaimed"] += len(reclaimed)
+        return reclaimed
+
+    async def _dead_letter(self, task: QueuedTask):
+        client = await self._client()
+        await client.xadd(
+            f"{self.prefix}:dead",
+            {
+                "task": json.dumps(task.payload),
+                "capability": task.capability,
+                "priority": task.priority,
+                "deliveries": task.deliveries,
+            },
+        )
+        await self._remove(task)
+        self.metrics["dead_lettered"] += 1
+        logger.warning(
+            f"Task {task.task_id} dead-lettered after {task.deliveries} deliveries"
+        )
+
+    async def _remove(self, task: QueuedTask) -> bool:
+        client = await self._client()
+        stream = self._lane(task.capability, task.priority)
+        if not await client.xack(stream, self.group, task.delivery_id):
+            return False
+        await client.xdel(stream, task.delivery_id)
+        return True
+
+    async def ack(self, task: QueuedTask):
+        if await self._remove(task):
+            self.metrics["acked"] += 1
+
+    async def release(self, task: QueuedTask):
+        await self._requeue(task, task.deliveries)
+        self.metrics["released"] += 1
+
+    async def _requeue(self, task: QueuedTask, deliveries: int):
+        # Streams cannot hand a pending entry back to the group, so the task
+        # is appended to its lane again, carrying its delivery count
+        client = await self._client()
+        stream = self._lane(task.capability, task.priority)
+        await client.xadd(stream, self._fields(task.payload, deliveries))
+        await self._remove(task)
+
+    async def extend(self, tasks: Sequence[QueuedTask]):
+        client = await self._client()
+        for task in tasks:
+            stream = self._lane(task.capability, task.priority)
+            # Only the current owner may extend; a task reclaimed by another
+            # consumer must not be claimed back from it
+            pending = await client.xpending_range(
+                stream, self.group, task.delivery_id, task.delivery_id, 1
+            )
+            if not pending or pending[0]["consumer"] != task.consumer:
+                continue
+            # Re-claiming for the current owner resets the idle time
+            await client.xclaim(
+                stream,
+                self.group,
+                task.consumer,
+                0,
+                [task.delivery_id],
+                justid=True,
+            )
+
+    async def depth(self, capability: str) -> Dict[int, int]:
+        client = await self._client()
+        depths = {}
+        for priority in range(MAX_PRIORITY, MIN_PRIORITY - 1, -1):
+            stream = self._lane(capability, priority)
+            length = await client.xlen(stream)
+            if not length:
+                continue
+            pending = await client.xpending(stream, self.group)
+            queued = length - (pending or {}).get("pending", 0)
+            if queued:
+                depths[priority] = queued
+        return depths
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
@@ -7,15 +7,29 @@ enabling automated CRM operations, contact management, and deal tracking.
 
 import asyncio
 import logging
+import math
 import os
+import time
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
 
 import aiohttp
 import hubspot
 
+from backend.core.crm_mirror import (
+    OBJECT_SCHEMAS,
+    CRMMirror,
+    compile_filters,
+    parse_timestamp,
+)
+from backend.core.semantic_cache import semantic_answer_cache
+
 logger = logging.getLogger(__name__)
 
+# The search API refuses to page past this many results for one query
+SEARCH_MAX_RESULTS = 10_000
+SEARCH_PAGE_SIZE = 100
+
 
 class HubSpotConfig:
     def __init__(self):
@@ -24,16 +38,31 @@ class HubSpotConfig:
         self.rate_limit_delay = 0.1  # 100ms between requests
         self.max_retries = 3
         self.timeout = 30
+        # Local CRM mirror for analytics and exports; disabled when unset
+        self.mirror_path = os.getenv("HUBSPOT_MIRROR_PATH", "")
+        self.mirror_max_staleness = float(
+            os.getenv("HUBSPOT_MIRROR_MAX_STALENESS", "300")
+        )
+        self.webhook_secret = os.getenv("HUBSPOT_WEBHOOK_SECRET", "")
 
 
 class HubSpotIntegration:
     """Comprehensive HubSpot CRM integration"""
 
-    def __init__(self, config: HubSpotConfig = None):
+    def __init__(self, config: HubSpotConfig = None, mirror: CRMMirror = None):
         self.config = config or HubSpotConfig()
         self.client = hubspot.Client.create(api_key=self.config.api_key)
         self.session = None
         self.last_request_time = datetime.now()
+        if mirror is None and self.config.mirror_path:
+            mirror = CRMMirror(self.config.mirror_path)
+        self.mirror = mirror
+        # Without a configured mirror, deals for analytics are kept in memory
+        self._deals_mirror: Optional[CRMMirror] = None
+        # Webhook events keep the mirrors current between delta syncs
+        self.webhook_handler = HubSpotWebhookHandler(self.config.webhook_secret or None)
+        if mirror is not None:
+            self.webhook_handler.attach_mirror(mirror)
 
     async def __aenter__(self):
         self.session = aiohttp.ClientSession(
@@ -85,6 +114,51 @@ class HubSpotIntegration:
                     raise
                 await asyncio.sleep(2**attempt)  # Exponential backoff
 
+    async def _search_pages(
+        self, object_type: str, data: Dict[str, Any]
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield search results page by page, up to SEARCH_MAX_RESULTS"""
+        endpoint = f"/crm/v3/objects/{object_type}/search"
+        data = {**data, "limit": SEARCH_PAGE_SIZE}
+        fetched = 0
+        while fetched < SEARCH_MAX_RESULTS:
+            result = await self._make_request("POST", endpoint, data=data)
+            results = result.get("results", [])
+            if not results:
+                break
+            fetched += len(results)
+            yield results
+
+            # Check for pagination
+            paging = result.get("paging", {})
+            if "next" not in paging:
+                break
+            data["after"] = paging["next"]["after"]
+
+    async def _archived_pages(
+        self, object_type: str
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield deleted and merged-away records page by page"""
+        endpoint = f"/crm/v3/objects/{object_type}"
+        params = {"archived": "true", "limit": SEARCH_PAGE_SIZE}
+        while True:
+            result = await self._make_request("GET", endpoint, params=params)
+            results = result.get("results", [])
+            if not results:
+                break
+            yield results
+
+            paging = result.get("paging", {})
+            if "next" not in paging:
+                break
+            params["after"] = paging["next"]["after"]
+
+    async def handle_webhook(
+        self, payload: List[Dict[str, Any]], signature: str = None
+    ) -> bool:
+        """Apply HubSpot webhook events to the CRM mirrors"""
+        return await self.webhook_handler.process_webhook(payload, signature)
+
     # Contact Management
     async def get_contact(
         self, contact_id: str = None, email: str = None
@@ -443,80 +517,138 @@ class HubSpotIntegration:
             return {}
 
     async def get_pipeline_analytics(self, pipeline_id: str = None) -> Dict[str, Any]:
-        """Get pipeline performance analytics"""
+        """Get pipeline performance analytics
+
+        Served from the CRM mirror when one is configured, after a delta sync
+        if the mirror is older than ``mirror_max_staleness``. Without a mirror,
+        deals are kept in an in-memory one that every call delta syncs.
+        """
         try:
-            # Get all deals in pipeline
-            endpoint = "/crm/v3/objects/deals/search"
-            filters = []
-            if pipeline_id:
-                filters.append(
-                    {"propertyName": "pipeline", "operator": "EQ", "value": pipeline_id}
-                )
+            if self.mirror is None:
+                if self._deals_mirror is None:
+                    self._deals_mirror = CRMMirror()
+                    self.webhook_handler.attach_mirror(self._deals_mirror)
+                await self._sync_object(self._deals_mirror, "deals")
+                return self._deals_mirror.pipeline_analytics(pipeline_id)
 
-            data = {
-                "filterGroups": [{"filters": filters}] if filters else [],
-                "properties": [
-                    "dealname",
-                    "amount",
-                    "dealstage",
-                    "pipeline",
-                    "closedate",
-                    "createdate",
-                ],
-                "limit": 1000,
-            }
+            await self._refresh_mirror("deals")
+            return self.mirror.pipeline_analytics(pipeline_id)
 
-            result = await self._make_request("POST", endpoint, data=data)
-            deals = result.get("results", [])
+        except Exception as e:
+            logger.error(f"Failed to get pipeline analytics: {str(e)}")
+            return {}
 
-            # Calculate analytics
-            total_value = sum(
-                float(deal.get("properties", {}).get("amount", 0) or 0)
-                for deal in deals
+    # CRM Mirror
+    async def sync_mirror(
+        self, object_types: Sequence[str] = tuple(OBJECT_SCHEMAS)
+    ) -> Dict[str, int]:
+        """Pull records modified since the last sync into the CRM mirror"""
+        if self.mirror is None:
+            logger.warning("HubSpot CRM mirror is not configured (HUBSPOT_MIRROR_PATH)")
+            return {}
+
+        changed = {}
+        for object_type in object_types:
+            changed[object_type] = await self._sync_object(self.mirror, object_type)
+            logger.info(
+                f"Synced {changed[object_type]} changed HubSpot {object_type} "
+                f"into the CRM mirror"
             )
-            closed_won = [
-                deal
-                for deal in deals
-                if deal.get("properties", {}).get("dealstage") == "closedwon"
-            ]
-            closed_lost = [
-                deal
-                for deal in deals
-                if deal.get("properties", {}).get("dealstage") == "closedlost"
-            ]
-            open_deals = [
-                deal
-                for deal in deals
-                if deal.get("properties", {}).get("dealstage")
-                not in ["closedwon", "closedlost"]
-            ]
 
-            analytics = {
-                "pipeline_id": pipeline_id,
-                "total_deals": len(deals),
-                "total_value": total_value,
-                "closed_won_count": len(closed_won),
-                "closed_won_value": sum(
-                    float(deal.get("properties", {}).get("amount", 0) or 0)
-                    for deal in closed_won
-                ),
-                "closed_lost_count": len(closed_lost),
-                "open_deals_count": len(open_deals),
-                "open_deals_value": sum(
-                    float(deal.get("properties", {}).get("amount", 0) or 0)
-                    for deal in open_deals
-                ),
-                "win_rate": len(closed_won) / (len(closed_won) + len(closed_lost))
-                if (closed_won or closed_lost)
-                else 0,
-                "average_deal_size": total_value / len(deals) if deals else 0,
+        if any(changed.values()):
+            # Cached RAG answers built on CRM data are now stale
+            await semantic_answer_cache.invalidate_source("hubspot")
+        return changed
+
+    async def _sync_object(self, mirror: CRMMirror, object_type: str) -> int:
+        """Delta sync one object type by last modification time"""
+        schema = OBJECT_SCHEMAS[object_type]
+        watermark = mirror.watermarks.get(object_type, 0.0)
+        started_at = time.time()
+        changed = 0
+
+        while True:
+            # Oldest changes first, so a query cut off at SEARCH_MAX_RESULTS
+            # resumes from the last modification time it saw
+            data = {
+                "filterGroups": [
+                    {
+                        "filters": [
+                            {
+                                "propertyName": schema.modified_property,
+                                "operator": "GTE",
+                                "value": str(int(watermark)),
+                            }
+                        ]
+                    }
+                ],
+                "sorts": [
+                    {"propertyName": schema.modified_property, "direction": "ASCENDING"}
+                ],
+                "properties": list(schema.properties),
             }
-
-            return analytics
-
+            fetched = 0
+            newest = watermark
+            async for records in self._search_pages(object_type, data):
+                changed += mirror.upsert(object_type, records)
+                await mirror.flush()
+                fetched += len(records)
+                for record in records:
+                    modified = parse_timestamp(
+                        record.get("properties", {}).get(schema.modified_property)
+                    )
+                    if not math.isnan(modified):
+                        newest = max(newest, modified)
+
+            if fetched < SEARCH_MAX_RESULTS:
+                watermark = newest
+                break
+            if newest <= watermark:
+                logger.warning(
+                    f"More than {SEARCH_MAX_RESULTS} HubSpot {object_type} share "
+                    f"modification time {watermark}; some were not synced"
+                )
+                break
+            watermark = newest
+
+        changed += await self._sync_deletions(mirror, object_type)
+        mirror.complete_sync(object_type, watermark, started_at)
+        await mirror.flush()
+        return changed
+
+    async def _sync_deletions(self, mirror: CRMMirror, object_type: str) -> int:
+        """Drop mirrored records HubSpot has archived
+
+        Searches only return live records, so deletions and merges are found
+        by listing archived objects. Records modified after they were
+        archived (restored since) are kept.
+        """
+        if not len(mirror.tables[object_type]):
+            return 0
+        deleted = 0
+        async for records in self._archived_pages(object_type):
+            for record in records:
+                archived_at = parse_timestamp(record.get("archivedAt"))
+                if mirror.delete(object_type, str(record["id"]), archived_at):
+                    deleted += 1
+            await mirror.flush()
+        if deleted:
+            logger.info(f"Removed {deleted} archived HubSpot {object_type} from mirror")
+        return deleted
+
+    async def _refresh_mirror(self, object_type: str):
+        """Delta sync ``object_type`` if the mirror is older than allowed"""
+        if self.mirror.staleness(object_type) <= self.config.mirror_max_staleness:
+            return
+        try:
+            await self.sync_mirror((object_type,))
         except Exception as e:
-            logger.error(f"Failed to get pipeline analytics: {str(e)}")
-            return {}
+            if object_type not in self.mirror.synced_at:
+                raise
+            logger.warning(
+                f"HubSpot {object_type} sync failed, serving mirror data "
+                f"{self.mirror.staleness(object_type):.0f}s old: {str(e)}"
+            )
 
     # Bulk Operations
     async def bulk_update_contacts(
@@ -538,45 +670,48 @@ class HubSpotIntegration:
     async def export_contacts(
         self, filters: List[Dict[str, Any]] = None, properties: List[str] = None
     ) -> List[Dict[str, Any]]:
-        """Export contacts with optional filters"""
-        try:
-            all_contacts = []
-            after = None
+        """Export contacts with optional filters
 
-            while True:
-                endpoint = "/crm/v3/objects/contacts/search"
-                data = {
-                    "filterGroups": [{"filters": filters}] if filters else [],
-                    "properties": properties
-                    or [
-                        "email",
-                        "firstname",
-                        "lastname",
-                        "company",
-                        "phone",
-                        "lifecyclestage",
-                    ],
-                    "limit": 100,
-                }
-
-                if after:
-                    data["after"] = after
-
-                result = await self._make_request("POST", endpoint, data=data)
-                contacts = result.get("results", [])
-
-                if not contacts:
-                    break
+        Served from the CRM mirror when it holds every requested property and
+        can evaluate the filters; otherwise pages through the search API.
+        """
+        try:
+            properties = properties or [
+                "email",
+                "firstname",
+                "lastname",
+                "company",
+                "phone",
+                "lifecyclestage",
+            ]
+            mirrored = OBJECT_SCHEMAS["contacts"].properties
+            predicate = compile_filters(filters, mirrored)
+            if (
+                self.mirror is not None
+                and predicate is not None
+                and set(properties) <= set(mirrored)
+            ):
+                await self._refresh_mirror("contacts")
+                all_contacts = [
+                    {
+                        "id": contact["id"],
+                        "properties": {
+                            name: contact["properties"].get(name) for name in properties
+                        },
+                    }
+                    for contact in self.mirror.records("contacts", predicate)
+                ]
+                logger.info(f"Exported {len(all_contacts)} contacts from mirror")
+                return all_contacts
 
+            all_contacts = []
+            data = {
+                "filterGroups": [{"filters": filters}] if filters else [],
+                "properties": properties,
+            }
+            async for contacts in self._search_pages("contacts", data):
                 all_contacts.extend(contacts)
 
-                # Check for pagination
-                paging = result.get("paging", {})
-                if "next" not in paging:
-                    break
-
-                after = paging["next"]["after"]
-
             logger.info(f"Exported {len(all_contacts)} contacts")
             return all_contacts
 
@@ -598,6 +733,17 @@ class HubSpotWebhookHandler:
             self.handlers[event_type] = []
         self.handlers[event_type].append(handler_func)
 
+    def attach_mirror(self, mirror: CRMMirror):
+        """Keep a CRM mirror current with deletion and property change events"""
+
+        async def apply_event(event: Dict[str, Any]):
+            if mirror.apply_webhook_event(event):
+                await mirror.flush()
+
+        for object_name in ("deal", "contact", "company"):
+            for action in ("deletion", "propertyChange"):
+                self.register_handler(f"{object_name}.{action}", apply_event)
+
     async def process_webhook(
         self, payload: Dict[str, Any], signature: str = None
     ) -> bool:
@@ -620,6 +766,10 @@ class HubSpotWebhookHandler:
                                 f"Webhook handler error for {event_type}: {str(e)}"
                             )
 
+            # Cached RAG answers built on CRM data are now stale
+            if payload:
+                await semantic_answer_cache.invalidate_source("hubspot")
+
             return True
 
         except Exception as e:
@@ -2,13 +2,16 @@
 Contained Company Knowledge Base System for Pay Ready
 """
 
+import asyncio
 import hashlib
 import logging
 import os
+import uuid
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import pinecone
 import weaviate
@@ -21,15 +24,13 @@ from sqlalchemy import (
     String,
     Text,
     create_engine,
+    func,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from weaviate.util import generate_uuid5
 
-from backend.core.comprehensive_memory_manager import (
-    MemoryOperationType,
-    MemoryRequest,
-    comprehensive_memory_manager,
-)
+from backend.core.comprehensive_memory_manager import comprehensive_memory_manager
 
 logger = logging.getLogger(__name__)
 
@@ -104,9 +105,10 @@ class KnowledgeBaseDocument(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     created_by = Column(String, nullable=False)
     tags = Column(JSON)
-    metadata = Column(JSON)
+    # "metadata" is reserved on declarative models, so map it under another name
+    doc_metadata = Column("metadata", JSON)
     embedding_id = Column(String)
-    content_hash = Column(String)  # For change detection
+    content_hash = Column(String, index=True)  # For change detection
 
 
 class SophiaKnowledgeBase:
@@ -239,7 +241,7 @@ class SophiaKnowledgeBase:
                 version=document.version,
                 created_by=document.created_by,
                 tags=document.tags,
-                metadata=document.metadata,
+                doc_metadata=document.metadata,
                 content_hash=content_hash,
             )
 
@@ -262,12 +264,39 @@ class SophiaKnowledgeBase:
             session.close()
             return False
 
+    @staticmethod
+    def _embedding_text(document: KnowledgeDocument) -> str:
+        return f"{document.title} {document.content}"
+
+    @staticmethod
+    def _pinecone_metadata(document: KnowledgeDocument) -> Dict[str, Any]:
+        return {
+            "title": document.title,
+            "content_type": document.content_type.value,
+            "tags": ",".join(document.tags),
+        }
+
+    @staticmethod
+    def _weaviate_object(document: KnowledgeDocument) -> Dict[str, Any]:
+        return {
+            "title": document.title,
+            "content": document.content,
+            "contentType": document.content_type.value,
+            "tags": document.tags,
+            "createdAt": document.created_at.isoformat(),
+        }
+
+    @staticmethod
+    def _weaviate_uuid(embedding_id: str) -> str:
+        # Weaviate requires UUIDs; derive a stable one from the embedding id
+        return generate_uuid5(embedding_id)
+
     def _store_embeddings(self, document: KnowledgeDocument) -> Optional[str]:
         """Store document embeddings in vector databases"""
         try:
             # Generate embedding
             embedding = self.embedding_model.encode(
-                f"{document.title} {document.content}"
+                self._embedding_text(document)
             ).tolist()
 
             embedding_id = f"doc_{document.id}"
@@ -275,31 +304,15 @@ class SophiaKnowledgeBase:
             # Store in Pinecone
             if self.pinecone_index:
                 self.pinecone_index.upsert(
-                    [
-                        (
-                            embedding_id,
-                            embedding,
-                            {
-                                "title": document.title,
-                                "content_type": document.content_type.value,
-                                "tags": ",".join(document.tags),
-                            },
-                        )
-                    ]
+                    [(embedding_id, embedding, self._pinecone_metadata(document))]
                 )
 
             # Store in Weaviate
             if self.weaviate_client:
                 self.weaviate_client.data_object.create(
-                    data_object={
-                        "title": document.title,
-                        "content": document.content,
-                        "contentType": document.content_type.value,
-                        "tags": document.tags,
-                        "createdAt": document.created_at.isoformat(),
-                    },
+                    data_object=self._weaviate_object(document),
                     class_name="KnowledgeDocument",
-                    uuid=embedding_id,
+                    uuid=self._weaviate_uuid(embedding_id),
                     vector=embedding,
                 )
 
@@ -314,6 +327,7 @@ class SophiaKnowledgeBase:
         query: str,
         content_types: Optional[List[ContentType]] = None,
         limit: int = 10,
+        preview_chars: int = 500,
     ) -> List[Dict[str, Any]]:
         """Search documents using semantic similarity
 
@@ -321,6 +335,7 @@ class SophiaKnowledgeBase:
             query: Search query
             content_types: Filter by content types
             limit: Maximum number of results
+            preview_chars: Length of the content preview returned per result
 
         Returns:
             List of matching documents with scores
@@ -329,61 +344,56 @@ class SophiaKnowledgeBase:
             # Generate query embedding
             query_embedding = self.embedding_model.encode(query).tolist()
 
-            results = []
+            scores: Dict[str, float] = {}
 
-            # Search Pinecone
+            # Search Pinecone, filtering by content type in the vector store so
+            # the top-k is not spent on results that would be discarded
             if self.pinecone_index:
+                vector_filter = None
+                if content_types:
+                    vector_filter = {
+                        "content_type": {"$in": [ct.value for ct in content_types]}
+                    }
+
                 pinecone_results = self.pinecone_index.query(
-                    vector=query_embedding, top_k=limit, include_metadata=True
+                    vector=query_embedding,
+                    top_k=limit,
+                    include_metadata=True,
+                    filter=vector_filter,
                 )
 
                 for match in pinecone_results["matches"]:
-                    doc_id = match["id"].replace("doc_", "")
-                    results.append(
-                        {
-                            "document_id": doc_id,
-                            "score": match["score"],
-                            "source": "pinecone",
-                            "metadata": match.get("metadata", {}),
-                        }
-                    )
+                    doc_id = match["id"].replace("doc_", "", 1)
+                    scores[doc_id] = max(match["score"], scores.get(doc_id, -1.0))
+
+            if not scores:
+                return []
 
-            # Get full document details from database
+            # Hydrate every match with one IN query over the columns we return
             session = self.Session()
-            enriched_results = []
-
-            for result in results:
-                doc = (
-                    await comprehensive_memory_manager.process_memory_request(
-                        MemoryRequest(
-                            operation=MemoryOperationType.RETRIEVE,
-                            query=KnowledgeBaseDocument,
-                        )
-                    )
-                    .filter_by(id=result["document_id"])
-                    .first()
+            try:
+                rows = self._fetch_document_previews(
+                    session, list(scores), content_types, preview_chars
                 )
+            finally:
+                session.close()
 
-                if doc and (
-                    not content_types or ContentType(doc.content_type) in content_types
-                ):
-                    enriched_results.append(
-                        {
-                            "id": doc.id,
-                            "title": doc.title,
-                            "content": (
-                                doc.content[:500] + "..."
-                                if len(doc.content) > 500
-                                else doc.content
-                            ),
-                            "content_type": doc.content_type,
-                            "tags": doc.tags,
-                            "score": result["score"],
-                            "created_at": doc.created_at.isoformat(),
-                        }
-                    )
-
-            session.close()
+            enriched_results = [
+                {
+                    "id": row.id,
+                    "title": row.title,
+                    "content": (
+                        row.preview[:preview_chars] + "..."
+                        if len(row.preview) > preview_chars
+                        else row.preview
+                    ),
+                    "content_type": row.content_type,
+                    "tags": row.tags,
+                    "score": scores[row.id],
+                    "created_at": row.created_at.isoformat(),
+                }
+                for row in rows
+            ]
 
             # Sort by score and return top results
             enriched_results.sort(key=lambda x: x["score"], reverse=True)
@@ -393,20 +403,52 @@ class SophiaKnowledgeBase:
             logger.error(f"Search failed: {e}")
             return []
 
+    async def search_documents_async(
+        self,
+        query: str,
+        content_types: Optional[List[ContentType]] = None,
+        limit: int = 10,
+        preview_chars: int = 500,
+    ) -> List[Dict[str, Any]]:
+        """Run ``search_documents`` in a worker thread for async handlers"""
+        return await asyncio.to_thread(
+            self.search_documents, query, content_types, limit, preview_chars
+        )
+
+    @staticmethod
+    def _fetch_document_previews(
+        session,
+        document_ids: List[str],
+        content_types: Optional[List[ContentType]],
+        preview_chars: int,
+    ):
+        """Load result columns and a content prefix for a set of documents"""
+        # One extra character tells us whether the preview was truncated
+        query = session.query(
+            KnowledgeBaseDocument.id,
+            KnowledgeBaseDocument.title,
+            KnowledgeBaseDocument.content_type,
+            KnowledgeBaseDocument.tags,
+            KnowledgeBaseDocument.created_at,
+            func.substr(KnowledgeBaseDocument.content, 1, preview_chars + 1).label(
+                "preview"
+            ),
+        ).filter(KnowledgeBaseDocument.id.in_(document_ids))
+
+        if content_types:
+            query = query.filter(
+                KnowledgeBaseDocument.content_type.in_(
+                    [ct.value for ct in content_types]
+                )
+            )
+
+        return query.all()
+
     def get_document(self, document_id: str) -> Optional[KnowledgeDocument]:
         """Get a specific document by ID"""
         try:
             session = self.Session()
-            doc = (
-                await comprehensive_memory_manager.process_memory_request(
-                    MemoryRequest(
-                        operation=MemoryOperationType.RETRIEVE,
-                        query=KnowledgeBaseDocument,
-                    )
-                )
-                .filter_by(id=document_id)
-                .first()
-            )
+            doc = session.query(KnowledgeBaseDocument).filter_by(id=document_id).first()
             session.close()
 
             if doc:
@@ -421,7 +463,7 @@ class SophiaKnowledgeBase:
                     updated_at=doc.updated_at,
                     created_by=doc.created_by,
                     tags=doc.tags or [],
-                    metadata=doc.metadata or {},
+                    metadata=doc.doc_metadata or {},
                     embedding_id=doc.embedding_id,
                 )
 
@@ -438,14 +480,7 @@ class SophiaKnowledgeBase:
 
             # Get existing document
             existing = (
-                await comprehensive_memory_manager.process_memory_request(
-                    MemoryRequest(
-                        operation=MemoryOperationType.RETRIEVE,
-                        query=KnowledgeBaseDocument,
-                    )
-                )
-                .filter_by(id=document.id)
-                .first()
+                session.query(KnowledgeBaseDocument).filter_by(id=document.id).first()
             )
             if not existing:
                 session.close()
@@ -461,7 +496,7 @@ class SophiaKnowledgeBase:
             existing.content_type = document.content_type.value
             existing.status = document.status.value
             existing.tags = document.tags
-            existing.metadata = document.metadata
+            existing.doc_metadata = document.metadata
             existing.updated_at = datetime.utcnow()
             existing.content_hash = new_hash
 
@@ -489,22 +524,13 @@ class SophiaKnowledgeBase:
         try:
             session = self.Session()
 
-            total_docs = await comprehensive_memory_manager.process_memory_request(
-                MemoryRequest(
-                    operation=MemoryOperationType.RETRIEVE, query=KnowledgeBaseDocument
-                )
-            ).count()
+            total_docs = session.query(KnowledgeBaseDocument).count()
 
             # Count by content type
             type_counts = {}
             for content_type in ContentType:
                 count = (
-                    await comprehensive_memory_manager.process_memory_request(
-                        MemoryRequest(
-                            operation=MemoryOperationType.RETRIEVE,
-                            query=KnowledgeBaseDocument,
-                        )
-                    )
+                    session.query(KnowledgeBaseDocument)
                     .filter_by(content_type=content_type.value)
                     .count()
                 )
@@ -514,12 +540,7 @@ class SophiaKnowledgeBase:
             status_counts = {}
             for status in ContentStatus:
                 count = (
-                    await comprehensive_memory_manager.process_memory_request(
-                        MemoryRequest(
-                            operation=MemoryOperationType.RETRIEVE,
-                            query=KnowledgeBaseDocument,
-                        )
-                    )
+                    session.query(KnowledgeBaseDocument)
                     .filter_by(status=status.value)
                     .count()
                 )
@@ -538,6 +559,24 @@ class SophiaKnowledgeBase:
             logger.error(f"Failed to get statistics: {e}")
             return {}
 
+    @staticmethod
+    def _document_from_dict(doc_data: Dict[str, Any]) -> KnowledgeDocument:
+        """Create a KnowledgeDocument from an import dictionary"""
+        now = datetime.utcnow()
+        return KnowledgeDocument(
+            id=doc_data.get("id") or f"doc_{uuid.uuid4().hex}",
+            title=doc_data["title"],
+            content=doc_data["content"],
+            content_type=ContentType(doc_data["content_type"]),
+            status=ContentStatus(doc_data.get("status", "draft")),
+            version=doc_data.get("version", 1),
+            created_at=now,
+            updated_at=now,
+            created_by=doc_data.get("created_by", "system"),
+            tags=doc_data.get("tags", []),
+            metadata=doc_data.get("metadata", {}),
+        )
+
     def bulk_import_documents(self, documents: List[Dict[str, Any]]) -> Dict[str, int]:
         """Bulk import documents from a list of dictionaries
 
@@ -547,36 +586,263 @@ class SophiaKnowledgeBase:
         Returns:
             Dictionary with import statistics
         """
-        stats = {"success": 0, "failed": 0, "skipped": 0}
+        report = self.bulk_ingest_documents(documents)
+        return {key: report[key] for key in ("success", "failed", "skipped")}
 
-        for doc_data in documents:
-            try:
-                # Create KnowledgeDocument from dictionary
-                document = KnowledgeDocument(
-                    id=doc_data.get("id", f"doc_{datetime.utcnow().timestamp()}"),
-                    title=doc_data["title"],
-                    content=doc_data["content"],
-                    content_type=ContentType(doc_data["content_type"]),
-                    status=ContentStatus(doc_data.get("status", "draft")),
-                    version=doc_data.get("version", 1),
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow(),
-                    created_by=doc_data.get("created_by", "system"),
-                    tags=doc_data.get("tags", []),
-                    metadata=doc_data.get("metadata", {}),
+    def bulk_ingest_documents(
+        self,
+        documents: Iterable[Dict[str, Any]],
+        chunk_size: int = 500,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """Stream documents into the knowledge base in chunked transactions
+
+        Each chunk is deduplicated by content hash, embedded in one batch,
+        inserted with a single bulk insert and written to the vector stores
+        through their batch APIs. A failing chunk is rolled back and reported
+        without aborting the rest of the import.
+
+        Args:
+            documents: Iterable of document dictionaries; consumed lazily
+            chunk_size: Number of documents per transaction
+            progress_callback: Called with the running report after each chunk
+
+        Returns:
+            Import report with counts and per-chunk errors
+        """
+        report: Dict[str, Any] = {
+            "success": 0,
+            "failed": 0,
+            "skipped": 0,
+            "chunks": 0,
+            "errors": [],
+        }
+        seen_hashes: Set[str] = set()
+        seen_ids: Set[str] = set()
+        iterator = iter(documents)
+
+        while True:
+            raw_chunk = list(islice(iterator, chunk_size))
+            if not raw_chunk:
+                break
+
+            chunk_index = report["chunks"]
+            report["chunks"] += 1
+
+            parsed: List[Tuple[KnowledgeDocument, str]] = []
+            for doc_data in raw_chunk:
+                try:
+                    document = self._document_from_dict(doc_data)
+                except Exception as e:
+                    report["failed"] += 1
+                    report["errors"].append(
+                        {
+                            "chunk": chunk_index,
+                            "stage": "parse",
+                            "document_ids": [doc_data.get("id")],
+                            "error": str(e),
+                        }
+                    )
+                    continue
+
+                content_hash = hashlib.sha256(document.content.encode()).hexdigest()
+                # A repeated id would fail the whole chunk's bulk insert
+                if content_hash in seen_hashes or document.id in seen_ids:
+                    report["skipped"] += 1
+                    continue
+                seen_hashes.add(content_hash)
+                seen_ids.add(document.id)
+                parsed.append((document, content_hash))
+
+            if parsed:
+                self._ingest_chunk(chunk_index, parsed, report)
+
+            logger.info(
+                f"Bulk ingest chunk {chunk_index}: success={report['success']} "
+                f"failed={report['failed']} skipped={report['skipped']}"
+            )
+            if progress_callback:
+                progress_callback(report)
+
+        logger.info(
+            f"Bulk ingest completed: {report['success']} added, "
+            f"{report['skipped']} skipped, {report['failed']} failed "
+            f"in {report['chunks']} chunks"
+        )
+        return report
+
+    def _ingest_chunk(
+        self,
+        chunk_index: int,
+        parsed: List[Tuple[KnowledgeDocument, str]],
+        report: Dict[str, Any],
+    ) -> None:
+        """Insert one deduplicated chunk and write its vectors"""
+        session = self.Session()
+        new_documents: List[Tuple[KnowledgeDocument, str]] = []
+        stage = "database"
+        try:
+            # Skip documents whose content or id is already stored
+            hashes = [content_hash for _, content_hash in parsed]
+            ids = [document.id for document, _ in parsed]
+            existing_hashes = {
+                row[0]
+                for row in session.query(KnowledgeBaseDocument.content_hash).filter(
+                    KnowledgeBaseDocument.content_hash.in_(hashes)
+                )
+            }
+            existing_ids = {
+                row[0]
+                for row in session.query(KnowledgeBaseDocument.id).filter(
+                    KnowledgeBaseDocument.id.in_(ids)
                 )
+            }
+            new_documents = [
+                (document, content_hash)
+                for document, content_hash in parsed
+                if content_hash not in existing_hashes
+                and document.id not in existing_ids
+            ]
+            if not new_documents:
+                session.close()
+                report["skipped"] += len(parsed)
+                return
+
+            stage = "embedding"
+            embeddings = self.embedding_model.encode(
+                [self._embedding_text(document) for document, _ in new_documents],
+                batch_size=64,
+            ).tolist()
+
+            stage = "database"
+            session.bulk_insert_mappings(
+                KnowledgeBaseDocument,
+                [
+                    {
+                        "id": document.id,
+                        "title": document.title,
+                        "content": document.content,
+                        "content_type": document.content_type.value,
+                        "status": document.status.value,
+                        "version": document.version,
+                        "created_at": document.created_at,
+                        "updated_at": document.updated_at,
+                        "created_by": document.created_by,
+                        "tags": document.tags,
+                        "doc_metadata": document.metadata,
+                        "embedding_id": f"doc_{document.id}",
+                        "content_hash": content_hash,
+                    }
+                    for document, content_hash in new_documents
+                ],
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            session.close()
+            logger.error(f"Bulk ingest chunk {chunk_index} failed at {stage}: {e}")
+            # Documents already stored count as skipped, not failed
+            failed = new_documents or parsed
+            report["failed"] += len(failed)
+            report["skipped"] += len(parsed) - len(failed)
+            report["errors"].append(
+                {
+                    "chunk": chunk_index,
+                    "stage": stage,
+                    "document_ids": [document.id for document, _ in failed],
+                    "error": str(e),
+                }
+            )
+            return
+
+        session.close()
+        report["success"] += len(new_documents)
+        report["skipped"] += len(parsed) - len(new_documents)
+
+        documents = [document for document, _ in new_documents]
+        for stage, error, failed_ids in self._store_embeddings_batch(
+            documents, embeddings
+        ):
+            report["errors"].append(
+                {
+                    "chunk": chunk_index,
+                    "stage": stage,
+                    "document_ids": failed_ids,
+                    "error": error,
+                }
+            )
+
+    def _store_embeddings_batch(
+        self,
+        documents: List[KnowledgeDocument],
+        embeddings: List[List[float]],
+        batch_size: int = 100,
+    ) -> List[Tuple[str, str, List[str]]]:
+        """Write a batch of vectors; returns ``(stage, error, ids)`` failures"""
+        failures: List[Tuple[str, str, List[str]]] = []
+
+        if self.pinecone_index:
+            for start in range(0, len(documents), batch_size):
+                batch = documents[start : start + batch_size]
+                try:
+                    self.pinecone_index.upsert(
+                        [
+                            (
+                                f"doc_{document.id}",
+                                embedding,
+                                self._pinecone_metadata(document),
+                            )
+                            for document, embedding in zip(
+                                batch, embeddings[start : start + batch_size]
+                            )
+                        ]
+                    )
+                except Exception as e:
+                    logger.error(f"Pinecone batch upsert failed: {e}")
+                    failures.append(
+                        ("pinecone", str(e), [document.id for document in batch])
+                    )
 
-                if self.add_document(document):
-                    stats["success"] += 1
-                else:
-                    stats["failed"] += 1
+        if self.weaviate_client:
+            uuid_to_id = {
+                self._weaviate_uuid(f"doc_{document.id}"): document.id
+                for document in documents
+            }
+            weaviate_errors: List[str] = []
+            weaviate_failed_ids: List[str] = []
+
+            def collect_errors(results):
+                for result in results or []:
+                    errors = result.get("result", {}).get("errors")
+                    if errors:
+                        weaviate_errors.append(str(errors))
+                        weaviate_failed_ids.append(
+                            uuid_to_id.get(result.get("id"), result.get("id"))
+                        )
 
+            try:
+                self.weaviate_client.batch.configure(
+                    batch_size=batch_size, callback=collect_errors
+                )
+                with self.weaviate_client.batch as batch:
+                    for document, embedding in zip(documents, embeddings):
+                        batch.add_data_object(
+                            data_object=self._weaviate_object(document),
+                            class_name="KnowledgeDocument",
+                            uuid=self._weaviate_uuid(f"doc_{document.id}"),
+                            vector=embedding,
+                        )
             except Exception as e:
-                logger.error(f"Failed to import document: {e}")
-                stats["failed"] += 1
+                logger.error(f"Weaviate batch import failed: {e}")
+                weaviate_errors.append(str(e))
+                weaviate_failed_ids = list(uuid_to_id.values())
+
+            if weaviate_errors:
+                failures.append(
+                    ("weaviate", "; ".join(weaviate_errors[:5]), weaviate_failed_ids)
+                )
 
-        logger.info(f"Bulk import completed: {stats}")
-        return stats
+        return failures
 
 
 # Example usage and initialization
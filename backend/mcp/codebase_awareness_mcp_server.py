@@ -84,8 +84,11 @@ class CodebaseAwarenessMCPServer(BaseMCPServer):
             ),
             Tool(
                 name="ingest_codebase",
-                description="Triggers a full scan and ingestion of the entire project codebase.",
-                inputSchema={"type": "object", "properties": {}},
+                description="Re-indexes the project codebase. Only changed files are re-parsed unless a full rebuild is requested.",
+                inputSchema={
+                    "type": "object",
+                    "properties": {"full": {"type": "boolean", "default": False}},
+                },
             ),
         ]
 
@@ -114,7 +117,11 @@ class CodebaseAwarenessMCPServer(BaseMCPServer):
 
         elif tool_name == "ingest_codebase":
             # This can be a long-running task. We start it but don't wait.
-            asyncio.create_task(self.ingestion_pipeline.ingest_codebase())
+            asyncio.create_task(
+                self.ingestion_pipeline.ingest_codebase(
+                    incremental=not args.get("full", False)
+                )
+            )
             result = {
                 "status": "success",
                 "message": "Codebase ingestion process started in the background.",
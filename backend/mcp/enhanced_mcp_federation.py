@@ -6,10 +6,16 @@ import asyncio
 import logging
 import statistics
 import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional, Union
 
+from backend.core.query_classification import (
+    CompiledRuleSet,
+    DecisionCache,
+    normalize_query,
+)
 from backend.mcp.agno_mcp_server import server as agno_server
 from backend.mcp.gong_mcp_server import server as gong_server
 from backend.mcp.knowledge_mcp_server import server as knowledge_server
@@ -140,6 +146,19 @@ class QueryClassifier:
             ],
         }
 
+        # Every keyword is a one-term rule matched as a substring, so server
+        # and query-type scores both come out of one scan of the query
+        rules = {
+            ("server", server_name): [[(keyword,)] for keyword in keywords]
+            for server_name, keywords in self.server_keywords.items()
+        }
+        for pattern_type, patterns in self.query_patterns.items():
+            rules[("query_type", pattern_type)] = [[(pattern,)] for pattern in patterns]
+        self.rule_set = CompiledRuleSet(rules, whole_words=False)
+        self.classification_cache: DecisionCache[Dict[str, Any]] = DecisionCache(
+            max_size=4096
+        )
+
     def classify_query(
         self, query: str, context: Dict[str, Any] = None
     ) -> Dict[str, Any]:
@@ -152,20 +171,32 @@ class QueryClassifier:
         Returns:
             Dict containing classification results
         """
-        query_lower = query.lower()
+        query_lower = normalize_query(query)
         context = context or {}
 
+        # Only the user contexts that change the default servers are part of
+        # the key; anything else (including unhashable dicts) maps to None
+        user_context = context.get("user_context")
+        if user_context not in ("business_intelligence", "development"):
+            user_context = None
+        cache_key = (query_lower, user_context)
+        cached = self.classification_cache.get(cache_key)
+        if cached is not None:
+            return self._copy_classification(cached)
+
+        scores = self.rule_set.score(query_lower)
+
         # Score servers based on keyword matches
         server_scores = {}
-        for server_name, keywords in self.server_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in query_lower)
+        for server_name in self.server_keywords:
+            score = scores[("server", server_name)]
             if score > 0:
                 server_scores[server_name] = score
 
         # Determine query type
         query_type = "data_retrieval"  # default
-        for pattern_type, patterns in self.query_patterns.items():
-            if any(pattern in query_lower for pattern in patterns):
+        for pattern_type in self.query_patterns:
+            if scores[("query_type", pattern_type)]:
                 query_type = pattern_type
                 break
 
@@ -181,14 +212,14 @@ class QueryClassifier:
 
         # If no specific matches, use context or default to knowledge
         if not priority_servers:
-            if context.get("user_context") == "business_intelligence":
+            if user_context == "business_intelligence":
                 priority_servers = ["gong", "knowledge"]
-            elif context.get("user_context") == "development":
+            elif user_context == "development":
                 priority_servers = ["linear", "vercel", "lambda_labs"]
             else:
                 priority_servers = ["knowledge", "agno"]
 
-        return {
+        classification = {
             "query_type": query_type,
             "priority_servers": priority_servers,
             "server_scores": server_scores,
@@ -200,6 +231,17 @@ class QueryClassifier:
             "parallel_execution": len(priority_servers) > 1,
             "timeout_ms": self._get_timeout_for_query_type(query_type),
         }
+        self.classification_cache.set(cache_key, classification)
+        return self._copy_classification(classification)
+
+    @staticmethod
+    def _copy_classification(classification: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a cached classification so callers cannot mutate the cache"""
+        return {
+            **classification,
+            "priority_servers": list(classification["priority_servers"]),
+            "server_scores": dict(classification["server_scores"]),
+        }
 
     def _get_timeout_for_query_type(self, query_type: str) -> int:
         """Get timeout based on query type."""
@@ -372,6 +414,19 @@ class MCPFederation:
         self.health_monitor_task = None
         self.initialized = False
 
+        # Priority-1 servers get a second attempt once they are slower than
+        # their recent p95 latency, or when the first attempt fails early.
+        # Only read-only query types are hedged: a repeated write would send
+        # the message or create the issue twice.
+        self.hedging_enabled = True
+        self.hedged_query_types = {"data_retrieval", "analysis"}
+        self.hedge_min_samples = 20
+        self.server_latencies: Dict[str, Deque[float]] = {}
+
+        # Return as soon as one server answers with at least this confidence;
+        # None waits for every server (overridable per query via context)
+        self.early_return_confidence: Optional[float] = None
+
         # Performance metrics
         self.metrics = {
             "total_queries": 0,
@@ -379,6 +434,9 @@ class MCPFederation:
             "avg_response_time_ms": 0.0,
             "server_success_rates": {},
             "query_types": {},
+            "server_timeouts": 0,
+            "hedged_requests": 0,
+            "early_returns": 0,
         }
 
     async def initialize(self):
@@ -547,55 +605,76 @@ class MCPFederation:
         context: Dict[str, Any],
         classification: Dict[str, Any],
     ) -> Dict[str, Any]:
-        """Execute queries in parallel across target servers."""
-        start_time = time.perf_counter()
+        """Execute queries in parallel across target servers
 
-        # Create tasks for parallel execution
-        tasks = []
-        for server_name in target_servers:
-            task = asyncio.create_task(
-                self._query_single_server(server_name, query, context, classification)
-            )
-            tasks.append(task)
-
-        # Wait for all tasks with timeout
-        timeout = classification.get("timeout_ms", 5000) / 1000  # Convert to seconds
-        try:
-            results = await asyncio.wait_for(
-                asyncio.gather(*tasks, return_exceptions=True), timeout=timeout
-            )
-        except asyncio.TimeoutError:
-            logger.warning(f"Federated query timed out after {timeout}s")
-            # Cancel remaining tasks
-            for task in tasks:
-                if not task.done():
-                    task.cancel()
-            results = [
-                FederatedQueryResult(
-                    server_name=server_name,
-                    success=False,
-                    data=None,
-                    execution_time_ms=timeout * 1000,
-                    error="Query timeout",
+        Every server runs under its own deadline (its ``timeout_ms``, capped
+        by the query-type budget), so a slow server only loses its own result.
+        With an early-return confidence set, the first answer that reaches it
+        ends the query and the remaining servers are cancelled.
+        """
+        start_time = time.perf_counter()
+        budget_s = classification.get("timeout_ms", 5000) / 1000
+        threshold = context.get("early_return_confidence", self.early_return_confidence)
+
+        tasks = {
+            asyncio.create_task(
+                self._query_with_deadline(
+                    server_name,
+                    query,
+                    context,
+                    classification,
+                    min(self.servers[server_name].timeout_ms / 1000, budget_s),
                 )
-                for server_name in target_servers
-            ]
+            ): server_name
+            for server_name in target_servers
+        }
 
-        # Process results
-        valid_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                valid_results.append(
-                    FederatedQueryResult(
-                        server_name=target_servers[i],
-                        success=False,
-                        data=None,
-                        execution_time_ms=(time.perf_counter() - start_time) * 1000,
-                        error=str(result),
-                    )
+        results: Dict[str, FederatedQueryResult] = {}
+        early_return_server = None
+        pending = set(tasks)
+        try:
+            while pending and early_return_server is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
                 )
-            else:
-                valid_results.append(result)
+                for task in done:
+                    server_name = tasks[task]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        result = FederatedQueryResult(
+                            server_name=server_name,
+                            success=False,
+                            data=None,
+                            execution_time_ms=(time.perf_counter() - start_time) * 1000,
+                            error=str(e),
+                        )
+                    results[server_name] = result
+
+                    if (
+                        threshold is not None
+                        and early_return_server is None
+                        and result.success
+                        and result.confidence_score >= threshold
+                    ):
+                        early_return_server = server_name
+        finally:
+            for task in pending:
+                task.cancel()
+
+        # Keep the routing order so ranking ties stay deterministic
+        valid_results = [results[name] for name in target_servers if name in results]
+        skipped_servers = [name for name in target_servers if name not in results]
+        failed_servers = [r.server_name for r in valid_results if not r.success]
+        timed_out_servers = [
+            r.server_name for r in valid_results if r.error == "Query timeout"
+        ]
+        if early_return_server:
+            self.metrics["early_returns"] += 1
+            logger.info(
+                f"Early return from {early_return_server}, "
+                f"cancelled {skipped_servers}"
+            )
 
         # Aggregate results
         aggregated = self.result_aggregator.aggregate_results(valid_results)
@@ -607,18 +686,126 @@ class MCPFederation:
             "servers_queried": target_servers,
             "classification": classification,
             "parallel_execution": True,
+            "partial": aggregated["success"]
+            and len(failed_servers) + len(skipped_servers) > 0,
+            "timed_out_servers": timed_out_servers,
+            "skipped_servers": skipped_servers,
+            "early_return_server": early_return_server,
         }
 
         # Update metrics
         if aggregated["success"]:
             self.metrics["successful_queries"] += 1
 
-        self._update_performance_metrics(
-            total_time, target_servers, aggregated["success"]
-        )
+        self._update_performance_metrics(total_time, valid_results)
 
         return aggregated
 
+    async def _query_with_deadline(
+        self,
+        server_name: str,
+        query: str,
+        context: Dict[str, Any],
+        classification: Dict[str, Any],
+        timeout_s: float,
+    ) -> FederatedQueryResult:
+        """Query one server within its own deadline
+
+        Read-only queries to priority-1 servers are hedged: a second attempt
+        starts when the first is slower than the server's recent p95 latency
+        or fails before the deadline, and whichever succeeds first wins.
+        """
+        start_time = time.perf_counter()
+        hedge_delay = self._hedge_delay(
+            server_name, classification.get("query_type"), timeout_s
+        )
+        max_attempts = 2 if hedge_delay is not None else 1
+
+        def launch() -> asyncio.Task:
+            return asyncio.create_task(
+                self._query_single_server(server_name, query, context, classification)
+            )
+
+        attempts = {launch()}
+        launched = 1
+        failure: Optional[FederatedQueryResult] = None
+        try:
+            while True:
+                elapsed = time.perf_counter() - start_time
+                remaining = timeout_s - elapsed
+                if remaining <= 0:
+                    break
+
+                if not attempts:
+                    if launched >= max_attempts:
+                        return failure
+                    attempts.add(launch())
+                    launched += 1
+                    self.metrics["hedged_requests"] += 1
+                    continue
+
+                wait_s = remaining
+                if launched < max_attempts:
+                    wait_s = min(wait_s, max(hedge_delay - elapsed, 0.0))
+
+                done, attempts = await asyncio.wait(
+                    attempts, timeout=wait_s, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    result = task.result()
+                    if result.success:
+                        result.execution_time_ms = (
+                            time.perf_counter() - start_time
+                        ) * 1000
+                        self._record_latency(server_name, result.execution_time_ms)
+                        return result
+                    failure = result
+
+                if (
+                    not done
+                    and launched < max_attempts
+                    and time.perf_counter() - start_time >= hedge_delay
+                ):
+                    attempts.add(launch())
+                    launched += 1
+                    self.metrics["hedged_requests"] += 1
+        finally:
+            for task in attempts:
+                task.cancel()
+
+        self.metrics["server_timeouts"] += 1
+        logger.warning(f"Query to {server_name} timed out after {timeout_s}s")
+        return FederatedQueryResult(
+            server_name=server_name,
+            success=False,
+            data=None,
+            execution_time_ms=timeout_s * 1000,
+            error="Query timeout",
+        )
+
+    def _hedge_delay(
+        self, server_name: str, query_type: Optional[str], timeout_s: float
+    ) -> Optional[float]:
+        """Seconds to wait before hedging, or None if the query is not hedged"""
+        if (
+            not self.hedging_enabled
+            or query_type not in self.hedged_query_types
+            or self.servers[server_name].priority != 1
+        ):
+            return None
+
+        samples = self.server_latencies.get(server_name)
+        if not samples or len(samples) < self.hedge_min_samples:
+            return timeout_s * 0.5
+
+        p95 = statistics.quantiles(samples, n=20)[-1] / 1000
+        return min(p95, timeout_s * 0.8)
+
+    def _record_latency(self, server_name: str, execution_time_ms: float):
+        """Remember recent successful latencies for hedge timing"""
+        samples = self.server_latencies.setdefault(server_name, deque(maxlen=200))
+        samples.append(execution_time_ms)
+
     async def _query_single_server(
         self,
         server_name: str,
@@ -759,10 +946,17 @@ class MCPFederation:
         }
 
         # Create tasks for parallel execution
+        budget_s = classification.get("timeout_ms", 5000) / 1000
         tasks = {}
         for server_name in target_servers:
             task = asyncio.create_task(
-                self._query_single_server(server_name, query, context, classification)
+                self._query_with_deadline(
+                    server_name,
+                    query,
+                    context,
+                    classification,
+                    min(self.servers[server_name].timeout_ms / 1000, budget_s),
+                )
             )
             tasks[server_name] = task
 
@@ -866,18 +1060,19 @@ class MCPFederation:
                 await asyncio.sleep(self.health_check_interval)
 
     def _update_performance_metrics(
-        self, execution_time_ms: float, servers: List[str], success: bool
+        self, execution_time_ms: float, results: List[FederatedQueryResult]
     ):
         """Update performance metrics."""
         # Update average response time
-        total_queries = self.metrics["total_queries"]
+        total_queries = self.metrics["total_queries"] + 1
         current_avg = self.metrics["avg_response_time_ms"]
         self.metrics["avg_response_time_ms"] = (
             current_avg * (total_queries - 1) + execution_time_ms
         ) / total_queries
 
-        # Update server success rates
-        for server in servers:
+        # Update server success rates from each server's own outcome
+        for result in results:
+            server = result.server_name
             if server not in self.metrics["server_success_rates"]:
                 self.metrics["server_success_rates"][server] = {
                     "total": 0,
@@ -885,7 +1080,7 @@ class MCPFederation:
                 }
 
             self.metrics["server_success_rates"][server]["total"] += 1
-            if success:
+            if result.success:
                 self.metrics["server_success_rates"][server]["successful"] += 1
 
     def get_federation_stats(self) -> Dict[str, Any]:
@@ -914,6 +1109,9 @@ class MCPFederation:
         return {
             "overall_metrics": self.metrics,
             "server_stats": server_stats,
+            "classification_cache": (
+                self.query_classifier.classification_cache.get_stats()
+            ),
             "federation_health": {
                 "healthy_servers": sum(
                     1 for s in self.servers.values() if s.health_status == "healthy"
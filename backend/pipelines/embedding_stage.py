@@ -0,0 +1,224 @@
+"""Concurrent, rate-limited embedding stage for pipeline documents
+Chunks long texts with overlap, packs chunks into multi-input embedding
+requests, runs them concurrently under request and token rate limits with
+retry/backoff, and writes the vectors out in fixed-size upsert batches.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.core.rate_limiter import AsyncTokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio used for request sizing and rate limiting
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class EmbeddingChunk:
+    """One piece of a document to be embedded"""
+
+    id: str
+    text: str
+    metadata: Dict[str, Any]
+
+
+def chunk_text(
+    text: str, chunk_chars: int = 6000, overlap_chars: int = 500
+) -> List[str]:
+    """Split ``text`` into overlapping chunks, preferring whitespace boundaries"""
+    text = text.strip()
+    if len(text) <= chunk_chars:
+        return [text] if text else []
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            # Back off to the last whitespace so words are not split
+            boundary = text.rfind(" ", start + chunk_chars // 2, end)
+            if boundary != -1:
+                end = boundary
+
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap_chars, start + 1)
+
+    return chunks
+
+
+def chunk_document(
+    document_id: str,
+    text: str,
+    metadata: Dict[str, Any],
+    chunk_chars: int = 6000,
+    overlap_chars: int = 500,
+) -> List[EmbeddingChunk]:
+    """Chunk a document, tagging each piece with its position"""
+    pieces = chunk_text(text, chunk_chars, overlap_chars)
+    return [
+        EmbeddingChunk(
+            id=f"{document_id}_chunk{index}",
+            text=piece,
+            metadata={
+                **metadata,
+                "document_id": document_id,
+                "chunk_index": index,
+                "chunk_count": len(pieces),
+                "text": piece,
+            },
+        )
+        for index, piece in enumerate(pieces)
+    ]
+
+
+class EmbeddingStage:
+    """Embeds chunks concurrently and flushes them in upsert batches
+
+    Args:
+        embed_fn: Async function embedding a list of texts in one request
+        store_fn: Async function persisting a batch of
+            ``(id, embedding, metadata)`` tuples; returns success
+        max_concurrency: Embedding requests in flight at once
+        max_inputs_per_request: Texts packed into one request
+        max_tokens_per_request: Approximate token budget of one request
+        requests_per_minute: Request quota for the embedding API
+        tokens_per_minute: Token quota for the embedding API
+        upsert_batch_size: Vectors written per ``store_fn`` call
+        max_retries: Attempts per request before the batch is reported failed
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], Awaitable[List[List[float]]]],
+        store_fn: Callable[
+            [List[Tuple[str, List[float], Dict[str, Any]]]], Awaitable[bool]
+        ],
+        max_concurrency: int = 4,
+        max_inputs_per_request: int = 64,
+        max_tokens_per_request: int = 100_000,
+        requests_per_minute: float = 3000,
+        tokens_per_minute: float = 1_000_000,
+        upsert_batch_size: int = 100,
+        max_retries: int = 5,
+    ):
+        self.embed_fn = embed_fn
+        self.store_fn = store_fn
+        self.max_inputs_per_request = max_inputs_per_request
+        self.max_tokens_per_request = max_tokens_per_request
+        self.upsert_batch_size = upsert_batch_size
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._request_bucket = AsyncTokenBucket(requests_per_minute)
+        self._token_bucket = AsyncTokenBucket(tokens_per_minute)
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+
+    def _pack_requests(
+        self, chunks: List[EmbeddingChunk]
+    ) -> List[List[EmbeddingChunk]]:
+        """Group chunks into requests bounded by input count and token budget"""
+        requests: List[List[EmbeddingChunk]] = []
+        current: List[EmbeddingChunk] = []
+        current_tokens = 0
+
+        for chunk in chunks:
+            tokens = self._estimate_tokens(chunk.text)
+            if current and (
+                len(current) >= self.max_inputs_per_request
+                or current_tokens + tokens > self.max_tokens_per_request
+            ):
+                requests.append(current)
+                current, current_tokens = [], 0
+            current.append(chunk)
+            current_tokens += tokens
+
+        if current:
+            requests.append(current)
+        return requests
+
+    async def _embed_request(
+        self, request: List[EmbeddingChunk]
+    ) -> Optional[List[List[float]]]:
+        texts = [chunk.text for chunk in request]
+        tokens = sum(self._estimate_tokens(text) for text in texts)
+
+        for attempt in range(1, self.max_retries + 1):
+            async with self._semaphore:
+                await self._request_bucket.acquire(1)
+                await self._token_bucket.acquire(tokens)
+                try:
+                    return await self.embed_fn(texts)
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        logger.error(
+                            f"Embedding request of {len(texts)} inputs failed "
+                            f"after {attempt} attempts: {e}"
+                        )
+                        return None
+                    error = e
+
+            # Back off outside the semaphore so other requests keep flowing
+            delay = min(60.0, 2 ** (attempt - 1)) * (0.5 + random.random())
+            logger.warning(
+                f"Embedding request failed (attempt {attempt}), retrying in "
+                f"{delay:.1f}s: {error}"
+            )
+            await asyncio.sleep(delay)
+
+        return None
+
+    async def run(self, chunks: List[EmbeddingChunk]) -> Dict[str, Any]:
+        """Embed and store ``chunks``; returns counts and timings"""
+        started = time.perf_counter()
+        stats = {"chunks": len(chunks), "embedded": 0, "stored": 0, "failed": 0}
+        if not chunks:
+            return stats
+
+        requests = self._pack_requests(chunks)
+        pending: List[Tuple[str, List[float], Dict[str, Any]]] = []
+        flushes = []
+
+        async def flush(batch):
+            if await self.store_fn(batch):
+                stats["stored"] += len(batch)
+            else:
+                stats["failed"] += len(batch)
+
+        async def embed(request):
+            return request, await self._embed_request(request)
+
+        # Store results as requests complete rather than after the slowest one
+        for completed in asyncio.as_completed([embed(r) for r in requests]):
+            request, embeddings = await completed
+
+            if embeddings is None or len(embeddings) != len(request):
+                stats["failed"] += len(request)
+                continue
+
+            stats["embedded"] += len(request)
+            pending.extend(
+                (chunk.id, embedding, chunk.metadata)
+                for chunk, embedding in zip(request, embeddings)
+            )
+            while len(pending) >= self.upsert_batch_size:
+                batch = pending[: self.upsert_batch_size]
+                pending = pending[self.upsert_batch_size :]
+                flushes.append(asyncio.ensure_future(flush(batch)))
+
+        if pending:
+            flushes.append(asyncio.ensure_future(flush(pending)))
+        await asyncio.gather(*flushes)
+
+        stats["requests"] = len(requests)
+        stats["duration_ms"] = (time.perf_counter() - started) * 1000
+        return stats
@@ -1,19 +1,152 @@
+import asyncio
 import json
 import logging
+import os
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 import snowflake.connector
 
-from backend.core.comprehensive_memory_manager import (
-    MemoryOperationType,
-    MemoryRequest,
-    comprehensive_memory_manager,
-)
+from backend.core.comprehensive_memory_manager import comprehensive_memory_manager
+from backend.core.semantic_cache import semantic_answer_cache
 
 from ..core.secret_manager import secret_manager
 from ..integrations.gong.enhanced_gong_integration import EnhancedGongIntegration
 from ..integrations.slack.slack_integration import SlackIntegration, SlackNotification
+from .embedding_stage import EmbeddingChunk, EmbeddingStage, chunk_document
+from .snowflake_bulk_loader import MergeSpec, SnowflakeBulkLoader
+
+
+def _excluded(*columns: str) -> Dict[str, str]:
+    """MERGE update clause copying ``columns`` from the staged row"""
+    return {column: f"s.{column}" for column in columns}
+
+
+# Target tables, merge keys and update rules (mirrors the former upserts)
+GONG_MERGE_SPECS: Dict[str, MergeSpec] = {
+    "GONG_CONVERSATIONS": MergeSpec(
+        table="GONG_CONVERSATIONS",
+        key_columns=["conversation_key"],
+        columns=[
+            "conversation_id",
+            "conversation_key",
+            "conversation_type",
+            "conversation_datetime",
+            "workspace_ids",
+            "is_deleted",
+        ],
+        update={"etl_modified_datetime": "CURRENT_TIMESTAMP()"},
+    ),
+    "GONG_CALLS": MergeSpec(
+        table="GONG_CALLS",
+        key_columns=["conversation_key"],
+        columns=[
+            "conversation_key",
+            "conversation_id",
+            "call_url",
+            "direction",
+            "disposition",
+            "duration_seconds",
+            "effective_start_datetime",
+            "planned_start_datetime",
+            "planned_end_datetime",
+            "scope",
+            "owner_id",
+            "phone_number",
+            "call_spotlight_brief",
+            "call_spotlight_key_points",
+            "call_spotlight_next_steps",
+            "call_spotlight_outcome",
+            "call_spotlight_type",
+            "question_company_count",
+            "question_non_company_count",
+            "presentation_duration_sec",
+            "browser_duration_sec",
+            "webcam_non_company_duration_sec",
+            "slack_notification_ts",
+        ],
+        update=_excluded(
+            "call_spotlight_brief",
+            "call_spotlight_key_points",
+            "call_spotlight_next_steps",
+            "call_spotlight_outcome",
+            "slack_notification_ts",
+        ),
+    ),
+    "GONG_CALL_TRANSCRIPTS": MergeSpec(
+        table="GONG_CALL_TRANSCRIPTS",
+        key_columns=["conversation_key"],
+        columns=[
+            "conversation_key",
+            "transcript_json",
+            "transcript_text",
+            "language",
+            "recording_duration_sec",
+        ],
+        update=_excluded("transcript_json", "transcript_text"),
+    ),
+    "GONG_EMAILS": MergeSpec(
+        table="GONG_EMAILS",
+        key_columns=["conversation_key"],
+        columns=[
+            "conversation_key",
+            "conversation_id",
+            "email_subject",
+            "email_thread_id",
+            "sender_email",
+            "recipient_emails",
+            "cc_emails",
+            "bcc_emails",
+            "email_direction",
+            "email_body_text",
+            "email_body_html",
+            "email_sentiment_score",
+            "email_attachment_count",
+            "email_thread_position",
+            "reply_to_conversation_key",
+        ],
+        update=_excluded("email_sentiment_score"),
+    ),
+    "GONG_PARTICIPANTS": MergeSpec(
+        table="GONG_PARTICIPANTS",
+        key_columns=["conversation_key", "participant_id"],
+        columns=[
+            "conversation_key",
+            "participant_id",
+            "participant_name",
+            "participant_email",
+            "participant_role",
+            "participant_company",
+            "is_from_customer",
+            "talk_time_percentage",
+            "email_role",
+        ],
+        update=_excluded("participant_name", "participant_email"),
+    ),
+    "GONG_CONVERSATION_TRACKERS": MergeSpec(
+        table="GONG_CONVERSATION_TRACKERS",
+        key_columns=["conversation_key", "tracker_id"],
+        columns=[
+            "conversation_key",
+            "tracker_id",
+            "tracker_name",
+            "tracker_type",
+            "tracker_count",
+            "tracker_sentiment",
+        ],
+        update=_excluded("tracker_count", "tracker_sentiment"),
+    ),
+    "GONG_CONVERSATION_CONTEXTS": MergeSpec(
+        table="GONG_CONVERSATION_CONTEXTS",
+        key_columns=["conversation_key", "crm_object_type", "crm_object_id"],
+        columns=[
+            "conversation_key",
+            "crm_object_type",
+            "crm_object_id",
+            "crm_object_name",
+        ],
+    ),
+}
 
 
 class GongSnowflakePipeline:
@@ -88,137 +221,204 @@ class GongSnowflakePipeline:
         if self.openai_client:
             await self._embed_and_store_conversations(conversations)
 
+        # Cached RAG answers built on Gong data are now stale
+        if conversations:
+            await semantic_answer_cache.invalidate_sources(["gong", "knowledge"])
+
         # 4. Send Slack notifications for new calls
         if self.slack_client:
             await self._send_slack_notifications(conversations)
 
     async def _load_conversations_to_snowflake(
         self, conversations: List[Dict[str, Any]]
-    ):
-        """Load conversations to Snowflake with proper normalization"""
-        cursor = self.sf_conn.cursor()
+    ) -> Dict[str, Dict[str, Any]]:
+        """Load conversations to Snowflake with proper normalization
+
+        Conversations are turned into one columnar batch per target table and
+        applied with set-based MERGEs in a single transaction, off the event
+        loop.
+        """
+        batches = self._build_table_batches(conversations)
+        loader = SnowflakeBulkLoader(self.sf_conn)
+        stats = await asyncio.to_thread(loader.load, batches, GONG_MERGE_SPECS)
+
+        self.logger.info(
+            f"Loaded {len(conversations)} conversations to Snowflake: "
+            + ", ".join(
+                f"{table}={table_stats.get('rows', 0)}"
+                for table, table_stats in stats.items()
+            )
+        )
+        return stats
+
+    def _build_table_batches(
+        self, conversations: List[Dict[str, Any]]
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Split conversations into row batches per target table"""
+        batches: Dict[str, List[Dict[str, Any]]] = {
+            table: [] for table in GONG_MERGE_SPECS
+        }
 
         for conv in conversations:
             try:
                 conv_type = conv["conversation_type"]
+                conversation_key = conv.get(
+                    "conversationKey", f"{conv_type}_{conv['id']}"
+                )
 
-                # 1. Insert into CONVERSATIONS table
-                cursor.execute(
-                    """
-                    INSERT INTO GONG_CONVERSATIONS 
-                    (conversation_id, conversation_key, conversation_type, 
-                     conversation_datetime, workspace_ids, is_deleted)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (conversation_key) DO UPDATE SET
-                    etl_modified_datetime = CURRENT_TIMESTAMP()
-                """,
-                    (
-                        conv["id"],
-                        conv.get("conversationKey", f"{conv_type}_{conv['id']}"),
-                        conv_type,
-                        conv.get("dateTime"),
-                        json.dumps(conv.get("workspaceIds", [])),
-                        conv.get("isDeleted", False),
+                rows: Dict[str, List[Dict[str, Any]]] = {
+                    "GONG_CONVERSATIONS": [
+                        {
+                            "conversation_id": conv["id"],
+                            "conversation_key": conversation_key,
+                            "conversation_type": conv_type,
+                            "conversation_datetime": conv.get("dateTime"),
+                            "workspace_ids": json.dumps(conv.get("workspaceIds", [])),
+                            "is_deleted": conv.get("isDeleted", False),
+                        }
+                    ],
+                    "GONG_PARTICIPANTS": self._participant_rows(conversation_key, conv),
+                    "GONG_CONVERSATION_TRACKERS": self._tracker_rows(
+                        conversation_key, conv
                     ),
-                )
+                    "GONG_CONVERSATION_CONTEXTS": self._crm_context_rows(
+                        conversation_key, conv
+                    ),
+                }
 
-                # 2. Insert type-specific data
                 if conv_type == "call":
-                    await self._insert_call_data(cursor, conv)
+                    rows["GONG_CALLS"] = [self._call_row(conversation_key, conv)]
+                    if "transcript" in conv:
+                        rows["GONG_CALL_TRANSCRIPTS"] = [
+                            self._transcript_row(conversation_key, conv)
+                        ]
                 elif conv_type == "email":
-                    await self._insert_email_data(cursor, conv)
-
-                # 3. Insert participants
-                await self._insert_participants(cursor, conv)
-
-                # 4. Insert trackers (topics/keywords)
-                await self._insert_trackers(cursor, conv)
-
-                # 5. Insert CRM context
-                await self._insert_crm_context(cursor, conv)
+                    rows["GONG_EMAILS"] = [self._email_row(conversation_key, conv)]
 
             except Exception as e:
-                self.logger.error(f"Failed to load conversation {conv['id']}: {e}")
-
-        cursor.close()
-
-    async def _insert_call_data(self, cursor, call_data: Dict[str, Any]):
-        """Insert call-specific data"""
-        conversation_key = call_data.get("conversationKey", f"call_{call_data['id']}")
-
-        # This will be updated with the Slack message TS later
-        slack_ts = call_data.get("slack_notification_ts")
-
-        cursor.execute(
-            """
-            INSERT INTO GONG_CALLS 
-            (conversation_key, conversation_id, call_url, direction, disposition,
-             duration_seconds, effective_start_datetime, planned_start_datetime,
-             planned_end_datetime, scope, owner_id, phone_number,
-             call_spotlight_brief, call_spotlight_key_points, 
-             call_spotlight_next_steps, call_spotlight_outcome,
-             call_spotlight_type, question_company_count, 
-             question_non_company_count, presentation_duration_sec,
-             browser_duration_sec, webcam_non_company_duration_sec, slack_notification_ts)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (conversation_key) DO UPDATE SET
-            call_spotlight_brief = EXCLUDED.call_spotlight_brief,
-            call_spotlight_key_points = EXCLUDED.call_spotlight_key_points,
-            call_spotlight_next_steps = EXCLUDED.call_spotlight_next_steps,
-            call_spotlight_outcome = EXCLUDED.call_spotlight_outcome,
-            slack_notification_ts = EXCLUDED.slack_notification_ts
-        """,
-            (
-                conversation_key,
-                call_data["id"],
-                call_data.get("url"),
-                call_data.get("direction"),
-                call_data.get("disposition"),
-                call_data.get("durationSeconds"),
-                call_data.get("effectiveStartDateTime"),
-                call_data.get("plannedStartDateTime"),
-                call_data.get("plannedEndDateTime"),
-                call_data.get("scope"),
-                call_data.get("ownerId"),
-                call_data.get("phoneNumber"),
-                call_data.get("spotlight", {}).get("brief"),
-                call_data.get("spotlight", {}).get("keyPoints"),
-                json.dumps(call_data.get("spotlight", {}).get("nextSteps", [])),
-                call_data.get("spotlight", {}).get("outcome"),
-                call_data.get("spotlight", {}).get("type"),
-                call_data.get("questionCompanyCount"),
-                call_data.get("questionNonCompanyCount"),
-                call_data.get("presentationDurationSec"),
-                call_data.get("browserDurationSec"),
-                call_data.get("webcamNonCompanyDurationSec"),
-                slack_ts,
+                self.logger.error(
+                    f"Failed to prepare conversation {conv.get('id')}: {e}"
+                )
+                continue
+
+            # Only add a conversation once all of its rows were built
+            for table, table_rows in rows.items():
+                batches[table].extend(table_rows)
+
+        return batches
+
+    def _call_row(self, conversation_key: str, call_data: Dict[str, Any]) -> Dict:
+        """Row for GONG_CALLS"""
+        spotlight = call_data.get("spotlight", {})
+        return {
+            "conversation_key": conversation_key,
+            "conversation_id": call_data["id"],
+            "call_url": call_data.get("url"),
+            "direction": call_data.get("direction"),
+            "disposition": call_data.get("disposition"),
+            "duration_seconds": call_data.get("durationSeconds"),
+            "effective_start_datetime": call_data.get("effectiveStartDateTime"),
+            "planned_start_datetime": call_data.get("plannedStartDateTime"),
+            "planned_end_datetime": call_data.get("plannedEndDateTime"),
+            "scope": call_data.get("scope"),
+            "owner_id": call_data.get("ownerId"),
+            "phone_number": call_data.get("phoneNumber"),
+            "call_spotlight_brief": spotlight.get("brief"),
+            "call_spotlight_key_points": spotlight.get("keyPoints"),
+            "call_spotlight_next_steps": json.dumps(spotlight.get("nextSteps", [])),
+            "call_spotlight_outcome": spotlight.get("outcome"),
+            "call_spotlight_type": spotlight.get("type"),
+            "question_company_count": call_data.get("questionCompanyCount"),
+            "question_non_company_count": call_data.get("questionNonCompanyCount"),
+            "presentation_duration_sec": call_data.get("presentationDurationSec"),
+            "browser_duration_sec": call_data.get("browserDurationSec"),
+            "webcam_non_company_duration_sec": call_data.get(
+                "webcamNonCompanyDurationSec"
             ),
-        )
+            # This will be updated with the Slack message TS later
+            "slack_notification_ts": call_data.get("slack_notification_ts"),
+        }
 
-        # Insert transcript if available
-        if "transcript" in call_data:
-            transcript_text = self.gong_client._extract_transcript_text(
+    def _transcript_row(self, conversation_key: str, call_data: Dict[str, Any]) -> Dict:
+        """Row for GONG_CALL_TRANSCRIPTS"""
+        return {
+            "conversation_key": conversation_key,
+            "transcript_json": json.dumps(call_data["transcript"]),
+            "transcript_text": self.gong_client._extract_transcript_text(
                 call_data["transcript"]
-            )
+            ),
+            "language": call_data["transcript"].get("language"),
+            "recording_duration_sec": call_data.get("durationSeconds"),
+        }
 
-            cursor.execute(
-                """
-                INSERT INTO GONG_CALL_TRANSCRIPTS
-                (conversation_key, transcript_json, transcript_text, 
-                 language, recording_duration_sec)
-                VALUES (%s, %s, %s, %s, %s)
-                ON CONFLICT (conversation_key) DO UPDATE SET
-                transcript_json = EXCLUDED.transcript_json,
-                transcript_text = EXCLUDED.transcript_text
-            """,
-                (
-                    conversation_key,
-                    json.dumps(call_data["transcript"]),
-                    transcript_text,
-                    call_data["transcript"].get("language"),
-                    call_data.get("durationSeconds"),
-                ),
-            )
+    def _email_row(self, conversation_key: str, email_data: Dict[str, Any]) -> Dict:
+        """Row for GONG_EMAILS"""
+        return {
+            "conversation_key": conversation_key,
+            "conversation_id": email_data["id"],
+            "email_subject": email_data.get("subject"),
+            "email_thread_id": email_data.get("threadId"),
+            "sender_email": email_data.get("senderEmail"),
+            "recipient_emails": json.dumps(email_data.get("recipientEmails", [])),
+            "cc_emails": json.dumps(email_data.get("ccEmails", [])),
+            "bcc_emails": json.dumps(email_data.get("bccEmails", [])),
+            "email_direction": email_data.get("direction"),
+            "email_body_text": email_data.get("bodyText"),
+            "email_body_html": email_data.get("bodyHtml"),
+            "email_sentiment_score": email_data.get("sentimentScore"),
+            "email_attachment_count": email_data.get("attachmentCount", 0),
+            "email_thread_position": email_data.get("threadPosition"),
+            "reply_to_conversation_key": email_data.get("replyToConversationKey"),
+        }
+
+    def _participant_rows(
+        self, conversation_key: str, conv: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Rows for GONG_PARTICIPANTS"""
+        return [
+            {
+                "conversation_key": conversation_key,
+                "participant_id": participant.get("id"),
+                "participant_name": participant.get("name"),
+                "participant_email": participant.get("email"),
+                "participant_role": participant.get("role"),
+                "participant_company": participant.get("company"),
+                "is_from_customer": participant.get("isFromCustomer", False),
+                "talk_time_percentage": participant.get("talkTimePercentage"),
+                "email_role": participant.get("emailRole"),
+            }
+            for participant in conv.get("participants", [])
+        ]
+
+    def _tracker_rows(
+        self, conversation_key: str, conv: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Rows for GONG_CONVERSATION_TRACKERS (topics/keywords)"""
+        return [
+            {
+                "conversation_key": conversation_key,
+                "tracker_id": tracker.get("id"),
+                "tracker_name": tracker.get("name"),
+                "tracker_type": tracker.get("type"),
+                "tracker_count": tracker.get("count", 1),
+                "tracker_sentiment": tracker.get("sentiment"),
+            }
+            for tracker in conv.get("trackers", [])
+        ]
+
+    def _crm_context_rows(
+        self, conversation_key: str, conv: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """Rows for GONG_CONVERSATION_CONTEXTS"""
+        return [
+            {
+                "conversation_key": conversation_key,
+                "crm_object_type": context.get("type"),
+                "crm_object_id": context.get("id"),
+                "crm_object_name": context.get("name"),
+            }
+            for context in conv.get("crmContexts", [])
+        ]
 
     async def _send_slack_notifications(self, conversations: List[Dict[str, Any]]):
         """Send Slack notifications for new calls and update Snowflake with the message TS."""
@@ -288,134 +488,20 @@ class GongSnowflakePipeline:
                     f"Failed to send Slack notification for call {conv['id']}: {e}"
                 )
 
-    async def _insert_email_data(self, cursor, email_data: Dict[str, Any]):
-        """Insert email-specific data"""
-        conversation_key = email_data.get(
-            "conversationKey", f"email_{email_data['id']}"
-        )
-
-        cursor.execute(
-            """
-            INSERT INTO GONG_EMAILS 
-            (conversation_key, conversation_id, email_subject, email_thread_id,
-             sender_email, recipient_emails, cc_emails, bcc_emails,
-             email_direction, email_body_text, email_body_html,
-             email_sentiment_score, email_attachment_count, 
-             email_thread_position, reply_to_conversation_key)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (conversation_key) DO UPDATE SET
-            email_sentiment_score = EXCLUDED.email_sentiment_score
-        """,
-            (
-                conversation_key,
-                email_data["id"],
-                email_data.get("subject"),
-                email_data.get("threadId"),
-                email_data.get("senderEmail"),
-                json.dumps(email_data.get("recipientEmails", [])),
-                json.dumps(email_data.get("ccEmails", [])),
-                json.dumps(email_data.get("bccEmails", [])),
-                email_data.get("direction"),
-                email_data.get("bodyText"),
-                email_data.get("bodyHtml"),
-                email_data.get("sentimentScore"),
-                email_data.get("attachmentCount", 0),
-                email_data.get("threadPosition"),
-                email_data.get("replyToConversationKey"),
-            ),
-        )
-
-    async def _insert_participants(self, cursor, conv: Dict[str, Any]):
-        """Insert conversation participants"""
-        conversation_key = conv.get(
-            "conversationKey", f"{conv['conversation_type']}_{conv['id']}"
-        )
-        participants = conv.get("participants", [])
-
-        for participant in participants:
-            cursor.execute(
-                """
-                INSERT INTO GONG_PARTICIPANTS
-                (conversation_key, participant_id, participant_name, 
-                 participant_email, participant_role, participant_company,
-                 is_from_customer, talk_time_percentage, email_role)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (conversation_key, participant_id) DO UPDATE SET
-                participant_name = EXCLUDED.participant_name,
-                participant_email = EXCLUDED.participant_email
-            """,
-                (
-                    conversation_key,
-                    participant.get("id"),
-                    participant.get("name"),
-                    participant.get("email"),
-                    participant.get("role"),
-                    participant.get("company"),
-                    participant.get("isFromCustomer", False),
-                    participant.get("talkTimePercentage"),
-                    participant.get("emailRole"),
-                ),
-            )
-
-    async def _insert_trackers(self, cursor, conv: Dict[str, Any]):
-        """Insert conversation trackers (topics/keywords)"""
-        conversation_key = conv.get(
-            "conversationKey", f"{conv['conversation_type']}_{conv['id']}"
-        )
-        trackers = conv.get("trackers", [])
-
-        for tracker in trackers:
-            cursor.execute(
-                """
-                INSERT INTO GONG_CONVERSATION_TRACKERS
-                (conversation_key, tracker_id, tracker_name, 
-                 tracker_type, tracker_count, tracker_sentiment)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (conversation_key, tracker_id) DO UPDATE SET
-                tracker_count = EXCLUDED.tracker_count,
-                tracker_sentiment = EXCLUDED.tracker_sentiment
-            """,
-                (
-                    conversation_key,
-                    tracker.get("id"),
-                    tracker.get("name"),
-                    tracker.get("type"),
-                    tracker.get("count", 1),
-                    tracker.get("sentiment"),
-                ),
-            )
-
-    async def _insert_crm_context(self, cursor, conv: Dict[str, Any]):
-        """Insert CRM context for conversation"""
-        conversation_key = conv.get(
-            "conversationKey", f"{conv['conversation_type']}_{conv['id']}"
-        )
-        contexts = conv.get("crmContexts", [])
-
-        for context in contexts:
-            cursor.execute(
-                """
-                INSERT INTO GONG_CONVERSATION_CONTEXTS
-                (conversation_key, crm_object_type, crm_object_id, crm_object_name)
-                VALUES (%s, %s, %s, %s)
-                ON CONFLICT (conversation_key, crm_object_type, crm_object_id) DO NOTHING
-            """,
-                (
-                    conversation_key,
-                    context.get("type"),
-                    context.get("id"),
-                    context.get("name"),
-                ),
-            )
+    async def _embed_and_store_conversations(
+        self, conversations: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Generate embeddings and store them via the memory manager
 
-    async def _embed_and_store_conversations(self, conversations: List[Dict[str, Any]]):
-        """Generate embeddings and store in Pinecone"""
+        Long transcripts are chunked with overlap instead of truncated, and
+        chunks are embedded with concurrent multi-input requests under the
+        OpenAI rate limits.
+        """
         if not self.openai_client:
             self.logger.warning("OpenAI client not available. Skipping embeddings.")
-            return
-
-        vectors_to_upsert = []
+            return {}
 
+        chunks: List[EmbeddingChunk] = []
         for conv in conversations:
             try:
                 # Create context for embedding
@@ -431,23 +517,11 @@ class GongSnowflakePipeline:
                     # Skip if no meaningful content
                     continue
 
-                # Truncate content if too long
-                if len(content) > 8000:
-                    content = content[:8000]
-
-                # Generate embedding
-                response = self.openai_client.embeddings.create(
-                    model="text-embedding-ada-002", input=content
-                )
-
-                embedding = response.data[0].embedding
-
-                # Prepare vector for Pinecone
-                vectors_to_upsert.append(
-                    {
-                        "id": f"{conv['conversation_type']}_{conv['id']}",
-                        "values": embedding,
-                        "metadata": {
+                chunks.extend(
+                    chunk_document(
+                        f"{conv['conversation_type']}_{conv['id']}",
+                        content,
+                        {
                             "conversation_id": conv["id"],
                             "conversation_type": conv["conversation_type"],
                             "conversation_datetime": conv.get("dateTime"),
@@ -457,19 +531,39 @@ class GongSnowflakePipeline:
                                 t.get("name") for t in conv.get("trackers", [])
                             ],
                         },
-                    }
+                    )
                 )
 
             except Exception as e:
-                self.logger.error(f"Failed to embed conversation {conv['id']}: {e}")
-
-        # Batch upsert to Pinecone
-        if vectors_to_upsert:
-            await comprehensive_memory_manager.process_memory_request(
-                MemoryRequest(
-                    operation=MemoryOperationType.STORE, content=vectors_to_upsert
-                )
-            )
-            self.logger.info(
-                f"Upserted {len(vectors_to_upsert)} conversation embeddings to Pinecone"
-            )
+                self.logger.error(f"Failed to prepare conversation {conv['id']}: {e}")
+
+        stage = EmbeddingStage(
+            embed_fn=self._embed_texts,
+            store_fn=self._store_vectors,
+            max_concurrency=int(os.getenv("GONG_EMBEDDING_CONCURRENCY", "4")),
+            requests_per_minute=float(os.getenv("OPENAI_EMBEDDING_RPM", "3000")),
+            tokens_per_minute=float(os.getenv("OPENAI_EMBEDDING_TPM", "1000000")),
+        )
+        stats = await stage.run(chunks)
+        self.logger.info(
+            f"Embedded {stats['embedded']}/{stats['chunks']} chunks from "
+            f"{len(conversations)} conversations, stored {stats['stored']}"
+        )
+        return stats
+
+    async def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts with one OpenAI request, off the event loop"""
+        response = await asyncio.to_thread(
+            self.openai_client.embeddings.create,
+            model="text-embedding-ada-002",
+            input=texts,
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+    async def _store_vectors(
+        self, vectors: List[Tuple[str, List[float], Dict[str, Any]]]
+    ) -> bool:
+        """Upsert one batch of conversation vectors"""
+        return await comprehensive_memory_manager.store_vectors(
+            vectors, namespace="gong_conversations"
+        )
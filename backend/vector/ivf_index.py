@@ -0,0 +1,332 @@
+"""Inverted-file (IVF) approximate vector index for Sophia AI
+Partitions normalized vectors into ``nlist`` cells with spherical k-means and
+searches only the ``nprobe`` cells closest to each query. Each cell is a
+``MatrixIndex`` so inserts stay incremental and deletes use tombstones.
+"""
+
+import asyncio
+import heapq
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.vector.matrix_index import MatrixIndex
+
+# Training sample multiples of nlist (FAISS recommends at least 39 per cell)
+MIN_POINTS_PER_CELL = 39
+MAX_POINTS_PER_CELL = 256
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    k: int,
+    iterations: int = 20,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """Cluster unit vectors by cosine similarity and return unit centroids"""
+    rng = rng or np.random.default_rng()
+    k = min(k, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+
+        # Re-seed empty cells from random points so every cell stays useful
+        empty = np.bincount(assignments, minlength=k) == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+
+        new_centroids = MatrixIndex.normalize(sums)
+        if np.allclose(new_centroids, centroids, atol=1e-6):
+            break
+        centroids = new_centroids
+
+    return centroids
+
+
+class IVFIndex:
+    """Approximate cosine-similarity index with tunable recall (``nprobe``)
+
+    Until ``train_size`` vectors have been added the index answers exactly
+    from a flat ``MatrixIndex``; after that it trains its coarse quantizer and
+    every later insert is routed to the nearest cell. With ``auto_train=False``
+    the caller trains instead, e.g. off the event loop with ``train_async``.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        nlist: int = 256,
+        nprobe: int = 8,
+        train_size: Optional[int] = None,
+        kmeans_iterations: int = 20,
+        seed: int = 0,
+        auto_train: bool = True,
+    ):
+        self.dimension = dimension
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size or nlist * MIN_POINTS_PER_CELL
+        self.kmeans_iterations = kmeans_iterations
+        self.auto_train = auto_train
+        self._rng = np.random.default_rng(seed)
+
+        self._flat: Optional[MatrixIndex] = MatrixIndex(dimension)
+        self.centroids: Optional[np.ndarray] = None
+        self._cells: List[MatrixIndex] = []
+        self._id_to_cell: Dict[str, int] = {}
+        # Writes made while ``train_async`` runs, replayed onto its result
+        self._training_log: Optional[List[Tuple]] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def needs_training(self) -> bool:
+        return self._flat is not None and len(self._flat) >= self.train_size
+
+    @property
+    def is_training(self) -> bool:
+        return self._training_log is not None
+
+    def __len__(self) -> int:
+        if self._flat is not None:
+            return len(self._flat)
+        return len(self._id_to_cell)
+
+    def __contains__(self, content_id: str) -> bool:
+        if self._flat is not None:
+            return content_id in self._flat
+        return content_id in self._id_to_cell
+
+    def _export(self) -> Tuple[List[str], np.ndarray]:
+        if self._flat is not None:
+            return self._flat.export()
+
+        ids: List[str] = []
+        blocks = [np.zeros((0, self.dimension), dtype=np.float32)]
+        for cell in self._cells:
+            cell_ids, cell_vectors = cell.export()
+            ids.extend(cell_ids)
+            blocks.append(cell_vectors)
+        return ids, np.vstack(blocks)
+
+    def train(self) -> None:
+        """(Re)build the coarse quantizer from the vectors currently stored"""
+        ids, vectors = self._export()
+        if ids:
+            self._install(self._build(ids, vectors))
+
+    async def train_async(self) -> None:
+        """Train in a worker thread, then swap the quantizer in on the loop
+
+        Searches keep using the current structure while k-means runs; writes
+        made meanwhile are applied to both and replayed onto the new cells.
+        """
+        if self.is_training:
+            return
+        ids, vectors = self._export()
+        if not ids:
+            return
+        self._training_log = []
+        try:
+            trained = await asyncio.to_thread(self._build, ids, vectors)
+            for op, *args in self._training_log:
+                getattr(trained, op)(*args)
+            self._install(trained)
+        finally:
+            self._training_log = None
+
+    def _build(self, ids: List[str], vectors: np.ndarray) -> "IVFIndex":
+        # Works on copies only, so it is safe to run in another thread
+        sample = vectors
+        max_points = self.nlist * MAX_POINTS_PER_CELL
+        if len(vectors) > max_points:
+            sample = vectors[self._rng.choice(len(vectors), max_points, replace=False)]
+
+        trained = IVFIndex(self.dimension, nlist=self.nlist, auto_train=False)
+        trained.centroids = spherical_kmeans(
+            sample, self.nlist, self.kmeans_iterations, self._rng
+        )
+        trained._cells = [MatrixIndex(self.dimension) for _ in trained.centroids]
+        trained._flat = None
+        trained._assign(ids, vectors)
+        return trained
+
+    def _install(self, trained: "IVFIndex") -> None:
+        self.centroids = trained.centroids
+        self._cells = trained._cells
+        self._id_to_cell = trained._id_to_cell
+        self._flat = None
+
+    def _assign(self, content_ids: Sequence[str], vectors: np.ndarray) -> None:
+        cells = np.argmax(vectors @ self.centroids.T, axis=1)
+        for cell in np.unique(cells):
+            positions = np.flatnonzero(cells == cell)
+            cell_ids = [content_ids[p] for p in positions]
+            self._cells[cell].upsert_many(cell_ids, vectors[positions])
+            for content_id in cell_ids:
+                self._id_to_cell[content_id] = int(cell)
+
+    def upsert_many(
+        self, content_ids: Sequence[str], embeddings: Sequence[Sequence[float]]
+    ) -> None:
+        """Insert or replace vectors, routing each to its nearest cell"""
+        if len(content_ids) != len(embeddings):
+            raise ValueError("content_ids and embeddings must have the same length")
+        if not content_ids:
+            return
+
+        if self._flat is not None:
+            self._flat.upsert_many(content_ids, embeddings)
+            if self._training_log is not None:
+                self._training_log.append(("upsert_many", content_ids, embeddings))
+            if self.auto_train and self.needs_training:
+                self.train()
+            return
+
+        vectors = MatrixIndex.normalize(embeddings)
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match index "
+                f"dimension {self.dimension}"
+            )
+
+        latest: Dict[str, int] = {}
+        for position, content_id in enumerate(content_ids):
+            latest[content_id] = position
+
+        # A replaced vector may land in a different cell than before
+        for content_id in latest:
+            previous = self._id_to_cell.pop(content_id, None)
+            if previous is not None:
+                self._cells[previous].delete(content_id)
+
+        positions = np.fromiter(latest.values(), dtype=np.int64, count=len(latest))
+        self._assign(list(latest), vectors[positions])
+        if self._training_log is not None:
+            self._training_log.append(("upsert_many", content_ids, embeddings))
+
+    def upsert(self, content_id: str, embedding: Sequence[float]) -> None:
+        """Insert or replace a single vector"""
+        self.upsert_many([content_id], [embedding])
+
+    def delete(self, content_id: str) -> bool:
+        """Remove a vector"""
+        if self._training_log is not None:
+            self._training_log.append(("delete", content_id))
+        if self._flat is not None:
+            return self._flat.delete(content_id)
+
+        cell = self._id_to_cell.pop(content_id, None)
+        if cell is None:
+            return False
+        return self._cells[cell].delete(content_id)
+
+    def _probe(self, queries: np.ndarray, nprobe: int) -> np.ndarray:
+        nprobe = max(1, min(nprobe, len(self._cells)))
+        coarse = queries @ self.centroids.T
+        if nprobe < len(self._cells):
+            return np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe]
+        return np.broadcast_to(np.arange(len(self._cells)), coarse.shape)
+
+    def search(
+        self, queries, top_k: int = 10, nprobe: Optional[int] = None
+    ) -> List[List[Tuple[str, float]]]:
+        """Top-k ``(content_id, score)`` pairs for each row of ``queries``"""
+        if self._flat is not None:
+            return self._flat.search(queries, top_k)
+
+        query_matrix = MatrixIndex.normalize(queries)
+        if query_matrix.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query dimension {query_matrix.shape[1]} does not match index "
+                f"dimension {self.dimension}"
+            )
+        probes = self._probe(query_matrix, nprobe or self.nprobe)
+
+        # Batch all queries that probe the same cell into one matrix product
+        candidates: List[List[Tuple[str, float]]] = [[] for _ in query_matrix]
+        for cell in np.unique(probes):
+            query_rows = np.flatnonzero((probes == cell).any(axis=1))
+            hits = self._cells[cell].search(query_matrix[query_rows], top_k)
+            for query_row, cell_hits in zip(query_rows, hits):
+                candidates[query_row].extend(cell_hits)
+
+        return [heapq.nlargest(top_k, hits, key=lambda x: x[1]) for hits in candidates]
+
+    def ranked(
+        self, query, nprobe: Optional[int] = None
+    ) -> Iterator[Tuple[str, float]]:
+        """Yield ``(content_id, score)`` from the probed cells, best first"""
+        if self._flat is not None:
+            yield from self._flat.ranked(query)
+            return
+
+        query_matrix = MatrixIndex.normalize(query)
+        probes = self._probe(query_matrix, nprobe or self.nprobe)[0]
+        yield from heapq.merge(
+            *(self._cells[cell].ranked(query_matrix) for cell in probes),
+            key=lambda x: x[1],
+            reverse=True,
+        )
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """Copy the index state into plain arrays suitable for ``np.savez``"""
+        ids, vectors = self._export()
+        arrays = {
+            "ids": np.array(ids, dtype=str),
+            "vectors": vectors,
+            "params": np.array(
+                [self.dimension, self.nlist, self.nprobe, self.train_size],
+                dtype=np.int64,
+            ),
+        }
+        if self.centroids is not None:
+            arrays["centroids"] = self.centroids.copy()
+        return arrays
+
+    def save(self, path: str) -> None:
+        """Atomically write the index to ``path`` (an ``.npz`` file)"""
+        write_snapshot(path, self.snapshot())
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        """Read an index previously written with ``save``"""
+        with np.load(path, allow_pickle=False) as data:
+            dimension, nlist, nprobe, train_size = (int(v) for v in data["params"])
+            index = cls(dimension, nlist=nlist, nprobe=nprobe, train_size=train_size)
+            ids = data["ids"].tolist()
+            vectors = data["vectors"]
+
+            if "centroids" in data:
+                index.centroids = data["centroids"]
+                index._cells = [MatrixIndex(dimension) for _ in index.centroids]
+                index._flat = None
+                if ids:
+                    index._assign(ids, vectors)
+            elif ids:
+                index._flat.upsert_many(ids, vectors)
+
+        return index
+
+
+def write_snapshot(path: str, arrays: Dict[str, np.ndarray]) -> None:
+    """Write ``arrays`` to ``path`` via a temporary file and atomic rename"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def write_json(path: str, payload: Dict) -> None:
+    """Write ``payload`` as JSON via a temporary file and atomic rename"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,220 @@
+"""Matrix-backed exact vector index for Sophia AI
+Keeps pre-normalized float32 vectors in a single contiguous NumPy matrix so a
+cosine search is one matrix product plus ``argpartition`` for the top-k.
+"""
+
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class MatrixIndex:
+    """Exact cosine-similarity index over a contiguous float32 matrix
+
+    Rows are L2-normalized on insert so the dot product is the cosine score.
+    Deletes mark a row as a tombstone; the matrix is compacted once the
+    fraction of dead rows passes ``compaction_threshold``.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        initial_capacity: int = 1024,
+        compaction_threshold: float = 0.25,
+    ):
+        self.dimension = dimension
+        self.compaction_threshold = compaction_threshold
+        capacity = max(initial_capacity, 1)
+        self._matrix = np.zeros((capacity, dimension), dtype=np.float32)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._row_ids: List[Optional[str]] = [None] * capacity
+        self._id_to_row: Dict[str, int] = {}
+        self._size = 0  # rows in use, including tombstones
+        self._tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self._id_to_row)
+
+    def __contains__(self, content_id: str) -> bool:
+        return content_id in self._id_to_row
+
+    @property
+    def capacity(self) -> int:
+        return self._matrix.shape[0]
+
+    @property
+    def tombstones(self) -> int:
+        return self._tombstones
+
+    @staticmethod
+    def normalize(vectors) -> np.ndarray:
+        """Return a 2-D float32 copy of ``vectors`` with unit-length rows"""
+        matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Zero vectors stay zero and therefore score 0 against everything
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _ensure_capacity(self, required: int) -> None:
+        if required <= self.capacity:
+            return
+
+        new_capacity = self.capacity
+        while new_capacity < required:
+            new_capacity *= 2
+
+        matrix = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        matrix[: self._size] = self._matrix[: self._size]
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[: self._size] = self._alive[: self._size]
+
+        self._matrix = matrix
+        self._alive = alive
+        self._row_ids.extend([None] * (new_capacity - len(self._row_ids)))
+
+    def upsert(self, content_id: str, embedding: Sequence[float]) -> None:
+        """Insert or replace a single vector"""
+        self.upsert_many([content_id], [embedding])
+
+    def upsert_many(
+        self, content_ids: Sequence[str], embeddings: Sequence[Sequence[float]]
+    ) -> None:
+        """Insert or replace a batch of vectors in one matrix write"""
+        if len(content_ids) != len(embeddings):
+            raise ValueError("content_ids and embeddings must have the same length")
+        if not content_ids:
+            return
+
+        vectors = self.normalize(embeddings)
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match index "
+                f"dimension {self.dimension}"
+            )
+
+        # Last occurrence wins when an id is repeated within the batch
+        latest: Dict[str, int] = {}
+        for position, content_id in enumerate(content_ids):
+            latest[content_id] = position
+
+        new_ids = [cid for cid in latest if cid not in self._id_to_row]
+        self._ensure_capacity(self._size + len(new_ids))
+
+        for content_id in new_ids:
+            row = self._size
+            self._id_to_row[content_id] = row
+            self._row_ids[row] = content_id
+            self._alive[row] = True
+            self._size += 1
+
+        rows = np.fromiter(
+            (self._id_to_row[cid] for cid in latest), dtype=np.int64, count=len(latest)
+        )
+        positions = np.fromiter(latest.values(), dtype=np.int64, count=len(latest))
+        self._matrix[rows] = vectors[positions]
+
+    def get(self, content_id: str) -> Optional[np.ndarray]:
+        """Return the stored (normalized) vector for ``content_id``"""
+        row = self._id_to_row.get(content_id)
+        if row is None:
+            return None
+        return self._matrix[row].copy()
+
+    def export(self) -> Tuple[List[str], np.ndarray]:
+        """Return the live ids and a copy of their normalized vectors"""
+        rows = np.flatnonzero(self._alive[: self._size])
+        return [self._row_ids[row] for row in rows], self._matrix[rows]
+
+    def delete(self, content_id: str) -> bool:
+        """Tombstone a vector, compacting when too many rows are dead"""
+        row = self._id_to_row.pop(content_id, None)
+        if row is None:
+            return False
+
+        self._alive[row] = False
+        self._row_ids[row] = None
+        self._tombstones += 1
+
+        if self._size and self._tombstones / self._size > self.compaction_threshold:
+            self.compact()
+        return True
+
+    def compact(self) -> None:
+        """Drop tombstoned rows and pack live vectors at the top of the matrix"""
+        if not self._tombstones:
+            return
+
+        keep = np.flatnonzero(self._alive[: self._size])
+        live = len(keep)
+
+        self._matrix[:live] = self._matrix[keep]
+        self._matrix[live : self._size] = 0.0
+        self._alive[:live] = True
+        self._alive[live : self._size] = False
+
+        row_ids = [self._row_ids[row] for row in keep]
+        self._row_ids[:live] = row_ids
+        self._row_ids[live : self._size] = [None] * (self._size - live)
+        self._id_to_row = {content_id: row for row, content_id in enumerate(row_ids)}
+
+        self._size = live
+        self._tombstones = 0
+
+    def scores(self, queries) -> np.ndarray:
+        """Cosine scores of each query against every row; dead rows are -inf"""
+        query_matrix = self.normalize(queries)
+        if query_matrix.shape[1] != self.dimension:
+            raise ValueError(
+                f"Query dimension {query_matrix.shape[1]} does not match index "
+                f"dimension {self.dimension}"
+            )
+
+        sims = query_matrix @ self._matrix[: self._size].T
+        if self._tombstones:
+            sims[:, ~self._alive[: self._size]] = -np.inf
+        return sims
+
+    def search(self, queries, top_k: int = 10) -> List[List[Tuple[str, float]]]:
+        """Top-k ``(content_id, score)`` pairs for each row of ``queries``"""
+        query_count = np.array(queries, ndmin=2).shape[0]
+        k = min(top_k, len(self))
+        if k <= 0:
+            return [[] for _ in range(query_count)]
+
+        sims = self.scores(queries)
+        if k < self._size:
+            candidates = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(self._size), sims.shape)
+
+        candidate_scores = np.take_along_axis(sims, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+        top_rows = np.take_along_axis(candidates, order, axis=1)
+        top_scores = np.take_along_axis(candidate_scores, order, axis=1)
+
+        results = []
+        for rows, row_scores in zip(top_rows, top_scores):
+            results.append(
+                [
+                    (self._row_ids[row], float(score))
+                    for row, score in zip(rows, row_scores)
+                    if np.isfinite(score)
+                ]
+            )
+        return results
+
+    def ranked(self, query) -> Iterator[Tuple[str, float]]:
+        """Yield every live ``(content_id, score)`` for one query, best first
+
+        Used when results must be post-filtered and the number of rows to
+        inspect is not known in advance.
+        """
+        if not len(self):
+            return
+
+        sims = self.scores(query)[0]
+        for row in np.argsort(-sims):
+            score = sims[row]
+            if not np.isfinite(score):
+                break
+            yield self._row_ids[row], float(score)
@@ -4,14 +4,13 @@ This module consolidates all vector database interactions to avoid duplication.
 """
 
 import asyncio
+import json
 import logging
 import os
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Dict, List, Optional, Tuple
-
-import numpy as np
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 # Import with fallback for optional dependencies
 try:
@@ -35,15 +34,13 @@ except ImportError:
     weaviate = None
     WeaviateClient = None
 
-try:
-    from sentence_transformers import SentenceTransformer
-
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
-    SentenceTransformer = None
-
 from backend.core.auto_esc_config import config
+from backend.core.enhanced_embedding_manager import (
+    EnhancedEmbeddingManager,
+    enhanced_embedding_manager,
+)
+from backend.vector.ivf_index import IVFIndex, write_json, write_snapshot
+from backend.vector.matrix_index import MatrixIndex
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +51,7 @@ class VectorDBType(Enum):
     PINECONE = "pinecone"
     WEAVIATE = "weaviate"
     MEMORY = "memory"  # In-memory for testing
+    IVF = "ivf"  # Local approximate index persisted to disk
 
 
 @dataclass
@@ -69,6 +67,10 @@ class VectorConfig:
     url: Optional[str] = None
     region: Optional[str] = "us-east-1"
     cloud: Optional[str] = "aws"
+    # IVF index knobs: cells, cells probed per query, and persistence path
+    nlist: int = 256
+    nprobe: int = 8
+    index_path: Optional[str] = None
 
 
 @dataclass
@@ -111,6 +113,31 @@ class VectorDBInterface(ABC):
         """Search for similar vectors"""
         pass
 
+    async def index_batch(
+        self,
+        items: List[Tuple[str, List[float], Dict[str, Any]]],
+        namespace: Optional[str] = None,
+    ) -> bool:
+        """Index a batch of ``(content_id, embedding, metadata)``"""
+        results = [
+            await self.index_content(content_id, embedding, metadata, namespace)
+            for content_id, embedding, metadata in items
+        ]
+        return all(results)
+
+    async def search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 10,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        namespace: Optional[str] = None,
+    ) -> List[List[VectorSearchResult]]:
+        """Search for several query vectors at once"""
+        return [
+            await self.search(query_embedding, top_k, filter_metadata, namespace)
+            for query_embedding in query_embeddings
+        ]
+
     @abstractmethod
     async def delete_content(
         self, content_id: str, namespace: Optional[str] = None
@@ -123,6 +150,10 @@ class VectorDBInterface(ABC):
         """Check health of the vector database"""
         pass
 
+    async def close(self) -> None:
+        """Flush pending writes and release resources"""
+        pass
+
 
 class PineconeVectorDB(VectorDBInterface):
     """Pinecone vector database implementation"""
@@ -184,6 +215,20 @@ class PineconeVectorDB(VectorDBInterface):
             logger.error(f"Failed to index content in Pinecone: {e}")
             return False
 
+    async def index_batch(
+        self,
+        items: List[Tuple[str, List[float], Dict[str, Any]]],
+        namespace: Optional[str] = None,
+    ) -> bool:
+        """Index a batch in Pinecone with a single upsert request"""
+        try:
+            namespace = namespace or self.config.namespace
+            self.index.upsert(vectors=list(items), namespace=namespace)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to batch index content in Pinecone: {e}")
+            return False
+
     async def search(
         self,
         query_embedding: List[float],
@@ -411,17 +456,31 @@ class WeaviateVectorDB(VectorDBInterface):
 
 
 class MemoryVectorDB(VectorDBInterface):
-    """In-memory vector database for testing"""
+    """In-memory vector database backed by one matrix index per namespace"""
 
     def __init__(self, config: VectorConfig):
         self.config = config
-        self.vectors = {}
-        self.metadata = {}
+        self.indexes: Dict[str, MatrixIndex] = {}
+        self.metadata: Dict[str, Dict[str, Dict[str, Any]]] = {}
 
     async def initialize(self) -> None:
         """Initialize in-memory storage"""
         logger.info("Initialized in-memory vector database")
 
+    def _get_index(self, namespace: str, dimension: int) -> MatrixIndex:
+        index = self.indexes.get(namespace)
+        if index is None:
+            index = MatrixIndex(dimension=dimension)
+            self.indexes[namespace] = index
+            self.metadata[namespace] = {}
+        return index
+
+    def _search_namespaces(self, namespace: Optional[str]) -> List[str]:
+        # No namespace searches across every namespace
+        if namespace:
+            return [namespace] if namespace in self.indexes else []
+        return list(self.indexes)
+
     async def index_content(
         self,
         content_id: str,
@@ -430,9 +489,31 @@ class MemoryVectorDB(VectorDBInterface):
         namespace: Optional[str] = None,
     ) -> bool:
         """Store content in memory"""
-        key = f"{namespace or 'default'}:{content_id}"
-        self.vectors[key] = np.array(embedding)
-        self.metadata[key] = metadata
+        return await self.index_batch([(content_id, embedding, metadata)], namespace)
+
+    async def index_batch(
+        self,
+        items: List[Tuple[str, List[float], Dict[str, Any]]],
+        namespace: Optional[str] = None,
+    ) -> bool:
+        """Store a batch of ``(content_id, embedding, metadata)`` in one write"""
+        if not items:
+            return True
+
+        namespace = namespace or "default"
+        content_ids = [item[0] for item in items]
+        embeddings = [item[1] for item in items]
+
+        try:
+            index = self._get_index(namespace, len(embeddings[0]))
+            index.upsert_many(content_ids, embeddings)
+        except ValueError as e:
+            logger.error(f"Failed to index content in memory: {e}")
+            return False
+
+        namespace_metadata = self.metadata[namespace]
+        for content_id, _, metadata in items:
+            namespace_metadata[content_id] = metadata
         return True
 
     async def search(
@@ -443,70 +524,290 @@ class MemoryVectorDB(VectorDBInterface):
         namespace: Optional[str] = None,
     ) -> List[VectorSearchResult]:
         """Search in memory using cosine similarity"""
-        query_vec = np.array(query_embedding)
-        results = []
+        results = await self.search_batch(
+            [query_embedding], top_k, filter_metadata, namespace
+        )
+        return results[0]
 
-        for key, vec in self.vectors.items():
-            # Check namespace
-            if namespace and not key.startswith(f"{namespace}:"):
-                continue
+    async def search_batch(
+        self,
+        query_embeddings: List[List[float]],
+        top_k: int = 10,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        namespace: Optional[str] = None,
+    ) -> List[List[VectorSearchResult]]:
+        """Search a matrix of queries with one matrix product per namespace"""
+        merged: List[List[Tuple[str, float, Dict[str, Any]]]] = [
+            [] for _ in query_embeddings
+        ]
+        if not query_embeddings:
+            return []
 
-            # Check metadata filters
-            if filter_metadata:
-                meta = self.metadata.get(key, {})
-                if not all(meta.get(k) == v for k, v in filter_metadata.items()):
-                    continue
+        for ns in self._search_namespaces(namespace):
+            index = self.indexes[ns]
+            namespace_metadata = self.metadata[ns]
 
-            # Calculate cosine similarity
-            similarity = np.dot(query_vec, vec) / (
-                np.linalg.norm(query_vec) * np.linalg.norm(vec)
-            )
+            try:
+                if filter_metadata:
+                    per_query = [
+                        self._filtered_top_k(
+                            index, query, top_k, filter_metadata, namespace_metadata
+                        )
+                        for query in query_embeddings
+                    ]
+                else:
+                    per_query = index.search(query_embeddings, top_k)
+            except ValueError as e:
+                logger.error(f"Failed to search namespace {ns}: {e}")
+                continue
 
-            results.append(
-                (
-                    key.split(":", 1)[1],  # Extract content_id
-                    float(similarity),
-                    self.metadata.get(key, {}),
+            for hits, ranked in zip(merged, per_query):
+                hits.extend(
+                    (content_id, score, namespace_metadata.get(content_id, {}))
+                    for content_id, score in ranked
                 )
-            )
-
-        # Sort by similarity and return top_k
-        results.sort(key=lambda x: x[1], reverse=True)
 
-        return [
-            VectorSearchResult(
-                id=r[0], score=r[1], metadata=r[2], text=r[2].get("text", "")
+        results = []
+        for hits in merged:
+            hits.sort(key=lambda x: x[1], reverse=True)
+            results.append(
+                [
+                    VectorSearchResult(
+                        id=r[0], score=r[1], metadata=r[2], text=r[2].get("text", "")
+                    )
+                    for r in hits[:top_k]
+                ]
             )
-            for r in results[:top_k]
-        ]
+        return results
+
+    @staticmethod
+    def _filtered_top_k(
+        index: Union[MatrixIndex, IVFIndex],
+        query_embedding: List[float],
+        top_k: int,
+        filter_metadata: Dict[str, Any],
+        namespace_metadata: Dict[str, Dict[str, Any]],
+    ) -> List[Tuple[str, float]]:
+        # Walk candidates best-first and stop as soon as top_k of them match
+        matches = []
+        for content_id, score in index.ranked(query_embedding):
+            meta = namespace_metadata.get(content_id, {})
+            if all(meta.get(k) == v for k, v in filter_metadata.items()):
+                matches.append((content_id, score))
+                if len(matches) >= top_k:
+                    break
+        return matches
 
     async def delete_content(
         self, content_id: str, namespace: Optional[str] = None
     ) -> bool:
         """Delete content from memory"""
-        key = f"{namespace or 'default'}:{content_id}"
-        if key in self.vectors:
-            del self.vectors[key]
-            del self.metadata[key]
-            return True
-        return False
+        namespace = namespace or "default"
+        index = self.indexes.get(namespace)
+        if index is None or not index.delete(content_id):
+            return False
+
+        self.metadata[namespace].pop(content_id, None)
+        return True
 
     async def health_check(self) -> Dict[str, Any]:
         """Check memory database health"""
         return {
             "status": "healthy",
-            "total_vectors": len(self.vectors),
+            "total_vectors": sum(len(index) for index in self.indexes.values()),
+            "namespaces": len(self.indexes),
             "type": "memory",
         }
 
 
+class IVFVectorDB(MemoryVectorDB):
+    """Local approximate vector database using one IVF index per namespace
+
+    Recall and latency are traded off with ``nprobe``; the index is persisted
+    to ``index_path`` every ``persist_every`` writes, every ``persist_interval``
+    seconds while writes are pending, and on ``persist()`` or ``close()``.
+    """
+
+    persist_every = 1000
+    persist_interval = 60.0
+
+    def __init__(self, config: VectorConfig):
+        super().__init__(config)
+        self.index_path = config.index_path
+        self._pending_writes = 0
+        self._persist_task: Optional[asyncio.Task] = None
+        # k-means runs in a worker thread so it never blocks the event loop
+        self._training: Dict[str, asyncio.Task] = {}
+
+    async def initialize(self) -> None:
+        """Load persisted indexes from disk, if any"""
+        if self.index_path:
+            os.makedirs(self.index_path, exist_ok=True)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._load)
+            for namespace in self.indexes:
+                self._train_if_needed(namespace)
+            self._persist_task = asyncio.create_task(self._persist_periodically())
+        logger.info(
+            f"Initialized IVF vector database (nlist={self.config.nlist}, "
+            f"nprobe={self.config.nprobe}, namespaces={len(self.indexes)})"
+        )
+
+    def _get_index(self, namespace: str, dimension: int) -> IVFIndex:
+        index = self.indexes.get(namespace)
+        if index is None:
+            index = IVFIndex(
+                dimension=dimension,
+                nlist=self.config.nlist,
+                nprobe=self.config.nprobe,
+                auto_train=False,
+            )
+            self.indexes[namespace] = index
+            self.metadata[namespace] = {}
+        return index
+
+    def set_nprobe(self, nprobe: int) -> None:
+        """Adjust the number of cells probed per query on every namespace"""
+        self.config.nprobe = nprobe
+        for index in self.indexes.values():
+            index.nprobe = nprobe
+
+    async def index_batch(
+        self,
+        items: List[Tuple[str, List[float], Dict[str, Any]]],
+        namespace: Optional[str] = None,
+    ) -> bool:
+        """Store a batch and persist once enough writes have accumulated"""
+        success = await super().index_batch(items, namespace)
+        if success:
+            self._train_if_needed(namespace or "default")
+            await self._record_writes(len(items))
+        return success
+
+    def _train_if_needed(self, namespace: str) -> None:
+        index = self.indexes.get(namespace)
+        if index is None or not index.needs_training or namespace in self._training:
+            return
+        task = asyncio.create_task(index.train_async())
+        self._training[namespace] = task
+        task.add_done_callback(lambda done: self._training_done(namespace, done))
+
+    def _training_done(self, namespace: str, task: asyncio.Task) -> None:
+        self._training.pop(namespace, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                f"Failed to train IVF index for namespace {namespace}: "
+                f"{task.exception()}"
+            )
+
+    async def delete_content(
+        self, content_id: str, namespace: Optional[str] = None
+    ) -> bool:
+        """Delete content and count it towards the next persist"""
+        deleted = await super().delete_content(content_id, namespace)
+        if deleted:
+            await self._record_writes(1)
+        return deleted
+
+    async def _record_writes(self, count: int) -> None:
+        self._pending_writes += count
+        if self.index_path and self._pending_writes >= self.persist_every:
+            await self.persist()
+
+    async def _persist_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.persist_interval)
+            if self._pending_writes:
+                try:
+                    await self.persist()
+                except Exception as e:
+                    logger.error(f"Failed to persist IVF vector database: {e}")
+
+    async def close(self) -> None:
+        """Stop the persist timer and write any pending changes"""
+        if self._persist_task is not None:
+            self._persist_task.cancel()
+            try:
+                await self._persist_task
+            except asyncio.CancelledError:
+                pass
+            self._persist_task = None
+        if self._training:
+            await asyncio.gather(*self._training.values(), return_exceptions=True)
+        if self._pending_writes:
+            await self.persist()
+
+    async def persist(self) -> None:
+        """Write all namespaces to ``index_path`` without blocking the loop"""
+        if not self.index_path:
+            return
+
+        # Snapshot on the loop so concurrent writes cannot tear the copy
+        manifest = {"namespaces": {}}
+        snapshots = []
+        for position, (namespace, index) in enumerate(self.indexes.items()):
+            name = f"ns_{position}"
+            manifest["namespaces"][namespace] = name
+            snapshots.append((name, index.snapshot(), dict(self.metadata[namespace])))
+        self._pending_writes = 0
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write, manifest, snapshots)
+
+    def _write(self, manifest: Dict[str, Any], snapshots: List[Tuple]) -> None:
+        for name, arrays, metadata in snapshots:
+            write_snapshot(os.path.join(self.index_path, f"{name}.npz"), arrays)
+            write_json(os.path.join(self.index_path, f"{name}.metadata.json"), metadata)
+        write_json(os.path.join(self.index_path, "manifest.json"), manifest)
+        logger.info(f"Persisted IVF vector database to {self.index_path}")
+
+    def _load(self) -> None:
+        manifest_path = os.path.join(self.index_path, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+        for namespace, name in manifest.get("namespaces", {}).items():
+            index = IVFIndex.load(os.path.join(self.index_path, f"{name}.npz"))
+            index.nprobe = self.config.nprobe
+            index.auto_train = False
+            with open(os.path.join(self.index_path, f"{name}.metadata.json")) as f:
+                self.metadata[namespace] = json.load(f)
+            self.indexes[namespace] = index
+
+    async def health_check(self) -> Dict[str, Any]:
+        """Check IVF database health"""
+        health = await super().health_check()
+        health.update(
+            {
+                "type": "ivf",
+                "nlist": self.config.nlist,
+                "nprobe": self.config.nprobe,
+                "trained_namespaces": sum(
+                    1 for index in self.indexes.values() if index.is_trained
+                ),
+                "training_namespaces": len(self._training),
+                "index_path": self.index_path,
+            }
+        )
+        return health
+
+
 class VectorIntegration:
     """Main vector integration class that manages different vector databases"""
 
-    def __init__(self, config: Optional[VectorConfig] = None):
+    def __init__(
+        self,
+        config: Optional[VectorConfig] = None,
+        embedding_manager: Optional[EnhancedEmbeddingManager] = None,
+    ):
         self.config = config or self._get_default_config()
         self.db: Optional[VectorDBInterface] = None
-        self.encoder = None
+        # Shared with the rest of the process so the model is loaded once and
+        # every component hits the same embedding cache
+        self.embedding_manager = embedding_manager or enhanced_embedding_manager
         self.initialized = False
 
     def _get_default_config(self) -> VectorConfig:
@@ -525,6 +826,15 @@ class VectorIntegration:
                 dimension=384,
                 url=os.getenv("WEAVIATE_URL"),
             )
+        elif os.getenv("VECTOR_INDEX_PATH"):
+            return VectorConfig(
+                db_type=VectorDBType.IVF,
+                index_name="sophia-knowledge-base",
+                dimension=384,
+                nlist=int(os.getenv("VECTOR_INDEX_NLIST", "256")),
+                nprobe=int(os.getenv("VECTOR_INDEX_NPROBE", "8")),
+                index_path=os.getenv("VECTOR_INDEX_PATH"),
+            )
         else:
             # Default to in-memory for testing
             return VectorConfig(
@@ -542,19 +852,14 @@ class VectorIntegration:
                 self.db = PineconeVectorDB(self.config)
             elif self.config.db_type == VectorDBType.WEAVIATE:
                 self.db = WeaviateVectorDB(self.config)
+            elif self.config.db_type == VectorDBType.IVF:
+                self.db = IVFVectorDB(self.config)
             else:
                 self.db = MemoryVectorDB(self.config)
 
             await self.db.initialize()
 
-            # Initialize encoder if available
-            if SENTENCE_TRANSFORMERS_AVAILABLE:
-                self.encoder = SentenceTransformer("all-MiniLM-L6-v2")
-                logger.info("Initialized sentence transformer encoder")
-            else:
-                logger.warning(
-                    "Sentence transformers not available - embeddings must be provided"
-                )
+            await self.embedding_manager.initialize()
 
             self.initialized = True
             logger.info(
@@ -567,11 +872,8 @@ class VectorIntegration:
 
     async def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for text"""
-        if not self.encoder:
-            raise RuntimeError("Encoder not available - install sentence-transformers")
-
-        embedding = self.encoder.encode(text)
-        return embedding.tolist()
+        embedding, _ = await self.embedding_manager.generate_text_embedding(text)
+        return embedding
 
     async def index_content(
         self,
@@ -579,14 +881,15 @@ class VectorIntegration:
         text: str,
         metadata: Optional[Dict[str, Any]] = None,
         namespace: Optional[str] = None,
+        embedding: Optional[List[float]] = None,
     ) -> bool:
-        """Index content with automatic embedding generation"""
+        """Index content, generating the embedding unless one is provided"""
         if not self.initialized:
             await self.initialize()
 
         try:
-            # Generate embedding
-            embedding = await self.generate_embedding(text)
+            if embedding is None:
+                embedding = await self.generate_embedding(text)
 
             # Add text to metadata
             if metadata is None:
@@ -604,6 +907,21 @@ class VectorIntegration:
             logger.error(f"Failed to index content: {e}")
             return False
 
+    async def index_vectors(
+        self,
+        items: List[Tuple[str, List[float], Dict[str, Any]]],
+        namespace: Optional[str] = None,
+    ) -> bool:
+        """Index precomputed ``(content_id, embedding, metadata)`` in one batch"""
+        if not self.initialized:
+            await self.initialize()
+
+        try:
+            return await self.db.index_batch(items, namespace=namespace)
+        except Exception as e:
+            logger.error(f"Failed to index vectors: {e}")
+            return False
+
     async def search(
         self,
         query: str,
@@ -646,9 +964,17 @@ class VectorIntegration:
 
         health = await self.db.health_check()
         health["db_type"] = self.config.db_type.value
-        health["encoder_available"] = self.encoder is not None
+        health["encoder_available"] = (
+            self.embedding_manager.sentence_transformer is not None
+        )
         return health
 
+    async def close(self) -> None:
+        """Flush the vector database, e.g. a local index, on shutdown"""
+        if self.db is not None:
+            await self.db.close()
+        self.initialized = False
+
     # Compatibility methods for existing code
     async def index_content_pinecone(
         self, content_id: str, text: str, metadata: Dict[str, Any]
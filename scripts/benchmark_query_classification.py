@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Microbenchmark for router query classification
+
+Measures the per-query cost of the HybridRAGRouter and MCPFederation
+classifiers: the old one-regex-per-rule loop, the compiled single-pass scan,
+and full classification with and without the decision cache.
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.core.hybrid_rag_router import MLQueryClassifier  # noqa: E402
+from backend.core.query_classification import normalize_query  # noqa: E402
+from backend.mcp.enhanced_mcp_federation import QueryClassifier  # noqa: E402
+
+QUERIES = [
+    "Find the latest documents about the Q3 pipeline review",
+    "Show all recent deals with a risk score above 0.7",
+    "Analyze sales call transcripts and generate a summary report",
+    "Automate the weekly workflow for onboarding new customers",
+    "What did the customer say about pricing in yesterday's call?",
+    "Get data records for the Linear issues assigned to the platform team",
+    "Summarize the key points of the board deck",
+    "Have the agent assist with deployment of the frontend build",
+    "Count the number of meetings in the sales pipeline",
+    "Compare GPU training instances on Lambda Labs by cost",
+]
+
+
+def _per_query_us(fn, queries, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            fn(query)
+    return (time.perf_counter() - started) / (repeat * len(queries)) * 1e6
+
+
+def _legacy_scorer(rule_set):
+    patterns = rule_set.as_regexes()
+
+    def score(text):
+        return {
+            label: sum(1 for pattern in label_patterns if re.search(pattern, text))
+            for label, label_patterns in patterns.items()
+        }
+
+    return score
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument(
+        "--unique",
+        type=int,
+        default=0,
+        help="Generate this many distinct queries instead of the fixed set",
+    )
+    args = parser.parse_args()
+
+    queries = QUERIES
+    if args.unique:
+        rng = random.Random(0)
+        words = " ".join(QUERIES).split()
+        queries = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(4, 16)))
+            for _ in range(args.unique)
+        ]
+    repeat = max(1, args.repeat * len(QUERIES) // len(queries))
+
+    for name, classifier in (
+        ("MLQueryClassifier", MLQueryClassifier()),
+        ("QueryClassifier", QueryClassifier()),
+    ):
+        cache = getattr(classifier, "decision_cache", None) or getattr(
+            classifier, "classification_cache"
+        )
+        legacy = _legacy_scorer(classifier.rule_set)
+        compiled = classifier.rule_set.score
+
+        results = {
+            "regex per rule": _per_query_us(
+                lambda q: legacy(normalize_query(q)), queries, repeat
+            ),
+            "compiled scan": _per_query_us(
+                lambda q: compiled(normalize_query(q)), queries, repeat
+            ),
+        }
+
+        def uncached(query):
+            cache.clear()
+            classifier.classify_query(query)
+
+        results["classify (cold)"] = _per_query_us(uncached, queries, repeat)
+        cache.clear()
+        results["classify (cached)"] = _per_query_us(
+            classifier.classify_query, queries, repeat
+        )
+
+        print(f"{name} ({len(classifier.rule_set)} rules)")
+        for label, micros in results.items():
+            print(f"  {label:<20} {micros:8.2f} us/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Unit Tests for BaseAgent shutdown"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("psycopg2")
+
+from backend.agents.core.base_agent import AgentConfig, BaseAgent  # noqa: E402
+from backend.agents.core.orchestrator import (  # noqa: E402
+    AgentCapability,
+    Task,
+    TaskStatus,
+    serialize_task,
+)
+from backend.core.capacity_index import InMemoryCapacityIndex  # noqa: E402
+from backend.core.task_queue import InMemoryTaskQueue  # noqa: E402
+
+
+class FakeRedis:
+    """Records published messages"""
+
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+class StuckAgent(BaseAgent):
+    """Agent whose tasks run until cancelled"""
+
+    def __init__(self, queue):
+        super().__init__(
+            AgentConfig("agent_1", "test", "test"),
+            task_queue=queue,
+            capacity_index=InMemoryCapacityIndex(),
+        )
+        self.redis_client = FakeRedis()
+        self.started = asyncio.Event()
+        self.cancelled = []
+
+    async def get_capabilities(self):
+        return [AgentCapability("crm_sync", "", [], [], 1.0)]
+
+    async def process_task(self, task):
+        self.started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled.append(task.task_id)
+            raise
+
+
+def _task(task_id):
+    return serialize_task(
+        Task(
+            task_id=task_id,
+            task_type="crm_sync",
+            agent_id=None,
+            task_data={},
+            status=TaskStatus.PENDING,
+            created_at=datetime.now(),
+            started_at=None,
+            completed_at=None,
+            result=None,
+            error_message=None,
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_running_tasks_before_handing_them_back():
+    """Test a released task stops here and publishes no result"""
+    queue = InMemoryTaskQueue(visibility_timeout_seconds=0)
+    await queue.enqueue("crm_sync", _task("t1"))
+    agent = StuckAgent(queue)
+    agent.is_running = True
+
+    (delivery,) = await queue.claim(["crm_sync"], agent.agent_id)
+    await agent._handle_task_assignment(delivery.payload, delivery)
+    await agent.started.wait()
+    await agent.stop()
+
+    assert agent.cancelled == ["t1"]
+    assert not agent._executions and not agent.current_tasks
+    assert agent.redis_client.published == []
+    (again,) = await queue.claim(["crm_sync"], "agent_2")
+    assert again.task_id == "t1"
@@ -0,0 +1,32 @@
+"""Unit Tests for the cache invalidation bus"""
+
+import pytest
+
+from backend.core.cache_invalidation import InvalidationMessage, LocalInvalidationBus
+
+
+class TestLocalInvalidationBus:
+    """Test in-process delivery of invalidation messages"""
+
+    def test_message_json_roundtrip(self):
+        """Test messages survive the wire format unchanged"""
+        message = InvalidationMessage("node", 3, 42, keys=["a"], tags=["deal:1"])
+        assert InvalidationMessage.from_json(message.to_json()) == message
+
+    @pytest.mark.asyncio
+    async def test_publish_reaches_every_subscriber(self):
+        """Test each subscriber sees each message despite a failing handler"""
+        bus = LocalInvalidationBus()
+        received = []
+
+        async def failing(message):
+            raise RuntimeError("boom")
+
+        async def recording(message):
+            received.append(message.keys)
+
+        await bus.start(failing)
+        await bus.start(recording)
+        await bus.publish(InvalidationMessage("node", 1, 1, keys=["k"]))
+
+        assert received == [["k"]]
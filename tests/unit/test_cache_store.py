@@ -0,0 +1,47 @@
+"""Unit Tests for the SQLite L3 cache store"""
+
+from backend.core.cache_store import SQLiteCacheStore
+
+
+class TestSQLiteCacheStore:
+    """Test L3 reads, expiry, tags and sweeping"""
+
+    def test_roundtrip_and_expiry(self, tmp_path):
+        """Test unexpired rows are returned and expired rows are hidden"""
+        store = SQLiteCacheStore(str(tmp_path / "l3.db"))
+        store.set_many([("a", '{"v": 1}', 200.0), ("b", '{"v": 2}', 50.0)])
+
+        assert store.get_many(["a", "b", "c"], now=100.0) == {"a": '{"v": 1}'}
+
+        store.set_many([("a", '{"v": 3}', 300.0)])
+        assert store.get_many(["a"], now=100.0) == {"a": '{"v": 3}'}
+
+    def test_tag_invalidation(self, tmp_path):
+        """Test a tag removes every entry carrying it in one call"""
+        store = SQLiteCacheStore(str(tmp_path / "l3.db"))
+        store.set_many([("d1", "x", 999.0), ("d2", "y", 999.0)], tags=["deal:1"])
+        store.set_many([("other", "z", 999.0)], tags=["deal:2"])
+
+        assert sorted(store.keys_for_tag("deal:1")) == ["d1", "d2"]
+        assert sorted(store.delete_tag("deal:1")) == ["d1", "d2"]
+        assert store.get_many(["d1", "d2", "other"], now=0.0) == {"other": "z"}
+        assert store.keys_for_tag("deal:1") == []
+
+    def test_rewrite_replaces_tags(self, tmp_path):
+        """Test setting a key again drops its old tags"""
+        store = SQLiteCacheStore(str(tmp_path / "l3.db"))
+        store.set_many([("k", "v1", 999.0)], tags=["old"])
+        store.set_many([("k", "v2", 999.0)], tags=["new"])
+
+        assert store.keys_for_tag("old") == []
+        assert store.keys_for_tag("new") == ["k"]
+
+    def test_sweep_removes_expired_rows_and_tags(self, tmp_path):
+        """Test bulk sweeping deletes expired rows in batches"""
+        store = SQLiteCacheStore(str(tmp_path / "l3.db"))
+        rows = [(f"k{i}", "v", 10.0 if i % 2 else 1000.0) for i in range(25)]
+        store.set_many(rows, tags=["t"])
+
+        assert store.sweep(now=100.0, batch_size=5) == 12
+        assert len(store.get_many([row[0] for row in rows], now=100.0)) == 13
+        assert len(store.keys_for_tag("t")) == 13
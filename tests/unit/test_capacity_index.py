@@ -0,0 +1,67 @@
+"""Unit Tests for the shared agent capacity index"""
+
+import asyncio
+import collections
+
+import pytest
+
+from backend.core.capacity_index import InMemoryCapacityIndex
+
+
+class TestInMemoryCapacityIndex:
+    """Test slot accounting, balancing and heartbeat expiry"""
+
+    @pytest.mark.asyncio
+    async def test_selection_reserves_slots_until_released(self):
+        """Test an agent is never handed more tasks than it has slots"""
+        index = InMemoryCapacityIndex(seed=1)
+        await index.register("a1", ["call_analysis", "crm_sync"], slots=2)
+
+        assert await index.select("call_analysis") == "a1"
+        assert await index.select("crm_sync") == "a1"
+        assert await index.select("call_analysis") is None
+        assert await index.free_slots("crm_sync") == {"a1": 0}
+
+        await index.release("a1")
+        assert await index.select("crm_sync") == "a1"
+        assert index.get_stats()["no_capacity"] == 1
+
+    @pytest.mark.asyncio
+    async def test_two_choices_spreads_load(self):
+        """Test concurrent selections are spread across agents"""
+        index = InMemoryCapacityIndex(seed=7)
+        for i in range(10):
+            await index.register(f"a{i}", ["call_analysis"], slots=10)
+
+        picks = await asyncio.gather(
+            *(index.select("call_analysis") for _ in range(50))
+        )
+        counts = collections.Counter(picks)
+        assert len(counts) == 10
+        assert max(counts.values()) - min(counts.values()) <= 2
+        assert "selection_latency_ms" in index.get_stats()
+
+    @pytest.mark.asyncio
+    async def test_stale_agents_expire(self):
+        """Test an agent that stops heartbeating is no longer selected"""
+        index = InMemoryCapacityIndex(heartbeat_ttl_seconds=0.05)
+        await index.register("a1", ["crm_sync"], slots=1)
+        await asyncio.sleep(0.1)
+
+        assert await index.select("crm_sync") is None
+        assert await index.free_slots("crm_sync") == {}
+        assert index.get_stats()["expired_agents"] == 1
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_reports_purged_agents(self):
+        """Test a purged agent learns it must register again"""
+        index = InMemoryCapacityIndex(heartbeat_ttl_seconds=0.05)
+        await index.register("a1", ["crm_sync"], slots=1)
+        assert await index.heartbeat("a1")
+
+        await asyncio.sleep(0.1)
+        await index.purge_expired()
+        assert not await index.heartbeat("a1")
+
+        await index.register("a1", ["crm_sync"], slots=1)
+        assert await index.select("crm_sync") == "a1"
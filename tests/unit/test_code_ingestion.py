@@ -0,0 +1,116 @@
+"""Unit Tests for incremental codebase ingestion"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("backend.knowledge_base.vector_store")
+
+from backend.codebase_awareness.code_ingestion import (  # noqa: E402
+    CodebaseIngestionPipeline,
+)
+
+ALPHA = '''
+def alpha():
+    """First"""
+    return 1
+
+
+def beta():
+    """Second"""
+    return 2
+'''
+
+GAMMA = '''
+def gamma():
+    """Third"""
+    return 3
+'''
+
+
+class FakeVectorStore:
+    """Records upserted and deleted item ids"""
+
+    INDEX_NAME = "codebase-test"
+
+    def __init__(self):
+        self.items = {}
+        self.upserts = []
+        self.deletes = []
+        self.fail = False
+
+    async def upsert(self, chunks):
+        if self.fail:
+            raise RuntimeError("index unavailable")
+        ids = [chunk.metadata["item_id"] for chunk in chunks]
+        self.upserts.append(sorted(ids))
+        self.items.update(
+            (chunk.metadata["item_id"], chunk.metadata["name"]) for chunk in chunks
+        )
+
+    async def delete(self, item_ids):
+        self.deletes.append(sorted(item_ids))
+        for item_id in item_ids:
+            self.items.pop(item_id)
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "a.py").write_text(ALPHA)
+    (root / "pkg" / "c.py").write_text(GAMMA)
+    store = FakeVectorStore()
+    pipeline = CodebaseIngestionPipeline(
+        store, None, root, manifest_path=tmp_path / "manifest.json", max_workers=1
+    )
+    return root, store, pipeline
+
+
+def _ids_by_name(store):
+    return {name: item_id for item_id, name in store.items.items()}
+
+
+def test_reruns_upsert_new_ids_and_delete_stale_ones(project):
+    """Test edited and removed files only touch the items that changed"""
+    root, store, pipeline = project
+
+    stats = asyncio.run(pipeline.ingest_codebase())
+    assert stats["items_upserted"] == 3 and store.deletes == []
+    first = _ids_by_name(store)
+    assert set(first) == {"alpha", "beta", "gamma"}
+
+    (root / "pkg" / "a.py").write_text(ALPHA.replace("return 2", "return 22"))
+    stats = asyncio.run(pipeline.ingest_codebase())
+    second = _ids_by_name(store)
+    assert stats["files_parsed"] == 1
+    assert store.upserts[-1] == [second["beta"]]
+    assert store.deletes == [[first["beta"]]]
+    assert second["alpha"] == first["alpha"]
+
+    (root / "pkg" / "c.py").unlink()
+    stats = asyncio.run(pipeline.ingest_codebase())
+    assert stats["files_parsed"] == 0 and stats["files_deleted"] == 1
+    assert len(store.upserts) == 2
+    assert store.deletes[-1] == [first["gamma"]]
+    assert set(_ids_by_name(store)) == {"alpha", "beta"}
+
+
+def test_manifest_is_saved_only_after_the_store_succeeds(project, tmp_path):
+    """Test a failed upsert leaves the manifest as it was"""
+    root, store, pipeline = project
+    asyncio.run(pipeline.ingest_codebase())
+    saved = (tmp_path / "manifest.json").read_text()
+
+    (root / "pkg" / "a.py").write_text(ALPHA.replace("return 2", "return 22"))
+    store.fail = True
+    with pytest.raises(RuntimeError):
+        asyncio.run(pipeline.ingest_codebase())
+    assert (tmp_path / "manifest.json").read_text() == saved
+    assert store.deletes == []
+
+    store.fail = False
+    stats = asyncio.run(pipeline.ingest_codebase())
+    assert stats["files_parsed"] == 1 and stats["items_upserted"] == 1
+    assert "pkg/a.py" in json.loads((tmp_path / "manifest.json").read_text())["files"]
@@ -0,0 +1,150 @@
+"""Unit Tests for the local HubSpot CRM mirror"""
+
+import asyncio
+
+import pytest
+
+from backend.core.crm_mirror import CRMMirror, compile_filters
+
+
+def _deal(deal_id, stage, amount, modified, pipeline="default"):
+    return {
+        "id": deal_id,
+        "properties": {
+            "dealname": f"Deal {deal_id}",
+            "amount": str(amount),
+            "dealstage": stage,
+            "pipeline": pipeline,
+            "hs_lastmodifieddate": str(modified),
+        },
+    }
+
+
+class TestPipelineAggregates:
+    """Test pipeline analytics stay correct as deals change"""
+
+    def test_incremental_totals_match_rebuild(self):
+        """Test upserts, stage changes and deletes adjust the totals"""
+        mirror = CRMMirror()
+        mirror.upsert(
+            "deals",
+            [
+                _deal("1", "closedwon", 100, 1),
+                _deal("2", "closedlost", 50, 1),
+                _deal("3", "appointmentscheduled", 30, 1),
+                _deal("4", "closedwon", 10, 1, pipeline="other"),
+            ],
+        )
+        mirror.upsert("deals", [_deal("3", "closedwon", 40, 2)])
+        mirror.delete("deals", "2")
+
+        analytics = mirror.pipeline_analytics("default")
+        assert analytics["total_deals"] == 2
+        assert analytics["closed_won_value"] == 140
+        assert analytics["win_rate"] == 1
+        assert mirror.pipeline_analytics()["total_deals"] == 3
+
+        incremental = dict(mirror.pipelines.totals)
+        mirror.pipelines.rebuild(mirror.tables["deals"])
+        assert mirror.pipelines.totals == incremental
+
+    def test_stale_updates_are_ignored(self):
+        """Test an older version never overwrites a newer one"""
+        mirror = CRMMirror()
+        mirror.upsert("deals", [_deal("1", "closedwon", 100, 5)])
+        assert mirror.upsert("deals", [_deal("1", "closedlost", 100, 4)]) == 0
+        assert not mirror.apply_webhook_event(
+            {
+                "subscriptionType": "deal.propertyChange",
+                "objectId": 1,
+                "propertyName": "dealstage",
+                "propertyValue": "closedlost",
+                "occurredAt": 3,
+            }
+        )
+        assert mirror.pipeline_analytics()["closed_won_count"] == 1
+
+
+class TestCRMMirrorPersistence:
+    """Test snapshots and journal replay"""
+
+    @pytest.mark.asyncio
+    async def test_reopen_replays_journal_over_snapshot(self, tmp_path):
+        """Test changes before and after a snapshot survive a restart"""
+        mirror = CRMMirror(str(tmp_path))
+        mirror.upsert("deals", [_deal("1", "closedwon", 100, 1)])
+        await mirror.flush()
+        mirror.upsert("deals", [_deal("2", "qualified", 20, 1)])
+        mirror.complete_sync("deals", 1, 1000.0)
+        await mirror.snapshot()
+        mirror.apply_webhook_event(
+            {
+                "subscriptionType": "deal.propertyChange",
+                "objectId": 2,
+                "propertyName": "dealstage",
+                "propertyValue": "closedlost",
+                "occurredAt": 2,
+            }
+        )
+        mirror.apply_webhook_event(
+            {"subscriptionType": "deal.deletion", "objectId": 1, "occurredAt": 3}
+        )
+        await mirror.flush()
+
+        reopened = CRMMirror(str(tmp_path))
+        assert reopened.get_stats()["objects"]["deals"] == 1
+        assert reopened.tables["deals"].get("2")["properties"]["dealstage"] == (
+            "closedlost"
+        )
+        assert reopened.watermarks == {"deals": 1}
+        assert reopened.pipelines.totals == mirror.pipelines.totals
+
+    @pytest.mark.asyncio
+    async def test_writes_run_off_the_event_loop(self, tmp_path, monkeypatch):
+        """Test journal and snapshot files are written in a worker thread"""
+        written = []
+        to_thread = asyncio.to_thread
+
+        async def tracking_to_thread(func, *args):
+            written.append(func.__name__)
+            return await to_thread(func, *args)
+
+        monkeypatch.setattr(asyncio, "to_thread", tracking_to_thread)
+        mirror = CRMMirror(str(tmp_path), journal_max_records=2)
+        mirror.upsert("deals", [_deal("1", "closedwon", 100, 1)])
+        assert not (tmp_path / "journal.jsonl").exists()
+
+        await mirror.flush()
+        mirror.upsert("deals", [_deal("2", "qualified", 20, 1)])
+        await mirror.flush()
+
+        assert written == ["_append_journal", "_append_journal", "_write_snapshot"]
+        assert (tmp_path / "journal.jsonl").read_bytes() == b""
+        assert CRMMirror(str(tmp_path)).get_stats()["objects"]["deals"] == 2
+
+
+def test_compile_filters():
+    """Test supported filters evaluate and unsupported ones defer to the API"""
+    available = ["email", "lifecyclestage", "createdate"]
+    predicate = compile_filters(
+        [
+            {"propertyName": "lifecyclestage", "operator": "EQ", "value": "Lead"},
+            {"propertyName": "createdate", "operator": "GTE", "value": "1000"},
+        ],
+        available,
+    )
+    assert predicate({"lifecyclestage": "lead", "createdate": "2000"})
+    assert not predicate({"lifecyclestage": "lead", "createdate": "500"})
+    assert (
+        compile_filters(
+            [{"propertyName": "email", "operator": "CONTAINS_TOKEN", "value": "x"}],
+            available,
+        )
+        is None
+    )
+    assert (
+        compile_filters(
+            [{"propertyName": "phone", "operator": "EQ", "value": "1"}], available
+        )
+        is None
+    )
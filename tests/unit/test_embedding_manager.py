@@ -0,0 +1,139 @@
+"""Unit Tests for batched embedding generation and the embedding cache"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from backend.core.enhanced_embedding_manager import (
+    EmbeddingCache,
+    EmbeddingMetadata,
+    EmbeddingResult,
+    EnhancedEmbeddingManager,
+)
+
+OPENAI_MODEL = "text-embedding-ada-002"
+
+
+def _vector(text):
+    return [float(len(text)), float(ord(text[0]))]
+
+
+class FakeEncoder:
+    """Sentence transformer stand-in that records every encode call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        self.calls.append((list(texts), batch_size))
+        return np.array([_vector(text) for text in texts], dtype=np.float32)
+
+
+class FakeOpenAI:
+    """OpenAI client stand-in answering with vectors in reverse order"""
+
+    def __init__(self):
+        self.requests = []
+        self.Embedding = self
+
+    def create(self, input, model):
+        self.requests.append(list(input))
+        data = [
+            {"index": index, "embedding": _vector(text)}
+            for index, text in enumerate(input)
+        ]
+        return {"data": data[::-1], "usage": {"total_tokens": 2 * len(input)}}
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("EMBEDDING_CACHE_DIR", str(tmp_path))
+    manager = EnhancedEmbeddingManager()
+    manager.cache = EmbeddingCache()
+    manager.sentence_transformer = FakeEncoder()
+    manager.initialized = True
+    return manager
+
+
+class TestGenerateBatchEmbeddings:
+    """Test dedupe, caching, batching and result order"""
+
+    @pytest.mark.asyncio
+    async def test_duplicates_embedded_once_in_input_order(self, manager):
+        """Test repeated texts share one encode and results follow the input"""
+        texts = ["alpha", "be", "alpha", "charlie"]
+        results = await manager.generate_batch_embeddings(texts)
+
+        assert manager.sentence_transformer.calls == [(["alpha", "be", "charlie"], 64)]
+        assert [embedding for embedding, _ in results] == [_vector(t) for t in texts]
+        assert results[0][1].content_hash == results[2][1].content_hash
+
+    @pytest.mark.asyncio
+    async def test_cache_hits_are_not_re_embedded(self, manager):
+        """Test only misses reach the model on a second batch"""
+        await manager.generate_batch_embeddings(["alpha", "be"])
+        results = await manager.generate_batch_embeddings(["be", "delta", "alpha"])
+
+        assert manager.sentence_transformer.calls[-1] == (["delta"], 64)
+        assert [embedding for embedding, _ in results] == [
+            _vector("be"),
+            _vector("delta"),
+            _vector("alpha"),
+        ]
+        assert manager.get_cache_stats()["memory_hits"] == 2
+
+    @pytest.mark.asyncio
+    async def test_batches_are_sized_for_the_model(self, manager):
+        """Test misses go to the encoder several batches per call"""
+        texts = [f"text {i}" for i in range(20)]
+        await manager.generate_batch_embeddings(texts, use_cache=False, batch_size=2)
+
+        calls = manager.sentence_transformer.calls
+        assert [(len(batch), size) for batch, size in calls] == [(16, 2), (4, 2)]
+        assert [text for batch, _ in calls for text in batch] == texts
+
+    @pytest.mark.asyncio
+    async def test_openai_vectors_follow_their_index(self, manager):
+        """Test responses are matched to inputs by index, one request per batch"""
+        manager.openai_client = FakeOpenAI()
+        texts = ["alpha", "be", "charlie"]
+        results = await manager.generate_batch_embeddings(
+            texts, model=OPENAI_MODEL, batch_size=2
+        )
+
+        assert manager.openai_client.requests == [["alpha", "be"], ["charlie"]]
+        assert [embedding for embedding, _ in results] == [_vector(t) for t in texts]
+        assert results[0][1].model == OPENAI_MODEL
+        assert results[0][1].token_count == 2
+
+
+def _result(text):
+    metadata = EmbeddingMetadata(
+        model="model", dimension=2, content_hash=text, created_at=datetime.now()
+    )
+    return EmbeddingResult(embedding=_vector(text), metadata=metadata)
+
+
+class TestEmbeddingCache:
+    """Test the byte-bounded memory tier"""
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_entries_are_evicted_over_budget(self):
+        """Test the byte budget holds and a recent read protects an entry"""
+        entry_bytes = 2 * 4 + EmbeddingCache.ENTRY_OVERHEAD_BYTES
+        cache = EmbeddingCache(max_memory_bytes=3 * entry_bytes)
+        await cache.set_many([(f"model:{text}", _result(text)) for text in "abc"])
+        assert await cache.get("model:a") is not None
+
+        await cache.set("model:d", _result("d"))
+
+        assert list(cache.cache) == ["model:c", "model:a", "model:d"]
+        assert await cache.get("model:b") is None
+        stats = cache.get_stats()
+        assert stats["memory_bytes"] == 3 * entry_bytes
+        assert stats["evictions"] == 1
+
+        await cache.set("model:a", _result("a"))
+        assert cache.memory_bytes == 3 * entry_bytes
+        assert list(cache.cache)[-1] == "model:a"
@@ -0,0 +1,125 @@
+"""Unit Tests for the pipeline embedding stage"""
+
+import pytest
+
+from backend.core.rate_limiter import AsyncTokenBucket
+from backend.pipelines.embedding_stage import (
+    EmbeddingStage,
+    chunk_document,
+    chunk_text,
+)
+
+
+class TestChunking:
+    """Test transcript chunking"""
+
+    def test_short_text_is_single_chunk(self):
+        """Test text under the limit is returned unchanged"""
+        assert chunk_text("hello world", chunk_chars=100) == ["hello world"]
+        assert chunk_text("   ", chunk_chars=100) == []
+
+    def test_long_text_covers_everything_with_overlap(self):
+        """Test chunks overlap and no content past 8000 chars is lost"""
+        words = [f"w{i}" for i in range(3000)]
+        text = " ".join(words)
+        chunks = chunk_text(text, chunk_chars=2000, overlap_chars=200)
+
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 2000 for chunk in chunks)
+        assert chunks[-1].endswith("w2999")
+        # Consecutive chunks share their boundary words
+        assert chunks[0].split()[-1] in chunks[1]
+
+    def test_chunk_document_metadata(self):
+        """Test chunk ids and positions are recorded"""
+        chunks = chunk_document("call_1", "a " * 50, {"k": "v"}, chunk_chars=40)
+
+        assert chunks[0].id == "call_1_chunk0"
+        assert chunks[0].metadata["chunk_count"] == len(chunks)
+        assert chunks[-1].metadata["chunk_index"] == len(chunks) - 1
+        assert chunks[0].metadata["k"] == "v"
+
+
+class TestAsyncTokenBucket:
+    """Test token bucket accounting"""
+
+    @pytest.mark.asyncio
+    async def test_acquire_within_capacity_does_not_wait(self):
+        """Test tokens available up front are granted immediately"""
+        bucket = AsyncTokenBucket(rate_per_minute=600)
+        assert await bucket.acquire(10) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_acquire_waits_for_refill(self):
+        """Test an empty bucket waits for the refill rate"""
+        bucket = AsyncTokenBucket(rate_per_minute=6000, capacity=1)
+        await bucket.acquire(1)
+        waited = await bucket.acquire(1)
+        assert waited == pytest.approx(0.01, abs=0.005)
+
+
+class TestEmbeddingStage:
+    """Test concurrent embedding and batched storage"""
+
+    @pytest.mark.asyncio
+    async def test_batches_requests_and_upserts(self):
+        """Test chunks are packed into requests and flushed in fixed batches"""
+        requests = []
+        stored = []
+
+        async def embed(texts):
+            requests.append(len(texts))
+            return [[float(len(text))] for text in texts]
+
+        async def store(batch):
+            stored.append(len(batch))
+            return True
+
+        stage = EmbeddingStage(
+            embed, store, max_inputs_per_request=4, upsert_batch_size=3
+        )
+        chunks = chunk_document("doc", "word " * 400, {}, chunk_chars=100)
+        stats = await stage.run(chunks)
+
+        assert stats["embedded"] == stats["stored"] == len(chunks)
+        assert max(requests) <= 4
+        assert all(size == 3 for size in stored[:-1])
+        assert sum(stored) == len(chunks)
+
+    @pytest.mark.asyncio
+    async def test_retries_then_reports_failures(self, monkeypatch):
+        """Test transient errors are retried and persistent ones reported"""
+        monkeypatch.setattr(
+            "backend.pipelines.embedding_stage.random.random", lambda: 0
+        )
+        monkeypatch.setattr(
+            "backend.pipelines.embedding_stage.asyncio.sleep", _no_sleep
+        )
+        attempts = {"count": 0}
+
+        async def flaky(texts):
+            attempts["count"] += 1
+            if attempts["count"] < 3:
+                raise RuntimeError("rate limited")
+            return [[1.0] for _ in texts]
+
+        async def store(batch):
+            return True
+
+        stage = EmbeddingStage(flaky, store, max_retries=5)
+        chunks = chunk_document("doc", "text", {})
+        stats = await stage.run(chunks)
+        assert stats["embedded"] == 1
+        assert attempts["count"] == 3
+
+        async def broken(texts):
+            raise RuntimeError("down")
+
+        stage = EmbeddingStage(broken, store, max_retries=2)
+        stats = await stage.run(chunks)
+        assert stats["failed"] == 1
+        assert stats["stored"] == 0
+
+
+async def _no_sleep(_delay):
+    return None
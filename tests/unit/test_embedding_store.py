@@ -0,0 +1,91 @@
+"""Unit Tests for the memory-mapped embedding store"""
+
+import os
+
+import numpy as np
+
+from backend.core.embedding_store import EmbeddingDiskCache
+
+
+class TestEmbeddingDiskCache:
+    """Test EmbeddingDiskCache persistence and sharing"""
+
+    def test_put_and_get(self, tmp_path):
+        """Test a stored vector is returned as float32"""
+        cache = EmbeddingDiskCache(str(tmp_path))
+        store = cache.store("all-MiniLM-L6-v2", 4)
+
+        assert store.put("abc", [1.0, 2.0, 3.0, 4.0], created_at=0.0) is True
+        assert store.put("abc", [9.0, 9.0, 9.0, 9.0], created_at=1.0) is False
+        np.testing.assert_array_equal(store.get("abc"), [1.0, 2.0, 3.0, 4.0])
+        assert store.get("missing") is None
+
+    def test_unknown_model_without_dimension(self, tmp_path):
+        """Test lookups for a model never written do not create a store"""
+        cache = EmbeddingDiskCache(str(tmp_path))
+        assert cache.store("text-embedding-ada-002") is None
+
+    def test_shared_between_instances(self, tmp_path):
+        """Test records written by one process are visible to another"""
+        writer = EmbeddingDiskCache(str(tmp_path)).store("model", 2)
+        reader = EmbeddingDiskCache(str(tmp_path)).store("model")
+
+        assert reader.get("later") is None
+        writer.put("later", [0.5, 0.25], created_at=0.0)
+        np.testing.assert_array_equal(reader.get("later"), [0.5, 0.25])
+
+    def test_compaction_keeps_recent_records(self, tmp_path):
+        """Test the file is bounded and newest records survive compaction"""
+        cache = EmbeddingDiskCache(str(tmp_path), max_records_per_model=4)
+        store = cache.store("model", 2)
+        reader = EmbeddingDiskCache(str(tmp_path)).store("model")
+
+        for i in range(5):
+            store.put(f"h{i}", [float(i), 0.0], created_at=float(i))
+
+        assert len(store) <= 4
+        assert store.get("h4") is not None
+        assert store.get("h0") is None
+        np.testing.assert_array_equal(reader.get("h4"), [4.0, 0.0])
+
+    def test_batch_put_and_get(self, tmp_path):
+        """Test batch writes are readable, including digests ending in NUL"""
+        cache = EmbeddingDiskCache(str(tmp_path))
+        hashes = [f"h{i}" for i in range(600)]
+        records = [(h, [float(i), 1.0], 0.0) for i, h in enumerate(hashes)]
+        assert any(cache.store("model", 2).digest(h).endswith(b"\0") for h in hashes)
+
+        assert cache.put_many("model", records) == 600
+        assert cache.put_many("model", records[:10]) == 0
+
+        found = EmbeddingDiskCache(str(tmp_path)).get_many("model", hashes + ["x"])
+        assert len(found) == 600
+        np.testing.assert_array_equal(found["h7"], [7.0, 1.0])
+
+    def test_torn_tail_is_truncated_before_appending(self, tmp_path):
+        """Test a partial record from a crashed writer does not misalign appends"""
+        cache = EmbeddingDiskCache(str(tmp_path))
+        store = cache.store("model", 2)
+        store.put("before", [1.0, 2.0], created_at=0.0)
+        with open(store.path, "ab") as f:
+            f.write(b"torn")
+
+        store.put("after", [3.0, 4.0], created_at=0.0)
+
+        assert os.path.getsize(store.path) == 2 * store.dtype.itemsize
+        reader = EmbeddingDiskCache(str(tmp_path)).store("model")
+        np.testing.assert_array_equal(reader.get("before"), [1.0, 2.0])
+        np.testing.assert_array_equal(reader.get("after"), [3.0, 4.0])
+
+    def test_short_writes_are_retried(self, tmp_path, monkeypatch):
+        """Test a batch is written whole even when os.write writes partially"""
+        store = EmbeddingDiskCache(str(tmp_path)).store("model", 2)
+        write = os.write
+        monkeypatch.setattr(os, "write", lambda fd, data: write(fd, data[:7]))
+
+        records = [(f"h{i}", [float(i), 0.0], 0.0) for i in range(3)]
+        assert store.put_many(records) == 3
+
+        assert os.path.getsize(store.path) == 3 * store.dtype.itemsize
+        found = EmbeddingDiskCache(str(tmp_path)).get_many("model", ["h0", "h2"])
+        np.testing.assert_array_equal(found["h2"], [2.0, 0.0])
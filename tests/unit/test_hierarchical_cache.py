@@ -0,0 +1,45 @@
+"""Unit Tests for HierarchicalCache value freshness"""
+
+import time
+
+import pytest
+
+pytest.importorskip("aioredis")
+
+from backend.core.hierarchical_cache import (  # noqa: E402
+    CacheStrategy,
+    CacheTier,
+    HierarchicalCache,
+)
+
+
+def _fresh_for(cache, ttls):
+    envelope = cache._envelope("value", ttls, 0.0)
+    return round(envelope["expires_at"] - time.time())
+
+
+class TestEnvelopeFreshness:
+    """Test which tier TTLs decide how long a value stays fresh"""
+
+    @pytest.fixture
+    def cache(self):
+        cache = HierarchicalCache()
+        cache.l2_client = object()
+        cache.l3_store = object()
+        return cache
+
+    def test_l1_override_is_not_extended_by_l3(self, cache):
+        """Test a 5-minute L1 override is not fresh for the 24h L3 TTL"""
+        assert _fresh_for(cache, {CacheTier.L1_MEMORY: 300}) == 300
+
+    def test_shortest_override_wins(self, cache):
+        """Test overriding several tiers keeps the tightest bound"""
+        ttls = {CacheTier.L2_REDIS: 600, CacheTier.L3_DATABASE: 7200}
+        assert _fresh_for(cache, ttls) == 600
+
+    def test_defaults_ignore_the_backing_store(self, cache):
+        """Test without overrides freshness follows L2, not L3"""
+        assert _fresh_for(cache, {}) == cache.l2_ttl
+
+        cache.strategy = CacheStrategy.WRITE_AROUND
+        assert _fresh_for(cache, {}) == cache.l3_ttl
@@ -0,0 +1,62 @@
+"""Unit Tests for hot-key detection"""
+
+import pytest
+
+from backend.core.hot_keys import CountMinSketch, HotKeyTracker
+
+
+class TestCountMinSketch:
+    """Test decayed frequency estimates"""
+
+    def test_never_underestimates(self):
+        """Test estimates are at least the true count"""
+        sketch = CountMinSketch(width=64, depth=4, half_life_seconds=1e9)
+        for i in range(500):
+            sketch.add(f"key{i % 50}", now=0.0)
+
+        assert all(sketch.estimate(f"key{i}", now=0.0) >= 10 for i in range(50))
+
+    def test_counts_decay_by_half_life(self):
+        """Test a count halves after one half-life"""
+        sketch = CountMinSketch(half_life_seconds=10.0)
+        sketch.add("k", count=8.0, now=100.0)
+
+        assert sketch.estimate("k", now=110.0) == pytest.approx(4.0)
+        assert sketch.estimate("k", now=130.0) == pytest.approx(1.0)
+
+
+class TestHotKeyTracker:
+    """Test the decaying top-K"""
+
+    def test_tracks_hottest_keys_with_bounded_memory(self):
+        """Test the top-K holds the heaviest keys among many cold ones"""
+        tracker = HotKeyTracker(k=3, half_life_seconds=1e6)
+        now = 0.0
+        for i in range(2000):
+            tracker.record(f"cold{i}", now=now)
+            if i % 10 == 0:
+                for hot in ("a", "b", "c"):
+                    tracker.record(hot, now=now)
+
+        assert len(tracker) == 3
+        assert {key for key, _ in tracker.top(now=now)} == {"a", "b", "c"}
+
+    def test_old_hot_keys_fade_out(self):
+        """Test recent traffic displaces keys that have gone quiet"""
+        tracker = HotKeyTracker(k=1, half_life_seconds=60.0)
+        for _ in range(100):
+            tracker.record("old", now=0.0)
+        for _ in range(10):
+            tracker.record("new", now=600.0)
+
+        assert tracker.top(now=600.0)[0][0] == "new"
+
+    def test_rate_estimate_for_steady_traffic(self):
+        """Test steady traffic converges to its true hourly rate"""
+        tracker = HotKeyTracker(k=5, half_life_seconds=60.0)
+        for second in range(3600):
+            tracker.record("steady", now=float(second))
+
+        ((key, rate),) = tracker.top(now=3599.0)
+        assert key == "steady"
+        assert rate == pytest.approx(3600, rel=0.01)
@@ -0,0 +1,90 @@
+"""Unit Tests for keeping the HubSpot CRM mirror in sync"""
+
+import pytest
+
+pytest.importorskip("hubspot")
+
+from backend.integrations.hubspot.hubspot_integration import (  # noqa: E402
+    HubSpotIntegration,
+)
+
+
+def _deal(deal_id, stage, amount, modified):
+    return {
+        "id": deal_id,
+        "properties": {
+            "amount": str(amount),
+            "dealstage": stage,
+            "pipeline": "default",
+            "hs_lastmodifieddate": str(modified),
+        },
+    }
+
+
+class FakeHubSpot:
+    """Live and archived deals served like the search and list endpoints"""
+
+    def __init__(self):
+        self.live = {}
+        self.archived = {}
+
+    async def search_pages(self, object_type, data):
+        since = float(data["filterGroups"][0]["filters"][0]["value"])
+        changed = [
+            deal
+            for deal in self.live.values()
+            if float(deal["properties"]["hs_lastmodifieddate"]) >= since
+        ]
+        if changed:
+            yield changed
+
+    async def archived_pages(self, object_type):
+        if self.archived:
+            yield list(self.archived.values())
+
+    def delete(self, deal_id, archived_at):
+        self.live.pop(deal_id)
+        self.archived[deal_id] = {"id": deal_id, "archivedAt": str(archived_at)}
+
+
+@pytest.fixture
+def hubspot(monkeypatch):
+    monkeypatch.delenv("HUBSPOT_MIRROR_PATH", raising=False)
+    fake = FakeHubSpot()
+    integration = HubSpotIntegration()
+    monkeypatch.setattr(integration, "_search_pages", fake.search_pages)
+    monkeypatch.setattr(integration, "_archived_pages", fake.archived_pages)
+    return integration, fake
+
+
+class TestInMemoryDealsMirror:
+    """Test pipeline analytics without a configured mirror"""
+
+    @pytest.mark.asyncio
+    async def test_deal_deleted_between_syncs_leaves_totals(self, hubspot):
+        """Test an archived deal no longer counts towards the pipeline"""
+        integration, fake = hubspot
+        fake.live = {
+            "1": _deal("1", "closedwon", 100, 10),
+            "2": _deal("2", "closedlost", 50, 10),
+        }
+        analytics = await integration.get_pipeline_analytics()
+        assert analytics["total_deals"] == 2
+
+        fake.delete("2", 20)
+        analytics = await integration.get_pipeline_analytics()
+        assert analytics["total_deals"] == 1
+        assert analytics["win_rate"] == 1
+
+    @pytest.mark.asyncio
+    async def test_webhook_deletion_reaches_the_mirror(self, hubspot):
+        """Test webhook events are applied to the in-memory mirror"""
+        integration, fake = hubspot
+        fake.live = {"1": _deal("1", "closedwon", 100, 10)}
+        await integration.get_pipeline_analytics()
+
+        assert await integration.handle_webhook(
+            [{"subscriptionType": "deal.deletion", "objectId": 1, "occurredAt": 20}]
+        )
+        mirror = integration._deals_mirror
+        assert mirror.pipeline_analytics()["total_deals"] == 0
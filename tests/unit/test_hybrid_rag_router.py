@@ -0,0 +1,177 @@
+"""Unit Tests for speculative engine execution in the hybrid RAG router"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("mcp")
+
+from backend.core import hybrid_rag_router  # noqa: E402
+from backend.core.hybrid_rag_router import (  # noqa: E402
+    HybridRAGRouter,
+    ProcessingResult,
+    QueryType,
+    RoutingDecision,
+)
+from backend.core.semantic_cache import SemanticAnswerCache  # noqa: E402
+
+# Seconds and confidence each fake engine answers with
+ENGINES = {
+    "vector_search": (0.0, 0.8),
+    "mcp_federation": (0.05, 0.5),
+    "agno_orchestration": (5.0, 0.9),
+}
+
+
+def _decision(primary, secondary):
+    return RoutingDecision(
+        query_type=QueryType.STRUCTURED_QUERY,
+        primary_engine=primary,
+        secondary_engines=secondary,
+        confidence=0.9,
+        reasoning="test",
+        estimated_time_ms=100,
+        parallel_execution=True,
+    )
+
+
+@pytest.fixture
+def router(monkeypatch):
+    router = HybridRAGRouter()
+    router.launched = []
+
+    async def fake_engine_query(engine, query, context):
+        router.launched.append(engine)
+        delay, confidence = ENGINES[engine]
+        await asyncio.sleep(delay)
+        return ProcessingResult(
+            success=True,
+            data={"engine": engine},
+            engine=engine,
+            execution_time_ms=delay * 1000,
+            confidence=confidence,
+            metadata={},
+        )
+
+    monkeypatch.setattr(router, "_execute_engine_query", fake_engine_query)
+    return router
+
+
+class TestExecuteSpeculative:
+    """Test when speculative execution stops early"""
+
+    @pytest.mark.asyncio
+    async def test_fast_secondary_does_not_cancel_primary(self, router):
+        """Test a confident secondary waits for the primary to finish"""
+        primary, secondary, speculation = await router._execute_speculative(
+            "q", {}, _decision("mcp_federation", ["vector_search"])
+        )
+
+        assert primary.success and secondary[0].success
+        assert speculation["stop_reason"] == "all_completed"
+
+    @pytest.mark.asyncio
+    async def test_stops_once_primary_is_done(self, router):
+        """Test slow secondaries are cancelled after the primary answers"""
+        primary, secondary, speculation = await router._execute_speculative(
+            "q", {}, _decision("vector_search", ["agno_orchestration"])
+        )
+
+        assert primary.success and not secondary[0].success
+        assert speculation["stop_reason"] == "confidence_reached"
+        assert speculation["cancelled_engines"] == ["agno_orchestration"]
+
+    @pytest.mark.asyncio
+    async def test_deadline_cuts_off_slow_primary(self, router):
+        """Test the latency budget is the only thing that cancels a primary"""
+        primary, _, speculation = await router._execute_speculative(
+            "q",
+            {"latency_budget_ms": 100},
+            _decision("agno_orchestration", ["vector_search"]),
+        )
+
+        assert primary.error == "Deadline exceeded"
+        assert primary.execution_time_ms == 100
+        assert speculation["timed_out_engines"] == ["agno_orchestration"]
+
+
+def test_writes_through_mcp_are_not_speculative(router, monkeypatch):
+    """Test queries the federation classifies as writes run staged"""
+    federation = hybrid_rag_router.mcp_federation
+    decision = _decision("vector_search", ["mcp_federation"])
+
+    monkeypatch.setattr(
+        federation.query_classifier,
+        "classify_query",
+        lambda query, context=None: {"query_type": "data_modification"},
+    )
+    assert not router._can_speculate("create an issue", {}, decision)
+    assert router._can_speculate("q", {}, _decision("vector_search", ["llamaindex"]))
+
+    monkeypatch.setattr(
+        federation.query_classifier,
+        "classify_query",
+        lambda query, context=None: {"query_type": "data_retrieval"},
+    )
+    assert router._can_speculate("find issues", {}, decision)
+
+
+def test_crm_backed_answers_carry_the_hubspot_source():
+    """Test answers from agno, directly or via MCP, go stale with HubSpot"""
+    result = {
+        "data": {
+            "primary_engine": "mcp_federation",
+            "primary_result": {
+                "ranked_results": [{"server": "agno"}, {"server": "linear"}]
+            },
+            "secondary_results": {"vector_search": {"data": {}}},
+        }
+    }
+    assert HybridRAGRouter._answer_sources(result, {}) == {
+        "agno",
+        "hubspot",
+        "linear",
+        "knowledge",
+    }
+
+    fallback = {"fallback_used": True, "primary_engine": "agno_orchestration"}
+    assert "hubspot" in HybridRAGRouter._answer_sources(fallback, {})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "query_type, primary, runs",
+    [
+        ("data_modification", "mcp_federation", 2),
+        ("data_retrieval", "agno_orchestration", 2),
+        ("data_retrieval", "mcp_federation", 1),
+    ],
+)
+async def test_only_read_only_queries_use_the_answer_cache(
+    router, monkeypatch, query_type, primary, runs
+):
+    """Test a repeated write reaches its engine again instead of the cache"""
+    federation = hybrid_rag_router.mcp_federation
+    router.initialized = True
+    router.answer_cache = SemanticAnswerCache()
+    decision = _decision(primary, [])
+
+    async def fake_embed(query):
+        return [1.0, 0.0, 0.0]
+
+    monkeypatch.setattr(router, "_embed_query", fake_embed)
+    monkeypatch.setattr(
+        router.classifier, "classify_query", lambda query, context=None: decision
+    )
+    monkeypatch.setattr(
+        federation.query_classifier,
+        "classify_query",
+        lambda query, context=None: {"query_type": query_type},
+    )
+    monkeypatch.setitem(ENGINES, "agno_orchestration", (0.0, 0.9))
+
+    for _ in range(2):
+        result = await router.route_query("send a Slack message to John", {})
+        assert result["success"]
+
+    assert router.launched == [primary] * runs
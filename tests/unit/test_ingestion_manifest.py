@@ -0,0 +1,114 @@
+"""Unit Tests for incremental codebase ingestion bookkeeping"""
+
+import ast
+
+from backend.codebase_awareness.architecture_parsers import ArchitectureParser
+from backend.codebase_awareness.ingestion_manifest import (
+    FileRecord,
+    IngestionManifest,
+    iter_source_files,
+    parse_file,
+)
+
+SOURCE = '''
+def alpha():
+    """First"""
+    return 1
+
+
+def beta():
+    """Second"""
+    return 2
+'''
+
+
+def _parse(path, rel_path="pkg/mod.py"):
+    return parse_file(str(path), rel_path, False, False, False)
+
+
+class TestItemIds:
+    """Test content-addressed item ids"""
+
+    def test_editing_one_function_keeps_the_others_id(self, tmp_path):
+        """Test only the edited item gets a new id"""
+        path = tmp_path / "mod.py"
+        path.write_text(SOURCE)
+        before = {item["name"]: item["item_id"] for item in _parse(path).items}
+
+        path.write_text(SOURCE.replace("return 2", "return 3"))
+        after = {item["name"]: item["item_id"] for item in _parse(path).items}
+
+        assert before["alpha"] == after["alpha"]
+        assert before["beta"] != after["beta"]
+
+    def test_same_content_in_another_file_gets_another_id(self, tmp_path):
+        """Test ids are scoped to the file path"""
+        path = tmp_path / "mod.py"
+        path.write_text(SOURCE)
+        first = _parse(path, "a.py").items[0]["item_id"]
+        assert _parse(path, "b.py").items[0]["item_id"] != first
+
+    def test_missing_file_reports_error(self, tmp_path):
+        """Test a file removed after the scan is reported, not raised"""
+        parsed = _parse(tmp_path / "gone.py")
+        assert parsed.error and parsed.items == []
+
+
+class TestIngestionManifest:
+    """Test manifest persistence and change detection"""
+
+    def test_round_trip_and_index_mismatch(self, tmp_path):
+        """Test a saved manifest reloads only for the same index"""
+        path = tmp_path / "manifest.json"
+        manifest = IngestionManifest(path, "codebase")
+        manifest.files["a.py"] = FileRecord("h", 10, 5, ["id1", "id2"])
+        manifest.save()
+
+        reloaded = IngestionManifest.load(path, "codebase")
+        assert reloaded.files == manifest.files
+        assert reloaded.all_item_ids() == {"id1", "id2"}
+        assert IngestionManifest.load(path, "other-index").files == {}
+
+    def test_is_unchanged_uses_size_and_mtime(self, tmp_path):
+        """Test a touched file counts as changed"""
+        path = tmp_path / "mod.py"
+        path.write_text(SOURCE)
+        parsed = _parse(path)
+        manifest = IngestionManifest(tmp_path / "manifest.json")
+        manifest.files["pkg/mod.py"] = FileRecord(
+            parsed.content_hash, parsed.size, parsed.mtime_ns
+        )
+
+        assert manifest.is_unchanged("pkg/mod.py", path.stat())
+        path.write_text(SOURCE + "\n")
+        assert not manifest.is_unchanged("pkg/mod.py", path.stat())
+
+
+def test_iter_source_files_prunes_ignored_dirs(tmp_path):
+    """Test only parseable files outside ignored directories are listed"""
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / "mod.py").write_text("")
+    (tmp_path / "db").mkdir()
+    (tmp_path / "db" / "schema.sql").write_text("")
+    (tmp_path / "other.sql").write_text("")
+    (tmp_path / "notes.md").write_text("")
+    (tmp_path / "mod.py").write_text("")
+
+    found = {
+        path.relative_to(tmp_path).as_posix()
+        for path, _ in iter_source_files(tmp_path, tmp_path / "db")
+    }
+    assert found == {"mod.py", "db/schema.sql"}
+
+
+def test_parsed_code_matches_ast_source_segments():
+    """Test the single-split source slicing matches ast.get_source_segment"""
+    source = 'class Ünï:\r\n    def f(self): return "é"\r\n\x0c\ndef g():\n    pass\n'
+    tree = ast.parse(source)
+    expected = [
+        ast.get_source_segment(source, node)
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef))
+    ]
+    items = ArchitectureParser.parse_python_code(source, "mod.py")
+    assert [item["code"] for item in items] == expected
@@ -0,0 +1,58 @@
+"""Unit Tests for the persistent call insight cache"""
+
+import pytest
+
+from backend.core.insight_cache import (
+    InsightCache,
+    call_fingerprint,
+    content_fingerprint,
+)
+
+
+class TestInsightCache:
+    """Test lookups by call id and content"""
+
+    @pytest.mark.asyncio
+    async def test_hits_survive_reopen_and_miss_on_changed_content(self, tmp_path):
+        """Test a stored call is reused until its transcript changes"""
+        path = str(tmp_path / "insights.db")
+        cache = InsightCache(path)
+        fingerprints = {"c1": content_fingerprint("hello"), "c2": "x"}
+        await cache.set_many({"c1": {"pain_points": ["cost"]}}, fingerprints)
+        cache.close()
+
+        reopened = InsightCache(path)
+        assert await reopened.get_many(fingerprints) == {
+            "c1": {"pain_points": ["cost"]}
+        }
+        assert await reopened.get_many({"c1": content_fingerprint("hello!")}) == {}
+        assert reopened.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_new_version_replaces_old(self, tmp_path):
+        """Test re-analysing a call drops its previous insights"""
+        cache = InsightCache(str(tmp_path / "insights.db"))
+        await cache.set_many({"c1": {"v": 1}}, {"c1": "old"})
+        await cache.set_many({"c1": {"v": 2}}, {"c1": "new"})
+
+        assert await cache.get_many({"c1": "old"}) == {}
+        assert await cache.get_many({"c1": "new"}) == {"c1": {"v": 2}}
+
+    def test_fingerprint_ignores_key_order(self):
+        """Test equal call records hash equally"""
+        assert content_fingerprint({"id": 1, "duration": 30}) == content_fingerprint(
+            {"duration": 30, "id": 1}
+        )
+
+
+def test_call_fingerprint_needs_content():
+    """Test id-only calls are uncacheable and transcripts win over metadata"""
+    assert call_fingerprint({"id": "c1"}) is None
+    # The single-call path adds the id to call_data; the batch path gets it
+    # from Gong with the record, and both must hit the same entry
+    assert call_fingerprint({"title": "Demo", "id": "c1"}) == call_fingerprint(
+        {"id": "c1", "title": "Demo"}
+    )
+    assert call_fingerprint(
+        {"id": "c1", "title": "Demo", "transcript": "hi"}
+    ) == call_fingerprint({"id": "c1", "title": "Renamed", "transcript": "hi"})
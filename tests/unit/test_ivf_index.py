@@ -0,0 +1,96 @@
+"""Unit Tests for the IVF approximate vector index"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from backend.vector.ivf_index import IVFIndex
+
+
+def _clustered_vectors(rng, clusters=8, per_cluster=50, dimension=16):
+    centers = rng.normal(size=(clusters, dimension)) * 5
+    points = np.repeat(centers, per_cluster, axis=0)
+    return points + rng.normal(size=points.shape)
+
+
+class TestIVFIndex:
+    """Test IVFIndex training, recall and persistence"""
+
+    def test_exact_until_trained(self):
+        """Test the index answers from a flat matrix before training"""
+        index = IVFIndex(dimension=2, nlist=4, train_size=10)
+        index.upsert_many(["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+
+        assert not index.is_trained
+        assert index.search([1.0, 0.0], top_k=1)[0][0][0] == "a"
+
+    def test_trains_and_keeps_recall(self):
+        """Test full probing reproduces exact results after training"""
+        rng = np.random.default_rng(1)
+        vectors = _clustered_vectors(rng)
+        ids = [f"v{i}" for i in range(len(vectors))]
+        index = IVFIndex(dimension=16, nlist=8, nprobe=8, train_size=100)
+        index.upsert_many(ids, vectors)
+
+        assert index.is_trained
+        assert len(index) == len(vectors)
+
+        query = vectors[7]
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        exact = [ids[i] for i in np.argsort(-(normalized @ query))[:10]]
+        approx = [cid for cid, _ in index.search(query, top_k=10)[0]]
+        assert approx == exact
+
+        # A single probe should still find the query's own vector
+        assert index.search(query, top_k=1, nprobe=1)[0][0][0] == "v7"
+
+    def test_incremental_insert_and_delete(self):
+        """Test inserts after training are routed and deletes are honoured"""
+        rng = np.random.default_rng(2)
+        vectors = _clustered_vectors(rng, per_cluster=20)
+        index = IVFIndex(dimension=16, nlist=4, train_size=40)
+        index.upsert_many([f"v{i}" for i in range(len(vectors))], vectors)
+
+        index.upsert("new", vectors[0] * 2)
+        assert "new" in index
+        assert index.delete("v0") is True
+        assert index.delete("v0") is False
+        assert "v0" not in [cid for cid, _ in index.ranked(vectors[0])]
+
+    @pytest.mark.asyncio
+    async def test_background_training_keeps_concurrent_writes(self):
+        """Test writes made while k-means runs in a thread reach the cells"""
+        rng = np.random.default_rng(4)
+        vectors = _clustered_vectors(rng, per_cluster=20)
+        index = IVFIndex(dimension=16, nlist=4, nprobe=4, train_size=40)
+        index.auto_train = False
+        index.upsert_many([f"v{i}" for i in range(len(vectors))], vectors)
+        assert index.needs_training and not index.is_trained
+
+        training = asyncio.create_task(index.train_async())
+        await asyncio.sleep(0)
+        assert index.is_training
+        index.upsert("new", vectors[0] * 2)
+        index.delete("v1")
+        assert index.search(vectors[0], top_k=1)[0][0][0] in ("v0", "new")
+        await training
+
+        assert index.is_trained and not index.is_training
+        assert "new" in index and "v1" not in index
+        assert len(index) == len(vectors)
+
+    def test_save_and_load_roundtrip(self, tmp_path):
+        """Test a trained index survives persistence"""
+        rng = np.random.default_rng(3)
+        vectors = _clustered_vectors(rng, per_cluster=20)
+        index = IVFIndex(dimension=16, nlist=4, nprobe=4, train_size=40)
+        index.upsert_many([f"v{i}" for i in range(len(vectors))], vectors)
+
+        path = str(tmp_path / "index.npz")
+        index.save(path)
+        restored = IVFIndex.load(path)
+
+        assert restored.is_trained
+        assert len(restored) == len(index)
+        assert restored.search(vectors[3], top_k=5) == index.search(vectors[3], top_k=5)
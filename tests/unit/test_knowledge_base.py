@@ -0,0 +1,193 @@
+"""Unit Tests for knowledge base bulk ingestion and search"""
+
+import re
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pinecone")
+pytest.importorskip("weaviate")
+pytest.importorskip("sentence_transformers")
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from backend.knowledge.knowledge_base import (  # noqa: E402
+    Base,
+    ContentType,
+    KnowledgeBaseDocument,
+    SophiaKnowledgeBase,
+)
+
+
+class FakeEncoder:
+    """Embedding model that fails on texts containing ``fail_on``"""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append(texts)
+        if isinstance(texts, str):
+            return np.array([float(len(texts)), 1.0])
+        if self.fail_on and any(self.fail_on in text for text in texts):
+            raise RuntimeError("encoder failed")
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+
+class FakePinecone:
+    """Vector store that records upserts and answers queries from ``matches``"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.upserts = []
+        self.queries = []
+        self.matches = []
+
+    def upsert(self, vectors):
+        if self.fail:
+            raise RuntimeError("pinecone unavailable")
+        self.upserts.append(vectors)
+
+    def query(self, **kwargs):
+        self.queries.append(kwargs)
+        return {"matches": self.matches}
+
+
+@pytest.fixture
+def knowledge_base(tmp_path):
+    kb = SophiaKnowledgeBase.__new__(SophiaKnowledgeBase)
+    kb.config = {}
+    kb.db_engine = create_engine(f"sqlite:///{tmp_path / 'kb.db'}")
+    kb.Session = sessionmaker(bind=kb.db_engine)
+    Base.metadata.create_all(kb.db_engine)
+    kb.embedding_model = FakeEncoder()
+    kb.pinecone_index = FakePinecone()
+    kb.weaviate_client = None
+    return kb
+
+
+def _doc(content, doc_id=None, content_type="company_core"):
+    doc = {"title": content.title(), "content": content, "content_type": content_type}
+    if doc_id:
+        doc["id"] = doc_id
+    return doc
+
+
+def _stored_ids(kb):
+    session = kb.Session()
+    try:
+        return {row[0] for row in session.query(KnowledgeBaseDocument.id)}
+    finally:
+        session.close()
+
+
+class TestBulkIngestDocuments:
+    """Test dedupe, chunked transactions and failure reporting"""
+
+    def test_duplicates_are_skipped_within_and_across_runs(self, knowledge_base):
+        """Test repeated content or ids are stored once"""
+        documents = [
+            _doc("mission", "a"),
+            _doc("mission", "b"),
+            _doc("values", "a"),
+            _doc("pricing", "c"),
+        ]
+        report = knowledge_base.bulk_ingest_documents(documents, chunk_size=2)
+
+        assert (report["success"], report["skipped"], report["failed"]) == (2, 2, 0)
+        assert report["chunks"] == 2
+        assert _stored_ids(knowledge_base) == {"a", "c"}
+
+        again = knowledge_base.bulk_ingest_documents(documents, chunk_size=2)
+        assert (again["success"], again["skipped"]) == (0, 4)
+
+    def test_documents_without_ids_get_unique_uuid_ids(self, knowledge_base):
+        """Test generated ids are uuid based and never collide"""
+        report = knowledge_base.bulk_ingest_documents([_doc("mission"), _doc("values")])
+
+        ids = _stored_ids(knowledge_base)
+        assert report["success"] == 2 and len(ids) == 2
+        assert all(re.fullmatch(r"doc_[0-9a-f]{32}", doc_id) for doc_id in ids)
+
+    def test_failed_chunk_is_rolled_back_and_reported(self, knowledge_base):
+        """Test one failing chunk does not stop or leak into the others"""
+        knowledge_base.embedding_model = FakeEncoder(fail_on="broken")
+        documents = [
+            _doc("mission", "a"),
+            _doc("broken", "b"),
+            _doc("values", "c"),
+            _doc("roadmap", "d", content_type="unknown"),
+        ]
+        report = knowledge_base.bulk_ingest_documents(documents, chunk_size=2)
+
+        assert (report["success"], report["failed"]) == (1, 3)
+        assert [(e["stage"], e["document_ids"]) for e in report["errors"]] == [
+            ("embedding", ["a", "b"]),
+            ("parse", ["d"]),
+        ]
+        assert _stored_ids(knowledge_base) == {"c"}
+
+    def test_vector_store_failures_keep_rows_and_report_ids(self, knowledge_base):
+        """Test a failed vector write is reported against the stored documents"""
+        knowledge_base.pinecone_index = FakePinecone(fail=True)
+        report = knowledge_base.bulk_ingest_documents(
+            [_doc("mission", "a"), _doc("values", "b")]
+        )
+
+        assert report["success"] == 2
+        (error,) = report["errors"]
+        assert (error["stage"], error["document_ids"]) == ("pinecone", ["a", "b"])
+        assert _stored_ids(knowledge_base) == {"a", "b"}
+
+
+class TestSearchDocuments:
+    """Test matches are hydrated with one query and keep their own scores"""
+
+    @pytest.fixture
+    def searchable(self, knowledge_base):
+        knowledge_base.bulk_ingest_documents(
+            [
+                _doc("mission " * 100, "a"),
+                _doc("pricing", "b", content_type="sales_marketing"),
+                _doc("values", "c"),
+            ]
+        )
+        knowledge_base.pinecone_index.matches = [
+            {"id": "doc_b", "score": 0.9},
+            {"id": "doc_a", "score": 0.7},
+            {"id": "doc_missing", "score": 0.8},
+        ]
+        statements = []
+        event.listen(
+            knowledge_base.db_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+        knowledge_base.statements = statements
+        return knowledge_base
+
+    def test_previews_come_from_a_single_query(self, searchable):
+        """Test one IN query fetches every match with a truncated preview"""
+        results = searchable.search_documents("pricing", preview_chars=20)
+
+        assert len(searchable.statements) == 1
+        assert " IN " in searchable.statements[0]
+        assert [(r["id"], r["score"]) for r in results] == [("b", 0.9), ("a", 0.7)]
+        assert results[0]["content"] == "pricing"
+        assert results[1]["content"] == ("mission " * 3)[:20] + "..."
+        assert results[1]["title"] == ("mission " * 100).title()
+
+    @pytest.mark.asyncio
+    async def test_content_types_filter_the_vector_query(self, searchable):
+        """Test the content type filter is pushed down to Pinecone"""
+        results = await searchable.search_documents_async(
+            "pricing", content_types=[ContentType.SALES_MARKETING], limit=5
+        )
+
+        (query,) = searchable.pinecone_index.queries
+        assert query["filter"] == {"content_type": {"$in": ["sales_marketing"]}}
+        assert query["top_k"] == 5
+        assert [r["id"] for r in results] == ["b"]
+        assert len(searchable.statements) == 1
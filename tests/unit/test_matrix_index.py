@@ -0,0 +1,73 @@
+"""Unit Tests for the matrix-backed vector index"""
+
+import numpy as np
+import pytest
+
+from backend.vector.matrix_index import MatrixIndex
+
+
+class TestMatrixIndex:
+    """Test MatrixIndex search, updates and deletes"""
+
+    def test_search_matches_brute_force(self):
+        """Test top-k ordering agrees with a naive cosine computation"""
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(200, 16))
+        index = MatrixIndex(dimension=16, initial_capacity=8)
+        index.upsert_many([f"doc{i}" for i in range(200)], vectors)
+
+        query = rng.normal(size=16)
+        expected = (
+            vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+        )
+        expected_ids = [f"doc{i}" for i in np.argsort(-expected)[:5]]
+
+        results = index.search(query, top_k=5)[0]
+        assert [content_id for content_id, _ in results] == expected_ids
+        assert results[0][1] == pytest.approx(expected.max(), rel=1e-5)
+
+    def test_batched_queries(self):
+        """Test a query matrix returns one ranked list per row"""
+        index = MatrixIndex(dimension=2)
+        index.upsert_many(["x", "y"], [[1.0, 0.0], [0.0, 1.0]])
+
+        results = index.search([[1.0, 0.1], [0.1, 1.0]], top_k=1)
+        assert [r[0][0] for r in results] == ["x", "y"]
+
+    def test_upsert_replaces_existing_vector(self):
+        """Test re-inserting an id overwrites its row"""
+        index = MatrixIndex(dimension=2)
+        index.upsert("a", [1.0, 0.0])
+        index.upsert("a", [0.0, 1.0])
+
+        assert len(index) == 1
+        assert index.search([0.0, 1.0], top_k=1)[0][0][0] == "a"
+
+    def test_delete_and_compaction(self):
+        """Test tombstoned rows are excluded and eventually compacted"""
+        index = MatrixIndex(dimension=2, compaction_threshold=0.5)
+        index.upsert_many(["a", "b", "c"], [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]])
+
+        assert index.delete("a") is True
+        assert index.delete("a") is False
+        assert index.tombstones == 1
+        assert [cid for cid, _ in index.search([1.0, 0.0], top_k=3)[0]] == ["b", "c"]
+
+        index.delete("b")
+        assert index.tombstones == 0
+        assert len(index) == 1
+        assert index.search([1.0, 0.0], top_k=3)[0][0][0] == "c"
+
+    def test_ranked_skips_tombstones(self):
+        """Test the best-first iterator only yields live rows"""
+        index = MatrixIndex(dimension=2)
+        index.upsert_many(["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+        index.delete("a")
+
+        assert [cid for cid, _ in index.ranked([1.0, 0.0])] == ["b"]
+
+    def test_dimension_mismatch_raises(self):
+        """Test vectors of the wrong width are rejected"""
+        index = MatrixIndex(dimension=3)
+        with pytest.raises(ValueError):
+            index.upsert("a", [1.0, 0.0])
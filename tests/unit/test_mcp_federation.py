@@ -0,0 +1,107 @@
+"""Unit Tests for per-server deadlines and hedging in the MCP federation"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("mcp")
+
+from backend.mcp.enhanced_mcp_federation import (  # noqa: E402
+    MCPFederation,
+    MCPServerInfo,
+    QueryClassifier,
+)
+
+
+class FakeServer:
+    """Server whose calls sleep for the next scripted delay"""
+
+    def __init__(self, delays):
+        self.delays = list(delays)
+        self.calls = []
+
+    async def _call(self, name, query):
+        self.calls.append(name)
+        await asyncio.sleep(self.delays.pop(0) if self.delays else 0)
+        return {"results": [query]}
+
+    async def search_calls(self, query, context):
+        return await self._call("search_calls", query)
+
+    async def update_call_data(self, query, context):
+        return await self._call("update_call_data", query)
+
+
+def _federation(server, priority=1):
+    federation = MCPFederation()
+    federation.servers["gong"] = MCPServerInfo(
+        name="gong",
+        server_instance=server,
+        capabilities=[],
+        priority=priority,
+        timeout_ms=1000,
+    )
+    return federation
+
+
+async def _query(federation, query_type, timeout_s=0.2):
+    return await federation._query_with_deadline(
+        "gong", "q", {}, {"query_type": query_type, "confidence": 0.5}, timeout_s
+    )
+
+
+class TestQueryWithDeadline:
+    """Test hedged reads, unhedged writes and the deadline"""
+
+    @pytest.mark.asyncio
+    async def test_slow_read_is_hedged(self):
+        """Test a second attempt wins when the first outlives the hedge delay"""
+        server = FakeServer([5, 0])
+        federation = _federation(server)
+
+        result = await _query(federation, "data_retrieval")
+
+        assert result.success
+        assert server.calls == ["search_calls", "search_calls"]
+        assert federation.metrics["hedged_requests"] == 1
+
+    @pytest.mark.asyncio
+    async def test_writes_are_never_hedged(self):
+        """Test a slow write is attempted once and then times out"""
+        server = FakeServer([5, 0])
+        federation = _federation(server)
+
+        result = await _query(federation, "data_modification")
+
+        assert not result.success and result.error == "Query timeout"
+        assert server.calls == ["update_call_data"]
+        assert federation.metrics["hedged_requests"] == 0
+
+    @pytest.mark.asyncio
+    async def test_deadline_bounds_unhedged_servers(self):
+        """Test a lower-priority server is cut off at its deadline"""
+        server = FakeServer([5])
+        federation = _federation(server, priority=2)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await _query(federation, "data_retrieval", timeout_s=0.1)
+
+        assert result.error == "Query timeout"
+        assert loop.time() - started < 1
+        assert server.calls == ["search_calls"]
+        assert federation.metrics["server_timeouts"] == 1
+
+
+def test_classifier_ignores_unhashable_user_context():
+    """Test dict user contexts classify like no context instead of raising"""
+    classifier = QueryClassifier()
+    plain = classifier.classify_query("hello there")
+    with_dict = classifier.classify_query(
+        "hello there", {"user_context": {"team": "sales"}}
+    )
+    assert with_dict == plain
+    development = classifier.classify_query(
+        "hello there", {"user_context": "development"}
+    )
+    assert development["priority_servers"] == ["linear", "vercel", "lambda_labs"]
@@ -0,0 +1,70 @@
+"""Unit Tests for the log-structured agent memory store"""
+
+import pytest
+
+from backend.core.memory_log import MemoryLog
+
+KEY = ("default", "agent_1")
+
+
+def _records(start, stop):
+    return [{"id": f"m{i}", "content": i} for i in range(start, stop)]
+
+
+class TestMemoryLog:
+    """Test appends, tombstones and compaction"""
+
+    @pytest.mark.asyncio
+    async def test_tail_returns_newest_records_in_order(self, tmp_path):
+        """Test the tail is the last N live records, oldest first"""
+        log = MemoryLog(tmp_path, segment_max_bytes=200)
+        await log.append(KEY, _records(0, 20))
+
+        tail = await log.tail(KEY, 3)
+        assert [record["content"] for record in tail] == [17, 18, 19]
+        # Small segments force the records across several files
+        assert len(list((tmp_path / "default" / "agent_1").iterdir())) > 1
+
+    @pytest.mark.asyncio
+    async def test_deletes_and_replacements_survive_reload(self, tmp_path):
+        """Test tombstones and superseded ids are replayed from disk"""
+        log = MemoryLog(tmp_path)
+        await log.append(KEY, _records(0, 5))
+        assert await log.delete(KEY, "m4")
+        assert not await log.delete(KEY, "missing")
+        await log.append(KEY, [{"id": "m1", "content": "updated"}])
+
+        reloaded = MemoryLog(tmp_path)
+        tail = await reloaded.tail(KEY, 10)
+        assert [record["id"] for record in tail] == ["m0", "m2", "m3", "m1"]
+        assert tail[-1]["content"] == "updated"
+
+    @pytest.mark.asyncio
+    async def test_compaction_reclaims_garbage(self, tmp_path):
+        """Test compaction keeps live records and shrinks the log"""
+        log = MemoryLog(tmp_path, compaction_min_bytes=10**9)
+        await log.append(KEY, _records(0, 50))
+        for i in range(40):
+            await log.delete(KEY, f"m{i}")
+
+        stats = await log.compact_all()
+        assert stats["streams"] == 1
+        assert stats["reclaimed_bytes"] > 0
+
+        reloaded = MemoryLog(tmp_path)
+        assert await reloaded.count(KEY) == 10
+        assert (await reloaded.tail(KEY, 1))[0]["id"] == "m49"
+
+    @pytest.mark.asyncio
+    async def test_torn_write_is_discarded(self, tmp_path):
+        """Test a partial final line from a crash does not corrupt appends"""
+        log = MemoryLog(tmp_path)
+        await log.append(KEY, _records(0, 2))
+        segment = next((tmp_path / "default" / "agent_1").iterdir())
+        with open(segment, "ab") as f:
+            f.write(b'{"op": "put", "id": "m2", "cont')
+
+        reloaded = MemoryLog(tmp_path)
+        await reloaded.append(KEY, _records(3, 4))
+        tail = await MemoryLog(tmp_path).tail(KEY, 10)
+        assert [record["id"] for record in tail] == ["m0", "m1", "m3"]
@@ -0,0 +1,98 @@
+"""Unit Tests for compiled query classification"""
+
+import random
+import re
+
+from backend.core.query_classification import (
+    CompiledRuleSet,
+    DecisionCache,
+    normalize_query,
+)
+
+RULES = {
+    "search": [
+        (("find", "search", "look for"), ("document", "file")),
+        (("what", "how"), ("about", "regarding")),
+        (("meaning", "definition"),),
+    ],
+    "workflow": [
+        (("analyze", "process"), ("report", "summary")),
+        (("workflow", "process", "pipeline"),),
+        (("business intelligence", "bi", "analytics"),),
+        (("look",), ("for",), ("file",)),
+    ],
+}
+
+VOCABULARY = [
+    "find",
+    "search",
+    "look",
+    "for",
+    "document",
+    "file",
+    "what",
+    "how",
+    "about",
+    "meaning",
+    "analyze",
+    "process",
+    "processing",
+    "report",
+    "workflow",
+    "business",
+    "intelligence",
+    "bi",
+    "bill",
+    "analytics",
+    "the",
+    "sales",
+]
+
+
+def _regex_scores(rule_set, text):
+    return {
+        label: sum(1 for pattern in patterns if re.search(pattern, text))
+        for label, patterns in rule_set.as_regexes().items()
+    }
+
+
+class TestCompiledRuleSet:
+    """Test single-pass scoring"""
+
+    def test_matches_per_rule_regexes(self):
+        """Test scores equal the old one-regex-per-rule loop"""
+        rng = random.Random(7)
+        rule_set = CompiledRuleSet(RULES)
+        for _ in range(500):
+            text = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(0, 8)))
+            assert rule_set.score(text) == _regex_scores(rule_set, text), text
+
+    def test_substring_mode_reports_overlapping_terms(self):
+        """Test prefixes and overlapping keywords all count as substrings"""
+        rule_set = CompiledRuleSet(
+            {"k": [[("ai",)], [("maintain",)], [("main",)], [("tai",)]]},
+            whole_words=False,
+        )
+        assert rule_set.score("maintain") == {"k": 4}
+        assert rule_set.score("main tai") == {"k": 3}
+
+    def test_normalize_query(self):
+        """Test case and whitespace are normalized"""
+        assert normalize_query("  Find\tTHE\n file ") == "find the file"
+
+
+class TestDecisionCache:
+    """Test the bounded LRU"""
+
+    def test_evicts_least_recently_used(self):
+        """Test recently read entries survive eviction"""
+        cache = DecisionCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get_stats()["hits"] == 2
+        assert cache.get_stats()["size"] == 2
@@ -0,0 +1,95 @@
+"""Unit Tests for the semantic answer cache"""
+
+import time
+
+import pytest
+
+from backend.core.cache_invalidation import LocalInvalidationBus
+from backend.core.semantic_cache import SemanticAnswerCache, anchor_terms
+
+PIPELINE = [1.0, 0.0, 0.0]
+NEAR_PIPELINE = [0.98, 0.05, 0.0]
+CHURN = [0.0, 1.0, 0.0]
+
+
+class TestAnchorTerms:
+    """Test entity and period extraction"""
+
+    def test_word_order_does_not_matter(self):
+        """Test reordered questions about the same account agree"""
+        assert anchor_terms("Q3 pipeline for Acme") == anchor_terms(
+            "What's the Acme Q3 pipeline?"
+        )
+        assert anchor_terms("Q3 pipeline for Acme") == {"q3", "acme"}
+
+    def test_different_entities_disagree(self):
+        """Test another account or period changes the anchors"""
+        assert anchor_terms("Q3 pipeline for Acme") != anchor_terms(
+            "Q3 pipeline for Globex"
+        )
+        assert anchor_terms("Q3 pipeline for Acme") != anchor_terms(
+            "Q4 pipeline for Acme"
+        )
+
+
+class TestSemanticAnswerCache:
+    """Test lookup, expiry and invalidation"""
+
+    def test_similar_question_hits_with_provenance(self):
+        """Test a near-identical question returns the stored answer"""
+        cache = SemanticAnswerCache(similarity_threshold=0.9)
+        cache.store("Q3 pipeline for Acme", PIPELINE, {"data": 1}, ["gong"], now=100)
+
+        entry, similarity = cache.lookup("Acme Q3 pipeline", NEAR_PIPELINE, now=160)
+        assert entry.answer == {"data": 1}
+        assert similarity > 0.9
+        provenance = entry.provenance(similarity, now=160)
+        assert provenance["age_seconds"] == 60
+        assert provenance["sources"] == ["gong"]
+
+        assert cache.lookup("Churn risk for Acme", CHURN, now=160) is None
+        assert cache.lookup("Q3 pipeline for Globex", PIPELINE, now=160) is None
+        assert cache.lookup("Acme Q3 pipeline", PIPELINE, scope="other") is None
+
+    def test_expires_on_shortest_source_ttl(self):
+        """Test an answer lives only as long as its most volatile source"""
+        cache = SemanticAnswerCache(source_ttls={"gong": 3600, "hubspot": 900})
+        entry = cache.store(
+            "Acme deal status", PIPELINE, {}, ["gong", "hubspot"], now=0
+        )
+
+        assert entry.expires_at == 900
+        assert cache.lookup("Acme deal status", PIPELINE, now=899) is not None
+        assert cache.lookup("Acme deal status", PIPELINE, now=901) is None
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_source_invalidation_reaches_other_workers(self):
+        """Test a source change on one worker drops answers on another"""
+        bus = LocalInvalidationBus()
+        serving = SemanticAnswerCache(invalidation_bus=bus)
+        ingesting = SemanticAnswerCache(invalidation_bus=bus)
+        await serving.start()
+        await ingesting.start()
+
+        serving.store("Acme calls", PIPELINE, {}, ["gong", "knowledge"])
+        serving.store("Open Linear bugs", CHURN, {}, ["linear"])
+
+        await ingesting.invalidate_source("gong")
+
+        assert serving.lookup("Acme calls", PIPELINE) is None
+        assert serving.lookup("Open Linear bugs", CHURN) is not None
+        assert serving.get_stats()["entries_by_source"] == {"linear": 1}
+
+    @pytest.mark.asyncio
+    async def test_answer_started_before_invalidation_is_not_stored(self):
+        """Test an answer computed across a source change never gets cached"""
+        cache = SemanticAnswerCache()
+        started = time.time_ns()
+        await cache.invalidate_source("hubspot")
+
+        stale = cache.store("Acme deals", PIPELINE, {}, ["hubspot"], version=started)
+        assert stale is None
+        assert cache.store("Acme calls", CHURN, {}, ["gong"], version=started)
+        assert cache.store("Acme deals", PIPELINE, {}, ["hubspot"]) is not None
+        assert cache.get_stats()["stale_stores"] == 1
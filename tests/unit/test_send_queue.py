@@ -0,0 +1,54 @@
+"""Unit Tests for bounded per-client send queues"""
+
+import pytest
+
+from backend.core.send_queue import ClientSendQueue, OverflowPolicy
+
+
+async def _drain(queue):
+    payloads = []
+    while len(queue):
+        message = await queue.get()
+        queue.mark_sent(message)
+        payloads.append(message.payload)
+    return payloads
+
+
+class TestClientSendQueue:
+    """Test overflow policies and lag accounting"""
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_newest_messages(self):
+        """Test a full queue discards from the front"""
+        queue = ClientSendQueue(max_size=3, policy=OverflowPolicy.DROP_OLDEST)
+        for i in range(5):
+            assert queue.put(f"m{i}", key="widget")
+
+        assert await _drain(queue) == ["m2", "m3", "m4"]
+        stats = queue.get_stats()
+        assert stats["dropped"] == 2
+        assert stats["sent"] == 3
+
+    @pytest.mark.asyncio
+    async def test_coalesce_replaces_pending_message_in_place(self):
+        """Test newer widget state supersedes queued state without reordering"""
+        queue = ClientSendQueue(max_size=10, policy=OverflowPolicy.COALESCE)
+        queue.put("a1", key="a")
+        queue.put("alert")
+        queue.put("b1", key="b")
+        queue.put("a2", key="a")
+
+        assert await _drain(queue) == ["a2", "alert", "b1"]
+        assert queue.coalesced == 1
+
+    @pytest.mark.asyncio
+    async def test_disconnect_policy_rejects_overflow(self):
+        """Test a full queue asks for the client to be dropped"""
+        queue = ClientSendQueue(max_size=2, policy=OverflowPolicy.DISCONNECT)
+        assert queue.put("m0") and queue.put("m1")
+        assert not queue.put("m2")
+        assert queue.overflowed
+
+        queue.close()
+        assert await queue.get() is None
+        assert not queue.put("m3")
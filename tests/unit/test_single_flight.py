@@ -0,0 +1,75 @@
+"""Unit Tests for cache fetch coalescing and early refresh"""
+
+import asyncio
+
+import pytest
+
+from backend.core.single_flight import SingleFlight, should_refresh_early
+
+
+class TestSingleFlight:
+    """Test concurrent fetches for one key share a single task"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_starts_coalesce(self):
+        """Test callers arriving mid-fetch await the same fetch"""
+        flights = SingleFlight()
+        calls = []
+        release = asyncio.Event()
+
+        async def fetch():
+            calls.append(1)
+            await release.wait()
+            return "value"
+
+        tasks = [flights.start("k", fetch) for _ in range(5)]
+        assert len({id(task) for task in tasks}) == 1
+        assert "k" in flights and len(flights) == 1
+
+        release.set()
+        assert await asyncio.gather(*tasks) == ["value"] * 5
+        assert calls == [1]
+        assert "k" not in flights
+
+    @pytest.mark.asyncio
+    async def test_failure_clears_slot_and_reports(self):
+        """Test a failed fetch is reported once and the next call refetches"""
+        errors = []
+        flights = SingleFlight(on_error=lambda key, exc: errors.append((key, exc)))
+
+        async def failing():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await flights.start("k", failing)
+        await asyncio.sleep(0)
+        assert [key for key, _ in errors] == ["k"]
+        assert "k" not in flights
+
+        async def fetch():
+            return "fresh"
+
+        assert await flights.start("k", fetch) == "fresh"
+        assert len(errors) == 1
+
+
+class TestShouldRefreshEarly:
+    """Test the XFetch early-refresh decision with a fixed clock and draw"""
+
+    def test_never_without_compute_time_or_beta(self):
+        """Test values without a delta or with beta disabled never refresh"""
+        assert not should_refresh_early(100.0, 0.0, 99.9, rand=lambda: 0.99)
+        assert not should_refresh_early(100.0, 5.0, 99.9, beta=0, rand=lambda: 0.99)
+
+    def test_refresh_probability_grows_towards_expiry(self):
+        """Test the same draw refreshes near expiry but not far from it"""
+        # U = 0.5 gives a gap of delta * ln(2), about 0.69s for delta = 1
+        draw = lambda: 0.5  # noqa: E731
+        assert should_refresh_early(100.0, 1.0, 99.5, rand=draw)
+        assert not should_refresh_early(100.0, 1.0, 99.0, rand=draw)
+
+    def test_slow_values_refresh_earlier(self):
+        """Test a longer compute time widens the refresh window"""
+        draw = lambda: 0.5  # noqa: E731
+        assert not should_refresh_early(100.0, 1.0, 90.0, rand=draw)
+        assert should_refresh_early(100.0, 20.0, 90.0, rand=draw)
@@ -0,0 +1,148 @@
+"""Unit Tests for the Snowflake stage-and-merge bulk loader"""
+
+import pytest
+
+pytest.importorskip("snowflake.connector.pandas_tools")
+
+from backend.pipelines import snowflake_bulk_loader  # noqa: E402
+from backend.pipelines.snowflake_bulk_loader import (  # noqa: E402
+    MergeSpec,
+    SnowflakeBulkLoader,
+)
+
+SPECS = {
+    "CALLS": MergeSpec(
+        table="CALLS",
+        key_columns=["CALL_ID"],
+        columns=["CALL_ID", "TITLE"],
+        update={"TITLE": "s.TITLE"},
+    ),
+    "PARTICIPANTS": MergeSpec(
+        table="PARTICIPANTS",
+        key_columns=["CALL_ID", "EMAIL"],
+        columns=["CALL_ID", "EMAIL"],
+    ),
+}
+
+
+class FakeCursor:
+    def __init__(self, fail_on=None):
+        self.executed = []
+        self.fail_on = fail_on
+        self.description = None
+        self.closed = False
+
+    def execute(self, sql):
+        self.executed.append(sql)
+        if self.fail_on and sql.startswith(self.fail_on):
+            raise RuntimeError("merge failed")
+        self.description = (
+            [("number of rows inserted",), ("number of rows updated",)]
+            if sql.startswith("MERGE")
+            else None
+        )
+
+    def fetchone(self):
+        return (2, 1) if self.description else None
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+@pytest.fixture
+def staged_frames(monkeypatch):
+    frames = {}
+
+    def fake_write_pandas(connection, frame, table, quote_identifiers=True):
+        frames[table] = frame
+        return True, 1, len(frame), None
+
+    monkeypatch.setattr(snowflake_bulk_loader, "write_pandas", fake_write_pandas)
+    return frames
+
+
+def _batches():
+    return {
+        "CALLS": [
+            {"CALL_ID": "1", "TITLE": "old"},
+            {"CALL_ID": "1", "TITLE": "new"},
+            {"CALL_ID": "2", "TITLE": "other"},
+        ],
+        "PARTICIPANTS": [{"CALL_ID": "1", "EMAIL": "a@x.com"}],
+    }
+
+
+class TestMergeSpec:
+    """Test MERGE statement generation"""
+
+    def test_upsert_and_insert_only(self):
+        """Test update clauses are only emitted when configured"""
+        upsert = SPECS["CALLS"].merge_sql("S")
+        assert "ON t.CALL_ID = s.CALL_ID" in upsert
+        assert "WHEN MATCHED THEN UPDATE SET t.TITLE = s.TITLE" in upsert
+
+        insert_only = SPECS["PARTICIPANTS"].merge_sql("S")
+        assert "t.CALL_ID = s.CALL_ID AND t.EMAIL = s.EMAIL" in insert_only
+        assert "WHEN MATCHED" not in insert_only
+
+
+class TestSnowflakeBulkLoader:
+    """Test staging, the merge transaction and cleanup"""
+
+    def test_stages_then_merges_in_one_transaction(self, staged_frames):
+        """Test deduped batches are staged before a single committed merge"""
+        cursor = FakeCursor()
+        stats = SnowflakeBulkLoader(FakeConnection(cursor)).load(_batches(), SPECS)
+
+        calls_stage = next(t for t in staged_frames if t.startswith("CALLS_STAGE_"))
+        assert staged_frames[calls_stage].to_dict("records") == [
+            {"CALL_ID": "1", "TITLE": "new"},
+            {"CALL_ID": "2", "TITLE": "other"},
+        ]
+
+        statements = [sql.split()[0] for sql in cursor.executed]
+        begin = statements.index("BEGIN")
+        assert statements[:begin] == ["CREATE", "CREATE"]
+        assert statements[begin + 1 : begin + 4] == ["MERGE", "MERGE", "COMMIT"]
+        assert statements[begin + 4 :] == ["DROP", "DROP"]
+        assert stats["CALLS"]["staged_rows"] == 2
+        assert stats["CALLS"]["inserted"] == 2 and stats["CALLS"]["updated"] == 1
+        assert cursor.closed
+
+    def test_merge_failure_rolls_back(self, staged_frames):
+        """Test a failing merge rolls back every table and drops the stages"""
+        cursor = FakeCursor(fail_on="MERGE INTO PARTICIPANTS")
+        with pytest.raises(RuntimeError):
+            SnowflakeBulkLoader(FakeConnection(cursor)).load(_batches(), SPECS)
+
+        statements = [sql.split()[0] for sql in cursor.executed]
+        assert "COMMIT" not in statements
+        assert statements[statements.index("BEGIN") :] == [
+            "BEGIN",
+            "MERGE",
+            "MERGE",
+            "ROLLBACK",
+            "DROP",
+            "DROP",
+        ]
+
+    def test_staging_failure_never_starts_transaction(self, monkeypatch):
+        """Test a failed stage aborts before any merge runs"""
+        monkeypatch.setattr(
+            snowflake_bulk_loader,
+            "write_pandas",
+            lambda *args, **kwargs: (False, 0, 0, None),
+        )
+        cursor = FakeCursor()
+        with pytest.raises(RuntimeError):
+            SnowflakeBulkLoader(FakeConnection(cursor)).load(_batches(), SPECS)
+        assert not any(sql.startswith(("BEGIN", "MERGE")) for sql in cursor.executed)
+        assert cursor.executed[-1].startswith("DROP TABLE IF EXISTS CALLS_STAGE_")
@@ -0,0 +1,224 @@
+"""Unit Tests for the durable agent task queue"""
+
+import asyncio
+import itertools
+from collections import defaultdict
+
+import pytest
+
+from backend.core.task_queue import InMemoryTaskQueue, RedisStreamTaskQueue
+
+
+class TestInMemoryTaskQueue:
+    """Test priority lanes, acknowledgements and reclaiming"""
+
+    @pytest.mark.asyncio
+    async def test_claims_highest_priority_first(self):
+        """Test higher priority lanes drain before lower ones"""
+        queue = InMemoryTaskQueue()
+        for task_id, priority in [("low", 1), ("high", 5), ("mid", 3), ("urgent", 9)]:
+            await queue.enqueue("call_analysis", {"task_id": task_id}, priority)
+        await queue.enqueue("other", {"task_id": "unrelated"}, 5)
+
+        tasks = await queue.claim(["call_analysis"], "agent_1", count=3)
+        # Out-of-range priorities share the top lane, in arrival order
+        assert [task.task_id for task in tasks] == ["high", "urgent", "mid"]
+        assert tasks[0].priority == 5
+        assert await queue.depth("call_analysis") == {1: 1}
+
+    @pytest.mark.asyncio
+    async def test_blocking_claim_wakes_on_enqueue(self):
+        """Test an idle consumer receives work as soon as it is queued"""
+        queue = InMemoryTaskQueue()
+        waiter = asyncio.create_task(
+            queue.claim(["crm_sync"], "agent_1", block_seconds=5)
+        )
+        await asyncio.sleep(0)
+        await queue.enqueue("crm_sync", {"task_id": "t1"})
+
+        tasks = await asyncio.wait_for(waiter, 1)
+        assert [task.task_id for task in tasks] == ["t1"]
+        assert await queue.claim(["crm_sync"], "agent_2", block_seconds=0.01) == []
+
+    @pytest.mark.asyncio
+    async def test_unacked_tasks_are_reclaimed_then_dead_lettered(self):
+        """Test a crashed consumer's task moves on and cannot loop forever"""
+        queue = InMemoryTaskQueue(visibility_timeout_seconds=0, max_deliveries=2)
+        await queue.enqueue("crm_sync", {"task_id": "t1"})
+        (first,) = await queue.claim(["crm_sync"], "agent_1")
+
+        (second,) = await queue.reclaim(["crm_sync"], "agent_2")
+        assert second.task_id == "t1"
+        assert (second.consumer, second.deliveries) == ("agent_2", 2)
+
+        assert await queue.reclaim(["crm_sync"], "agent_3") == []
+        assert [task.task_id for task in queue.dead_letters] == ["t1"]
+
+    @pytest.mark.asyncio
+    async def test_released_task_is_delivered_again(self):
+        """Test a task handed back is not lost and acked tasks are gone"""
+        queue = InMemoryTaskQueue(visibility_timeout_seconds=0)
+        await queue.enqueue("crm_sync", {"task_id": "t1"})
+        await queue.enqueue("crm_sync", {"task_id": "t2"})
+        first, second = await queue.claim(["crm_sync"], "agent_1", count=2)
+
+        await queue.release(first)
+        await queue.ack(second)
+        (again,) = await queue.claim(["crm_sync"], "agent_2", count=2)
+        assert again.task_id == "t1"
+        assert again.deliveries == 2
+
+        await queue.ack(again)
+        assert await queue.reclaim(["crm_sync"], "agent_3") == []
+        stats = queue.get_stats()
+        assert (stats["queued"], stats["pending"], stats["acked"]) == (0, 0, 2)
+
+
+class FakeStreamRedis:
+    """The Redis Streams commands RedisStreamTaskQueue uses, for one group
+
+    ``on_block`` runs when a blocking read starts, to add tasks that arrive
+    while a consumer waits.
+    """
+
+    def __init__(self):
+        self.streams = {}
+        self.pending = {}
+        self.delivered = defaultdict(set)
+        self.groups = set()
+        self.on_block = None
+        self.claims = []
+        self._ids = itertools.count(1)
+
+    async def xgroup_create(self, stream, group, id="0", mkstream=False):
+        if stream in self.groups:
+            raise Exception("BUSYGROUP Consumer Group name already exists")
+        self.groups.add(stream)
+        self.streams.setdefault(stream, {})
+        self.pending.setdefault(stream, {})
+
+    def add(self, stream, fields):
+        entry_id = f"{next(self._ids)}-0"
+        self.streams.setdefault(stream, {})[entry_id] = {
+            key: str(value) for key, value in fields.items()
+        }
+        return entry_id
+
+    async def xadd(self, stream, fields):
+        return self.add(stream, fields)
+
+    async def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        if block is not None and self.on_block is not None:
+            self.on_block()
+        response = []
+        for stream in streams:
+            new = [
+                (entry_id, fields)
+                for entry_id, fields in self.streams[stream].items()
+                if entry_id not in self.delivered[stream]
+            ][:count]
+            for entry_id, _ in new:
+                self.delivered[stream].add(entry_id)
+                self.pending[stream][entry_id] = {
+                    "consumer": consumer,
+                    "times_delivered": 1,
+                }
+            if new:
+                response.append([stream, new])
+        return response
+
+    async def xautoclaim(
+        self, stream, group, consumer, min_idle_ms, start_id="0-0", count=100
+    ):
+        entries = []
+        for entry_id, info in list(self.pending[stream].items())[:count]:
+            info["consumer"] = consumer
+            info["times_delivered"] += 1
+            entries.append((entry_id, self.streams[stream].get(entry_id)))
+        return "0-0", entries, []
+
+    async def xpending_range(self, stream, group, min, max, count):
+        info = self.pending.get(stream, {}).get(min)
+        if info is None:
+            return []
+        return [{"message_id": min, **info}]
+
+    async def xack(self, stream, group, entry_id):
+        return int(self.pending[stream].pop(entry_id, None) is not None)
+
+    async def xdel(self, stream, entry_id):
+        self.streams[stream].pop(entry_id, None)
+
+    async def xclaim(self, stream, group, consumer, min_idle, ids, justid=False):
+        self.claims.append((consumer, list(ids)))
+        for entry_id in ids:
+            self.pending[stream][entry_id]["consumer"] = consumer
+        return ids
+
+
+def _redis_queue(**kwargs):
+    queue = RedisStreamTaskQueue("redis://fake", **kwargs)
+    queue._redis = FakeStreamRedis()
+    return queue
+
+
+class TestRedisStreamTaskQueue:
+    """Test the stream backend's requeue, dead-letter and ownership paths"""
+
+    @pytest.mark.asyncio
+    async def test_blocking_claim_requeues_tasks_beyond_count(self):
+        """Test tasks read from several lanes at once keep only the best"""
+        queue = _redis_queue()
+        redis = queue._redis
+
+        low_lane = queue._lane("crm_sync", 1)
+        arrived = []
+
+        def arrive():
+            redis.on_block = None
+            arrived.append(redis.add(low_lane, queue._fields({"task_id": "low"})))
+            redis.add(queue._lane("crm_sync", 5), queue._fields({"task_id": "high"}))
+
+        redis.on_block = arrive
+        (task,) = await queue.claim(["crm_sync"], "agent_1", block_seconds=1)
+        assert task.task_id == "high"
+
+        # The extra task is back in its lane, not pending for agent_1
+        assert arrived[0] not in redis.streams[low_lane]
+        assert not redis.pending[low_lane]
+        (again,) = await queue.claim(["crm_sync"], "agent_2")
+        assert again.task_id == "low" and again.deliveries == 1
+
+    @pytest.mark.asyncio
+    async def test_reclaim_dead_letters_after_max_deliveries(self):
+        """Test XAUTOCLAIM delivery counts move a looping task aside"""
+        queue = _redis_queue(visibility_timeout_seconds=0, max_deliveries=2)
+        redis = queue._redis
+        await queue.enqueue("crm_sync", {"task_id": "t1"})
+        await queue.claim(["crm_sync"], "agent_1")
+
+        (second,) = await queue.reclaim(["crm_sync"], "agent_2")
+        assert (second.consumer, second.deliveries) == ("agent_2", 2)
+
+        assert await queue.reclaim(["crm_sync"], "agent_3") == []
+        (dead,) = redis.streams[f"{queue.prefix}:dead"].values()
+        assert dead["deliveries"] == "3"
+        assert not redis.streams[queue._lane("crm_sync", 1)]
+        assert queue.get_stats()["dead_lettered"] == 1
+
+    @pytest.mark.asyncio
+    async def test_extend_only_for_the_current_owner(self):
+        """Test a stale handle cannot claim a task back from its new owner"""
+        queue = _redis_queue(visibility_timeout_seconds=0)
+        redis = queue._redis
+        await queue.enqueue("crm_sync", {"task_id": "t1"})
+        (first,) = await queue.claim(["crm_sync"], "agent_1")
+        (second,) = await queue.reclaim(["crm_sync"], "agent_2")
+
+        await queue.extend([first])
+        assert redis.claims == []
+
+        await queue.extend([second])
+        assert redis.claims == [("agent_2", [second.delivery_id])]
+        pending = redis.pending[queue._lane("crm_sync", 1)]
+        assert pending[second.delivery_id]["consumer"] == "agent_2"
@@ -0,0 +1,65 @@
+"""Unit Tests for persisting the local IVF vector database"""
+
+import asyncio
+
+import pytest
+
+from backend.vector.vector_integration import IVFVectorDB, VectorConfig, VectorDBType
+
+
+def _config(path):
+    return VectorConfig(
+        db_type=VectorDBType.IVF,
+        index_name="test",
+        dimension=2,
+        nlist=4,
+        index_path=str(path),
+    )
+
+
+class TestIVFVectorDBPersistence:
+    """Test writes below the persist threshold are not lost"""
+
+    @pytest.mark.asyncio
+    async def test_close_persists_pending_writes(self, tmp_path):
+        """Test a reopened database has every write made before close"""
+        db = IVFVectorDB(_config(tmp_path))
+        await db.initialize()
+        await db.index_batch(
+            [("a", [1.0, 0.0], {"text": "a"}), ("b", [0.0, 1.0], {"text": "b"})]
+        )
+        await db.delete_content("b")
+        await db.close()
+
+        reopened = IVFVectorDB(_config(tmp_path))
+        await reopened.initialize()
+        results = await reopened.search([1.0, 0.0], top_k=5)
+        assert [(r.id, r.text) for r in results] == [("a", "a")]
+        await reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_pending_writes_persist_on_a_timer(self, tmp_path, monkeypatch):
+        """Test writes are flushed after persist_interval without close"""
+        monkeypatch.setattr(IVFVectorDB, "persist_interval", 0.01)
+        db = IVFVectorDB(_config(tmp_path))
+        await db.initialize()
+        await db.index_content("a", [1.0, 0.0], {"text": "a"})
+        await asyncio.sleep(0.1)
+
+        assert db._pending_writes == 0
+        assert (tmp_path / "manifest.json").exists()
+        await db.close()
+
+
+@pytest.mark.asyncio
+async def test_index_trains_in_the_background(tmp_path):
+    """Test reaching train_size schedules k-means instead of running it inline"""
+    db = IVFVectorDB(_config(tmp_path))
+    await db.initialize()
+    items = [(f"v{i}", [1.0, i / 200], {}) for i in range(4 * 39)]
+    await db.index_batch(items)
+
+    index = db.indexes["default"]
+    assert not index.is_trained and "default" in db._training
+    await db.close()
+    assert index.is_trained and len(index) == len(items)
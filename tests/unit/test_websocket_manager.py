@@ -0,0 +1,47 @@
+"""Unit Tests for WebSocket send-queue overflow handling"""
+
+import asyncio
+
+import pytest
+from fastapi import WebSocket
+
+pytest.importorskip("aioredis")
+
+from backend.app.websocket_manager import WebSocketManager  # noqa: E402
+from backend.core.send_queue import OverflowPolicy  # noqa: E402
+
+
+class StalledWebSocket(WebSocket):
+    """Socket whose sends never complete, like a client that stopped reading"""
+
+    def __init__(self):
+        self.close_codes = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, payload):
+        await asyncio.Event().wait()
+
+    async def close(self, code=1000):
+        self.close_codes.append(code)
+
+
+@pytest.mark.asyncio
+async def test_overflow_disconnect_closes_the_socket():
+    """Test a client that falls behind is deregistered and its socket closed"""
+    manager = WebSocketManager(
+        send_queue_size=2, overflow_policy=OverflowPolicy.DISCONNECT
+    )
+    manager._initialized = True
+    websocket = StalledWebSocket()
+    client_id = await manager.connect(websocket)
+    await asyncio.sleep(0)
+
+    for i in range(3):
+        await manager._send_to_client(client_id, {"type": "data", "i": i})
+    await asyncio.sleep(0)
+
+    assert client_id not in manager.active_connections
+    assert manager.broadcast_stats["overflow_disconnects"] == 1
+    assert websocket.close_codes == [1013]